@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 import sys
 import time
 import asyncio
@@ -30,6 +30,7 @@ JOB_MANAGER = None
 RUN_BACKGROUND_JOBS = True
 BACKGROUND_JOBS_RUNNING = False
 BACKGROUND_JOB_TASK = None
+WHISPER_MODEL_HOST = None
 
 
 # TODO make this a setting
@@ -58,6 +59,16 @@ for path in py_vcon_server.settings.PLUGIN_PATHS:
 import py_vcon_server.vcon_api
 import py_vcon_server.admin_api
 
+# Warm up the filter plugins in parallel before the VconProcessor bindings,
+# which use some of them, are loaded
+PLUGIN_WARMUP_SECONDS = 0.0
+if(len(py_vcon_server.settings.PLUGIN_WARMUP) > 0):
+  logger.info("warming up filter plugins: {}".format(py_vcon_server.settings.PLUGIN_WARMUP))
+  warmup_start = time.perf_counter()
+  vcon.filter_plugins.FilterPluginRegistry.load_plugins(py_vcon_server.settings.PLUGIN_WARMUP)
+  PLUGIN_WARMUP_SECONDS = time.perf_counter() - warmup_start
+  logger.info("filter plugin warm up took: {:.3f} seconds".format(PLUGIN_WARMUP_SECONDS))
+
 # Load the VconProcessor bindings
 logger.debug("loading VconProcessors from: {} with prefix: {}".format(
     py_vcon_server.processor.__path__,
@@ -107,6 +118,23 @@ async def startup():
     py_vcon_server.settings.LAUNCH_VCON_API,
     py_vcon_server.settings.NUM_WORKERS)
 
+  # Start the shared Whisper model host before connecting to Redis as it forks.
+  # start blocks until the model is loaded and warmed up so that the first
+  # transcription job does not pay the model load time.
+  global WHISPER_MODEL_HOST
+  if(py_vcon_server.settings.WHISPER_MODEL_HOST != ""):
+    import vcon.filter_plugins.impl.whisper
+    logger.info("starting Whisper model host: {} model size: {}".format(
+        py_vcon_server.settings.WHISPER_MODEL_HOST,
+        py_vcon_server.settings.WHISPER_MODEL_SIZE
+      ))
+    WHISPER_MODEL_HOST = vcon.filter_plugins.impl.whisper.WhisperModelHost(
+        py_vcon_server.settings.WHISPER_MODEL_HOST,
+        py_vcon_server.settings.WHISPER_MODEL_SIZE,
+        py_vcon_server.settings.WHISPER_MODEL_HOST_WORKERS
+      )
+    WHISPER_MODEL_HOST.start()
+
   # Need to fork job worker processes before we connect or send commands to Redis due to
   # async Redis multiprocessing issue which causes hangs.
   # Start the job scheduler and worker pool
@@ -147,6 +175,15 @@ async def startup():
 
   await py_vcon_server.states.SERVER_STATE.starting()
 
+  # Load the preload filter plugins in background threads.  This is done after
+  # the Whisper model host is forked, so that no import is in progress in the fork.
+  if(len(py_vcon_server.settings.PLUGIN_PRELOAD) > 0):
+    logger.info("preloading filter plugins: {}".format(py_vcon_server.settings.PLUGIN_PRELOAD))
+    vcon.filter_plugins.FilterPluginRegistry.load_plugins(
+      py_vcon_server.settings.PLUGIN_PRELOAD,
+      False # do not wait
+      )
+
   py_vcon_server.db.VCON_STORAGE = py_vcon_server.db.VconStorage.instantiate(py_vcon_server.settings.VCON_STORAGE_URL)
 
   py_vcon_server.queue.JOB_QUEUE = py_vcon_server.queue.JobQueue(py_vcon_server.settings.QUEUE_DB_URL)
@@ -196,6 +233,11 @@ async def shutdown():
   # Shutdown the filter_plugins as some create stateful connections
   vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
 
+  global WHISPER_MODEL_HOST
+  if(WHISPER_MODEL_HOST):
+    WHISPER_MODEL_HOST.stop()
+    WHISPER_MODEL_HOST = None
+
   logger.info("event shutdown completed")
 
 # Enable Admin entry points
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 import typing
 import time
 import os
@@ -7,7 +7,9 @@ import pydantic
 import py_vcon_server
 import py_vcon_server.logging_utils
 import py_vcon_server.settings
+import py_vcon_server.db
 import py_vcon_server.pipeline
+import py_vcon_server.processor
 import py_vcon_server.restful_api
 from . import __version__
 import vcon
@@ -123,6 +125,165 @@ class InProgressJob(pydantic.BaseModel):
       )
 
 
+class FilterPluginLoadTimes(pydantic.BaseModel):
+    module: str = pydantic.Field(
+      title = "implementation module",
+      description = "name of the module implementing the filter plugin"
+      )
+    state: str = pydantic.Field(
+      title = "load state",
+      examples = ["not_loaded", "loaded", "module_not_found", "class_not_found", "failed"]
+      )
+    import_seconds: typing.Union[float, None] = pydantic.Field(
+      title = "module import time",
+      description = "seconds taken to import the filter plugin's implementation module, null if not imported",
+      default = None
+      )
+    init_seconds: typing.Union[float, None] = pydantic.Field(
+      title = "plugin initialization time",
+      description = "seconds taken to instantiate the filter plugin, null if not instantiated",
+      default = None
+      )
+
+
+class ProcessorLoadTimes(pydantic.BaseModel):
+    module: str = pydantic.Field(
+      title = "implementation module",
+      description = "name of the module implementing the VconProcessor"
+      )
+    loaded: bool = pydantic.Field(
+      title = "processor loaded",
+      description = "true if the VconProcessor was instantiated"
+      )
+    import_seconds: typing.Union[float, None] = pydantic.Field(
+      title = "module import time",
+      description = "seconds taken to import the VconProcessor's implementation module, null if not imported",
+      default = None
+      )
+    init_seconds: typing.Union[float, None] = pydantic.Field(
+      title = "processor initialization time",
+      description = "seconds taken to instantiate the VconProcessor, null if not instantiated",
+      default = None
+      )
+
+
+class PluginLoadTimes(pydantic.BaseModel):
+    warmup_seconds: float = pydantic.Field(
+      title = "filter plugin warm up time",
+      description = "seconds taken to load the filter plugins configured in PLUGIN_WARMUP"
+      )
+    bindings: typing.Dict[str, typing.Dict[str, float]] = pydantic.Field(
+      title = "binding module load times",
+      description = "seconds taken to load each of the DB, site and VconProcessor binding modules, keyed by label and module name"
+      )
+    filter_plugins: typing.Dict[str, FilterPluginLoadTimes] = pydantic.Field(
+      title = "filter plugin load times",
+      description = "load state and times for each of the registered filter plugins, keyed by plugin name"
+      )
+    processors: typing.Dict[str, ProcessorLoadTimes] = pydantic.Field(
+      title = "VconProcessor load times",
+      description = "load times for each of the registered VconProcessors, keyed by processor name"
+      )
+
+
+class HistogramStats(pydantic.BaseModel):
+    count: int = pydantic.Field(
+      title = "number of values",
+      description = "number of values observed in the histogram"
+      )
+    sum: float = pydantic.Field(
+      title = "sum of values"
+      )
+    min: typing.Union[float, None] = pydantic.Field(
+      title = "minimum value",
+      default = None
+      )
+    max: typing.Union[float, None] = pydantic.Field(
+      title = "maximum value",
+      default = None
+      )
+    mean: typing.Union[float, None] = pydantic.Field(
+      title = "mean value",
+      default = None
+      )
+    p50: typing.Union[float, None] = pydantic.Field(
+      title = "50th percentile",
+      description = "upper bound of the histogram bucket containing the median",
+      default = None
+      )
+    p90: typing.Union[float, None] = pydantic.Field(
+      title = "90th percentile",
+      description = "upper bound of the histogram bucket containing the 90th percentile",
+      default = None
+      )
+    p99: typing.Union[float, None] = pydantic.Field(
+      title = "99th percentile",
+      description = "upper bound of the histogram bucket containing the 99th percentile",
+      default = None
+      )
+    buckets: typing.Dict[str, int] = pydantic.Field(
+      title = "histogram buckets",
+      description = "number of values in each non-empty bucket, keyed by the bucket's upper bound (\"inf\" for the overflow bucket)"
+      )
+
+
+class CallStats(pydantic.BaseModel):
+    calls: int = pydantic.Field(
+      title = "number of calls"
+      )
+    errors: int = pydantic.Field(
+      title = "number of calls which raised an exception"
+      )
+    wall_seconds: HistogramStats = pydantic.Field(
+      title = "elapsed time of the calls in seconds"
+      )
+    cpu_seconds: HistogramStats = pydantic.Field(
+      title = "CPU time of the calls in seconds"
+      )
+    peak_memory_bytes: HistogramStats = pydantic.Field(
+      title = "peak memory allocated by the calls in bytes",
+      description = "only measured for the sampled calls run in the filter plugin executor thread or process"
+      )
+    bytes_in: HistogramStats = pydantic.Field(
+      title = "size of the input vCon(s) in bytes",
+      description = "only measured for the sampled calls"
+      )
+    bytes_out: HistogramStats = pydantic.Field(
+      title = "size of the output vCon(s) in bytes",
+      description = "only measured for the sampled calls"
+      )
+
+
+class CacheStats(pydantic.BaseModel):
+    hits: int = pydantic.Field(
+      title = "number of lookups which found a cached result"
+      )
+    misses: int = pydantic.Field(
+      title = "number of lookups which did not find a cached result"
+      )
+    hit_ratio: float = pydantic.Field(
+      title = "hits / (hits + misses)",
+      description = "0.0 if there have been no lookups"
+      )
+
+
+class ServerCallStats(pydantic.BaseModel):
+    filter_plugins: typing.Dict[str, CallStats] = pydantic.Field(
+      title = "filter plugin call stats",
+      description = "stats for the filter plugin filter calls, keyed by plugin name"
+        + " (with \".filter_batch\" appended for filter_batch calls)"
+      )
+    processors: typing.Dict[str, CallStats] = pydantic.Field(
+      title = "VconProcessor call stats",
+      description = "stats for the VconProcessor process calls, keyed by processor name"
+      )
+    filter_plugin_caches: typing.Dict[str, typing.Dict[str, CacheStats]] = pydantic.Field(
+      title = "filter plugin result cache stats",
+      description = "hit and miss counts of the result caches (e.g. transcription_cache or response_cache)"
+        + " of the loaded filter plugins, keyed by plugin name and then cache name"
+      )
+
+
 def init(restapi):
 
   @restapi.get("/server/info",
@@ -154,6 +315,70 @@ def init(restapi):
     return(fastapi.responses.JSONResponse(content=info))
 
 
+  @restapi.get("/server/plugins",
+    response_model = PluginLoadTimes,
+    tags = [ py_vcon_server.restful_api.SERVER_TAG ])
+  async def get_server_plugin_load_times():
+    """
+    Get the load state and the import and initialization times of the filter
+    plugins and VconProcessors on this server.
+
+    Filter plugins configured in PLUGIN_WARMUP are loaded before the server is
+    running, those in PLUGIN_PRELOAD are loaded in the background at startup and
+    the rest are loaded upon first use.
+
+    Returns: PluginLoadTimes - load times for this server
+    """
+
+    try:
+      logger.debug("getting plugin load times")
+      load_times = {
+        "warmup_seconds": py_vcon_server.PLUGIN_WARMUP_SECONDS,
+        "bindings": py_vcon_server.db.BINDING_LOAD_SECONDS,
+        "filter_plugins": vcon.filter_plugins.FilterPluginRegistry.get_load_timings(),
+        "processors": py_vcon_server.processor.VconProcessorRegistry.get_load_timings()
+        }
+
+    except Exception as e:
+      py_vcon_server.restful_api.log_exception(e)
+      return(py_vcon_server.restful_api.InternalErrorResponse(e))
+
+    return(fastapi.responses.JSONResponse(content = load_times))
+
+
+  @restapi.get("/server/stats",
+    response_model = ServerCallStats,
+    tags = [ py_vcon_server.restful_api.SERVER_TAG ])
+  async def get_server_call_stats():
+    """
+    Get the histograms of the wall time, CPU time, peak memory and bytes in and
+    out of the filter plugin and VconProcessor calls made on this server since
+    it started.
+
+    Wall and CPU time are measured for all calls.  Peak memory and bytes in
+    and out are measured for the fraction of calls set in
+    VCON_INSTRUMENTATION_SAMPLE_RATE.
+
+    Also provides the hit and miss counts of the filter plugin result caches.
+
+    Returns: ServerCallStats - call stats for this server
+    """
+
+    try:
+      logger.debug("getting call stats")
+      call_stats = {
+        "filter_plugins": vcon.filter_plugins.stats(),
+        "processors": py_vcon_server.processor.PROCESSOR_STATS.stats(),
+        "filter_plugin_caches": vcon.filter_plugins.cache_stats()
+        }
+
+    except Exception as e:
+      py_vcon_server.restful_api.log_exception(e)
+      return(py_vcon_server.restful_api.InternalErrorResponse(e))
+
+    return(fastapi.responses.JSONResponse(content = call_stats))
+
+
   @restapi.get("/server/queues",
     response_model = typing.Dict[str, QueueProperties],
     tags = [ py_vcon_server.restful_api.SERVER_TAG ])
@@ -1,4 +1,5 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+import time
 import typing
 import urllib
 import asyncio
@@ -6,6 +7,7 @@ import pkgutil
 import importlib
 import vcon
 import py_vcon_server.logging_utils
+import py_vcon_server.db.codec
 #from py_vcon_server.processor import ProcessorIO
 
 logger = py_vcon_server.logging_utils.init_logger(__name__)
@@ -14,8 +16,12 @@ class VconNotFound(Exception):
   """ Rasied when the vCon for the given UUID does not exist """
 
 
+# seconds to load each binding module, by label (e.g. "DB", "VconProcessor") and module name
+BINDING_LOAD_SECONDS: typing.Dict[str, typing.Dict[str, float]] = {}
+
+
 def import_bindings(path: typing.List[str], module_prefix: str, label: str):
-  """ Import the modules and interface registrations """
+  """ Import the modules and interface registrations, recording the load time of each in BINDING_LOAD_SECONDS """
   for finder, module_name, is_package in pkgutil.iter_modules(
     path,
     module_prefix
@@ -25,18 +31,26 @@ def import_bindings(path: typing.List[str], module_prefix: str, label: str):
     #logger.debug("mod_found type: {} dir: {}".format(type(mod_found), dir(mod_found)))
     logger.info("{} module load: {} is_package: {}".format(label, module_name, is_package))
     # Use finder to load the module as import_module will fail if path is not in PYTHONPATH
+    start = time.perf_counter()
     mod_found.load_module(module_name)
+    BINDING_LOAD_SECONDS.setdefault(label, {})[module_name] = time.perf_counter() - start
     #importlib.import_module(module_name)
 
 
 # Should this be a class or global methods??
 class VconStorage():
   _vcon_storage_implementations = {}
+  # Optional compression of vCons at rest (see py_vcon_server.db.codec.VconCodec)
+  codec: typing.Union['py_vcon_server.db.codec.VconCodec', None] = None
 
 
   @staticmethod
   def instantiate(db_url : str = "redis://localhost") -> 'VconStorage':
-    """ Setup Vcon storage DB type, factory and connection URL """
+    """
+    Setup Vcon storage DB type, factory and connection URL.
+    Compression is configured by query parameters on the URL
+    (see py_vcon_server.db.codec.VconCodec).
+    """
     #  Need to setup Vcon storage type and URL
     url_object = urllib.parse.urlparse(db_url)
     db_type = url_object.scheme
@@ -44,7 +58,8 @@ class VconStorage():
     impl_class = VconStorage._vcon_storage_implementations[db_type]
     instance = impl_class()
 
-    instance.setup(db_url)
+    storage_url, instance.codec = py_vcon_server.db.codec.VconCodec.from_url(db_url)
+    instance.setup(storage_url)
 
     return(instance)
 
@@ -79,21 +94,35 @@ class VconStorage():
     output of a **VconProcessor** or **Pipeline**.
 
     Saves **Vcon**s which have been marked as modified
-    or new in the given **VconProcessorIO**
+    or new in the given **VconProcessorIO**.  The **Vcon** object
+    form is passed to **set** so that storage bindings which support
+    it may write only the changes (see **Vcon.get_changes**).
     """
     num_vcons = processor_output.num_vcons()
     for index in range(0, num_vcons):
       if(processor_output.is_vcon_modified(index)):
-        vcon_dict = await processor_output.get_vcon(
+        vcon_object = await processor_output.get_vcon(
           index,
-          py_vcon_server.processor.VconTypes.DICT
+          py_vcon_server.processor.VconTypes.OBJECT
           )
 
-        await self.set(vcon_dict)
+        await self.set(vcon_object)
 
 
-  async def get(self, vcon_uuid : str) -> typing.Union[None, vcon.Vcon]:
-    """ Get a Vcon from storage using its UUID as the key """
+  async def get(
+      self,
+      vcon_uuid : str,
+      track_changes: bool = False
+    ) -> typing.Union[None, vcon.Vcon]:
+    """
+    Get a Vcon from storage using its UUID as the key
+
+    Parameters:
+      **vcon_uuid** (str) - UUID of the vCon to get
+      **track_changes** (bool) - track changes to the vCon (see **Vcon.track_changes**)
+        so that a subsequent **set** may write only the changes.  Only set when the
+        vCon is to be modified and saved, as it adds to the cost of the get.
+    """
     raise Exception("get not implemented")
 
 
@@ -0,0 +1,180 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Optional compression codec for vCons and vCon bodies at rest in **VconStorage** """
+
+import typing
+import json
+import urllib.parse
+import py_vcon_server.logging_utils
+
+logger = py_vcon_server.logging_utils.init_logger(__name__)
+
+# All zstd frames start with this magic number.  As it is not valid UTF-8,
+# compressed values can be distinguished from uncompressed text.
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# VconStorage URL query parameters used to configure the codec
+CODEC_URL_PARAMETERS = [
+  "compression",
+  "compression_level",
+  "compression_dictionary",
+  "compress_body_min_size",
+  "compress_document_min_size"
+  ]
+
+class CodecNotSupported(Exception):
+  """ Raised when the requested compression is not supported or its package is not installed """
+
+
+class VconCodec():
+  """
+  zstd compression of vCon documents and large bodies for **VconStorage** bindings.
+
+  Configured per **VconStorage** using query parameters on the storage URL, e.g.:
+
+    redis://localhost?compression=zstd&compress_body_min_size=1024&compress_document_min_size=4096
+
+  **compression** - "zstd" to enable compression
+  **compression_level** - zstd compression level (default: 3)
+  **compression_dictionary** - path to a dictionary trained using **VconCodec.train_dictionary**
+      on samples of stored vCon documents.  The dictionary captures the JSON skeleton common
+      to vCons, which significantly improves the compression of small documents.
+      The same dictionary must be used to read what was written with it.
+  **compress_body_min_size** - minimum length of body strings to compress (0 disables)
+  **compress_document_min_size** - minimum length of the vCon JSON to compress (0 disables)
+  """
+  def __init__(
+      self,
+      compression_level: int = 3,
+      compression_dictionary: typing.Union[str, None] = None,
+      compress_body_min_size: int = 1024,
+      compress_document_min_size: int = 0
+    ):
+    try:
+      import zstandard
+    except ModuleNotFoundError as mod_error:
+      raise CodecNotSupported("zstd compression requires the zstandard package") from mod_error
+
+    self.compression_level = compression_level
+    self.compress_body_min_size = compress_body_min_size
+    self.compress_document_min_size = compress_document_min_size
+
+    dictionary = None
+    if(compression_dictionary):
+      with open(compression_dictionary, "rb") as dictionary_file:
+        dictionary = zstandard.ZstdCompressionDict(dictionary_file.read())
+      logger.info("loaded zstd dictionary: {} id: {}".format(
+        compression_dictionary,
+        dictionary.dict_id()
+        ))
+
+    # Compressor/decompressor objects are reused as the dictionary digest is expensive
+    self._compressor = zstandard.ZstdCompressor(level = compression_level, dict_data = dictionary)
+    self._decompressor = zstandard.ZstdDecompressor(dict_data = dictionary)
+
+
+  @staticmethod
+  def from_url(db_url: str) -> typing.Tuple[str, typing.Union['VconCodec', None]]:
+    """
+    Create the codec configured by the query parameters of the given storage URL.
+
+    Returns:
+      tuple of the URL with the codec parameters removed and the **VconCodec**
+      or None if compression is not configured.
+    """
+    url_object = urllib.parse.urlparse(db_url)
+    query = urllib.parse.parse_qsl(url_object.query, keep_blank_values = True)
+    codec_parameters = {name: value for name, value in query if name in CODEC_URL_PARAMETERS}
+    if(len(codec_parameters) == 0):
+      return(db_url, None)
+
+    other_parameters = [(name, value) for name, value in query if name not in CODEC_URL_PARAMETERS]
+    storage_url = urllib.parse.urlunparse(url_object._replace(query = urllib.parse.urlencode(other_parameters)))
+
+    compression = codec_parameters.pop("compression", "none")
+    if(compression in ("", "none")):
+      return(storage_url, None)
+
+    if(compression != "zstd"):
+      raise CodecNotSupported("compression: {} not supported".format(compression))
+
+    kwargs = {}
+    for name, value in codec_parameters.items():
+      kwargs[name] = value if name == "compression_dictionary" else int(value)
+
+    return(storage_url, VconCodec(**kwargs))
+
+
+  def compress(self, data: bytes) -> bytes:
+    """ zstd compress the given bytes """
+    return(self._compressor.compress(data))
+
+
+  def decompress(self, data: bytes) -> bytes:
+    """ Decompress the given bytes if zstd compressed, otherwise return them unchanged """
+    if(data[0:4] != ZSTD_MAGIC):
+      return(data)
+
+    return(self._decompressor.decompress(data))
+
+
+  def encode_body(self, body: str) -> typing.Union[str, bytes]:
+    """ Get the compressed body if it meets the body size threshold, otherwise the body unchanged """
+    if(0 < self.compress_body_min_size <= len(body)):
+      return(self.compress(body.encode("utf-8")))
+
+    return(body)
+
+
+  def decode_body(self, body: bytes) -> str:
+    """ Get the body string from the stored, possibly compressed, bytes """
+    return(self.decompress(body).decode("utf-8"))
+
+
+  def encode_document(self, vcon_dict: dict) -> typing.Union[bytes, None]:
+    """
+    Get the compressed JSON for the vCon dict if it meets the document size threshold.
+
+    Returns: compressed bytes or None if the document is not to be compressed
+    """
+    if(self.compress_document_min_size <= 0):
+      return(None)
+
+    vcon_json = json.dumps(vcon_dict).encode("utf-8")
+    if(len(vcon_json) < self.compress_document_min_size):
+      return(None)
+
+    return(self.compress(vcon_json))
+
+
+  def decode_document(self, data: bytes) -> dict:
+    """ Get the vCon dict from the compressed JSON """
+    return(json.loads(self.decompress(data)))
+
+
+  @staticmethod
+  def train_dictionary(
+      samples: typing.List[typing.Union[dict, str, bytes]],
+      dictionary_size: int = 16384
+    ) -> bytes:
+    """
+    Train a zstd dictionary from samples of stored vCon documents (dict or JSON).
+    Large bodies should be removed from the samples (e.g. using body deduplication)
+    so that the dictionary captures the JSON skeleton.
+
+    Returns: the dictionary bytes to be saved to the **compression_dictionary** file
+    """
+    try:
+      import zstandard
+    except ModuleNotFoundError as mod_error:
+      raise CodecNotSupported("zstd compression requires the zstandard package") from mod_error
+
+    sample_bytes = []
+    for sample in samples:
+      if(isinstance(sample, dict)):
+        sample = json.dumps(sample)
+      if(isinstance(sample, str)):
+        sample = sample.encode("utf-8")
+      sample_bytes.append(sample)
+
+    return(zstandard.train_dictionary(dictionary_size, sample_bytes).as_bytes())
+
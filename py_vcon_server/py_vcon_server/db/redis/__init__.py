@@ -1,19 +1,66 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Redis implementation of the Vcon storage DB interface """
 
 import typing
 import json
+import hashlib
+import redis.exceptions
 import vcon
+import vcon.security
 import py_vcon_server.db
+import py_vcon_server.db.codec
 import py_vcon_server.db.redis.redis_mgr
 import py_vcon_server.logging_utils
+import py_vcon_server.settings
 
 logger = py_vcon_server.logging_utils.init_logger(__name__)
 
+VCON_KEY_PREFIX = "vcon:"
+# vCon documents stored zstd compressed (see py_vcon_server.db.codec.VconCodec)
+COMPRESSED_VCON_KEY_PREFIX = "vcon_zstd:"
+# Deduplicated body content keyed by SHA-512 hex digest
+BODY_KEY_PREFIX = "vcon_body:"
+# Set of UUIDs of the vCons referencing a deduplicated body (i.e. reference count)
+BODY_REFS_KEY_PREFIX = "vcon_body_refs:"
+# Set of digests of the deduplicated bodies referenced by a vCon
+VCON_BODIES_KEY_PREFIX = "vcon_bodies:"
+# Signatures (JWS without the payload) of vCons stored with a detached payload
+DETACHED_JWS_KEY_PREFIX = "vcon_jws:"
+# Object parameter replacing body in the stored vCon when deduplicated
+BODY_REFERENCE = "body_sha512"
+DEDUP_OBJECT_ARRAYS = ["group", "dialog", "analysis", "attachments"]
+
 class RedisVconStorage(py_vcon_server.db.VconStorage):
-  """ Redis binding of VconStorage """
+  """
+  Redis binding of VconStorage
+
+  When **body_dedup_min_size** is greater than zero, string **body** values of
+  that size or larger in unsigned vCon group, dialog, analysis and attachment
+  objects are moved to a content addressed store keyed by their SHA-512 digest,
+  so that the same recording or attachment in several vCons (e.g. redacted and
+  unredacted forms) is stored once.  The stored vCon references the body by
+  digest and the body is re-inlined on **get**.  Bodies are garbage collected
+  when the last vCon referencing them is deleted or rewritten without them.
+  Note: **json_path_query** operates on the stored form with the references.
+
+  When a **codec** is configured, bodies of at least **codec.compress_body_min_size**
+  are also moved to the content addressed store, where they are stored compressed.
+  vCon documents of at least **codec.compress_document_min_size** are stored
+  compressed as a string rather than a JSON document, in which case
+  **json_path_query** and path level writes are not supported for the vCon.
+
+  When **detach_signed_payload** is True, vCons signed with a canonical
+  payload (see **Vcon.sign**) are stored as the unsigned vCon, in which
+  bodies may be deduplicated and compressed, and the signatures (JWS without
+  the payload) are stored separately.  The payload is the canonical JSON of
+  the unsigned vCon, so it is rebuilt from the stored vCon on **get**.
+  """
   def __init__(self):
     self._redis_mgr = None
+    # Needed to read compressed values as binary
+    self._binary_redis_mgr = None
+    self.body_dedup_min_size = py_vcon_server.settings.VCON_STORAGE_BODY_DEDUP_MIN_SIZE
+    self.detach_signed_payload = py_vcon_server.settings.VCON_STORAGE_DETACH_SIGNED_PAYLOAD
 
   def setup(self, redis_uri : str) -> None:
     """ Initialize redis connect """
@@ -26,6 +73,60 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
     # Setup connection pool
     self._redis_mgr.create_pool()
 
+    self._binary_redis_mgr = py_vcon_server.db.redis.redis_mgr.RedisMgr(
+      redis_uri,
+      "VconStorageBinary",
+      decode_responses = False
+      )
+    self._binary_redis_mgr.create_pool()
+
+    redis_con = self._redis_mgr.get_client()
+
+    # KEYS = [ BODY_REFS_KEY_PREFIX + digest, BODY_KEY_PREFIX + digest ]
+    # ARGV = [ vcon_uuid ]
+    lua_script_release_body = """
+    redis.call("SREM", KEYS[1], ARGV[1])
+    -- delete the body when it is no longer referenced
+    if redis.call("SCARD", KEYS[1]) == 0 then
+      redis.call("DEL", KEYS[2])
+      return 1
+    end
+    return 0
+    """
+    self._do_lua_release_body = redis_con.register_script(lua_script_release_body)
+
+    # Release the bodies no longer referenced by the stored (uncompressed) vCon,
+    # run in the same transaction as incremental writes.
+    # KEYS = [ VCON_KEY_PREFIX + vcon_uuid, VCON_BODIES_KEY_PREFIX + vcon_uuid ]
+    # ARGV = [ vcon_uuid, BODY_REFS_KEY_PREFIX, BODY_KEY_PREFIX, JSON paths of body references ... ]
+    lua_script_release_unreferenced_bodies = """
+    local referenced = {}
+    for path_index = 4, #ARGV do
+      local digests = redis.call("JSON.GET", KEYS[1], ARGV[path_index])
+      if digests then
+        for _, digest in ipairs(cjson.decode(digests)) do
+          referenced[digest] = true
+        end
+      end
+    end
+    local released = 0
+    for _, digest in ipairs(redis.call("SMEMBERS", KEYS[2])) do
+      if not referenced[digest] then
+        redis.call("SREM", KEYS[2], digest)
+        redis.call("SREM", ARGV[2] .. digest, ARGV[1])
+        -- delete the body when it is no longer referenced
+        if redis.call("SCARD", ARGV[2] .. digest) == 0 then
+          redis.call("DEL", ARGV[3] .. digest)
+        end
+        released = released + 1
+      end
+    end
+    return released
+    """
+    self._do_lua_release_unreferenced_bodies = redis_con.register_script(
+      lua_script_release_unreferenced_bodies
+      )
+
   async def shutdown(self) -> None:
     """ shutdown and wait for redis connections to close """
     if(self._redis_mgr is None):
@@ -36,6 +137,10 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
       self._redis_mgr = None
       await rm.shutdown_pool()
 
+      brm = self._binary_redis_mgr
+      self._binary_redis_mgr = None
+      await brm.shutdown_pool()
+
 
   def __del__(self):
     if(self._redis_mgr is not None):
@@ -43,10 +148,35 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
 
 
   async def set(self, save_vcon : typing.Union[vcon.Vcon, dict, str]) -> None:
-    """ save **Vcon** to redis storage """
+    """
+    save **Vcon** to redis storage
+
+    If a **Vcon** object with tracked changes (see **Vcon.get_changes**) is given,
+    only the changed paths are written in a single transaction pipeline.  Otherwise
+    the whole vCon is written.
+
+    Bodies are deduplicated as described in **RedisVconStorage**.
+    """
     redis_con = self._redis_mgr.get_client()
 
     if(isinstance(save_vcon, vcon.Vcon)):
+      changes = save_vcon.get_changes()
+      # Path level writes cannot be done if the vCon may be stored compressed
+      if(changes is not None and
+        (self.codec is None or self.codec.compress_document_min_size <= 0)
+        ):
+        try:
+          await self._set_changes(redis_con, save_vcon, changes)
+          save_vcon.track_changes()
+          return
+
+        except redis.exceptions.ResponseError as path_error:
+          # e.g. vCon was deleted from storage since it was read
+          logger.warning("incremental write of vCon: {} failed ({}), writing whole vCon".format(
+            save_vcon.uuid,
+            path_error
+            ))
+
       # Don't deepcopy as we don't modify the dict
       # TODO: handle signed and encrypted where UUID is not a top level member
       vcon_dict = save_vcon.dumpd(True, False)
@@ -63,19 +193,306 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
     else:
       raise Exception("Invalid type: {} for Vcon to be saved to redis".format(type(save_vcon)))
 
-    await redis_con.json().set("vcon:{}".format(uuid), "$", vcon_dict)
+    detached_jws = None
+    if(self.detach_signed_payload):
+      vcon_dict, detached_jws = self._detach_payload(vcon_dict)
+
+    bodies = {}
+    # Signed and encrypted forms cannot be deduplicated
+    if(self._body_min_size() > 0 and vcon.Vcon.VCON_VERSION in vcon_dict):
+      vcon_dict = self._externalize_bodies(vcon_dict, bodies)
+
+    compressed_vcon = None
+    if(self.codec is not None):
+      compressed_vcon = self.codec.encode_document(vcon_dict)
+
+    key = VCON_KEY_PREFIX + uuid
+    compressed_key = COMPRESSED_VCON_KEY_PREFIX + uuid
+    bodies_key = VCON_BODIES_KEY_PREFIX + uuid
+    async with redis_con.pipeline(transaction = True) as pipe:
+      pipe.smembers(bodies_key)
+      self._add_body_references(pipe, uuid, bodies)
+      if(detached_jws is None):
+        pipe.delete(DETACHED_JWS_KEY_PREFIX + uuid)
+      else:
+        pipe.json().set(DETACHED_JWS_KEY_PREFIX + uuid, "$", detached_jws)
+      # Remove the prior form if stored compressed or vise versa
+      if(compressed_vcon is None):
+        pipe.delete(compressed_key)
+        pipe.json().set(key, "$", vcon_dict)
+      else:
+        pipe.delete(key)
+        pipe.set(compressed_key, compressed_vcon)
+      results = await pipe.execute()
+
+    # Release the bodies no longer referenced by the rewritten vCon
+    await self._release_bodies(redis_con, uuid, results[0] - bodies.keys(), True)
+
+    if(isinstance(save_vcon, vcon.Vcon)):
+      save_vcon.track_changes()
+
+
+  @staticmethod
+  def _detach_payload(vcon_dict: dict) -> typing.Tuple[dict, typing.Union[dict, None]]:
+    """
+    Split a vCon signed with a canonical (unencoded) payload in to the unsigned
+    vCon dict and the JWS without the payload.
+
+    Returns: tuple of the vCon dict to store and the JWS dict to store
+      separately, or the given vCon dict and None if it is not signed with a
+      canonical payload
+    """
+    if(not isinstance(vcon_dict.get("payload", None), str) or
+      len(vcon_dict.get("signatures", [])) == 0 or
+      not all(vcon.security.is_jws_unencoded(signature["protected"]) for signature in vcon_dict["signatures"])
+      ):
+      return(vcon_dict, None)
+
+    detached_jws = {name: value for name, value in vcon_dict.items() if name != "payload"}
+    return(json.loads(vcon_dict["payload"]), detached_jws)
+
+
+  def _body_min_size(self) -> int:
+    """ Get the minimum size of bodies moved to the content addressed store (0 = none) """
+    sizes = [self.body_dedup_min_size]
+    if(self.codec is not None):
+      sizes.append(self.codec.compress_body_min_size)
+
+    sizes = [size for size in sizes if size > 0]
+    if(len(sizes) == 0):
+      return(0)
+
+    return(min(sizes))
+
 
-  async def get(self, vcon_uuid : str) -> typing.Union[None, vcon.Vcon]:
-    """ Get Vcon from redis storage """
+  def _externalize_objects(self, object_list: list, bodies: dict) -> list:
+    """
+    Get a copy of the list of group, dialog, analysis or attachment objects with
+    the large string bodies replaced with a SHA-512 digest reference.  The
+    replaced bodies are added to the bodies dict keyed by their digest.
+    """
+    min_size = self._body_min_size()
+    new_list = []
+    for an_object in object_list:
+      body = an_object.get("body", None) if isinstance(an_object, dict) else None
+      if(isinstance(body, str) and len(body) >= min_size):
+        digest = hashlib.sha512(body.encode("utf-8")).hexdigest()
+        bodies[digest] = body
+        # Shallow copy so that the Vcon is not modified
+        an_object = an_object.copy()
+        del an_object["body"]
+        an_object[BODY_REFERENCE] = digest
+
+      new_list.append(an_object)
+
+    return(new_list)
+
+
+  def _externalize_value(self, name: str, value: typing.Any, bodies: dict) -> typing.Any:
+    """ Get the top level vCon parameter value with large bodies replaced with a reference """
+    if(self._body_min_size() > 0 and name in DEDUP_OBJECT_ARRAYS and isinstance(value, list)):
+      return(self._externalize_objects(value, bodies))
+
+    return(value)
+
+
+  def _externalize_bodies(self, vcon_dict: dict, bodies: dict) -> dict:
+    """ Get a shallow copy of the unsigned vCon dict with large bodies replaced with a reference """
+    stored_dict = vcon_dict.copy()
+    for array_name in DEDUP_OBJECT_ARRAYS:
+      if(array_name in stored_dict):
+        stored_dict[array_name] = self._externalize_value(array_name, stored_dict[array_name], bodies)
+
+    return(stored_dict)
+
+
+  def _add_body_references(self, pipe, vcon_uuid: str, bodies: dict) -> None:
+    """ Queue commands to store the bodies and add references to them from the vCon """
+    for digest, body in bodies.items():
+      if(self.codec is not None):
+        body = self.codec.encode_body(body)
+      # reference is added in the same transaction so that it cannot be garbage collected
+      pipe.sadd(BODY_REFS_KEY_PREFIX + digest, vcon_uuid)
+      pipe.set(BODY_KEY_PREFIX + digest, body, nx = True)
+
+    if(len(bodies) > 0):
+      pipe.sadd(VCON_BODIES_KEY_PREFIX + vcon_uuid, *bodies.keys())
+
+
+  async def _release_bodies(
+      self,
+      redis_con,
+      vcon_uuid: str,
+      digests: typing.Set[str],
+      remove_from_vcon: bool
+    ) -> None:
+    """ Remove the vCon references to the given bodies, deleting bodies no longer referenced """
+    if(len(digests) == 0):
+      return
+
+    async with redis_con.pipeline(transaction = False) as pipe:
+      for digest in digests:
+        await self._do_lua_release_body(
+          keys = [BODY_REFS_KEY_PREFIX + digest, BODY_KEY_PREFIX + digest],
+          args = [vcon_uuid],
+          client = pipe
+          )
+
+      if(remove_from_vcon):
+        pipe.srem(VCON_BODIES_KEY_PREFIX + vcon_uuid, *digests)
+
+      deleted = await pipe.execute()
+
+    logger.debug("released {} bodies ({} deleted) for vCon: {}".format(
+      len(digests),
+      sum(deleted[0:len(digests)]),
+      vcon_uuid
+      ))
+
+
+  def _get_codec(self) -> py_vcon_server.db.codec.VconCodec:
+    """ Get the codec to read compressed values from storage """
+    if(self.codec is None):
+      raise py_vcon_server.db.codec.CodecNotSupported(
+        "compression not configured for Vcon storage, cannot read compressed vCon or body")
+
+    return(self.codec)
+
+
+  def _decode_body(self, body: bytes) -> str:
+    """ Get the body string from the value read from storage, decompressing it if compressed """
+    if(body[0:4] != py_vcon_server.db.codec.ZSTD_MAGIC):
+      return(body.decode("utf-8"))
+
+    return(self._get_codec().decode_body(body))
+
+
+  async def _inline_bodies(self, vcon_dict: dict) -> None:
+    """ Replace the body references in the stored vCon dict with the deduplicated bodies """
+    referencing_objects = []
+    for array_name in DEDUP_OBJECT_ARRAYS:
+      for an_object in vcon_dict.get(array_name, None) or []:
+        if(isinstance(an_object, dict) and BODY_REFERENCE in an_object):
+          referencing_objects.append(an_object)
+
+    if(len(referencing_objects) == 0):
+      return
+
+    # Bodies may be compressed, so must be read as binary
+    binary_redis_con = self._binary_redis_mgr.get_client()
+    bodies = await binary_redis_con.mget(
+      [BODY_KEY_PREFIX + an_object[BODY_REFERENCE] for an_object in referencing_objects]
+      )
+    for an_object, body in zip(referencing_objects, bodies):
+      if(body is None):
+        raise Exception("body for digest: {} referenced in vCon: {} not found".format(
+          an_object[BODY_REFERENCE],
+          vcon_dict.get(vcon.Vcon.UUID, None)
+          ))
+
+      del an_object[BODY_REFERENCE]
+      an_object["body"] = self._decode_body(body)
+
+
+  async def _set_changes(
+      self,
+      redis_con,
+      save_vcon: vcon.Vcon,
+      changes: dict
+    ) -> None:
+    """
+    Write the given changes for the **Vcon** using path level JSON.SET
+    and JSON.ARRAPPEND commands in a single transaction.  References to
+    bodies dropped by the rewritten objects are released in the same
+    transaction.
+    """
+    # Don't deepcopy as we don't modify the dict
+    vcon_dict = save_vcon.dumpd(False, False)
+    uuid = save_vcon.uuid
+    key = VCON_KEY_PREFIX + uuid
+
+    bodies = {}
+    num_commands = 0
+    async with redis_con.pipeline(transaction = True) as pipe:
+      for parameter in changes["parameters"]:
+        value = self._externalize_value(parameter, vcon_dict[parameter], bodies)
+        pipe.json().set(key, "$['{}']".format(parameter), value)
+        num_commands += 1
+
+      for array_name, indices in changes["modified"].items():
+        for index in indices:
+          value = self._externalize_value(array_name, vcon_dict[array_name][index:index + 1], bodies)
+          pipe.json().set(key, "$.{}[{}]".format(array_name, index), value[0])
+          num_commands += 1
+
+      for array_name, start_index in changes["appended"].items():
+        values = self._externalize_value(array_name, vcon_dict[array_name][start_index:], bodies)
+        pipe.json().arrappend(key, "$.{}".format(array_name), *values)
+        num_commands += 1
+
+      self._add_body_references(pipe, uuid, bodies)
+
+      if(num_commands == 0):
+        logger.debug("no changes to write for vCon: {}".format(save_vcon.uuid))
+        return
+
+      # Objects or parameters which were replaced may have referenced bodies
+      release_bodies = len(changes["modified"]) > 0 or \
+        any(parameter in DEDUP_OBJECT_ARRAYS for parameter in changes["parameters"])
+      if(release_bodies):
+        await self._do_lua_release_unreferenced_bodies(
+          keys = [key, VCON_BODIES_KEY_PREFIX + uuid],
+          args = [uuid, BODY_REFS_KEY_PREFIX, BODY_KEY_PREFIX] +
+            ["$.{}[*].{}".format(array_name, BODY_REFERENCE) for array_name in DEDUP_OBJECT_ARRAYS],
+          client = pipe
+          )
+
+      # Raises ResponseError if the vCon no longer exists, in which case
+      # the path level commands fail and nothing is written.
+      results = await pipe.execute()
+
+    logger.debug("wrote {} changes for vCon: {}{}".format(
+      num_commands,
+      save_vcon.uuid,
+      ", released {} bodies".format(results[-1]) if release_bodies else ""
+      ))
+
+
+  async def get(
+      self,
+      vcon_uuid : str,
+      track_changes: bool = False
+    ) -> typing.Union[None, vcon.Vcon]:
+    """ Get Vcon from redis storage, see **VconStorage.get** """
     redis_con = self._redis_mgr.get_client()
 
-    vcon_dict = await redis_con.json().get("vcon:{}".format(vcon_uuid))
+    async with redis_con.pipeline(transaction = True) as pipe:
+      pipe.json().get(VCON_KEY_PREFIX + vcon_uuid)
+      pipe.json().get(DETACHED_JWS_KEY_PREFIX + vcon_uuid)
+      vcon_dict, detached_jws = await pipe.execute()
     # logger.debug("Got {} vcon: {}".format(vcon_uuid, vcon_dict))
+    compressed = False
     if(vcon_dict is None):
-      raise py_vcon_server.db.VconNotFound("vCon not found for UUID: {}".format(vcon_uuid))
+      binary_redis_con = self._binary_redis_mgr.get_client()
+      compressed_vcon = await binary_redis_con.get(COMPRESSED_VCON_KEY_PREFIX + vcon_uuid)
+      if(compressed_vcon is None):
+        raise py_vcon_server.db.VconNotFound("vCon not found for UUID: {}".format(vcon_uuid))
+
+      vcon_dict = self._get_codec().decode_document(compressed_vcon)
+      compressed = True
+
+    await self._inline_bodies(vcon_dict)
+
+    if(detached_jws is not None):
+      # The signed payload is the canonical form of the stored unsigned vCon
+      detached_jws["payload"] = vcon.security.jcs_dumps(vcon_dict)
+      vcon_dict = detached_jws
 
     a_vcon = vcon.Vcon()
     a_vcon.loadd(vcon_dict)
+    # Allow set to write only what has changed
+    if(track_changes and not compressed):
+      a_vcon.track_changes()
 
     return(a_vcon)
 
@@ -99,7 +516,12 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
     """ Get the JSON path query results for the given **Vcon** """
     redis_con = self._redis_mgr.get_client()
 
-    query_list = await redis_con.json().get("vcon:{}".format(vcon_uuid), json_path_query_string)
+    query_list = await redis_con.json().get(VCON_KEY_PREFIX + vcon_uuid, json_path_query_string)
+    if(query_list is None and
+      await redis_con.exists(COMPRESSED_VCON_KEY_PREFIX + vcon_uuid)
+      ):
+      raise py_vcon_server.db.codec.CodecNotSupported(
+        "JSON path query not supported on compressed vCon: {}".format(vcon_uuid))
 
     return(query_list)
 
@@ -108,5 +530,17 @@ class RedisVconStorage(py_vcon_server.db.VconStorage):
     """ Delete the Vcon with the given UUID """
 
     redis_con = self._redis_mgr.get_client()
-    await redis_con.delete(f"vcon:{str(vcon_uuid)}")
+    vcon_uuid = str(vcon_uuid)
+    bodies_key = VCON_BODIES_KEY_PREFIX + vcon_uuid
+    async with redis_con.pipeline(transaction = True) as pipe:
+      pipe.smembers(bodies_key)
+      pipe.delete(
+        VCON_KEY_PREFIX + vcon_uuid,
+        COMPRESSED_VCON_KEY_PREFIX + vcon_uuid,
+        DETACHED_JWS_KEY_PREFIX + vcon_uuid,
+        bodies_key
+        )
+      results = await pipe.execute()
+
+    await self._release_bodies(redis_con, vcon_uuid, results[0], False)
 
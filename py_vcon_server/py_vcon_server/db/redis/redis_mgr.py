@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ 
 Package to manage Redis connection pool and clients
 
@@ -29,8 +29,10 @@ class RedisMgr():
   def __init__(
       self,
       redis_url: str,
-      label: str = None):
+      label: str = None,
+      decode_responses: bool = True):
     self._redis_url = redis_url
+    self._decode_responses = decode_responses
     self._redis_pool = None
     self._redis_pool_initialization_count = 0
     self._label = label # for debug and logging
@@ -59,7 +61,7 @@ class RedisMgr():
           self._redis_url
         ))
       self._redis_pool_initialization_count += 1
-      options = {"decode_responses": True}
+      options = {"decode_responses": self._decode_responses}
       self._redis_pool = redis.asyncio.connection.ConnectionPool.from_url(self._redis_url,
         **options)
       logger.info(
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Vcon Pipeline processor objects and methods """
 import os
 import typing
@@ -384,7 +384,12 @@ class PipelineRunner():
             await next_proc_input.get_vcon(vcon_index, py_vcon_server.processor.VconTypes.UUID),
             vcon_index
           ))
-        next_proc_input = await processor.process(next_proc_input, processor_type_options)
+        next_proc_input = await py_vcon_server.processor.measure_process(
+          processor_name,
+          processor,
+          next_proc_input,
+          processor_type_options
+          )
 
       else:
         logger.debug("Skipping pipeline {} processor: {} on vCon: {} (index: {})".format(
@@ -1,9 +1,10 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Abstract VconProcessor and registry """
 
 import enum
 import typing
 import copy
+import json
 import time
 import datetime
 import asyncio
@@ -12,6 +13,7 @@ import pydantic
 #from py_vcon_server.db import VconStorage
 import py_vcon_server.logging_utils
 import vcon
+import vcon.instrumentation
 if typing.TYPE_CHECKING:
   import py_vcon_server.queue
 
@@ -114,6 +116,27 @@ class MultifariousVcon():
 
       # String JSON, don't parse to get UUID, wait until we need to
 
+
+  def cached_size(self) -> typing.Union[int, None]:
+    """
+    Get the size in bytes of the JSON serialized vCon from the cached forms,
+    without retrieving it from vCon Storage.
+
+    Returns: the size in bytes, None if only the UUID is cached
+    """
+    vcon_json = self._vcon_forms.get(VconTypes.JSON, None)
+    if(vcon_json is None):
+      if(self._vcon_forms.get(VconTypes.OBJECT, None) is not None):
+        vcon_json = self._vcon_forms[VconTypes.OBJECT].dumps()
+
+      elif(self._vcon_forms.get(VconTypes.DICT, None) is not None):
+        vcon_json = json.dumps(self._vcon_forms[VconTypes.DICT])
+
+      else:
+        return(None)
+
+    return(len(vcon_json.encode("utf-8")))
+
   async def get_vcon(self,
     vcon_type: VconTypes
     ) -> typing.Union[str, dict, vcon.Vcon, None]:
@@ -140,7 +163,8 @@ class MultifariousVcon():
     forms = list(self._vcon_forms.keys())
     if(len(forms) == 1 and forms[0] == VconTypes.UUID):
       # No choice have to hit the DB
-      vcon_object = await self._vcon_storage.get(self._vcon_forms[VconTypes.UUID])
+      # Track changes so that, if the vCon is modified and committed, only the changes are written
+      vcon_object = await self._vcon_storage.get(self._vcon_forms[VconTypes.UUID], True)
       if(vcon_object is None):
         logger.warning("Unable to get Vcon for UUID: {} from storage".format(self._vcon_forms[VconTypes.UUID]))
 
@@ -553,6 +577,20 @@ class VconProcessorIO():
     return(len(self._vcons))
 
 
+  def cached_size(self) -> typing.Union[int, None]:
+    """
+    Get the total size in bytes of the JSON serialized **Vcons** in this
+    **VconProcessorIO** object, without retrieving any from vCon Storage.
+
+    Returns: the size in bytes, None if any of the **Vcons** are only cached as a UUID
+    """
+    sizes = [multi_vcon.cached_size() for multi_vcon in self._vcons]
+    if(None in sizes):
+      return(None)
+
+    return(sum(sizes))
+
+
   async def get_vcon(self,
     index: int = 0,
     vcon_type: VconTypes = VconTypes.OBJECT
@@ -1000,6 +1038,34 @@ class VconProcessor():
     logger.debug("deleting {}".format(self.__class__.__name__))
 
 
+# Instrumentation of VconProcessor.process calls by processor name
+PROCESSOR_STATS = vcon.instrumentation.CallInstrumentation(
+  lambda processor_io: processor_io.cached_size()
+  )
+
+
+async def measure_process(
+    processor_name: str,
+    processor: VconProcessor,
+    processor_input: VconProcessorIO,
+    options: VconProcessorOptions
+  ) -> VconProcessorIO:
+  """
+  Run the processor's **process** method, recording its wall time, CPU time
+  and bytes in and out in **PROCESSOR_STATS** under the processor name.
+  Peak memory is not measured as **process** is awaited on the event loop
+  (see **vcon.instrumentation**).  The peak memory of the CPU bound filter
+  plugins it runs in an executor is in the filter plugin stats.
+
+  Returns: the processor output
+  """
+  with PROCESSOR_STATS.measure(processor_name, processor_input) as measurement:
+    processor_output = await processor.process(processor_input, options)
+    measurement.set_output(processor_output)
+
+  return(processor_output)
+
+
 # dict of names and VconProcessor registered
 VCON_PROCESSOR_REGISTRY = {}
 
@@ -1030,6 +1096,9 @@ class VconProcessorRegistry():
       self._module_load_attempted = False
       self._module_not_found = False
       self._processor_instance = None
+      # seconds to import the module and to instantiate the processor
+      self.import_seconds: typing.Union[float, None] = None
+      self.init_seconds: typing.Union[float, None] = None
 
       logger.debug("Loading module: {} for VconProcessor: {}".format(
         self._module_name,
@@ -1053,7 +1122,9 @@ class VconProcessorRegistry():
               ))
 
           try:
+            start = time.perf_counter()
             self._processor_instance = class_(init_options)
+            self.init_seconds = time.perf_counter() - start
 
             if(self._processor_instance.title() is None or
               self._processor_instance.title() == ""):
@@ -1090,7 +1161,9 @@ class VconProcessorRegistry():
           logger.info("importing: {} for registering VconProcessor: {}".format(
             self._module_name,
             self._name))
+          start = time.perf_counter()
           self._module = importlib.import_module(self._module_name)
+          self.import_seconds = time.perf_counter() - start
           self._module_load_attempted = True
           self._module_not_found = False
           loaded = True
@@ -1153,6 +1226,28 @@ class VconProcessorRegistry():
 
     return(names)
 
+  @staticmethod
+  def get_load_timings() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Get the module import and instantiation timings for all of the registered **VconProcessors**.
+
+    Returns: dict of processor name to dict with keys:
+      **module** (str) - the module name implementing the processor
+      **loaded** (bool) - True if the processor was instantiated
+      **import_seconds** (float) - seconds to import the module, None if not imported
+      **init_seconds** (float) - seconds to instantiate the processor, None if not instantiated
+    """
+    timings = {}
+    for name, registration in list(VCON_PROCESSOR_REGISTRY.items()):
+      timings[name] = {
+        "module": registration._module_name,
+        "loaded": registration._processor_instance is not None,
+        "import_seconds": registration.import_seconds,
+        "init_seconds": registration.init_seconds
+        }
+
+    return(timings)
+
   @staticmethod
   def get_processor_instance(name: str) -> VconProcessor:
     """
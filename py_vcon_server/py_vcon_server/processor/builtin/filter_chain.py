@@ -0,0 +1,31 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" VconProcessor binding for the Vcon filter_chain filter_plugin """
+
+import py_vcon_server.processor
+import vcon.filter_plugins
+
+
+PLUGIN_NAME = "filter_chain"
+CLASS_NAME = "FilterPluginChain"
+PLUGIN = vcon.filter_plugins.FilterPluginRegistry.get(PLUGIN_NAME)
+
+
+FilterPluginChainInitOptions = py_vcon_server.processor.FilterPluginProcessor.makeInitOptions(CLASS_NAME, PLUGIN)
+
+
+FilterPluginChainOptions = py_vcon_server.processor.FilterPluginProcessor.makeOptions(CLASS_NAME, PLUGIN)
+
+
+class FilterChain(py_vcon_server.processor.FilterPluginProcessor):
+  """ filter plugin chain binding for **VconProcessor** """
+  plugin_version = "0.0.1"
+  plugin_name = PLUGIN_NAME
+  options_class =  FilterPluginChainOptions
+  headline = "filter plugin chain **VconProcessor**"
+  plugin_description = """
+This **VconProcessor** will run the Vcon through the ordered list of **FilterPlugins** in the steps option.
+The Vcon is modified in place by each of the **FilterPlugins** and is only copied if a step takes the
+Vcon state from before an earlier step modified it, rather than being copied for each **FilterPlugin**
+as when each is run as a separate **VconProcessor** in a pipeline.
+"""
+
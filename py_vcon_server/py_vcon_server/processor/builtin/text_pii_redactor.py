@@ -1,10 +1,11 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 
 import typing
 import pydantic
 import pyjq
 import vcon.filter_plugins.impl.jq_redaction
 import vcon.filter_plugins.impl.redact_pii
+import vcon.filter_plugins.impl.redact_pii_rules
 import py_vcon_server.processor
 
 logger = py_vcon_server.logging_utils.init_logger(__name__)
@@ -18,9 +19,16 @@ class TextPiiRedactorInitOptions(py_vcon_server.processor.VconProcessorInitOptio
 
 class TextPiiRedactorOptions(py_vcon_server.processor.VconProcessorOptions,
       vcon.filter_plugins.impl.jq_redaction.JqRedactionOptions,
-      vcon.filter_plugins.impl.redact_pii.RedactPiiOptions
+      vcon.filter_plugins.impl.redact_pii_rules.RedactPiiRulesOptions
     ):
-  pass
+  pii_redaction_plugin: str = pydantic.Field(
+    title = "PII redaction **FilterPlugin**",
+    description = "name of the **FilterPlugin** used to add the redacted transcripts.  "
+      "**redact_pii** uses the dataprofiler ML model.  **redact_pii_rules** is much "
+      "faster, but only redacts structured PII (e.g. phone, card and account numbers).",
+    examples = ["redact_pii", "redact_pii_rules"],
+    default = "redact_pii"
+    )
   # TODO: set the default JQ query to redact audio, video and unredacted text
 
 
@@ -34,7 +42,7 @@ class TextPiiRedactor(py_vcon_server.processor.VconProcessor):
 
     super().__init__(
       "create a redacted vCon with the text PII redacted from the given input vCon",
-      "the PII in the input vCon is redacted using the **pii_redact** filter_plugin.  "
+      "the PII in the input vCon is redacted using the **redact_pii** (or **pii_redaction_plugin**) filter_plugin.  "
       "By default, the redacted transcript is not saved and the input vCon is unmodified.  "
       "A new redacted vCon is created, referencing the input, unredacted vCon.  "
       "By default the unredacted vCon is copied to the redacted vCon with the text, "
@@ -65,10 +73,12 @@ class TextPiiRedactor(py_vcon_server.processor.VconProcessor):
 
     # Add a redacted transcript to the temporary unredacted vCon
     # Note: the modified unredacted vCon is not marked for update unless processor_input.update_vcon is invoked
-    await unredacted.redact_pii(formatted_options)
+    await unredacted.filter(formatted_options.pii_redaction_plugin, formatted_options)
 
-    if(formatted_options.jq_redaction_query in (None, "")):
-      raise Exception("redaction query options.jq_redaction_query is not set")
+    if(formatted_options.jq_redaction_query in (None, "") and
+      len(formatted_options.redaction_paths) == 0
+      ):
+      raise Exception("redaction query options.jq_redaction_query or options.redaction_paths is not set")
     # Copy/delete content from the unredacted to the redacted per JQ query
     redacted = await unredacted.jq_redaction(formatted_options)
 
@@ -0,0 +1,13 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Registration for the filter plugin chain **VconProcessor** """
+import py_vcon_server.processor
+import py_vcon_server.processor.builtin.filter_chain
+
+init_options = py_vcon_server.processor.builtin.filter_chain.FilterPluginChainInitOptions()
+
+py_vcon_server.processor.VconProcessorRegistry.register(
+      init_options,
+      "filter_chain",
+      "py_vcon_server.processor.builtin.filter_chain",
+      "FilterChain"
+      )
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 import os
 import multiprocessing
 from pathlib import Path
@@ -7,6 +7,15 @@ VCON_STORAGE_URL = os.getenv("VCON_STORAGE_URL", "redis://localhost")
 QUEUE_DB_URL = os.getenv("QUEUE_DB__URL", VCON_STORAGE_URL)
 PIPELINE_DB_URL = os.getenv("PIPELINE_DB_URL", VCON_STORAGE_URL)
 STATE_DB_URL = os.getenv("STATE_DB_URL", VCON_STORAGE_URL)
+# Minimum size of vCon body strings to store once in content addressed storage (0 = disabled)
+try:
+  VCON_STORAGE_BODY_DEDUP_MIN_SIZE = int(os.getenv("VCON_STORAGE_BODY_DEDUP_MIN_SIZE", 0))
+except ValueError:
+  print("Warning: VCON_STORAGE_BODY_DEDUP_MIN_SIZE should be an int, setting to: 0")
+  VCON_STORAGE_BODY_DEDUP_MIN_SIZE = 0
+# Store the payload of vCons signed with a canonical payload (see Vcon.sign) separately
+# from the signature, as the unsigned vCon (which bodies can be deduplicated in)
+VCON_STORAGE_DETACH_SIGNED_PAYLOAD = os.getenv("VCON_STORAGE_DETACH_SIGNED_PAYLOAD", "false").lower() in ("1", "true", "yes", "on")
 REST_URL = os.getenv("REST_URL", "http://localhost:8000")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
 LOGGING_CONFIG_FILE = os.getenv("LOGGING_CONFIG_FILE", Path(__file__).parent / 'logging.conf')
@@ -22,6 +31,22 @@ if(not isinstance(NUM_WORKERS, int)):
 
 PLUGIN_PATHS = os.getenv("PLUGIN_PATHS", "").split(",")
 
+# Filter plugin startup policy, comma separated filter plugin names ("*" for all).
+# Filter plugins not listed are loaded upon first use.
+# Loaded in parallel threads before the VconProcessor bindings are loaded and the server is running:
+PLUGIN_WARMUP = [name.strip() for name in os.getenv("PLUGIN_WARMUP", "").split(",") if name.strip() != ""]
+# Loaded in background threads at startup, the server does not wait for them to load:
+PLUGIN_PRELOAD = [name.strip() for name in os.getenv("PLUGIN_PRELOAD", "").split(",") if name.strip() != ""]
+
+# Optional shared Whisper model host (Unix socket path), started and warmed up before the server is running
+WHISPER_MODEL_HOST = os.getenv("WHISPER_MODEL_HOST", "")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+try:
+  WHISPER_MODEL_HOST_WORKERS = int(os.getenv("WHISPER_MODEL_HOST_WORKERS", 0))
+except ValueError:
+  print("Warning: WHISPER_MODEL_HOST_WORKERS should be an int, setting to: 0")
+  WHISPER_MODEL_HOST_WORKERS = 0
+
 # parse out optional weights from name for each queue
 manager = multiprocessing.Manager()
 #WORK_QUEUES: multiprocessing.managers.DictProxy = manager.dict({})
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Implementation of the Vcon API entry points """
 
 import os
@@ -198,7 +198,9 @@ def init(restapi):
           ))
 
         # Run the processor
-        processor_output = await processor_inst.process(
+        processor_output = await py_vcon_server.processor.measure_process(
+          processor_name_from_path,
+          processor_inst,
           processor_input,
           processor_type_options)
 
@@ -0,0 +1,68 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for **VconCodec** compression of vCons at rest """
+
+import pytest
+from common_setup import make_inline_audio_vcon, make_2_party_tel_vcon
+import py_vcon_server.db.codec
+import vcon
+
+
+def test_codec_from_url(tmp_path):
+  url, codec = py_vcon_server.db.codec.VconCodec.from_url("redis://localhost")
+  assert(url == "redis://localhost")
+  assert(codec is None)
+
+  url, codec = py_vcon_server.db.codec.VconCodec.from_url(
+    "redis://localhost:6379/0?compression=zstd&compress_body_min_size=10&compress_document_min_size=20&socket_timeout=5")
+  assert(url == "redis://localhost:6379/0?socket_timeout=5")
+  assert(codec.compress_body_min_size == 10)
+  assert(codec.compress_document_min_size == 20)
+  assert(codec.compression_level == 3)
+
+  url, codec = py_vcon_server.db.codec.VconCodec.from_url("redis://localhost?compression=none")
+  assert(url == "redis://localhost")
+  assert(codec is None)
+
+  with pytest.raises(py_vcon_server.db.codec.CodecNotSupported):
+    py_vcon_server.db.codec.VconCodec.from_url("redis://localhost?compression=lz4")
+
+
+def test_codec_bodies_and_documents(make_inline_audio_vcon: vcon.Vcon, tmp_path):
+  vcon_dict = make_inline_audio_vcon.dumpd()
+  codec = py_vcon_server.db.codec.VconCodec(compress_body_min_size = 100, compress_document_min_size = 1000)
+
+  body = vcon_dict["dialog"][0]["body"]
+  encoded_body = codec.encode_body(body)
+  assert(isinstance(encoded_body, bytes))
+  assert(len(encoded_body) < len(body))
+  assert(codec.decode_body(encoded_body) == body)
+  # small bodies are not compressed
+  assert(codec.encode_body("small") == "small")
+  assert(codec.decode_body(b"small") == "small")
+
+  compressed_vcon = codec.encode_document(vcon_dict)
+  assert(compressed_vcon[0:4] == py_vcon_server.db.codec.ZSTD_MAGIC)
+  assert(codec.decode_document(compressed_vcon) == vcon_dict)
+  assert(codec.encode_document({"vcon": "0.0.1"}) is None)
+
+  # train a dictionary on the JSON skeleton of vCons
+  samples = []
+  for index in range(200):
+    sample = vcon.Vcon()
+    sample.set_uuid("py-vcon.dev")
+    sample.set_party_parameter("tel", "+1555{:07d}".format(index))
+    sample.set_party_parameter("name", "party {}".format(index))
+    sample.add_dialog_inline_text("hello {}".format(index), index, 10, 0, vcon.Vcon.MIMETYPE_TEXT_PLAIN)
+    samples.append(sample.dumpd())
+  dictionary_path = tmp_path / "vcon.dict"
+  dictionary_path.write_bytes(py_vcon_server.db.codec.VconCodec.train_dictionary(samples, 4096))
+
+  dict_codec = py_vcon_server.db.codec.VconCodec(
+    compression_dictionary = str(dictionary_path),
+    compress_document_min_size = 10
+    )
+  small_vcon = samples[0]
+  with_dictionary = dict_codec.encode_document(small_vcon)
+  without_dictionary = py_vcon_server.db.codec.VconCodec(compress_document_min_size = 10).encode_document(small_vcon)
+  assert(len(with_dictionary) < len(without_dictionary))
+  assert(dict_codec.decode_document(with_dictionary) == small_vcon)
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Unit tests for **VconStorage** """
 
 import pytest
@@ -98,6 +98,162 @@ async def test_redis_delete(make_2_party_tel_vcon: vcon.Vcon):
     # expected
     pass
 
+@pytest.mark.asyncio
+async def test_redis_incremental_set(make_2_party_tel_vcon: vcon.Vcon):
+  """ Test that set of a **Vcon** retrieved from storage writes only the changed paths """
+  vCon = make_2_party_tel_vcon
+  await VCON_STORAGE.set(vCon)
+
+  # changes are only tracked if requested (e.g. by the pipeline)
+  assert((await VCON_STORAGE.get(UUID)).get_changes() is None)
+  retrieved_vcon = await VCON_STORAGE.get(UUID, True)
+  assert(retrieved_vcon.get_changes() == {"parameters": [], "modified": {}, "appended": {}})
+  retrieved_vcon.set_party_parameter("name", "Alice", 0)
+  retrieved_vcon.set_party_parameter("tel", "999")
+  retrieved_vcon.set_subject("incremental")
+  changes = retrieved_vcon.get_changes()
+  assert(changes["parameters"] == ["subject"])
+  assert(changes["modified"] == {"parties": [0]})
+  assert(changes["appended"] == {"parties": 2})
+  await VCON_STORAGE.set(retrieved_vcon)
+  # baseline is reset after the write
+  assert(retrieved_vcon.get_changes() == {"parameters": [], "modified": {}, "appended": {}})
+
+  saved_vcon = await VCON_STORAGE.get(UUID)
+  assert(saved_vcon.dumpd() == retrieved_vcon.dumpd())
+  assert(saved_vcon.parties[0]["name"] == "Alice")
+  assert(saved_vcon.parties[0]["tel"] == "1234")
+  assert(saved_vcon.parties[2]["tel"] == "999")
+  assert(saved_vcon.subject == "incremental")
+
+  # vCon deleted after it was read falls back to writing the whole vCon
+  saved_vcon.set_party_parameter("tel", "777", 1)
+  await VCON_STORAGE.delete(UUID)
+  await VCON_STORAGE.set(saved_vcon)
+  restored_vcon = await VCON_STORAGE.get(UUID)
+  assert(restored_vcon.dumpd() == saved_vcon.dumpd())
+
+
+@pytest.mark.asyncio
+async def test_redis_body_dedup(make_inline_audio_vcon: vcon.Vcon):
+  """ Test that the same body in multiple **Vcon**s is stored once and garbage collected """
+  import py_vcon_server.db.redis
+  VCON_STORAGE.body_dedup_min_size = 1000
+  try:
+    vcon1 = make_inline_audio_vcon
+    vcon2 = vcon.Vcon()
+    vcon2.loadd(vcon1.dumpd())
+    vcon2.set_uuid("py-vcon.org", True)
+    vcon2.set_redacted(UUID, "PII")
+    assert(vcon2.uuid != UUID)
+    body = vcon1.dialog[0]["body"]
+
+    await VCON_STORAGE.set(vcon1)
+    await VCON_STORAGE.set(vcon2)
+
+    # stored form has reference instead of body
+    stored_dialog = await VCON_STORAGE.json_path_query(UUID, "$.dialog[0]")
+    assert("body" not in stored_dialog[0])
+    digest = stored_dialog[0][py_vcon_server.db.redis.BODY_REFERENCE]
+
+    redis_con = VCON_STORAGE._redis_mgr.get_client()
+    body_key = py_vcon_server.db.redis.BODY_KEY_PREFIX + digest
+    refs_key = py_vcon_server.db.redis.BODY_REFS_KEY_PREFIX + digest
+    assert(await redis_con.get(body_key) == body)
+    assert(await redis_con.scard(refs_key) == 2)
+
+    # body re-inlined on get
+    retrieved_vcon = await VCON_STORAGE.get(vcon2.uuid, True)
+    assert(retrieved_vcon.dialog[0]["body"] == body)
+    assert(retrieved_vcon.dumpd() == vcon2.dumpd())
+
+    # incremental write of an appended dialog references the same body
+    retrieved_vcon.add_dialog_inline_recording(
+      vcon1.decode_dialog_inline_body(0),
+      "2023-01-01T00:00:00+00:00",
+      0,
+      [0, 1],
+      vcon.Vcon.MIMETYPE_AUDIO_WAV
+      )
+    await VCON_STORAGE.set(retrieved_vcon)
+    stored_dialog = await VCON_STORAGE.json_path_query(vcon2.uuid, "$.dialog[1]")
+    assert(stored_dialog[0][py_vcon_server.db.redis.BODY_REFERENCE] == digest)
+    assert((await VCON_STORAGE.get(vcon2.uuid)).dialog[1]["body"] == body)
+
+    # incremental rewrite of one of the objects referencing the body keeps the
+    # reference held by the other
+    retrieved_vcon = await VCON_STORAGE.get(vcon2.uuid, True)
+    retrieved_vcon.dialog[1]["body"] = "small"
+    await VCON_STORAGE.set(retrieved_vcon)
+    assert(await redis_con.sismember(refs_key, vcon2.uuid))
+
+    # incremental rewrite of the last object referencing the body releases it
+    retrieved_vcon.dialog[0]["body"] = "small too"
+    await VCON_STORAGE.set(retrieved_vcon)
+    assert(not await redis_con.sismember(refs_key, vcon2.uuid))
+    assert(await redis_con.scard(refs_key) == 1)
+    assert(await redis_con.exists(body_key) == 1)
+
+    await VCON_STORAGE.delete(vcon2.uuid)
+    assert(await redis_con.scard(refs_key) == 1)
+    assert(await redis_con.exists(body_key) == 1)
+
+    # rewriting the vCon without the body releases it
+    vcon3 = vcon.Vcon()
+    vcon3.loadd(vcon1.dumpd())
+    vcon3.dialog[0]["body"] = "small"
+    await VCON_STORAGE.set(vcon3)
+    assert(await redis_con.exists(refs_key) == 0)
+    assert(await redis_con.exists(body_key) == 0)
+
+  finally:
+    VCON_STORAGE.body_dedup_min_size = 0
+
+
+@pytest.mark.asyncio
+async def test_redis_compression(make_inline_audio_vcon: vcon.Vcon):
+  """ Test zstd compression of bodies and documents in redis **VconStorage** """
+  import py_vcon_server.db.redis
+  import py_vcon_server.db.codec
+  vCon = make_inline_audio_vcon
+  body = vCon.dialog[0]["body"]
+  redis_con = VCON_STORAGE._redis_mgr.get_client()
+  binary_redis_con = VCON_STORAGE._binary_redis_mgr.get_client()
+  try:
+    # compressed bodies, JSON document
+    VCON_STORAGE.codec = py_vcon_server.db.codec.VconCodec(compress_body_min_size = 1000)
+    await VCON_STORAGE.set(vCon)
+    stored_dialog = await VCON_STORAGE.json_path_query(UUID, "$.dialog[0]")
+    digest = stored_dialog[0][py_vcon_server.db.redis.BODY_REFERENCE]
+    stored_body = await binary_redis_con.get(py_vcon_server.db.redis.BODY_KEY_PREFIX + digest)
+    assert(stored_body[0:4] == py_vcon_server.db.codec.ZSTD_MAGIC)
+    assert(len(stored_body) < len(body))
+    retrieved_vcon = await VCON_STORAGE.get(UUID)
+    assert(retrieved_vcon.dumpd() == vCon.dumpd())
+
+    # compressed document
+    VCON_STORAGE.codec = py_vcon_server.db.codec.VconCodec(compress_document_min_size = 100)
+    await VCON_STORAGE.set(vCon)
+    assert(await redis_con.exists("vcon:{}".format(UUID)) == 0)
+    assert(await redis_con.exists(py_vcon_server.db.redis.COMPRESSED_VCON_KEY_PREFIX + UUID) == 1)
+    retrieved_vcon = await VCON_STORAGE.get(UUID, True)
+    assert(retrieved_vcon.dumpd() == vCon.dumpd())
+    assert(retrieved_vcon.get_changes() is None)
+    with pytest.raises(py_vcon_server.db.codec.CodecNotSupported):
+      await VCON_STORAGE.json_path_query(UUID, "$.dialog")
+
+    # uncompressed again replaces the compressed document
+    VCON_STORAGE.codec = None
+    vCon.set_subject("not compressed")
+    await VCON_STORAGE.set(vCon)
+    assert(await redis_con.exists(py_vcon_server.db.redis.COMPRESSED_VCON_KEY_PREFIX + UUID) == 0)
+    assert((await VCON_STORAGE.get(UUID)).subject == "not compressed")
+
+  finally:
+    VCON_STORAGE.codec = None
+    await VCON_STORAGE.delete(UUID)
+
+
 @pytest.mark.asyncio
 async def test_processor_io_commit(
   make_2_party_tel_vcon: vcon.Vcon,
@@ -143,3 +299,41 @@ async def test_processor_io_commit(
     # expected
     pass
 
+
+
+@pytest.mark.asyncio
+async def test_redis_detached_signed_payload(make_inline_audio_vcon: vcon.Vcon):
+  """ Test that the payload of a canonically signed **Vcon** is stored as the unsigned vCon """
+  import py_vcon_server.db.redis
+  import vcon.security
+  VCON_STORAGE.detach_signed_payload = True
+  VCON_STORAGE.body_dedup_min_size = 1000
+  try:
+    vCon = make_inline_audio_vcon
+    unsigned_dict = vCon.dumpd()
+    vCon.sign("../certs/fake_grp.key", ["../certs/fake_grp.crt", "../certs/fake_div.crt", "../certs/fake_ca_root.crt"], canonical = True)
+    await VCON_STORAGE.set(vCon)
+
+    # stored form is the unsigned vCon with deduplicated bodies and the JWS without the payload
+    redis_con = VCON_STORAGE._redis_mgr.get_client()
+    stored_dialog = await VCON_STORAGE.json_path_query(UUID, "$.dialog[0]")
+    assert(py_vcon_server.db.redis.BODY_REFERENCE in stored_dialog[0])
+    detached_jws = await redis_con.json().get(py_vcon_server.db.redis.DETACHED_JWS_KEY_PREFIX + UUID)
+    assert("payload" not in detached_jws)
+    assert(len(detached_jws["signatures"]) == 1)
+
+    retrieved_vcon = await VCON_STORAGE.get(UUID)
+    retrieved_vcon.verify(["../certs/fake_ca_root.crt"])
+    assert(retrieved_vcon.dumpd(False) == unsigned_dict)
+
+    # rewriting the vCon unsigned removes the JWS
+    unsigned_vcon = vcon.Vcon()
+    unsigned_vcon.loadd(unsigned_dict)
+    await VCON_STORAGE.set(unsigned_vcon)
+    assert(await redis_con.exists(py_vcon_server.db.redis.DETACHED_JWS_KEY_PREFIX + UUID) == 0)
+
+    await VCON_STORAGE.delete(UUID)
+
+  finally:
+    VCON_STORAGE.detach_signed_payload = False
+    VCON_STORAGE.body_dedup_min_size = 0
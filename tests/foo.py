@@ -1,3 +1,6 @@
+import os
+import time
+import threading
 import vcon.filter_plugins
 
 class FooInitOptions(vcon.filter_plugins.FilterPluginInitOptions):
@@ -27,3 +30,71 @@ class FooNoInit(vcon.filter_plugins.FilterPlugin):
       FooOptions)
     print("foo plugin created with options: {}".format(options))
 
+
+
+class FooSubject(vcon.filter_plugins.FilterPlugin):
+  """ Valid class: sets the subject of the Vcon and counts batches """
+  init_options_type = FooInitOptions
+
+  def __init__(self, options):
+    super().__init__(
+      options,
+      FooOptions)
+    self.num_filter_calls = 0
+
+
+  async def filter(self, in_vcon, options):
+    self.num_filter_calls += 1
+    in_vcon.set_subject("foo")
+    return(in_vcon)
+
+
+class FooBatchSubject(FooSubject):
+  """ Valid class: overrides filter_batch to operate on all Vcons in one call """
+  async def filter_batch(self, in_vcons, options):
+    self.num_batch_calls = getattr(self, "num_batch_calls", 0) + 1
+    for in_vcon in in_vcons:
+      in_vcon.set_subject("foo batch of {}".format(len(in_vcons)))
+    return(in_vcons)
+
+
+class FooCpuBound(FooSubject):
+  """ Valid class: CPU bound plugin which sets the subject to where it was run """
+  cpu_bound = True
+
+  async def filter(self, in_vcon, options):
+    self.num_filter_calls += 1
+    # block for the optional sleep time as if CPU bound
+    time.sleep(getattr(options, "sleep", 0))
+    in_vcon.set_subject("{} {}".format(os.getpid(), threading.current_thread().name))
+    return(in_vcon)
+
+
+class FooAppendOptions(vcon.filter_plugins.FilterPluginOptions):
+  text: str = ""
+
+
+class FooAppendSubject(FooSubject):
+  """ Valid class: appends the text option to the subject of the Vcon """
+  def __init__(self, options):
+    vcon.filter_plugins.FilterPlugin.__init__(
+      self,
+      options,
+      FooAppendOptions)
+    self.num_filter_calls = 0
+
+
+  async def filter(self, in_vcon, options):
+    self.num_filter_calls += 1
+    in_vcon.set_subject((in_vcon.subject or "") + options.text)
+    return(in_vcon)
+
+
+class FooReadSubject(FooSubject):
+  """ Valid class: records the subject of the Vcon without modifying it """
+  modifies_vcon = False
+
+  async def filter(self, in_vcon, options):
+    self.num_filter_calls += 1
+    self.last_subject = in_vcon.subject
+    return(in_vcon)
@@ -23,3 +23,60 @@ vcon.filter_plugins.FilterPluginRegistry.register(
   )
 #print(vcon.filter_plugins.FilterPluginRegistry.get_names())
 
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "foosubject",
+  "tests.foo",
+  "FooSubject",
+  "Sets subject to foo",
+  init_options
+  )
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "foobatchsubject",
+  "tests.foo",
+  "FooBatchSubject",
+  "Sets subject to foo in batches",
+  init_options
+  )
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "foocpubound",
+  "tests.foo",
+  "FooCpuBound",
+  "Sets subject to the process and thread it was run in",
+  init_options
+  )
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "fooappendsubject",
+  "tests.foo",
+  "FooAppendSubject",
+  "Appends text to the subject",
+  init_options
+  )
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "fooreadsubject",
+  "tests.foo",
+  "FooReadSubject",
+  "Records the subject",
+  init_options
+  )
+
+
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "foochain",
+  "vcon.filter_plugins",
+  "FilterPluginChain",
+  "Appends a and b to the subject",
+  {"steps": [
+    {"plugin": "fooappendsubject", "options": {"text": "a"}},
+    {"plugin": "fooappendsubject", "options": {"text": "b"}}
+  ]}
+  )
@@ -0,0 +1,70 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for in memory decoding of dialog recordings """
+
+import io
+import wave
+import numpy
+import vcon.audio
+
+
+def make_wav(channel_samples, sample_rate = vcon.audio.SPEECH_SAMPLE_RATE) -> bytes:
+  """ build a 16 bit PCM wave file from a list of int16 sample arrays, one per channel """
+  wav_io = io.BytesIO()
+  with wave.open(wav_io, "wb") as wave_file:
+    wave_file.setnchannels(len(channel_samples))
+    wave_file.setsampwidth(2)
+    wave_file.setframerate(sample_rate)
+    wave_file.writeframes(numpy.stack(channel_samples, axis = 1).tobytes())
+  return(wav_io.getvalue())
+
+
+def test_decode_audio():
+  """ Test in memory decoding of recordings to audio samples """
+  # 16kHz stereo 16 bit PCM is decoded natively and down mixed to mono
+  left = numpy.array([1000, -2000, 3000, 16384], numpy.int16)
+  right = numpy.array([3000, 2000, -3000, 16384], numpy.int16)
+  wav_bytes = make_wav([left, right])
+  samples = vcon.audio.decode_wav(wav_bytes)
+  assert(samples.dtype == numpy.float32)
+  assert(samples.tolist() == [2000 / 32768, 0.0, 0.0, 0.5])
+
+  # other rates are resampled by ffmpeg
+  with open("examples/agent_sample.mp3", "rb") as audio_file:
+    mp3_bytes = audio_file.read()
+  assert(vcon.audio.decode_wav(mp3_bytes) is None)
+  samples = vcon.audio.decode_audio(mp3_bytes)
+  assert(samples.dtype == numpy.float32)
+  assert(len(samples) > vcon.audio.SPEECH_SAMPLE_RATE)
+  assert(-1.0 <= samples.min() and samples.max() <= 1.0)
+
+
+def test_decode_channels():
+  """ Test separation of multi-channel recordings """
+  left = numpy.array([1000, -2000, 3000, 16384], numpy.int16)
+  right = numpy.array([3000, 2000, -3000, -16384], numpy.int16)
+  wav_bytes = make_wav([left, right])
+  assert(vcon.audio.channel_count(wav_bytes) == 2)
+  assert(vcon.audio.channel_count(make_wav([left])) == 1)
+  # not audio
+  assert(vcon.audio.channel_count(b"not audio") == 1)
+
+  channels = vcon.audio.decode_audio(wav_bytes, channels = 2)
+  assert(channels.shape == (2, 4))
+  assert(channels.dtype == numpy.float32)
+  assert(channels[0].tolist() == (left / 32768.0).tolist())
+  assert(channels[1].tolist() == [3000 / 32768, 2000 / 32768, -3000 / 32768, -0.5])
+
+  # number of channels does not match the wave file
+  assert(vcon.audio.decode_wav(wav_bytes, channels = 3) is None)
+
+
+def test_channel_parties():
+  dialog = {"type": "recording", "parties": [0, 1]}
+  assert(vcon.audio.channel_parties(dialog, 2) == [0, 1])
+  # mono recording with two parties
+  assert(vcon.audio.channel_parties(dialog, 1) is None)
+  assert(vcon.audio.channel_parties({"parties": [1, [0, 2]]}, 2) == [1, [0, 2]])
+  assert(vcon.audio.channel_parties({"parties": 1}, 2) is None)
+  assert(vcon.audio.channel_parties({"parties": [0, 1]}, 4) is None)
+  assert(vcon.audio.channel_parties({}, 2) is None)
+
@@ -0,0 +1,89 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for base64url codec """
+
+import os
+import time
+import binascii
+import pytest
+import jose.utils
+import vcon.base64url
+
+
+def test_codec() -> None:
+  chunk_size = 3 * 4
+  # sizes around the chunk boundaries and all of the padding lengths
+  for size in list(range(0, 4 * chunk_size)) + [vcon.base64url.CHUNK_SIZE + 1, 3 * vcon.base64url.CHUNK_SIZE]:
+    data = os.urandom(size)
+    expected = jose.utils.base64url_encode(data)
+    assert(vcon.base64url.encode(data) == expected)
+    assert(vcon.base64url.encode(data, chunk_size) == expected)
+    assert(vcon.base64url.encode(bytearray(data), chunk_size) == expected)
+    assert(vcon.base64url.encode(memoryview(data)) == expected)
+    assert(vcon.base64url.encode_str(data) == expected.decode("utf-8"))
+    assert(b"".join(vcon.base64url.iter_encode(data, chunk_size)) == expected)
+
+    encoded = expected.decode("utf-8")
+    assert(vcon.base64url.decode(encoded) == data)
+    assert(vcon.base64url.decode(encoded, chunk_size) == data)
+    assert(vcon.base64url.decode(expected, chunk_size) == data)
+    assert(vcon.base64url.decode(memoryview(expected), chunk_size) == data)
+    assert(b"".join(vcon.base64url.iter_decode(encoded, chunk_size)) == data)
+
+  # non-byte memoryview format
+  assert(vcon.base64url.encode(memoryview(bytes(range(8))).cast("I")) == jose.utils.base64url_encode(bytes(range(8))))
+
+  try:
+    vcon.base64url.encode(b"abcdefgh", 4)
+    raise Exception("Should have thrown an exception as chunk size is not a multiple of 3")
+
+  except AttributeError as chunk_size_error:
+    # expected
+    pass
+
+
+def test_decode_unaligned() -> None:
+  data = os.urandom(100)
+  encoded = vcon.base64url.encode_str(data)
+  # padding and white space which shift the chunk alignment are accepted, as they are by jose
+  for unaligned in [
+      encoded + "==",
+      encoded[:20] + "\n" + encoded[20:40] + "\n" + encoded[40:] + "\r\n",
+      encoded[:8] + "\r\n  " + encoded[8:]
+    ]:
+    assert(jose.utils.base64url_decode(unaligned.encode("utf-8")) == data)
+    assert(vcon.base64url.decode(unaligned) == data)
+    assert(vcon.base64url.decode(unaligned, 12) == data)
+    assert(b"".join(vcon.base64url.iter_decode(unaligned, 12)) == data)
+
+  try:
+    vcon.base64url.decode(encoded[:-1])
+    raise Exception("Should have thrown an exception as encoding is truncated")
+
+  except binascii.Error as truncated_error:
+    # expected
+    pass
+
+
+@pytest.mark.skipif(os.getenv("VCON_BENCHMARK", "") == "", reason = "benchmark, set VCON_BENCHMARK=1 to run")
+def test_benchmark() -> None:
+  """ compare with the jose.utils encoding and decoding previously used """
+  for size in [100, 100 * 1024, 10 * 1024 * 1024]:
+    data = os.urandom(size)
+    encoded = vcon.base64url.encode_str(data)
+    iterations = max(1, 2 * 1024 * 1024 // size)
+    timings = {}
+    for name, function in [
+        ("jose encode", lambda: jose.utils.base64url_encode(data).decode('utf-8')),
+        ("encode", lambda: vcon.base64url.encode_str(data)),
+        ("jose decode", lambda: jose.utils.base64url_decode(bytes(encoded, 'utf-8'))),
+        ("decode", lambda: vcon.base64url.decode(encoded))
+      ]:
+      start = time.perf_counter()
+      for iteration in range(iterations):
+        function()
+      timings[name] = (time.perf_counter() - start) / iterations
+
+    print("base64url {} bytes: {}".format(
+      size,
+      ", ".join(["{}: {:.1f} us".format(name, seconds * 1000000) for name, seconds in timings.items()])
+      ))
@@ -0,0 +1,85 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for tracking of changes to **Vcon** for incremental storage writes """
+
+import copy
+import vcon
+
+def make_tracked_vcon() -> vcon.Vcon:
+  vCon = vcon.Vcon()
+  vCon.set_uuid("py-vcon.dev")
+  vCon.set_party_parameter("tel", "1234")
+  vCon.set_party_parameter("tel", "5678")
+  vCon.add_dialog_inline_text("hello", "2023-01-01T00:00:00+00:00", 0, 0, vcon.Vcon.MIMETYPE_TEXT_PLAIN)
+
+  loaded_vcon = vcon.Vcon()
+  loaded_vcon.loadd(vCon.dumpd())
+  assert(loaded_vcon.get_changes() is None)
+  loaded_vcon.track_changes()
+
+  return(loaded_vcon)
+
+
+def test_no_changes():
+  vCon = make_tracked_vcon()
+  assert(vCon.get_changes() == {"parameters": [], "modified": {}, "appended": {}})
+
+
+def test_appended_and_modified():
+  vCon = make_tracked_vcon()
+  vCon.set_party_parameter("name", "Alice", 1)
+  vCon.set_party_parameter("tel", "999")
+  # modify a party that was appended since tracking started
+  vCon.set_party_parameter("name", "Bob", 2)
+  vCon.add_analysis(0, "summary", "short call", "test", "test", encoding = "none")
+  vCon.set_dialog_parameter("duration", 5, 0)
+  vCon.set_subject("test call")
+
+  changes = vCon.get_changes()
+  assert(changes["parameters"] == ["subject"])
+  assert(changes["modified"] == {"parties": [1], "dialog": [0]})
+  assert(changes["appended"] == {"parties": 2, "analysis": 0})
+
+  # restart tracking with the current content as baseline
+  vCon.track_changes()
+  assert(vCon.get_changes() == {"parameters": [], "modified": {}, "appended": {}})
+
+
+def test_full_write_required():
+  vCon = make_tracked_vcon()
+  vCon.set_uuid("py-vcon.org", True)
+  assert(vCon.get_changes() is None)
+
+  vCon = make_tracked_vcon()
+  # new top level array is set whole
+  del vCon._vcon_dict["attachments"]
+  vCon.track_changes()
+  vCon.add_attachment_inline(b"abc", "2023-01-01T00:00:00+00:00", 0, vcon.Vcon.MIMETYPE_TEXT_PLAIN)
+  assert(vCon.get_changes()["parameters"] == ["attachments"])
+
+  # reload resets tracking
+  vCon.loadd(vCon.dumpd())
+  assert(vCon.get_changes() is None)
+
+
+def test_in_place_modification():
+  vCon = make_tracked_vcon()
+  # modification of the returned dicts rather than through Vcon methods
+  vCon.dialog[0]["duration"] = 7
+  vCon._vcon_dict["subject"] = "in place"
+  changes = vCon.get_changes()
+  assert(changes["parameters"] == ["subject"])
+  assert(changes["modified"] == {"dialog": [0]})
+
+  # remove and append keeping the same length
+  vCon = make_tracked_vcon()
+  del vCon.parties[0]
+  vCon.set_party_parameter("tel", "999")
+  changes = vCon.get_changes()
+  assert(changes["modified"] == {"parties": [0, 1]})
+  assert(changes["appended"] == {})
+
+  # tracking is preserved in deep copies (e.g. VconProcessorIO.get_vcon)
+  vCon = copy.deepcopy(make_tracked_vcon())
+  assert(vCon.get_changes() == {"parameters": [], "modified": {}, "appended": {}})
+  vCon.dialog[0]["duration"] = 7
+  assert(vCon.get_changes()["modified"] == {"dialog": [0]})
@@ -1,7 +1,9 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Deepgram transcription plugin unit test """
 
 import os
+import time
+import asyncio
 import datetime
 import json
 import vcon
@@ -159,3 +161,219 @@ async def test_deepgram_no_dialog():
   assert(in_vcon.dialog is None)
   out_vcon = await in_vcon.deepgram(options)
   assert(out_vcon.analysis is None)
+
+
+def deepgram_stub_response(transcript: str) -> dict:
+  """ minimal Deepgram pre-recorded transcription response """
+  return({
+    "metadata": {"channels": 1},
+    "results": {
+      "channels": [
+        {
+          "alternatives": [
+            {
+              "transcript": transcript,
+              "paragraphs": {
+                "paragraphs": [
+                  {
+                    "speaker": 0,
+                    "start": 0.0,
+                    "end": 1.0,
+                    "sentences": [{"text": transcript}]
+                  }
+                ]
+              }
+            }
+          ]
+        }
+      ]
+    }
+  })
+
+
+async def start_deepgram_stub(delay: float, stats: dict):
+  """ Start a local Deepgram stub server which transcribes the recording as its text """
+  import aiohttp.web
+
+  stats.update({"in_flight": 0, "max_in_flight": 0, "peers": set(), "request_times": []})
+  async def listen(request):
+    assert(request.headers["Authorization"] == "Token stub_key")
+    assert(request.query["model"] == "nova-2-meeting")
+    body = await request.read()
+    stats["request_times"].append(time.monotonic())
+    stats["peers"].add(request.transport.get_extra_info("peername"))
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    await asyncio.sleep(delay)
+    stats["in_flight"] -= 1
+    if(body.startswith(b"fail")):
+      return(aiohttp.web.Response(status = 400, text = "bad recording"))
+    return(aiohttp.web.json_response(deepgram_stub_response(body.decode())))
+
+  app = aiohttp.web.Application()
+  app.router.add_post("/v1/listen", listen)
+  runner = aiohttp.web.AppRunner(app)
+  await runner.setup()
+  site = aiohttp.web.TCPSite(runner, "127.0.0.1", 0)
+  await site.start()
+  return(runner, "http://127.0.0.1:{}/v1/listen".format(runner.addresses[0][1]))
+
+
+def recordings_vcon(count: int) -> vcon.Vcon:
+  in_vcon = vcon.Vcon()
+  in_vcon.set_party_parameter("name", "Dana")
+  in_vcon.set_party_parameter("name", "Carolyn")
+  for index in range(count):
+    in_vcon.add_dialog_inline_recording(
+      "recording {}".format(index).encode(),
+      "2023-08-31T18:26:36.987+00:00",
+      1,
+      [0, 1],
+      vcon.Vcon.MIMETYPE_AUDIO_WAV
+      )
+  return(in_vcon)
+
+
+@pytest.mark.asyncio
+async def test_deepgram_concurrent_stub():
+  """ Test concurrent transcription of dialogs against a local Deepgram stub server """
+  stats = {}
+  runner, url = await start_deepgram_stub(0.2, stats)
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "deepgram_stub",
+      "vcon.filter_plugins.impl.deepgram",
+      "Deepgram",
+      "Deepgram using a local stub server",
+      {
+        "deepgram_key": "stub_key",
+        "deepgram_url": url,
+        "max_concurrent_requests": 2
+      },
+      replace = True
+      )
+
+    in_vcon = recordings_vcon(5)
+    out_vcon = await in_vcon.filter("deepgram_stub", {"split_channels": False})
+
+    # transcribed concurrently, limited to max_concurrent_requests
+    assert(len(stats["request_times"]) == 5)
+    assert(stats["max_in_flight"] == 2)
+    # keep-alive connections are reused
+    assert(len(stats["peers"]) <= 2)
+
+    # analysis added in dialog order
+    assert(len(out_vcon.analysis) == 5)
+    for index, analysis in enumerate(out_vcon.analysis):
+      assert(analysis["dialog"] == index)
+      assert(analysis["vendor"] == "deepgram")
+      assert(analysis["body"]["results"]["channels"][0]["alternatives"][0]["transcript"] ==
+        "recording {}".format(index))
+
+    text_list = await out_vcon.get_dialog_text(3)
+    assert(text_list[0]["text"] == "recording 3")
+
+    # already transcribed
+    out_vcon = await out_vcon.filter("deepgram_stub", {"split_channels": False})
+    assert(len(out_vcon.analysis) == 5)
+    assert(len(stats["request_times"]) == 5)
+
+  finally:
+    # close the plugin's HTTP sessions
+    vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
+    await asyncio.sleep(0.1)
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_deepgram_rate_limit_stub():
+  """ Test the Deepgram request rate limit against a local Deepgram stub server """
+  stats = {}
+  runner, url = await start_deepgram_stub(0.0, stats)
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "deepgram_stub_limited",
+      "vcon.filter_plugins.impl.deepgram",
+      "Deepgram",
+      "Deepgram using a local stub server",
+      {
+        "deepgram_key": "stub_key",
+        "deepgram_url": url,
+        "max_concurrent_requests": 4,
+        "requests_per_second": 10,
+        "request_burst": 1
+      },
+      replace = True
+      )
+
+    out_vcon = await recordings_vcon(4).filter("deepgram_stub_limited", {"split_channels": False})
+    assert(len(out_vcon.analysis) == 4)
+    request_times = sorted(stats["request_times"])
+    # one request per 0.1 seconds
+    assert(request_times[-1] - request_times[0] >= 0.28)
+
+  finally:
+    # close the plugin's HTTP sessions
+    vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
+    await asyncio.sleep(0.1)
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_deepgram_partial_failure_stub():
+  """ Test that transcripts of the other dialogs are kept when one dialog fails """
+  stats = {}
+  runner, url = await start_deepgram_stub(0.0, stats)
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "deepgram_stub_failure",
+      "vcon.filter_plugins.impl.deepgram",
+      "Deepgram",
+      "Deepgram using a local stub server",
+      {
+        "deepgram_key": "stub_key",
+        "deepgram_url": url
+      },
+      replace = True
+      )
+
+    in_vcon = recordings_vcon(3)
+    in_vcon.add_dialog_inline_recording(
+      b"fail",
+      "2023-08-31T18:26:36.987+00:00",
+      1,
+      [0, 1],
+      vcon.Vcon.MIMETYPE_AUDIO_WAV
+      )
+    out_vcon = await in_vcon.filter("deepgram_stub_failure", {"split_channels": False})
+    assert([analysis["dialog"] for analysis in out_vcon.analysis] == [0, 1, 2])
+
+    # all dialogs failed
+    try:
+      await out_vcon.filter("deepgram_stub_failure", {"split_channels": False, "input_dialogs": "3:4"})
+      raise Exception("Expected exception for failed transcription")
+
+    except Exception as filter_error:
+      if(str(filter_error).startswith("Expected")):
+        raise filter_error
+
+  finally:
+    # close the plugin's HTTP sessions
+    vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
+    await asyncio.sleep(0.1)
+    await runner.cleanup()
+
+
+def test_deepgram_retry_after():
+  import tenacity
+  import vcon.filter_plugins.impl.deepgram
+
+  assert(vcon.filter_plugins.impl.deepgram.retry_after_seconds(None) is None)
+  assert(vcon.filter_plugins.impl.deepgram.retry_after_seconds("2.5") == 2.5)
+  assert(vcon.filter_plugins.impl.deepgram.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0)
+  assert(vcon.filter_plugins.impl.deepgram.retry_after_seconds("soon") is None)
+
+  retry_state = tenacity.RetryCallState(None, None, (), {})
+  rate_limited = vcon.filter_plugins.impl.deepgram.DeepgramRateLimited("rate limited", 7.0)
+  retry_state.set_exception((type(rate_limited), rate_limited, None))
+  assert(vcon.filter_plugins.impl.deepgram.deepgram_retry_wait(retry_state) == 7.0)
@@ -1,8 +1,11 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Unit tests for encrypting filter plugin """
 import pytest
 import json
+import os
+import shutil
 import vcon
+import vcon.filter_plugins
 
 
 CA_CERT = "certs/fake_ca_root.crt"
@@ -114,3 +117,90 @@ async def test_encrypt_2party(two_party_tel_vcon : vcon.Vcon) -> None:
   assert(deserialized_vcon.parties[1]['tel'] == call_data['destination'])
   print("verified vCon: {}".format(deserialized_vcon.dumps()))
 
+
+@pytest.mark.asyncio
+async def test_batch_sign_encrypt() -> None:
+  in_vcons = []
+  for index in range(6):
+    a_vcon = vcon.Vcon()
+    a_vcon.set_uuid("vcon.dev")
+    a_vcon.set_party_parameter("tel", call_data['source'])
+    a_vcon.set_subject("batch {}".format(index))
+    in_vcons.append(a_vcon)
+
+  sign_options = {
+      "private_pem_key": GROUP_PRIVATE_KEY,
+      "cert_chain_pems": [GROUP_CERT, DIVISION_CERT, CA_CERT]
+    }
+
+  registry = vcon.filter_plugins.FilterPluginRegistry
+  vcon.security.KEY_MATERIAL_CACHE.clear()
+  num_loads = vcon.security.KEY_MATERIAL_CACHE.num_loads
+  signed_vcons = await registry.get("signfilter").filter_batch(in_vcons, sign_options)
+  # key and certs parsed once for the batch
+  assert(vcon.security.KEY_MATERIAL_CACHE.num_loads == num_loads + 1)
+  encrypted_vcons = await registry.get("encryptfilter").filter_batch(
+    signed_vcons,
+    {"public_pem_key": GROUP_CERT}
+    )
+  assert(len(encrypted_vcons) == len(in_vcons))
+
+  loaded_vcons = []
+  for encrypted_vcon in encrypted_vcons:
+    assert(encrypted_vcon._state == vcon.VconStates.ENCRYPTED)
+    loaded_vcon = vcon.Vcon()
+    loaded_vcon.loads(encrypted_vcon.dumps())
+    loaded_vcons.append(loaded_vcon)
+
+  decrypted_vcons = await registry.get("decryptfilter").filter_batch(
+    loaded_vcons,
+    {"private_pem_key": GROUP_PRIVATE_KEY, "public_pem_key": GROUP_CERT}
+    )
+  verified_vcons = await registry.get("verifyfilter").filter_batch(
+    decrypted_vcons,
+    {"allowed_ca_cert_pems": [CA_CERT]}
+    )
+  for index, verified_vcon in enumerate(verified_vcons):
+    assert(verified_vcon._state == vcon.VconStates.VERIFIED)
+    assert(verified_vcon.subject == "batch {}".format(index))
+
+
+def test_key_material_reload(tmp_path) -> None:
+  cert_file = str(tmp_path / "cert.pem")
+  shutil.copyfile(GROUP_CERT, cert_file)
+  cache = vcon.security.KEY_MATERIAL_CACHE
+  group_key = vcon.security.get_encryption_key(cert_file)[2]
+  num_loads = cache.num_loads
+  assert(vcon.security.get_encryption_key(cert_file)[2] is group_key)
+  assert(cache.num_loads == num_loads)
+
+  # change the cert file, the key is reloaded
+  shutil.copyfile(DIVISION_CERT, cert_file)
+  stat = os.stat(cert_file)
+  os.utime(cert_file, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+  division_key = vcon.security.get_encryption_key(cert_file)[2]
+  assert(cache.num_loads == num_loads + 1)
+  assert(division_key.public_numbers() != group_key.public_numbers())
+
+
+def test_sign_plugin_key_preload() -> None:
+  import vcon.filter_plugins.impl.sign_filter_plugin
+  sign_module = vcon.filter_plugins.impl.sign_filter_plugin
+  cache = vcon.security.KEY_MATERIAL_CACHE
+  cache.clear()
+  num_loads = cache.num_loads
+  init_options = sign_module.SignFilterPluginInitOptions(
+    private_pem_key = GROUP_PRIVATE_KEY,
+    cert_chain_pems = [GROUP_CERT, DIVISION_CERT, CA_CERT]
+    )
+  sign_module.SignFilterPlugin(init_options)
+  # key and certs parsed at init, not on first sign
+  assert(cache.num_loads == num_loads + 1)
+  vcon.security.get_signing_key(GROUP_PRIVATE_KEY, [GROUP_CERT, DIVISION_CERT, CA_CERT])
+  assert(cache.num_loads == num_loads + 1)
+
+  # unreadable key material is logged and reported on first use
+  sign_module.SignFilterPlugin(sign_module.SignFilterPluginInitOptions(
+    private_pem_key = "certs/no_such.key",
+    cert_chain_pems = [GROUP_CERT]
+    ))
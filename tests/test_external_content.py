@@ -1,10 +1,13 @@
 """
 Unit tests for external content such as recording, attachments which are stored
 as URLs with a signature for the content stored else where.  Using
-Leighton-Micali One Time Signature (RFC8554).
+Leighton-Micali One Time Signature (RFC8554) and batches signed with
+an Ed25519 signed Merkle tree.
 """
 
 import os
+import json
+import time
 import datetime
 import pytest
 import vcon
@@ -12,6 +15,9 @@ import vcon.security
 import hsslms
 import hashlib
 import jose.utils
+import cryptography.hazmat.primitives.asymmetric.ed25519
+import cryptography.hazmat.primitives.serialization
+import vcon.base64url
 
 call_data = {
       "epoch" : "1652552179",
@@ -231,3 +237,103 @@ def test_external_recording_sha_512(two_party_tel_vcon : vcon.Vcon) -> None:
   except vcon.InvalidVconHash as invalid_error:
     # Expect to get this exception
     pass
+
+def test_external_recording_merkle_batch(two_party_tel_vcon : vcon.Vcon) -> None:
+  url = "https://example.com/rec"
+  recordings = [os.urandom(4096 + index) for index in range(5)]
+
+  # first 3 recordings in one vCon, the rest in another vCon of the same batch
+  vcon2 = vcon.Vcon()
+  vcon2.loads(two_party_tel_vcon.dumps())
+  vcon2.set_uuid("vcon.dev", True)
+  for index, data in enumerate(recordings):
+    (two_party_tel_vcon if index < 3 else vcon2).add_dialog_external_recording(data,
+      call_data["rfc2822"],
+      call_data["duration"],
+      0,
+      url + str(index),
+      vcon.Vcon.MIMETYPE_AUDIO_WAV)
+
+  private_key = cryptography.hazmat.primitives.asymmetric.ed25519.Ed25519PrivateKey.generate()
+  private_key_pem = private_key.private_bytes(
+    cryptography.hazmat.primitives.serialization.Encoding.PEM,
+    cryptography.hazmat.primitives.serialization.PrivateFormat.PKCS8,
+    cryptography.hazmat.primitives.serialization.NoEncryption()
+    ).decode("utf-8")
+  assert(vcon.Vcon.sign_external_recordings([two_party_tel_vcon, vcon2], private_key_pem) == 5)
+  # already signed
+  assert(vcon.Vcon.sign_external_recordings([two_party_tel_vcon, vcon2]) == 0)
+
+  new_vcon = vcon.Vcon()
+  new_vcon.loads(two_party_tel_vcon.dumps())
+  new_vcon2 = vcon.Vcon()
+  new_vcon2.loads(vcon2.dumps())
+  dialogs = new_vcon.dialog + new_vcon2.dialog
+  for index, dialog in enumerate(dialogs):
+    assert(dialog['alg'] == "MERKLE_SHA512_Ed25519")
+    assert(dialog['digest'] == vcon.security.sha_512_hash(recordings[index]))
+    assert(dialog['signature'] == dialogs[0]['signature'])
+    assert(dialog['proof']['index'] == index)
+    assert(dialog['proof']['size'] == 5)
+    assert(len(dialog['proof']['path']) in [1, 3])
+    assert(vcon.base64url.decode(dialog['key']) == private_key.public_key().public_bytes(
+      cryptography.hazmat.primitives.serialization.Encoding.Raw,
+      cryptography.hazmat.primitives.serialization.PublicFormat.Raw
+      ))
+
+  for index in range(3):
+    new_vcon.verify_dialog_external_recording(index, recordings[index])
+  for index in range(2):
+    new_vcon2.verify_dialog_external_recording(index, recordings[index + 3])
+
+  try:
+    # Change the data so that validation should fail
+    new_vcon.verify_dialog_external_recording(0, recordings[0][1:])
+    raise Exception("Should have raised exception here as data is missing the first byte")
+
+  except vcon.InvalidVconHash as invalid_error:
+    # Expect to get this exception
+    pass
+
+  # digest of another recording in the batch with the wrong inclusion proof
+  new_vcon.dialog[0]['digest'] = new_vcon.dialog[1]['digest']
+  try:
+    new_vcon.verify_dialog_external_recording(0, recordings[1])
+    raise Exception("Should have raised exception here as the proof is for another recording")
+
+  except vcon.security.InvalidMerkleSignature as invalid_error:
+    # Expect to get this exception
+    pass
+
+
+@pytest.mark.skipif(os.getenv("VCON_BENCHMARK", "") == "", reason = "benchmark, set VCON_BENCHMARK=1 to run")
+def test_external_recording_signature_benchmark(two_party_tel_vcon : vcon.Vcon) -> None:
+  """ compare signing a batch of recordings with LM-OTS and a Merkle tree """
+  recordings = [os.urandom(1024 * 1024) for index in range(10)]
+  for sign_type in ["LM-OTS", "SHA-512"]:
+    vCon = vcon.Vcon()
+    vCon.loads(two_party_tel_vcon.dumps())
+    start = time.perf_counter()
+    for data in recordings:
+      vCon.add_dialog_external_recording(data,
+        call_data["rfc2822"],
+        call_data["duration"],
+        0,
+        "https://example.com/rec",
+        sign_type = sign_type)
+    if(sign_type == "SHA-512"):
+      vcon.Vcon.sign_external_recordings([vCon])
+    sign_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index, data in enumerate(recordings):
+      vCon.verify_dialog_external_recording(index, data)
+    verify_seconds = time.perf_counter() - start
+
+    print("{} {} x 1MB recordings: sign: {:.3f} s verify: {:.3f} s dialog signature size: {} bytes".format(
+      vCon.dialog[0]['alg'],
+      len(recordings),
+      sign_seconds,
+      verify_seconds,
+      len(json.dumps({name: vCon.dialog[0][name] for name in ["alg", "signature", "key", "digest", "proof"] if name in vCon.dialog[0]}))
+      ))
@@ -0,0 +1,58 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit test for batch filtering of many Vcons in one plugin call """
+
+import pytest
+import vcon
+import vcon.filter_plugins
+
+# test foo registration file
+import tests.foo_reg
+
+
+def make_vcons(count: int):
+  vcons = []
+  for index in range(count):
+    a_vcon = vcon.Vcon()
+    a_vcon.set_uuid("py-vcon.dev")
+    a_vcon.set_party_parameter("tel", str(index))
+    vcons.append(a_vcon)
+
+  return(vcons)
+
+
+@pytest.mark.asyncio
+async def test_default_filter_batch():
+  in_vcons = make_vcons(3)
+  out_vcons = await vcon.Vcon.filter_many(in_vcons, "foosubject", {})
+  assert(len(out_vcons) == 3)
+  for index, out_vcon in enumerate(out_vcons):
+    assert(out_vcon.subject == "foo")
+    assert(out_vcon.parties[0]["tel"] == str(index))
+
+  # default implementation loops over filter
+  plugin = vcon.filter_plugins.FilterPluginRegistry.get("foosubject").plugin()
+  assert(plugin.num_filter_calls == 3)
+
+  registration = vcon.filter_plugins.FilterPluginRegistry.get("foosubject")
+  out_vcons = await registration.filter_batch(make_vcons(2), vcon.filter_plugins.FilterPluginOptions())
+  assert(len(out_vcons) == 2)
+  assert(plugin.num_filter_calls == 5)
+
+
+@pytest.mark.asyncio
+async def test_override_filter_batch():
+  plugin = vcon.filter_plugins.FilterPluginRegistry.get("foobatchsubject").plugin()
+  # other tests may have used the plugin
+  num_batch_calls = getattr(plugin, "num_batch_calls", 0)
+  num_filter_calls = getattr(plugin, "num_filter_calls", 0)
+  out_vcons = await vcon.Vcon.filter_many(make_vcons(4), "foobatchsubject", {})
+  assert([out_vcon.subject for out_vcon in out_vcons] == ["foo batch of 4"] * 4)
+  assert(plugin.num_batch_calls == num_batch_calls + 1)
+  assert(plugin.num_filter_calls == num_filter_calls)
+
+  # all Vcons must be in a valid state before any are filtered
+  in_vcons = make_vcons(2)
+  in_vcons[1]._state = vcon.VconStates.SIGNED
+  with pytest.raises(vcon.InvalidVconState):
+    await vcon.Vcon.filter_many(in_vcons, "foobatchsubject", {})
+  assert(in_vcons[0].subject is None)
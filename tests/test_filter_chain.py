@@ -0,0 +1,97 @@
+""" Unit tests for FilterPluginChain """
+
+import vcon
+import vcon.filter_plugins
+import pytest
+
+# test foo registration file
+import tests.foo_reg
+
+
+def append_step(text: str, input_vcon: int = -1):
+  return({"plugin": "fooappendsubject", "options": {"text": text}, "input_vcon": input_vcon})
+
+
+@pytest.mark.asyncio
+async def test_chain_in_place():
+  in_vcon = vcon.Vcon()
+  in_vcon.set_subject("")
+  out_vcon = await in_vcon.filter(
+    "filter_chain",
+    {"steps": [append_step(text) for text in "abcde"]}
+    )
+
+  # the chain modifies the vCon in place, without copies between steps
+  assert(out_vcon is in_vcon)
+  assert(out_vcon.subject == "abcde")
+  chain = vcon.filter_plugins.FilterPluginRegistry.get("filter_chain").plugin()
+  assert(chain.last_stats == {"num_steps": 5, "num_copies": 0})
+  assert(vcon.filter_plugins.FilterPluginRegistry.get("fooappendsubject").plugin().num_filter_calls >= 5)
+
+  # read only steps do not cause copies
+  out_vcon = await in_vcon.filter(
+    "filter_chain",
+    {"steps": [
+      append_step("f"),
+      {"plugin": "fooreadsubject"},
+      append_step("g", 1)
+    ]})
+  assert(out_vcon is in_vcon)
+  assert(out_vcon.subject == "abcdefg")
+  assert(vcon.filter_plugins.FilterPluginRegistry.get("fooreadsubject").plugin().last_subject == "abcdef")
+  assert(chain.last_stats == {"num_steps": 3, "num_copies": 0})
+
+
+@pytest.mark.asyncio
+async def test_chain_copies():
+  in_vcon = vcon.Vcon()
+  in_vcon.set_subject("")
+  # last step takes the chain input, which the first step would have modified
+  out_vcon = await in_vcon.filter(
+    "filter_chain",
+    {"steps": [append_step("a"), append_step("b"), append_step("c", 0)]}
+    )
+
+  chain = vcon.filter_plugins.FilterPluginRegistry.get("filter_chain").plugin()
+  assert(chain.last_stats == {"num_steps": 3, "num_copies": 1})
+  assert(in_vcon.subject == "c")
+  assert(out_vcon is in_vcon)
+
+  # branch off the output of step 1
+  in_vcon = vcon.Vcon()
+  in_vcon.set_subject("")
+  out_vcon = await in_vcon.filter(
+    "filter_chain",
+    {"steps": [append_step("a"), append_step("b"), append_step("c", 1)]}
+    )
+  assert(chain.last_stats == {"num_steps": 3, "num_copies": 1})
+  assert(out_vcon.subject == "ac")
+  assert(in_vcon.subject == "ac")
+
+
+@pytest.mark.asyncio
+async def test_registered_chain():
+  in_vcon = vcon.Vcon()
+  in_vcon.set_subject("x")
+  out_vcon = await in_vcon.foochain({})
+  assert(out_vcon.subject == "xab")
+
+  # steps in the filter options replace the registered steps
+  out_vcon = await in_vcon.foochain({"steps": [append_step("c")]})
+  assert(out_vcon.subject == "xabc")
+
+  try:
+    await in_vcon.filter("filter_chain", {"steps": [append_step("a"), append_step("b", 3)]})
+    raise Exception("Expected exception for step input_vcon after the step")
+
+  except AttributeError as invalid_step:
+    # expected
+    pass
+
+  try:
+    await in_vcon.filter("filter_chain", {"steps": [{"plugin": "doesnotexist"}]})
+    raise Exception("Expected exception for step plugin which is not registered")
+
+  except vcon.filter_plugins.FilterPluginNotRegistered as not_reg_error:
+    # expected
+    pass
@@ -0,0 +1,81 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit test for running CPU bound filter plugins in an executor off of the event loop """
+
+import os
+import asyncio
+import pytest
+import vcon
+import vcon.filter_plugins
+
+# test foo registration file
+import tests.foo_reg
+from tests.test_filter_batch import make_vcons
+
+
+@pytest.mark.asyncio
+async def test_thread_executor():
+  vcon.filter_plugins.FilterPluginRegistry.set_executor("thread", 2)
+  ticks = 0
+  async def tick():
+    nonlocal ticks
+    while(True):
+      await asyncio.sleep(0.02)
+      ticks += 1
+
+  ticker = asyncio.create_task(tick())
+  try:
+    try:
+      in_vcon = make_vcons(1)[0]
+      out_vcon = await in_vcon.filter("foocpubound", {"sleep": 0.5})
+    finally:
+      ticker.cancel()
+
+    # filtered in place on an executor thread
+    assert(out_vcon is in_vcon)
+    pid, thread_name = out_vcon.subject.split(" ")
+    assert(int(pid) == os.getpid())
+    assert(thread_name.startswith("filter_plugin"))
+    # the event loop was not blocked while the plugin ran
+    assert(ticks >= 5)
+
+    # default filter_batch filters each Vcon concurrently in the executor
+    out_vcons = await vcon.Vcon.filter_many(make_vcons(3), "foocpubound", {})
+    assert(len(out_vcons) == 3)
+    for index, out_vcon in enumerate(out_vcons):
+      assert(out_vcon.parties[0]["tel"] == str(index))
+      assert(out_vcon.subject.split(" ")[1].startswith("filter_plugin"))
+
+  finally:
+    vcon.filter_plugins.FilterPluginRegistry.set_executor("none")
+
+
+@pytest.mark.asyncio
+async def test_process_executor():
+  vcon.filter_plugins.FilterPluginRegistry.set_executor("process", 2)
+  try:
+    in_vcons = make_vcons(3)
+    out_vcon = await in_vcons[0].filter("foocpubound", {})
+    # filtered on a copy in another process
+    assert(out_vcon is not in_vcons[0])
+    assert(in_vcons[0].subject is None)
+    assert(int(out_vcon.subject.split(" ")[0]) != os.getpid())
+    assert(out_vcon.parties[0]["tel"] == "0")
+
+    out_vcons = await vcon.Vcon.filter_many(in_vcons, "foocpubound", {})
+    assert([out_vcon.parties[0]["tel"] for out_vcon in out_vcons] == ["0", "1", "2"])
+    for out_vcon in out_vcons:
+      assert(int(out_vcon.subject.split(" ")[0]) != os.getpid())
+
+  finally:
+    vcon.filter_plugins.FilterPluginRegistry.set_executor("none")
+
+
+@pytest.mark.asyncio
+async def test_no_executor():
+  # CPU bound plugins run on the event loop unless an executor is configured
+  assert(vcon.filter_plugins.FilterPluginRegistry.get_executor() is None)
+  out_vcon = await make_vcons(1)[0].filter("foocpubound", {})
+  assert(out_vcon.subject == "{} MainThread".format(os.getpid()))
+
+  with pytest.raises(AttributeError):
+    vcon.filter_plugins.FilterPluginRegistry.set_executor("fiber")
@@ -122,3 +122,40 @@ async def test_registry():
 
   vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
 
+
+def test_load_plugins():
+  # Start with none of the plugins loaded
+  vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
+
+  # Load in parallel, waiting for the loads
+  futures = vcon.filter_plugins.FilterPluginRegistry.load_plugins(["foosubject", "foonoinittype"])
+  assert(set(futures.keys()) == {"foosubject", "foonoinittype"})
+  assert(futures["foosubject"].result() is True)
+  assert(isinstance(futures["foonoinittype"].exception(), vcon.filter_plugins.FilterPluginNotImplemented))
+
+  timings = vcon.filter_plugins.FilterPluginRegistry.get_load_timings()
+  assert(timings["foosubject"]["module"] == "tests.foo")
+  assert(timings["foosubject"]["state"] == "loaded")
+  assert(timings["foosubject"]["import_seconds"] >= 0.0)
+  assert(timings["foosubject"]["init_seconds"] >= 0.0)
+  assert(timings["foonoinittype"]["state"] == "failed")
+  assert(timings["foonoinittype"]["init_seconds"] is None)
+
+  # Load in the background, using the plugin waits for the load
+  futures = vcon.filter_plugins.FilterPluginRegistry.load_plugins(["foobatchsubject"], False)
+  plugin = vcon.filter_plugins.FilterPluginRegistry.get("foobatchsubject").plugin()
+  assert(plugin is not None)
+  assert(futures["foobatchsubject"].result(timeout = 10) is True)
+  assert(vcon.filter_plugins.FilterPluginRegistry.get_load_timings()["foobatchsubject"]["state"] == "loaded")
+
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.load_plugins(["foosubject", "doesnotexist"])
+    raise Exception("Expected exception for plugin that is not registered")
+
+  except vcon.filter_plugins.FilterPluginNotRegistered as not_reg_error:
+    # expected
+    pass
+
+  vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
+  assert(vcon.filter_plugins.FilterPluginRegistry.get_load_timings()["foosubject"]["state"] == "not_loaded")
+  assert(vcon.filter_plugins.FilterPluginRegistry.get_load_timings()["foosubject"]["import_seconds"] is None)
@@ -0,0 +1,111 @@
+""" Unit tests for the filter plugin call instrumentation """
+
+import vcon
+import vcon.filter_plugins
+import vcon.instrumentation
+import pytest
+
+# test foo registration file
+import tests.foo_reg
+
+
+def test_histogram():
+  histogram = vcon.instrumentation.Histogram(1, 4)
+  assert(histogram.bounds == [1, 2, 4, 8])
+  assert(histogram.quantile(0.5) is None)
+
+  for value in [0.5, 1, 1.5, 3, 3, 3, 7, 7, 20, 30]:
+    histogram.observe(value)
+
+  assert(histogram.count == 10)
+  assert(histogram.min == 0.5)
+  assert(histogram.max == 30)
+  assert(histogram.quantile(0.2) == 1)
+  assert(histogram.quantile(0.5) == 4)
+  assert(histogram.quantile(0.8) == 8)
+  # overflow bucket is reported as the max value
+  assert(histogram.quantile(0.99) == 30)
+
+  stats = histogram.to_dict()
+  assert(stats["count"] == 10)
+  assert(stats["sum"] == 76)
+  assert(stats["mean"] == 7.6)
+  assert(stats["buckets"] == {"1": 2, "2": 1, "4": 3, "8": 2, "inf": 2})
+
+
+def test_call_tracing_memory():
+  result, peak_memory_bytes = vcon.instrumentation.call_tracing_memory(lambda size: len(bytearray(size)), 1000000)
+  assert(result == 1000000)
+  assert(peak_memory_bytes >= 1000000)
+  assert(not vcon.instrumentation.tracemalloc.is_tracing())
+
+
+@pytest.mark.asyncio
+async def test_filter_stats():
+  sample_rate = vcon.instrumentation.CallInstrumentation.sample_rate
+  vcon.instrumentation.CallInstrumentation.sample_rate = 1.0
+  vcon.filter_plugins.FILTER_PLUGIN_STATS.reset()
+  try:
+    in_vcon = vcon.Vcon()
+    in_vcon.set_uuid("py-vcon.dev")
+    in_vcon.set_subject("")
+    for text in "abc":
+      in_vcon = await in_vcon.filter("fooappendsubject", {"text": text * 1000})
+
+    # CPU bound plugin run in an executor thread
+    vcon.filter_plugins.FilterPluginRegistry.set_executor("thread", 2)
+    try:
+      await in_vcon.foocpubound({})
+    finally:
+      vcon.filter_plugins.FilterPluginRegistry.set_executor("none")
+    batch_vcons = [vcon.Vcon(), vcon.Vcon()]
+    for batch_vcon in batch_vcons:
+      batch_vcon.set_uuid("py-vcon.dev")
+    await vcon.filter_plugins.FilterPluginRegistry.get("foobatchsubject").filter_batch(batch_vcons, {})
+
+    try:
+      await in_vcon.filter("foop", {})
+      raise Exception("Expected exception for plugin not implementing filter")
+
+    except Exception as filter_error:
+      if(str(filter_error).startswith("Expected")):
+        raise filter_error
+
+    stats = vcon.filter_plugins.stats()
+    append_stats = stats["fooappendsubject"]
+    assert(append_stats["calls"] == 3)
+    assert(append_stats["errors"] == 0)
+    assert(append_stats["wall_seconds"]["count"] == 3)
+    assert(append_stats["cpu_seconds"]["count"] == 3)
+    # memory is only traced for calls run in the executor
+    assert(append_stats["peak_memory_bytes"]["count"] == 0)
+    # each call appends 1000 characters to the subject
+    assert(append_stats["bytes_out"]["max"] - append_stats["bytes_in"]["max"] == 1000)
+    assert(append_stats["bytes_in"]["min"] < 1000)
+    assert(append_stats["bytes_in"]["max"] > 2000)
+
+    assert(stats["foocpubound"]["calls"] == 1)
+    assert(stats["foocpubound"]["cpu_seconds"]["count"] == 1)
+    assert(stats["foocpubound"]["peak_memory_bytes"]["count"] == 1)
+    assert(stats["foobatchsubject.filter_batch"]["calls"] == 1)
+    assert(stats["foobatchsubject.filter_batch"]["bytes_in"]["count"] == 1)
+    assert(stats["foop"]["calls"] == 1)
+    assert(stats["foop"]["errors"] == 1)
+
+    # no sampling of memory or bytes
+    vcon.instrumentation.CallInstrumentation.sample_rate = 0.0
+    await in_vcon.filter("fooappendsubject", {"text": "d"})
+    append_stats = vcon.filter_plugins.stats()["fooappendsubject"]
+    assert(append_stats["calls"] == 4)
+    assert(append_stats["wall_seconds"]["count"] == 4)
+    assert(append_stats["bytes_in"]["count"] == 3)
+
+    # disabled
+    vcon.instrumentation.CallInstrumentation.enabled = False
+    await in_vcon.filter("fooappendsubject", {"text": "e"})
+    assert(vcon.filter_plugins.stats()["fooappendsubject"]["calls"] == 4)
+
+  finally:
+    vcon.instrumentation.CallInstrumentation.enabled = True
+    vcon.instrumentation.CallInstrumentation.sample_rate = sample_rate
+    vcon.filter_plugins.FILTER_PLUGIN_STATS.reset()
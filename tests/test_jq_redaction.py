@@ -1,6 +1,7 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Unit test for jq_redaction plugin """
 import vcon
+import vcon.filter_plugins.impl.jq_redaction
 import pytest
 #from tests.common_utils import call_data , empty_vcon, two_party_tel_vcon
 
@@ -51,3 +52,100 @@ async def test_jq_redaction():
   assert(len(unredacted.dialog) == 1)
   assert(len(unredacted.analysis) == 3)
 
+
+def test_redact_paths():
+  """ Test copy on write removal of paths from a vCon dict """
+  body = "x" * 1000
+  vcon_dict = {
+    "vcon": "0.0.1",
+    "uuid": "1234",
+    "parties": [{"tel": "+12345678901", "name": "Alice"}, {"name": "Bob"}],
+    "dialog": [{"type": "recording", "body": body, "parties": [0, 1]}, {"type": "text", "body": "hi", "parties": 0}],
+    "analysis": [{"type": "transcript", "body": {"text": "hi"}}, {"type": "summary", "body": "greeting"}],
+    "attachments": []
+    }
+
+  redacted = vcon.filter_plugins.impl.jq_redaction.redact_paths(
+    vcon_dict,
+    [".dialog[].body", ".analysis[type=transcript]", ".parties[0].tel", ".attachments"]
+    )
+  assert(redacted["dialog"] == [{"type": "recording", "parties": [0, 1]}, {"type": "text", "parties": 0}])
+  assert(redacted["analysis"] == [{"type": "summary", "body": "greeting"}])
+  assert(redacted["parties"] == [{"name": "Alice"}, {"name": "Bob"}])
+  assert("attachments" not in redacted)
+
+  # input is unchanged
+  assert(vcon_dict["dialog"][0]["body"] is body)
+  assert(len(vcon_dict["analysis"]) == 2)
+  assert(vcon_dict["parties"][0]["tel"] == "+12345678901")
+  assert(vcon_dict["attachments"] == [])
+
+  # retained strings are shared, all objects and arrays are copied
+  assert(redacted["analysis"][0]["body"] is vcon_dict["analysis"][1]["body"])
+  assert(redacted["dialog"][0]["parties"] == vcon_dict["dialog"][0]["parties"])
+  assert(redacted["dialog"][0]["parties"] is not vcon_dict["dialog"][0]["parties"])
+  assert(redacted["parties"][1] == vcon_dict["parties"][1])
+  assert(redacted["parties"][1] is not vcon_dict["parties"][1])
+  assert(redacted["parties"] is not vcon_dict["parties"])
+
+  # nested objects are not shared
+  redacted = vcon.filter_plugins.impl.jq_redaction.redact_paths(vcon_dict, [".dialog[].body"])
+  redacted["analysis"][0]["body"]["text"] = "changed"
+  assert(vcon_dict["analysis"][0]["body"]["text"] == "hi")
+
+  # index and negative index, missing paths are ignored
+  redacted = vcon.filter_plugins.impl.jq_redaction.redact_paths(
+    vcon_dict,
+    [".dialog[-1]", ".analysis[5]", ".group[].uuid", ".dialog[0].foo"]
+    )
+  assert(len(redacted["dialog"]) == 1)
+  assert(redacted["dialog"][0]["body"] is body)
+  assert(len(redacted["analysis"]) == 2)
+
+  for bad_path in ["dialog", "[].body", ".dialog[x", ""]:
+    try:
+      vcon.filter_plugins.impl.jq_redaction.redact_paths(vcon_dict, [bad_path])
+      raise Exception("Expected exception for invalid path: {}".format(bad_path))
+
+    except AttributeError:
+      # expected
+      pass
+
+
+@pytest.mark.asyncio
+async def test_jq_redaction_paths():
+  """ Test structural redaction with paths in place of a JQ query """
+  unredacted = vcon.Vcon()
+  unredacted.load("tests/example_external_dialog.vcon")
+  unredacted.set_party_parameter("name", "Alice", 0)
+  unredacted.set_party_parameter("name", "Bob", 1)
+  analysis_types = [analysis["type"] for analysis in unredacted.analysis]
+
+  options = {
+      "redaction_paths": [".parties[].tel", ".dialog[].body", ".dialog[].url", ".analysis[type=transcript]"],
+      "redaction_type_label": "Test Redaction",
+      "uuid_domain": "py-vcon.org"
+    }
+
+  redacted = await unredacted.jq_redaction(options)
+
+  assert(len(redacted.parties) == 2)
+  assert(redacted.parties[0] == {"name": "Alice"})
+  assert(redacted.parties[1] == {"name": "Bob"})
+  assert(len(redacted.dialog) == 1)
+  assert(redacted.dialog[0].get("url", None) is None)
+  assert(redacted.dialog[0].get("body", None) is None)
+  assert(redacted.dialog[0]["type"] == "recording")
+  assert(len(redacted.analysis) == len([analysis_type for analysis_type in analysis_types if analysis_type != "transcript"]))
+  assert(redacted.redacted["uuid"] == unredacted.uuid)
+  assert(redacted.uuid != unredacted.uuid)
+
+  # modifying the redacted vCon does not modify the unredacted
+  redacted.set_party_parameter("name", "Carol", 0)
+  redacted.add_analysis(0, "summary", "a summary", "py-vcon", "text")
+  assert(unredacted.parties[0]["name"] == "Alice")
+  assert(len(unredacted.analysis) == len(analysis_types))
+  assert(unredacted.dialog[0].get("url", None) is not None)
+  assert(unredacted.redacted is None or
+      unredacted.redacted == {}
+    )
@@ -290,3 +290,68 @@ def test_encrypt_decrypt_serialization(two_party_tel_vcon : vcon.Vcon) -> None:
 
   assert(reconstituted_unsigned_vcon.parties[0]['tel'] == call_data['source'])
   assert(reconstituted_unsigned_vcon.parties[1]['tel'] == call_data['destination'])
+
+
+def test_multiple_recipient_encrypt_decrypt(two_party_tel_vcon : vcon.Vcon) -> None:
+  two_party_tel_vcon.sign(GROUP_PRIVATE_KEY, [GROUP_CERT, DIVISION_CERT, CA_CERT])
+  two_party_tel_vcon.encrypt([DIVISION_CERT, GROUP_CERT])
+  assert(two_party_tel_vcon._state == vcon.VconStates.ENCRYPTED)
+
+  encrypted_serialized_vcon = two_party_tel_vcon.dumps()
+  jwe_dict = json.loads(encrypted_serialized_vcon)
+  # one ciphertext, a content key per recipient
+  assert(len(jwe_dict["recipients"]) == 2)
+  assert(jwe_dict["recipients"][0]["header"]["kid"] == vcon.security.get_encryption_key(DIVISION_CERT)[1])
+  assert(jwe_dict["recipients"][1]["header"]["kid"] == vcon.security.get_encryption_key(GROUP_CERT)[1])
+  assert(jwe_dict["unprotected"]["uuid"] == two_party_tel_vcon.uuid)
+
+  for private_key, cert in [(DIVISION_PRIVATE_KEY, DIVISION_CERT), (GROUP_PRIVATE_KEY, GROUP_CERT)]:
+    reconstituted_vcon = vcon.Vcon()
+    reconstituted_vcon.loads(encrypted_serialized_vcon)
+    assert(reconstituted_vcon._state == vcon.VconStates.ENCRYPTED)
+    reconstituted_vcon.decrypt(private_key, cert)
+    assert(reconstituted_vcon._state == vcon.VconStates.UNVERIFIED)
+    reconstituted_vcon.verify([CA_CERT])
+    assert(reconstituted_vcon.parties[0]['tel'] == call_data['source'])
+
+  # not one of the recipients
+  two_party_tel_vcon = vcon.Vcon()
+  two_party_tel_vcon.loads(encrypted_serialized_vcon)
+  two_party_tel_vcon._jwe_dict["recipients"] = two_party_tel_vcon._jwe_dict["recipients"][1:]
+  try:
+    two_party_tel_vcon.decrypt(DIVISION_PRIVATE_KEY, DIVISION_CERT)
+    raise Exception("Should have thrown an exception as division is not a recipient")
+
+  except vcon.security.InvalidJwe as not_recipient_error:
+    # expected
+    pass
+
+
+def test_jwe_json_compatibility() -> None:
+  plaintext = b"0123456789abcdef" * 1000 + b"xyz"
+  division_key = vcon.security.get_encryption_key(DIVISION_CERT)
+  division_private_key = vcon.security.get_decryption_key(DIVISION_PRIVATE_KEY, DIVISION_CERT)
+
+  # chunk sizes which do and do not divide the plaintext
+  for chunk_size in [16, 4096, vcon.security.JWE_CHUNK_SIZE]:
+    jwe_dict = vcon.security.jwe_encrypt_json(plaintext, [division_key], chunk_size = chunk_size)
+    assert(vcon.security.jwe_decrypt_json(jwe_dict, division_private_key, division_key[1], chunk_size = 32) == plaintext)
+
+  # single recipient JWE JSON can be converted to a compact token decrypted by jose
+  jwe_compact_token = vcon.security.jwe_complete_serialization_to_compact_token(jwe_dict)
+  assert(jose.jwe.decrypt(jwe_compact_token, division_private_key) == plaintext)
+
+  # jose encrypted compact token converted to JWE JSON, as done by earlier versions of Vcon.encrypt
+  jwe_compact_token = jose.jwe.encrypt(plaintext, division_key[2], "A256CBC-HS512", division_key[0]).decode('utf-8')
+  jwe_dict = vcon.security.jwe_compact_token_to_complete_serialization(jwe_compact_token, enc = "A256CBC-HS512", x5c = [])
+  assert(vcon.security.jwe_decrypt_json(jwe_dict, division_private_key, division_key[1]) == plaintext)
+
+  # tampered ciphertext
+  jwe_dict["ciphertext"] = "A" + jwe_dict["ciphertext"][1:]
+  try:
+    vcon.security.jwe_decrypt_json(jwe_dict, division_private_key, division_key[1])
+    raise Exception("Should have thrown an exception as the ciphertext was modified")
+
+  except vcon.security.InvalidJwe as tag_error:
+    # expected
+    pass
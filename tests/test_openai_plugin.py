@@ -2,6 +2,7 @@
 """ Unit test for OpenAI filter plugins """
 import os
 import json
+import asyncio
 import pydantic
 import vcon
 import vcon.filter_plugins.impl.openai
@@ -328,3 +329,307 @@ async def test_5_openai_triggers_transcribe():
   print("Response: " + out_vcon.analysis[original_analysis_count + 3]["body"]["choices"][0]["message"]["content"])
 
 
+
+
+async def start_openai_mock(stats: dict, server_errors: int = 0):
+  """
+  Start a local mock of the OpenAI completions and chat completions endpoints.
+  The first request is rate limited (429), the next **server_errors** requests
+  fail (500), completions echo the last word of the prompt.
+  """
+  import aiohttp.web
+
+  stats.update({"requests": 0, "rate_limited": 0, "server_errors": 0, "in_flight": 0, "max_in_flight": 0})
+  async def complete(request):
+    assert(request.headers["Authorization"] == "Bearer mock_key")
+    request_body = await request.json()
+    stats["requests"] += 1
+    if(stats["rate_limited"] == 0):
+      stats["rate_limited"] += 1
+      return(aiohttp.web.json_response(
+        {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+        status = 429,
+        headers = {"retry-after-ms": "200"}
+        ))
+
+    if(stats["server_errors"] < server_errors):
+      stats["server_errors"] += 1
+      return(aiohttp.web.json_response(
+        {"error": {"message": "The server had an error", "type": "server_error", "code": None}},
+        status = 500
+        ))
+
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    await asyncio.sleep(0.1)
+    stats["in_flight"] -= 1
+    response = {
+      "id": "mock-{}".format(stats["requests"]),
+      "created": 0,
+      "model": request_body["model"],
+      "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+      }
+    if("messages" in request_body):
+      response["object"] = "chat.completion"
+      response["choices"] = [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": "chat of {} messages".format(len(request_body["messages"]))}
+        }]
+    else:
+      response["object"] = "text_completion"
+      response["choices"] = [{
+        "index": 0,
+        "finish_reason": "stop",
+        "logprobs": None,
+        "text": "summary of " + request_body["prompt"].split()[-1]
+        }]
+    return(aiohttp.web.json_response(response))
+
+  app = aiohttp.web.Application()
+  app.router.add_post("/v1/completions", complete)
+  app.router.add_post("/v1/chat/completions", complete)
+  runner = aiohttp.web.AppRunner(app)
+  await runner.setup()
+  site = aiohttp.web.TCPSite(runner, "127.0.0.1", 0)
+  await site.start()
+  return(runner, "http://127.0.0.1:{}/v1".format(runner.addresses[0][1]))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_mock():
+  """ Test concurrent, rate limited per dialog completions against a local OpenAI mock """
+  stats = {}
+  runner, url = await start_openai_mock(stats, 1)
+  try:
+    init_options = {
+      "openai_api_key": "mock_key",
+      "openai_base_url": url,
+      "max_concurrent_requests": 3,
+      "requests_per_minute": 6000
+      }
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "openai_completion_mock",
+      "vcon.filter_plugins.impl.openai",
+      "OpenAICompletion",
+      "OpenAI completion using a local mock",
+      init_options,
+      replace = True
+      )
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "openai_chat_completion_mock",
+      "vcon.filter_plugins.impl.openai",
+      "OpenAIChatCompletion",
+      "OpenAI chat completion using a local mock",
+      init_options,
+      replace = True
+      )
+
+    in_vcon = vcon.Vcon()
+    in_vcon.set_party_parameter("name", "Alice")
+    in_vcon.set_party_parameter("name", "Bob")
+    for index in range(8):
+      in_vcon.add_dialog_inline_text(
+        "chat message number{}".format(index),
+        "2023-08-31T18:26:{:02d}.000+00:00".format(index),
+        0,
+        index % 2,
+        vcon.Vcon.MIMETYPE_TEXT_PLAIN
+        )
+
+    out_vcon = await in_vcon.filter("openai_completion_mock", {"model": TEST_MODEL})
+
+    # rate limited request was retried after the retry-after time and
+    # the failed request was retried
+    assert(stats["rate_limited"] == 1)
+    assert(stats["server_errors"] == 1)
+    assert(stats["requests"] == 10)
+    plugin = vcon.filter_plugins.FilterPluginRegistry.get("openai_completion_mock").plugin()
+    assert(plugin.client.rate_limiter.num_rate_limited == 1)
+    assert(plugin.client.rate_limiter.rate_scale < 1.0)
+
+    # requests were concurrent up to max_concurrent_requests
+    assert(stats["max_in_flight"] == 3)
+
+    # analysis in dialog order
+    assert(len(out_vcon.analysis) == 8)
+    for index, analysis in enumerate(out_vcon.analysis):
+      assert(analysis["dialog"] == index)
+      assert(analysis["body"] == "summary of number{}".format(index))
+
+    # chat completions of many vCons concurrently
+    out_vcons = await vcon.Vcon.filter_many(
+      [out_vcon, vcon.Vcon(), vcon.Vcon()],
+      "openai_chat_completion_mock",
+      {"model": TEST_CHAT_MODEL, "input_dialogs": "0:2"}
+      )
+    assert(len(out_vcons) == 3)
+    assert(out_vcons[0].analysis[-1]["body"] == "chat of 4 messages")
+    assert(out_vcons[0].analysis[-1]["dialog"] == [0, 1])
+
+  finally:
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_mock():
+  """ Test caching of deterministic responses against a local OpenAI mock """
+  stats = {}
+  runner, url = await start_openai_mock(stats)
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "openai_chat_completion_cache_mock",
+      "vcon.filter_plugins.impl.openai",
+      "OpenAIChatCompletion",
+      "OpenAI chat completion using a local mock and response cache",
+      {
+        "openai_api_key": "mock_key",
+        "openai_base_url": url,
+        "response_cache": "memory:"
+      },
+      replace = True
+      )
+
+    in_vcon = vcon.Vcon()
+    in_vcon.set_uuid("py-vcon.dev")
+    in_vcon.set_party_parameter("name", "Alice")
+    in_vcon.set_party_parameter("name", "Bob")
+    for index in range(2):
+      in_vcon.add_dialog_inline_text(
+        "chat message number{}".format(index),
+        "2023-08-31T18:26:{:02d}.000+00:00".format(index),
+        0,
+        index % 2,
+        vcon.Vcon.MIMETYPE_TEXT_PLAIN
+        )
+    vcon_json = in_vcon.dumps()
+    def copy_vcon():
+      vcon_copy = vcon.Vcon()
+      vcon_copy.loads(vcon_json)
+      return(vcon_copy)
+
+    # first request is rate limited and retried
+    out_vcon = await in_vcon.filter("openai_chat_completion_cache_mock", {"model": TEST_CHAT_MODEL})
+    assert(stats["requests"] == 2)
+    assert(out_vcon.analysis[-1]["body"] == "chat of 4 messages")
+    plugin = vcon.filter_plugins.FilterPluginRegistry.get("openai_chat_completion_cache_mock").plugin()
+    assert(plugin.client.response_cache.stats()["misses"] == 1)
+
+    # temperature 0, same request is served from the cache
+    out_vcon = await copy_vcon().filter("openai_chat_completion_cache_mock", {"model": TEST_CHAT_MODEL})
+    assert(stats["requests"] == 2)
+    assert(out_vcon.analysis[-1]["body"] == "chat of 4 messages")
+    cache_stats = plugin.client.response_cache.stats()
+    assert(cache_stats["hits"] == 1)
+    assert(cache_stats["hit_ratio"] == 0.5)
+
+    # different sampling options are a different request
+    options = {"model": TEST_CHAT_MODEL, "max_tokens": 50}
+    await copy_vcon().filter("openai_chat_completion_cache_mock", options)
+    assert(stats["requests"] == 3)
+
+    # non-zero temperature is not cached
+    options = {"model": TEST_CHAT_MODEL, "temperature": 0.5}
+    await copy_vcon().filter("openai_chat_completion_cache_mock", options)
+    await copy_vcon().filter("openai_chat_completion_cache_mock", options)
+    assert(stats["requests"] == 5)
+
+    # unless cache is set
+    options["cache"] = True
+    await copy_vcon().filter("openai_chat_completion_cache_mock", options)
+    await copy_vcon().filter("openai_chat_completion_cache_mock", options)
+    assert(stats["requests"] == 6)
+    assert(plugin.client.response_cache.stats()["hits"] == 2)
+
+    # published with the other filter plugin cache stats
+    plugin_cache_stats = vcon.filter_plugins.cache_stats()["openai_chat_completion_cache_mock"]
+    assert(plugin_cache_stats["response_cache"]["hits"] == 2)
+    assert(plugin_cache_stats["response_cache"]["misses"] == 3)
+
+  finally:
+    await runner.cleanup()
+
+
+def test_chunk_messages():
+  """ Test token budgeted chunking of chat messages """
+  messages = [{"role": "user", "content": "message {} ".format(index) + "word " * 20} for index in range(10)]
+  tokens = [vcon.filter_plugins.impl.openai.count_tokens(message["content"], TEST_CHAT_MODEL) +
+    vcon.filter_plugins.impl.openai.MESSAGE_TOKEN_OVERHEAD for message in messages]
+  max_chunk_tokens = sum(tokens[0:3])
+  chunks = vcon.filter_plugins.impl.openai.chunk_messages(messages, max_chunk_tokens, TEST_CHAT_MODEL)
+  assert(len(chunks) == 4)
+  assert([len(chunk) for chunk in chunks] == [3, 3, 3, 1])
+  # order is preserved
+  assert([message for chunk in chunks for message in chunk] == messages)
+
+  # message longer than the budget is split at white space
+  long_message = {"role": "user", "content": " ".join(["word{}".format(index) for index in range(100)])}
+  chunks = vcon.filter_plugins.impl.openai.chunk_messages([long_message], 40, TEST_CHAT_MODEL)
+  assert(len(chunks) > 1)
+  for chunk in chunks:
+    assert(sum([vcon.filter_plugins.impl.openai.count_tokens(message["content"], TEST_CHAT_MODEL) +
+      vcon.filter_plugins.impl.openai.MESSAGE_TOKEN_OVERHEAD for message in chunk]) <= 40)
+  assert(" ".join([message["content"] for chunk in chunks for message in chunk]) == long_message["content"])
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_chat_completion_mock():
+  """ Test chunked, map-reduce chat completion of a long conversation against a local OpenAI mock """
+  stats = {}
+  runner, url = await start_openai_mock(stats)
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "openai_chat_completion_map_mock",
+      "vcon.filter_plugins.impl.openai",
+      "OpenAIChatCompletion",
+      "OpenAI chat completion using a local mock",
+      {
+        "openai_api_key": "mock_key",
+        "openai_base_url": url
+      },
+      replace = True
+      )
+
+    in_vcon = vcon.Vcon()
+    in_vcon.set_party_parameter("name", "Alice")
+    in_vcon.set_party_parameter("name", "Bob")
+    for index in range(40):
+      in_vcon.add_dialog_inline_text(
+        "chat message number{}".format(index),
+        "2023-08-31T18:{:02d}:00.000+00:00".format(index),
+        0,
+        index % 2,
+        vcon.Vcon.MIMETYPE_TEXT_PLAIN
+        )
+
+    # fits in budget, single request
+    options = {"model": TEST_CHAT_MODEL, "max_input_tokens": 100000}
+    out_vcon = await in_vcon.filter("openai_chat_completion_map_mock", options)
+    # first request is rate limited and retried
+    assert(stats["requests"] == 2)
+    assert(out_vcon.analysis[-1]["body"] == "chat of 42 messages")
+    plugin = vcon.filter_plugins.FilterPluginRegistry.get("openai_chat_completion_map_mock").plugin()
+    assert(plugin.last_stats["num_map_completions"] == 0)
+
+    # chunked in to parallel map requests and a reduce request
+    options = {"model": TEST_CHAT_MODEL, "max_input_tokens": 400, "map_max_tokens": 50}
+    out_vcon = await in_vcon.filter("openai_chat_completion_map_mock", options)
+    num_maps = plugin.last_stats["num_map_completions"]
+    assert(num_maps > 1)
+    assert(stats["requests"] == 2 + num_maps + 1)
+    assert(stats["max_in_flight"] > 1)
+    # reduce completion gets a message per map completion
+    assert(out_vcon.analysis[-1]["body"] == "chat of {} messages".format(num_maps + 2))
+    assert(out_vcon.analysis[-1]["dialog"] == list(range(40)))
+
+    # budget too small for the prompts
+    try:
+      await in_vcon.filter("openai_chat_completion_map_mock", {"model": TEST_CHAT_MODEL, "max_input_tokens": 100})
+      raise Exception("Expected exception for max_input_tokens too small")
+
+    except AttributeError:
+      # expected
+      pass
+
+  finally:
+    await runner.cleanup()
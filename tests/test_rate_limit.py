@@ -0,0 +1,31 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for rate limiting of requests to third party services """
+
+import time
+import pytest
+import vcon.rate_limit
+
+
+def test_token_bucket_reserve():
+  bucket = vcon.rate_limit.TokenBucket(10, 2)
+  # burst of capacity
+  assert(bucket.reserve() == 0.0)
+  assert(bucket.reserve() == 0.0)
+  # waiting requests reserve in order
+  assert(0.09 <= bucket.reserve() <= 0.1)
+  assert(0.19 <= bucket.reserve() <= 0.2)
+
+  # no limit
+  bucket = vcon.rate_limit.TokenBucket(0)
+  for count in range(100):
+    assert(bucket.reserve(5) == 0.0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire():
+  bucket = vcon.rate_limit.TokenBucket(20)
+  start = time.monotonic()
+  for count in range(25):
+    await bucket.acquire()
+  # 20 token burst, then 5 at 20 per second
+  assert(0.23 <= time.monotonic() - start < 1.0)
@@ -0,0 +1,116 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for the rule based PII redaction filter plugin """
+import pytest
+import vcon
+import vcon.filter_plugins.impl.redact_pii_rules
+
+
+TEXT = "my email is test@mail.com and number is 617 555 1234, card 4111 1111 1111 1111 " \
+  "not 4111 1111 1111 1112, ssn 123-45-6789, account Ac-10023 call (617) 555-1234 ushers"
+
+def test_luhn():
+  assert(vcon.filter_plugins.impl.redact_pii_rules.luhn_valid("4111 1111 1111 1111"))
+  assert(vcon.filter_plugins.impl.redact_pii_rules.luhn_valid("5500-0000-0000-0004"))
+  assert(not vcon.filter_plugins.impl.redact_pii_rules.luhn_valid("4111 1111 1111 1112"))
+  assert(not vcon.filter_plugins.impl.redact_pii_rules.luhn_valid(""))
+
+
+def test_keyword_automaton():
+  terms = {"he": "PRONOUN", "she": "PRONOUN", "his": "PRONOUN", "hers": "PRONOUN"}
+  automaton = vcon.filter_plugins.impl.redact_pii_rules.KeywordAutomaton(terms)
+  matches = sorted(automaton.iter_matches("UsHers"))
+  assert(matches == [(1, 4, "PRONOUN"), (2, 4, "PRONOUN"), (2, 6, "PRONOUN")])
+
+  # pure python automaton gives the same matches as pyahocorasick
+  automaton._automaton = None
+  automaton._build({term: label for term, label in terms.items()})
+  assert(sorted(automaton.iter_matches("UsHers")) == matches)
+
+  automaton = vcon.filter_plugins.impl.redact_pii_rules.KeywordAutomaton(terms, True)
+  assert(sorted(automaton.iter_matches("UsHers")) == [])
+
+
+def test_pii_rules():
+  rules = vcon.filter_plugins.impl.redact_pii_rules.PiiRules(
+    {"ACCOUNT_ID": ["AC-10023", "hers"]},
+    vcon.filter_plugins.impl.redact_pii_rules.DEFAULT_PATTERNS
+    )
+  labels = rules.label(TEXT)
+  assert([(TEXT[start:end], label) for start, end, label in labels] == [
+    ("test@mail.com", "EMAIL_ADDRESS"),
+    ("617 555 1234", "PHONE_NUMBER"),
+    ("4111 1111 1111 1111", "CREDIT_CARD"),
+    ("123-45-6789", "SSN"),
+    ("Ac-10023", "ACCOUNT_ID"),
+    ("(617) 555-1234", "PHONE_NUMBER")
+    ])
+
+  # requested label is not hidden by a longer overlapping label which was not requested
+  rules = vcon.filter_plugins.impl.redact_pii_rules.PiiRules(
+    {"ACCOUNT_ID": ["ssn 123-45-6789"]},
+    vcon.filter_plugins.impl.redact_pii_rules.DEFAULT_PATTERNS
+    )
+  assert([TEXT[start:end] for start, end, label in rules.label(TEXT) if label in ("SSN", "ACCOUNT_ID")] ==
+    ["ssn 123-45-6789"])
+  labels = rules.label(TEXT, {"SSN"})
+  assert([(TEXT[start:end], label) for start, end, label in labels] == [("123-45-6789", "SSN")])
+
+  # a card number candidate failing the Luhn check does not hide the phone number
+  rules = vcon.filter_plugins.impl.redact_pii_rules.PiiRules(
+    {},
+    vcon.filter_plugins.impl.redact_pii_rules.DEFAULT_PATTERNS
+    )
+  for text, phone in [
+      ("call me at 415 555 1234 5678 thanks", "415 555 1234"),
+      ("numbers 4155551234 1234", "4155551234")
+    ]:
+    assert([(text[start:end], label) for start, end, label in rules.label(text)] == [(phone, "PHONE_NUMBER")])
+
+
+@pytest.mark.asyncio
+async def test_redact_pii_rules_plugin():
+  vcon.filter_plugins.FilterPluginRegistry.register(
+    "redact_pii_rules_test",
+    "vcon.filter_plugins.impl.redact_pii_rules",
+    "RedactPiiRules",
+    "rule based PII redaction with account IDs",
+    {
+      "dictionary": {"ACCOUNT_ID": ["AC-10023"]},
+      "patterns": {"ORDER_NUMBER": "\\bORD\\d{6}\\b"}
+    },
+    replace = True
+    )
+
+  in_vcon = vcon.Vcon()
+  in_vcon.set_party_parameter("name", "Alice")
+  in_vcon.set_party_parameter("name", "Bob")
+  in_vcon.add_dialog_inline_text(
+    TEXT,
+    "2023-08-31T18:26:00.000+00:00",
+    0,
+    0,
+    vcon.Vcon.MIMETYPE_TEXT_PLAIN
+    )
+  in_vcon.add_dialog_inline_text(
+    "order ORD123456 was shipped",
+    "2023-08-31T18:27:00.000+00:00",
+    0,
+    1,
+    vcon.Vcon.MIMETYPE_TEXT_PLAIN
+    )
+
+  out_vcon = await in_vcon.filter("redact_pii_rules_test", {})
+  assert(len(out_vcon.analysis) == 2)
+  analysis = out_vcon.analysis[0]
+  assert(analysis["type"] == vcon.filter_plugins.impl.redact_pii_rules.ANALYSIS_TYPE)
+  assert(analysis["dialog"] == 0)
+  assert(analysis["product"] == "redact_pii_rules")
+  assert(analysis["body"][0]["text"] == "my email is {{EMAIL_ADDRESS}} and number is {{PHONE_NUMBER}}, "
+    "card {{CREDIT_CARD}} not 4111 1111 1111 1112, ssn {{SSN}}, account {{ACCOUNT_ID}} call {{PHONE_NUMBER}} ushers")
+  assert(analysis["body"][0]["party"] == 0)
+  assert(out_vcon.analysis[1]["body"][0]["text"] == "order {{ORDER_NUMBER}} was shipped")
+
+  # only the given labels
+  out_vcon = await in_vcon.filter("redact_pii_rules_test", {"input_dialogs": "0:1", "labels": ["SSN"]})
+  assert(len(out_vcon.analysis) == 3)
+  assert(out_vcon.analysis[2]["body"][0]["text"] == TEXT.replace("123-45-6789", "{{SSN}}"))
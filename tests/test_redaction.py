@@ -1,9 +1,10 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Unit test for the sample redaction filter plugin """
 
 import json
 import pytest
 import vcon
+import vcon.filter_plugins.impl.redact_pii
 # Register and load the redaction filter plugin
 
 TRANSCRIBED_VCON_FILE       = "tests/example_deepgram_external_dialog.vcon"
@@ -41,3 +42,18 @@ async def test_pii_redaction():
 
   vcon.filter_plugins.FilterPluginRegistry.shutdown_plugins()
 
+
+def test_redact_text():
+  """ Test replacement of labeled PII spans in text """
+  text = "my email is test@mail.com and number is 617 555 1234"
+  labels = [(40, 52, "PHONE_NUMBER"), (12, 25, "EMAIL_ADDRESS")]
+  redacted = vcon.filter_plugins.impl.redact_pii.redact_text(text, labels)
+  assert(redacted == "my email is {{EMAIL_ADDRESS}} and number is {{PHONE_NUMBER}}")
+
+  # no labels
+  assert(vcon.filter_plugins.impl.redact_pii.redact_text(text, []) == text)
+
+  # overlapping spans are redacted once, end past the end of the text
+  labels = [(0, 2, "PRONOUN"), (1, 5, "OTHER"), (40, 60, "PHONE_NUMBER")]
+  redacted = vcon.filter_plugins.impl.redact_pii.redact_text(text, labels)
+  assert(redacted == "{{PRONOUN}} email is test@mail.com and number is {{PHONE_NUMBER}}")
@@ -409,3 +409,88 @@ def test_strings_sign_vcon(two_party_tel_vcon : vcon.Vcon) -> None:
   assert(uuid == deserialized_signed_vcon.uuid)
   assert(uuid == vcon.Vcon.get_dict_uuid(deserialized_signed_vcon.dumpd()))
 
+
+
+def test_jcs() -> None:
+  # RFC8785 appendix B and section 3.2.3 examples
+  numbers = [0.0, -0.0, 1e21, 1e20, 333333333.3333333, 1e-7, 0.000001, 5e-324, 1.7976931348623157e308, 4.5, 2e-3]
+  assert([vcon.security._jcs_number(number) for number in numbers] ==
+    ["0", "0", "1e+21", "100000000000000000000", "333333333.3333333", "1e-7", "0.000001", "5e-324", "1.7976931348623157e+308", "4.5", "0.002"])
+  assert(vcon.security._jcs_number(2 ** 60) == "1152921504606847000")
+
+  value = {"€": "Euro Sign", "\r": "Carriage Return", "דּ": "Hebrew Letter Dalet With Dagesh",
+    "1": "One", "\U0001f600": "Emoji: Grinning Face", "\u0080": "Control", "ö": "Latin Small Letter O With Diaeresis"}
+  assert(list(json.loads(vcon.security.jcs_dumps(value)).values()) == ["Carriage Return", "One", "Control",
+    "Latin Small Letter O With Diaeresis", "Euro Sign", "Emoji: Grinning Face", "Hebrew Letter Dalet With Dagesh"])
+  assert(vcon.security.jcs_dumps({"b": [None, True, 1.0, "\u0001\n\""], "a": {}}) == '{"a":{},"b":[null,true,1,"\\u0001\\n\\""]}')
+
+  # large strings are yielded on their own
+  body = "x" * vcon.security.JCS_CHUNK_SIZE
+  chunks = list(vcon.security.jcs_iter({"a": 1, "body": body}))
+  assert(chunks == ['{"a":1,"body":', json.dumps(body), "}"])
+
+
+def test_canonical_sign_vcon(two_party_tel_vcon : vcon.Vcon) -> None:
+  two_party_tel_vcon.set_uuid("vcon.dev")
+  two_party_tel_vcon.add_dialog_inline_text("hello " * 1000, "2022-06-21T17:53:26.000+00:00", 0, 0, "Alice")
+  uuid = two_party_tel_vcon.uuid
+  unsigned_dict = two_party_tel_vcon.dumpd(signed = False)
+  two_party_tel_vcon.sign(GROUP_PRIVATE_KEY, [GROUP_CERT, DIVISION_CERT, CA_CERT], canonical = True)
+  assert(uuid == two_party_tel_vcon.uuid)
+
+  signed_dict = two_party_tel_vcon.dumpd()
+  # payload is the canonical JSON rather than base64url
+  assert(signed_dict["payload"] == vcon.security.jcs_dumps(unsigned_dict))
+  assert(json.loads(vcon.base64url.decode(signed_dict["signatures"][0]["protected"]))["b64"] is False)
+
+  deserialized_signed_vcon = vcon.Vcon()
+  deserialized_signed_vcon.loads(two_party_tel_vcon.dumps())
+  assert(deserialized_signed_vcon.uuid == uuid)
+  deserialized_signed_vcon.verify([CA_CERT])
+  assert(deserialized_signed_vcon.dialog[0]["body"] == "hello " * 1000)
+
+  # payload stored separately from the signature
+  detached_json = two_party_tel_vcon.dumps(detached = True)
+  assert("payload" not in json.loads(detached_json))
+  # the canonical form is verified, so the stored JSON may be reordered and reformatted
+  stored_payload = json.dumps(dict(reversed(list(unsigned_dict.items()))), indent = 2)
+  for payload in [unsigned_dict, stored_payload]:
+    detached_vcon = vcon.Vcon()
+    detached_vcon.loads(detached_json)
+    assert(detached_vcon._state == vcon.VconStates.UNVERIFIED)
+    assert(detached_vcon.uuid == uuid)
+    detached_vcon.verify([CA_CERT], detached_payload = payload)
+    assert(detached_vcon.parties[1]['tel'] == call_data['destination'])
+    # payload is restored once verified
+    assert(detached_vcon.dumpd() == signed_dict)
+
+  detached_vcon = vcon.Vcon()
+  detached_vcon.loads(detached_json)
+  try:
+    detached_vcon.verify([CA_CERT])
+    raise Exception("Should have thrown an exception as the payload is detached")
+
+  except vcon.InvalidVconState as no_payload_error:
+    # expected
+    pass
+
+  unsigned_dict["parties"][0]["tel"] = "+12345678901"
+  try:
+    detached_vcon.verify([CA_CERT], detached_payload = unsigned_dict)
+    raise Exception("Should have thrown an exception as the payload was modified")
+
+  except vcon.security.InvalidJwsSignature as modified_error:
+    # expected
+    pass
+
+  # base64url payload cannot be detached
+  two_party_tel_vcon = vcon.Vcon()
+  two_party_tel_vcon.set_uuid("vcon.dev")
+  two_party_tel_vcon.sign(GROUP_PRIVATE_KEY, [GROUP_CERT, DIVISION_CERT, CA_CERT])
+  try:
+    two_party_tel_vcon.dumps(detached = True)
+    raise Exception("Should have thrown an exception as the payload is not canonical")
+
+  except AttributeError as not_canonical_error:
+    # expected
+    pass
@@ -0,0 +1,151 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Unit tests for the transcription/result cache """
+
+import os
+import asyncio
+import vcon.cache
+import vcon.filter_plugins
+import pytest
+
+
+def test_cache_key():
+  recording = b"some audio bytes"
+  key1 = vcon.cache.make_key(
+    "transcript",
+    "openai",
+    "whisper",
+    "base",
+    {"language": "en", "task": "transcribe"},
+    vcon.cache.digest(recording)
+    )
+  assert(key1.startswith("transcript:"))
+  assert(len(key1) == len("transcript:") + 128)
+
+  # Option order should not matter
+  key2 = vcon.cache.make_key(
+    "transcript",
+    "openai",
+    "whisper",
+    "base",
+    {"task": "transcribe", "language": "en"},
+    vcon.cache.digest(recording)
+    )
+  assert(key1 == key2)
+
+  # different model
+  assert(key1 != vcon.cache.make_key(
+    "transcript",
+    "openai",
+    "whisper",
+    "tiny",
+    {"language": "en", "task": "transcribe"},
+    vcon.cache.digest(recording)
+    ))
+
+  # different recording
+  assert(key1 != vcon.cache.make_key(
+    "transcript",
+    "openai",
+    "whisper",
+    "base",
+    {"language": "en", "task": "transcribe"},
+    vcon.cache.digest(recording + b" ")
+    ))
+
+
+async def check_cache(cache: vcon.cache.ResultCache):
+  key = vcon.cache.make_key("transcript", "test", {"a": 1})
+  assert(await cache.get(key) is None)
+
+  transcript = {"text": "hello", "segments": [{"start": 0.0, "end": 1.5}]}
+  await cache.set(key, transcript)
+  assert(await cache.get(key) == transcript)
+
+  # cached value should not be effected by changes to the original
+  transcript["text"] = "goodbye"
+  assert((await cache.get(key))["text"] == "hello")
+
+  await cache.delete(key)
+  assert(await cache.get(key) is None)
+  # no exception
+  await cache.delete(key)
+
+  await cache.set(key, transcript, 1)
+  assert((await cache.get(key))["text"] == "goodbye")
+  await asyncio.sleep(1.1)
+  assert(await cache.get(key) is None)
+
+  # hit and miss counts
+  await cache.set(key, transcript)
+  assert((await cache.lookup(key))["text"] == "goodbye")
+  assert(await cache.lookup(vcon.cache.make_key("transcript", "missing")) is None)
+  hits = cache.stats()["hits"]
+  assert(hits >= 1)
+  assert(cache.stats()["misses"] >= 1)
+  assert(0.0 < cache.stats()["hit_ratio"] < 1.0)
+  await cache.delete(key)
+
+
+@pytest.mark.asyncio
+async def test_memory_cache():
+  assert(vcon.cache.ResultCache.from_url("") is None)
+  assert(vcon.cache.ResultCache.from_url(None) is None)
+
+  cache = vcon.cache.ResultCache.from_url("memory:")
+  assert(isinstance(cache, vcon.cache.MemoryResultCache))
+  assert(cache.max_entries == vcon.cache.MemoryResultCache.DEFAULT_MAX_ENTRIES)
+  await check_cache(cache)
+
+  # each get returns a copy, changes to it (e.g. offset transcript) do not alter the cache
+  key = vcon.cache.make_key("transcript", "test", "copy")
+  await cache.set(key, {"segments": [{"start": 0.0}]})
+  cached = await cache.get(key)
+  cached["segments"][0]["start"] = 10.0
+  assert(await cache.get(key) == {"segments": [{"start": 0.0}]})
+  assert(await cache.get(key) is not await cache.get(key))
+
+  # least recently used entries are dropped
+  cache = vcon.cache.ResultCache.from_url("memory:?max_entries=2")
+  assert(cache.max_entries == 2)
+  await cache.set("a", 1)
+  await cache.set("b", 2)
+  assert(await cache.get("a") == 1)
+  await cache.set("c", 3)
+  assert(await cache.get("b") is None)
+  assert(await cache.get("a") == 1)
+  assert(await cache.get("c") == 3)
+
+  with pytest.raises(vcon.cache.CacheNotSupported):
+    vcon.cache.ResultCache.from_url("memory:?max_entries=lots")
+
+
+@pytest.mark.asyncio
+async def test_disk_cache(tmp_path):
+  cache_dir = str(tmp_path / "transcripts")
+  cache = vcon.cache.ResultCache.from_url("file://" + cache_dir)
+  assert(isinstance(cache, vcon.cache.DiskResultCache))
+  await check_cache(cache)
+
+  key = vcon.cache.make_key("transcript", "test", "persist")
+  await cache.set(key, {"text": "persisted"})
+  # no temp files left behind
+  assert(len(os.listdir(cache_dir)) == 1)
+
+  # A new instance (e.g. another process) sees the same entries
+  cache2 = vcon.cache.ResultCache.from_url("file://" + cache_dir)
+  assert(await cache2.get(key) == {"text": "persisted"})
+
+
+def test_unsupported_cache():
+  with pytest.raises(vcon.cache.CacheNotSupported):
+    vcon.cache.ResultCache.from_url("ftp://example.com/cache")
+
+
+def test_transcribe_init_options():
+  init_options = vcon.filter_plugins.TranscribeInitOptions()
+  assert(init_options.transcription_cache == "")
+  assert(init_options.transcription_cache_ttl == 0)
+
+  init_options = vcon.filter_plugins.TranscribeInitOptions(transcription_cache = "memory:")
+  assert(init_options.transcription_cache == "memory:")
+
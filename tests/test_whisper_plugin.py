@@ -194,6 +194,205 @@ async def test_whisper_transcribe_external_dialog():
     vcon_file.write(json.dumps(out_vcon_dict, indent = 2))
 
 
+@pytest.mark.asyncio
+async def test_whisper_transcription_cache(tmp_path):
+  """ Test that Whisper transcripts are cached and reused for the same recording """
+  cache_dir = str(tmp_path / "transcripts")
+  vcon.filter_plugins.FilterPluginRegistry.register(
+    "whisper_cached",
+    "vcon.filter_plugins.impl.whisper",
+    "Whisper",
+    "Whisper with transcription cache",
+    {
+      "model_size": "tiny",
+      "transcription_cache": "file://" + cache_dir
+    },
+    replace = True
+    )
+
+  options = {"output_types": ["vendor", "word_srt"]}
+  in_vcon = vcon.Vcon()
+  with open("examples/test.vcon", "r") as vcon_file:
+    in_vcon.load(vcon_file)
+  analysis_count = len(in_vcon.analysis)
+  out_vcon = await in_vcon.filter("whisper_cached", options)
+  assert(len(out_vcon.analysis) == analysis_count + 2)
+  cache_files = os.listdir(cache_dir)
+  assert(len(cache_files) == 1)
+
+  # Same recording in a new vCon should get the cached transcript
+  in_vcon2 = vcon.Vcon()
+  with open("examples/test.vcon", "r") as vcon_file:
+    in_vcon2.load(vcon_file)
+  out_vcon2 = await in_vcon2.filter("whisper_cached", options)
+  assert(len(out_vcon2.analysis) == analysis_count + 2)
+  assert(os.listdir(cache_dir) == cache_files)
+  assert(out_vcon2.analysis[analysis_count]["body"] == out_vcon.analysis[analysis_count]["body"])
+  assert(out_vcon2.analysis[analysis_count + 1]["body"] == out_vcon.analysis[analysis_count + 1]["body"])
+
+
+def test_whisper_chunk_boundaries():
+  """ Test splitting of audio at silence and stitching of chunk transcripts """
+  import numpy
+  import vcon.filter_plugins.impl.whisper
+  whisper_impl = vcon.filter_plugins.impl.whisper
+  sample_rate = whisper_impl.WHISPER_SAMPLE_RATE
+
+  # 10 seconds of noise with silence at 3.5-3.9 and 7.2-7.6 seconds
+  audio = (numpy.random.default_rng(0).standard_normal(sample_rate * 10) * 0.3).astype(numpy.float32)
+  audio[int(3.5 * sample_rate):int(3.9 * sample_rate)] = 0.0
+  audio[int(7.2 * sample_rate):int(7.6 * sample_rate)] = 0.0
+
+  assert(whisper_impl.find_chunk_boundaries(audio, 0) == [(0, len(audio))])
+  assert(whisper_impl.find_chunk_boundaries(audio, 20) == [(0, len(audio))])
+
+  boundaries = whisper_impl.find_chunk_boundaries(audio, 4.0)
+  assert(len(boundaries) == 3)
+  assert(boundaries[0][0] == 0)
+  assert(boundaries[-1][1] == len(audio))
+  for index, (start, end) in enumerate(boundaries):
+    assert(end - start <= 4.0 * sample_rate)
+    if(index > 0):
+      assert(start == boundaries[index - 1][1])
+  # cuts are in the silence
+  assert(3.5 * sample_rate <= boundaries[0][1] <= 3.9 * sample_rate)
+  assert(7.2 * sample_rate <= boundaries[1][1] <= 7.6 * sample_rate)
+
+  # chunks shorter than a few frames with a one frame silence window always advance
+  for chunk_duration in [0.01, 0.05, 0.07]:
+    boundaries = whisper_impl.find_chunk_boundaries(audio[0:sample_rate], chunk_duration, silence_duration = 0.02)
+    assert(boundaries[0][0] == 0)
+    assert(boundaries[-1][1] == sample_rate)
+    for index, (start, end) in enumerate(boundaries):
+      assert(0 < end - start <= int(chunk_duration * sample_rate))
+      if(index > 0):
+        assert(start == boundaries[index - 1][1])
+
+  chunk_transcripts = [
+    {"text": " Hello.", "language": "en", "segments": [
+      {"id": 0, "start": 0.5, "end": 1.5, "seek": 0.0, "text": " Hello.",
+        "words": [{"word": " Hello.", "start": 0.5, "end": 1.5}]}
+      ]},
+    {"text": " Goodbye.", "language": "en", "segments": [
+      {"id": 0, "start": 0.25, "end": 1.0, "seek": 0.0, "text": " Goodbye.",
+        "words": [{"word": " Goodbye.", "start": 0.25, "end": 1.0}]}
+      ]}
+    ]
+  transcript = whisper_impl.stitch_transcripts(chunk_transcripts, [0.0, 3.5])
+  assert(transcript["text"] == " Hello. Goodbye.")
+  assert(transcript["language"] == "en")
+  assert([segment["id"] for segment in transcript["segments"]] == [0, 1])
+  assert(transcript["segments"][1]["start"] == 3.75)
+  assert(transcript["segments"][1]["end"] == 4.5)
+  assert(transcript["segments"][1]["seek"] == 3.5)
+  assert(transcript["segments"][1]["words"][0]["start"] == 3.75)
+  assert(transcript["segments"][0]["words"][0]["start"] == 0.5)
+
+
+def test_whisper_merge_channels():
+  """ Test merging of per channel transcripts and party attribution """
+  import vcon.filter_plugins.impl.whisper
+  agent_transcript = {"text": " Hello, how can I help? Sure.", "language": "en", "segments": [
+    {"id": 0, "start": 0.5, "end": 2.0, "text": " Hello, how can I help?"},
+    {"id": 1, "start": 6.0, "end": 6.5, "text": " Sure."}
+    ]}
+  customer_transcript = {"text": " My bill is wrong.", "language": "en", "segments": [
+    {"id": 0, "start": 3.0, "end": 5.0, "text": " My bill is wrong."}
+    ]}
+  transcript = vcon.filter_plugins.impl.whisper.merge_channel_transcripts(
+    [agent_transcript, customer_transcript],
+    [1, 0]
+    )
+  assert(transcript["text"] == " Hello, how can I help? My bill is wrong. Sure.")
+  assert([segment["party"] for segment in transcript["segments"]] == [1, 0, 1])
+  assert([segment["channel"] for segment in transcript["segments"]] == [0, 1, 0])
+  assert([segment["id"] for segment in transcript["segments"]] == [0, 1, 2])
+
+  # accessor provides the text per party
+  dialog = {"type": "recording", "start": "2023-08-31T18:26:36.987+00:00", "parties": [1, 0]}
+  analysis = {"type": "transcript", "vendor": "openai", "product": "whisper",
+    "schema": "whisper_word_timestamps", "body": transcript}
+  accessor = vcon.accessors.transcript_accessors[("openai", "whisper", "whisper_word_timestamps")](
+    dialog, analysis)
+  text_list = accessor.get_text()
+  assert([text["parties"] for text in text_list] == [1, 0, 1])
+  assert(text_list[1]["text"] == "My bill is wrong.")
+  assert(text_list[1]["duration"] == 2.0)
+  assert(text_list[1]["start"] == "2023-08-31T18:26:39.987000+00:00")
+
+
+@pytest.mark.asyncio
+async def test_whisper_chunked_transcription():
+  """ Test parallel transcription of a recording split into chunks """
+  vcon.filter_plugins.FilterPluginRegistry.register(
+    "whisper_chunked",
+    "vcon.filter_plugins.impl.whisper",
+    "Whisper",
+    "Whisper with chunked transcription",
+    {
+      "model_size": "tiny",
+      "chunk_workers": 2
+    },
+    replace = True
+    )
+
+  in_vcon = vcon.Vcon()
+  with open("examples/test.vcon", "r") as vcon_file:
+    in_vcon.load(vcon_file)
+  analysis_count = len(in_vcon.analysis)
+  out_vcon = await in_vcon.filter("whisper_chunked", {"output_types": ["vendor", "word_srt"], "chunk_duration": 30})
+  assert(len(out_vcon.analysis) == analysis_count + 2)
+  transcript = out_vcon.analysis[analysis_count]["body"]
+  assert(len(transcript["text"]) > 100)
+  # segments are in order across the chunks
+  starts = [segment["start"] for segment in transcript["segments"]]
+  assert(starts == sorted(starts))
+  assert(transcript["segments"][-1]["end"] > 30)
+  assert(len(out_vcon.analysis[analysis_count + 1]["body"]) > 1000)
+
+
+@pytest.mark.asyncio
+async def test_whisper_model_host(tmp_path):
+  """ Test transcription through a shared, pre-warmed model host process """
+  import vcon.filter_plugins.impl.whisper
+  socket_path = str(tmp_path / "whisper_host")
+  model_host = vcon.filter_plugins.impl.whisper.WhisperModelHost(socket_path, "tiny")
+  model_host.start()
+  try:
+    vcon.filter_plugins.FilterPluginRegistry.register(
+      "whisper_hosted",
+      "vcon.filter_plugins.impl.whisper",
+      "Whisper",
+      "Whisper using a model host",
+      {
+        "model_size": "tiny",
+        "model_host": socket_path
+      },
+      replace = True
+      )
+
+    in_vcon = vcon.Vcon()
+    with open("examples/test.vcon", "r") as vcon_file:
+      in_vcon.load(vcon_file)
+    analysis_count = len(in_vcon.analysis)
+    out_vcon = await in_vcon.filter("whisper_hosted", {"output_types": ["vendor"]})
+    assert(len(out_vcon.analysis) == analysis_count + 1)
+    assert(len(out_vcon.analysis[analysis_count]["body"]["text"]) > 100)
+    plugin = vcon.filter_plugins.FilterPluginRegistry.get("whisper_hosted").plugin()
+    assert(isinstance(plugin._transcriber, vcon.filter_plugins.impl.whisper.WhisperModelHostClient))
+
+  finally:
+    model_host.stop()
+
+  # model host not running, the model is not loaded until first use
+  plugin = vcon.filter_plugins.impl.whisper.Whisper(
+    vcon.filter_plugins.impl.whisper.WhisperInitOptions(model_size = "tiny", model_host = socket_path))
+  assert(plugin._transcriber is None)
+  # falls back to loading the model locally
+  assert(plugin.whisper_model is not None)
+  assert(isinstance(plugin._transcriber, vcon.filter_plugins.impl.whisper.WhisperTranscriber))
+
+
 @pytest.mark.asyncio
 async def test_whisper_no_dialog():
   """ Test Whisper plugin on Vcon with no dialogs """
@@ -222,3 +421,4 @@ async def test_whisper_no_dialog():
   assert(in_vcon.dialog is None)
   out_vcon = await in_vcon.transcribe(options)
   assert(out_vcon.analysis is None)
+
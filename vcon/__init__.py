@@ -31,6 +31,7 @@ import jose.jws
 import jose.jwe
 import pythonjsonlogger.jsonlogger
 import vcon.utils
+import vcon.base64url
 import vcon.security
 import vcon.filter_plugins
 import vcon.accessors
@@ -327,6 +328,137 @@ class VconPluginMethodProperty:
     return(VconPluginMethodType(self.plugin_name, instance_object))
 
 
+class VconChangeTracker():
+  """
+  Records the changes made to an unsigned **Vcon** relative to a baseline
+  (typically the form last read from or written to storage) so that storage
+  bindings can write only the changed paths rather than the whole vCon.
+
+  Changes are recorded by the **Vcon** mutator methods.  As the dicts and lists
+  returned by the **Vcon** attributes may also be modified in place, a shallow
+  snapshot of each top level parameter and array object is taken for the
+  baseline.  Objects and parameters which have been replaced or whose top level
+  members have been set, added or removed are reported as changed, even if not
+  recorded by a mutator method.  This is cheap as only references are compared,
+  so modification nested deeper in an object (e.g. in a list in a dialog object)
+  is only detected if made through the **Vcon** methods.
+  """
+  TRACKED_ARRAYS = ["group", "parties", "dialog", "analysis", "attachments"]
+
+  def __init__(self, vcon_dict: dict):
+    self._keys = set(vcon_dict.keys())
+    self._array_lengths = {}
+    self._element_snapshots = {}
+    self._modified_elements = {}
+    for array_name in self.TRACKED_ARRAYS:
+      array = vcon_dict.get(array_name, None)
+      if(isinstance(array, list)):
+        self._array_lengths[array_name] = len(array)
+        self._element_snapshots[array_name] = [self.snapshot(element) for element in array]
+      else:
+        self._array_lengths[array_name] = None
+      self._modified_elements[array_name] = set()
+    self._parameter_snapshots = {name: self.snapshot(value) for name, value in vcon_dict.items()
+      if name not in self.TRACKED_ARRAYS}
+    self._modified_parameters = set()
+    self._invalid = False
+
+
+  @staticmethod
+  def snapshot(value: typing.Any) -> typing.Tuple[typing.Any, typing.Any]:
+    """
+    Shallow snapshot of a JSON value used to detect in place modification.
+
+    Returns: the value and a shallow copy of it if it is a dict or list
+    """
+    if(isinstance(value, (dict, list))):
+      return((value, value.copy()))
+
+    return((value, value))
+
+
+  @staticmethod
+  def unchanged(value: typing.Any, snapshot: typing.Tuple[typing.Any, typing.Any]) -> bool:
+    """
+    Check if the value is the same object as in the snapshot with the same
+    top level members.  Members are compared by reference first, so the
+    nested objects are not traversed unless they were replaced.
+    """
+    return(value is snapshot[0] and value == snapshot[1])
+
+
+  def parameter_modified(self, parameter_name: str) -> None:
+    """ Record that the named top level parameter was set or replaced """
+    self._modified_parameters.add(parameter_name)
+
+
+  def element_modified(self, array_name: str, index: int) -> None:
+    """ Record that the object at index in the named top level array was modified """
+    self._modified_elements[array_name].add(index)
+
+
+  def invalidate(self) -> None:
+    """ Record a change which cannot be expressed incrementally (e.g. UUID change) """
+    self._invalid = True
+
+
+  def get_changes(self, vcon_dict: dict) -> typing.Union[dict, None]:
+    """
+    Get the changes between the baseline and the given vCon dict.
+
+    Parameters:
+      **vcon_dict** (dict) - the current unsigned vCon dict
+
+    Returns:
+      None if the changes cannot be expressed incrementally, otherwise a dict containing:
+        **parameters** - list of top level parameter names to be replaced whole
+        **modified** - dict of array name to list of indices of modified existing objects
+        **appended** - dict of array name to the index of the first appended object
+    """
+    if(self._invalid):
+      return(None)
+
+    current_keys = set(vcon_dict.keys())
+    # Removal of a top level parameter cannot be done with a path level set
+    if(not self._keys <= current_keys):
+      return(None)
+
+    parameters = self._modified_parameters | (current_keys - self._keys)
+    # Parameters modified in place rather than through the Vcon methods
+    for name, baseline_snapshot in self._parameter_snapshots.items():
+      if(name not in parameters and not self.unchanged(vcon_dict[name], baseline_snapshot)):
+        parameters.add(name)
+
+    modified = {}
+    appended = {}
+    for array_name in self.TRACKED_ARRAYS:
+      if(array_name in parameters or array_name not in current_keys):
+        continue
+
+      array = vcon_dict[array_name]
+      baseline_length = self._array_lengths[array_name]
+      if(baseline_length is None or
+        not isinstance(array, list) or
+        len(array) < baseline_length
+        ):
+        parameters.add(array_name)
+        continue
+
+      # Objects modified in place rather than through the Vcon methods (e.g.
+      # an object removed and another appended keeping the same length)
+      modified_indices = self._modified_elements[array_name]
+      baseline_snapshots = self._element_snapshots[array_name]
+      indices = sorted(index for index in range(baseline_length)
+        if index in modified_indices or not self.unchanged(array[index], baseline_snapshots[index]))
+      if(len(indices) > 0):
+        modified[array_name] = indices
+
+      if(len(array) > baseline_length):
+        appended[array_name] = baseline_length
+
+    return({"parameters": sorted(parameters), "modified": modified, "appended": appended})
+
+
 class Vcon():
   """
   Constructor, Serializer and Deserializer for vCon conversation data container.
@@ -465,6 +597,7 @@ class Vcon():
     self._state = VconStates.UNSIGNED
     self._jws_dict = None
     self._jwe_dict = None
+    self._changes = None
 
     self._vcon_dict = {}
     self._vcon_dict[Vcon.VCON_VERSION] = Vcon.CURRENT_VCON_VERSION
@@ -618,6 +751,8 @@ class Vcon():
 
     # TODO parameter specific validation
     self._vcon_dict[Vcon.PARTIES][party_index][parameter_name] = parameter_value
+    if(self._changes is not None):
+      self._changes.element_modified(Vcon.PARTIES, party_index)
 
     return(party_index)
 
@@ -880,7 +1015,7 @@ class Vcon():
       new_dialog['originator'] = originator
 
     new_dialog['encoding'] = "base64url"
-    encoded_body = jose.utils.base64url_encode(body).decode('utf-8')
+    encoded_body = vcon.base64url.encode_str(body)
     #print("encoded body type: {}".format(type(encoded_body)))
     new_dialog['body'] = encoded_body
 
@@ -1080,9 +1215,7 @@ class Vcon():
 
     encoding = dialog.get("encoding", "none").lower()
     if(encoding == "base64url"):
-      # This is wrong.  decode should take a string not bytes, but it fails without the bytes conversion
-      # this is a bug in jose.baseurl_decode
-      decoded_body = jose.utils.base64url_decode(bytes(dialog["body"], 'utf-8'))
+      decoded_body = vcon.base64url.decode(dialog["body"])
 
     # No encoding
     elif(encoding == "none"):
@@ -1122,7 +1255,8 @@ class Vcon():
     **mime_type** (str): mime type of the recording (optional)  
     **file_name** (str): file name of the recording (optional)  
     **sign_type** (str): signature type to create for external signature
-                     default= "SHA-512" use SHA 512 bit hash (RFC6234)
+                     default= "SHA-512" use SHA 512 bit hash (RFC6234),
+                       which may then be signed in a batch with **sign_external_recordings**
                      "LM-OTS" use Leighton-Micali One Time Signature (RFC8554)  
     **originator** (int): by default the originator of the dialog is the first party listed in the parites array.
                However , in some cases, it is difficult to arrange the recording channels with the originator
@@ -1241,6 +1375,8 @@ class Vcon():
 
     # TODO parameter specific validation
     self._vcon_dict[Vcon.DIALOG][dialog_index][parameter_name] = parameter_value
+    if(self._changes is not None):
+      self._changes.element_modified(Vcon.DIALOG, dialog_index)
 
     return(dialog_index)
 
@@ -1284,8 +1420,89 @@ class Vcon():
         print("dialog: {}".format(json.dumps(dialog, indent=2)))
         raise InvalidVconHash("SHA-512 hash in signature does not match the given body for dialog[{}]".format(dialog_index))
 
+    elif(dialog['alg'] == vcon.security.MERKLE_ED25519_ALGORITHM):
+      if(dialog.get('digest', None) != vcon.security.sha_512_hash(body)):
+        raise InvalidVconHash("SHA-512 digest does not match the given body for dialog[{}]".format(dialog_index))
+
+      proof = dialog.get('proof', {})
+      vcon.security.verify_merkle_batch_signature(
+        dialog['digest'],
+        proof.get('index', -1),
+        proof.get('size', 0),
+        proof.get('path', []),
+        dialog['signature'],
+        dialog.get('key', "")
+        )
+
     else:
-      raise AttributeError("dialog[{}] alg: {} not supported.  Must be SHA-512 or LMOTS_SHA256_N32_W8".format(dialog_index, dialog['alg']))
+      raise AttributeError("dialog[{}] alg: {} not supported.  Must be SHA-512, {} or LMOTS_SHA256_N32_W8".format(
+        dialog_index,
+        dialog['alg'],
+        vcon.security.MERKLE_ED25519_ALGORITHM
+        ))
+
+
+  @staticmethod
+  @tag_signing
+  def sign_external_recordings(
+    vcons: typing.List['Vcon'],
+    private_key_pem_file: typing.Union[str, None] = None
+    ) -> int:
+    """
+    Sign the external recordings in a batch of vCons (e.g. one vCon or an ingest batch)
+    with one Ed25519 signature of a Merkle tree of their SHA-512 digests.  This is
+    much faster than signing each recording with "LM-OTS".
+
+    The recording dialogs added with sign_type "SHA-512" (see **add_dialog_external_recording**)
+    are signed.  Their **alg** is changed to "MERKLE_SHA512_Ed25519" and the SHA-512
+    digest is moved to **digest**.  The Ed25519 signature of the tree is set in
+    **signature**, the public key in **key** and the digest's inclusion proof
+    (index and path in the tree and tree size) in **proof**.
+    **verify_dialog_external_recording** verifies the body with the proof and signature.
+
+    Parameters:  
+      **vcons** (List[Vcon]) - the vCons with external recordings to sign  
+      **private_key_pem_file** (str) - file name or PEM string of an Ed25519 private key.
+        If None (default), a key is generated for the batch.
+
+    Returns:  
+      number of recordings signed
+    """
+    private_key = None
+    if(private_key_pem_file is not None):
+      private_key = vcon.security.load_pem_key(private_key_pem_file)
+
+    recordings = []
+    for a_vcon in vcons:
+      for dialog_index, dialog in enumerate(a_vcon.dialog if a_vcon.dialog is not None else []):
+        if(dialog.get('type', None) == "recording" and "url" in dialog and
+          dialog.get('alg', None) == "SHA-512"
+          ):
+          a_vcon._attempting_modify()
+          recordings.append((a_vcon, dialog_index, dialog))
+
+    if(len(recordings) == 0):
+      return(0)
+
+    public_key, signature, paths = vcon.security.merkle_batch_signature(
+      [dialog['signature'] for a_vcon, dialog_index, dialog in recordings],
+      private_key
+      )
+
+    for leaf_index, (a_vcon, dialog_index, dialog) in enumerate(recordings):
+      dialog['alg'] = vcon.security.MERKLE_ED25519_ALGORITHM
+      dialog['digest'] = dialog['signature']
+      dialog['signature'] = signature
+      dialog['key'] = public_key
+      dialog['proof'] = {
+        "index": leaf_index,
+        "size": len(recordings),
+        "path": paths[leaf_index]
+        }
+      if(a_vcon._changes is not None):
+        a_vcon._changes.element_modified(Vcon.DIALOG, dialog_index)
+
+    return(len(recordings))
 
 
   @tag_analysis
@@ -1428,7 +1645,7 @@ class Vcon():
       else:
         encoded_body = body.decode('utf-8')
     else:
-      encoded_body = jose.utils.base64url_encode(body).decode('utf-8')
+      encoded_body = vcon.base64url.encode_str(body)
     #print("encoded body type: {}".format(type(encoded_body)))
     new_attachment['body'] = encoded_body
 
@@ -1470,7 +1687,8 @@ class Vcon():
   def dumps(
       self,
       signed: bool = True,
-      indent: typing.Union[int, None] = None
+      indent: typing.Union[int, None] = None,
+      detached: bool = False
     ) -> str:
     """
     Dump the vCon as a JSON format string.
@@ -1478,12 +1696,15 @@ class Vcon():
     Parameters:  
     **signed** (Boolean): If the vCon is signed locally or verfied,  
         True: serialize the signed version  
-        False: serialize the unsigned version
+        False: serialize the unsigned version  
+    **detached** (Boolean): for a vCon signed with a canonical payload (see **sign**),
+        True: serialize the signed version without the payload, which is stored
+        separately (e.g. the unsigned version) and provided to **verify**
 
     Returns:  
              String containing JSON representation of the vCon.
     """
-    return(json.dumps(self.dumpd(signed, False), indent = indent, default=lambda o: o.__dict__, **dumps_options))
+    return(json.dumps(self.dumpd(signed, False, detached), indent = indent, default=lambda o: o.__dict__, **dumps_options))
 
 
   class VconBase64Bytes():
@@ -1497,7 +1718,7 @@ class Vcon():
       return(self._base64url)
 
     def bytes(self) -> bytes:
-      return(jose.utils.base64url_decode(bytes(self._base64url, 'utf-8')))
+      return(vcon.base64url.decode(self._base64url))
 
     @staticmethod
     def isBase64Object(dict_object: dict) -> bool:
@@ -1564,6 +1785,7 @@ class Vcon():
       self,
       signed: bool = True,
       deepcopy: bool = True,
+      detached: bool = False
     ) -> dict:
     """
     Dump the vCon as a dict representing JSON.
@@ -1579,6 +1801,10 @@ class Vcon():
         True (default): make deep copy of the dict holding Vcon JSON data (highly recommended)
         False: pass reference to Vcon data as dict (dangerous)
 
+    detached (boolean): for a vCon signed with a canonical payload (see **sign**),
+        True: the signed version without the payload, which is stored
+        separately (e.g. the unsigned version) and provided to **verify**
+
     Returns:
              dict containing JSON representation of the vCon.
     """
@@ -1600,6 +1826,10 @@ class Vcon():
         vcon_dict = self._vcon_dict
       else:
         vcon_dict = self._jws_dict
+        if(detached):
+          if(not all(vcon.security.is_jws_unencoded(signature["protected"]) for signature in vcon_dict["signatures"])):
+            raise AttributeError("detached payload is only supported for vCons signed with a canonical payload")
+          vcon_dict = {name: value for name, value in vcon_dict.items() if name != "payload"}
 
     elif(self._state in [VconStates.ENCRYPTED, VconStates.DECRYPTED]):
       if(signed is False):
@@ -1615,6 +1845,54 @@ class Vcon():
     return(vcon_dict)
 
 
+  @tag_serialize
+  def track_changes(self) -> None:
+    """
+    Start (or restart) tracking of changes made to this vCon, using its current
+    content as the baseline.  Typically invoked by storage bindings after loading
+    a vCon which is to be modified and saved, or after saving it, so that a
+    subsequent save can write only the changes.
+    Tracking is only done for vCons in the UNSIGNED state.
+
+    Parameters: none
+
+    Returns: none
+    """
+    if(self._state == VconStates.UNSIGNED):
+      self._changes = VconChangeTracker(self._vcon_dict)
+
+    else:
+      self._changes = None
+
+
+  @tag_serialize
+  def get_changes(self) -> typing.Union[dict, None]:
+    """
+    Get the changes made to this vCon since **Vcon.track_changes** was invoked.
+
+    Changes made through the **Vcon** methods are recorded.  Direct in place
+    modification of the top level parameters and array objects (i.e. replacing
+    them or setting, adding or removing their members) is detected by comparing
+    them with the shallow snapshots taken by **Vcon.track_changes**.  Changes
+    nested deeper in these objects are only detected if made through the
+    **Vcon** methods.
+
+    Parameters: none
+
+    Returns:
+      None if changes are not tracked or cannot be expressed incrementally (e.g. signed or
+      encrypted vCon, UUID changed, or a top level parameter was removed) in which case
+      the whole vCon must be written.  Otherwise a dict with:
+        **parameters** - list of top level parameter names to be replaced whole
+        **modified** - dict of array name to list of indices of modified existing objects
+        **appended** - dict of array name to the index of the first appended object
+    """
+    if(self._changes is None or self._state != VconStates.UNSIGNED):
+      return(None)
+
+    return(self._changes.get_changes(self._vcon_dict))
+
+
   @tag_serialize
   async def post(
     self,
@@ -1678,7 +1956,12 @@ class Vcon():
 
 
   @tag_serialize
-  def loadd(self, vcon_dict : dict) -> None:
+  def loadd(
+      self,
+      vcon_dict : dict,
+      copy: bool = True,
+      migrate: bool = True
+    ) -> None:
     """
     Load the vCon from the JSON style dict.
     Assumes that this vCon is an empty vCon as it is not cleared.
@@ -1690,33 +1973,19 @@ class Vcon():
 
     Parameters:  
       **vcon_dict** (dict): dict containing JSON representation of a vCon
+      **copy** (bool):
+        True (default): load a copy of the dict (serialized and deserialized)
+        False: take ownership of the dict without copying it.  The caller must
+          not modify the dict or its contents after it is loaded.
+      **migrate** (bool):
+        True (default): migrate content from older versions of vCon to the current version
+        False: the dict is known to be in the current form (e.g. from **dumpd**)
 
     Returns: none
     """
 
-    # TODO:  Should refactor this and loads to work with dict.  This is very
-    # inefficient as we are serializing and then deserializing.
-    vcon_string = json.dumps(vcon_dict)
-
-    return(self.loads(vcon_string))
-
-
-  @tag_serialize
-  def loads(self, vcon_json : str) -> None:
-    """
-    Load the vCon from a JSON string.
-    Assumes that this vCon is an empty vCon as it is not cleared.
-
-    Decision as to what json form to be deserialized is:
-    1) unsigned vcon must have a vcon and one or more of the following elements: parties, dialog, analysis, attachments
-    2) JWS vCon must have a payload and signatures
-    3) JWE vCon must have a ciphertext and recipients
-
-    Parameters:  
-      **vcon_json** (str): string containing JSON representation of a vCon
-
-    Returns: none
-    """
+    if(copy):
+      vcon_dict = json.loads(json.dumps(vcon_dict))
 
     self._attempting_modify()
 
@@ -1726,15 +1995,16 @@ class Vcon():
     if(self._state != VconStates.UNSIGNED):
       raise InvalidVconState("Cannot load Vcon unless current state is UNSIGNED.  Current state: {}".format(self._state))
 
-    vcon_dict = json.loads(vcon_json)
+    # Loaded content is not a change relative to any prior baseline
+    self._changes = None
 
     # we need to check the format as to whether it is signed or
     # not and deconstruct the loaded object.
     # load differently based upon the contents of the JSON
 
-    # Signed vCon (JWS)
-    if(("payload" in vcon_dict) and
-      ("signatures" in vcon_dict)
+    # Signed vCon (JWS), the payload may be detached
+    if(("signatures" in vcon_dict) and
+      ("payload" in vcon_dict or self.VCON_VERSION not in vcon_dict)
       ):
       self._vcon_dict = {}
 
@@ -1764,7 +2034,10 @@ class Vcon():
       if(version_string != "0.0.1"):
         raise UnsupportedVconVersion("loads of JSON vcon version: \"{}\" not supported".format(version_string))
 
-      self._vcon_dict = self.migrate_0_0_1_vcon(vcon_dict)
+      if(migrate):
+        self._vcon_dict = self.migrate_0_0_1_vcon(vcon_dict)
+      else:
+        self._vcon_dict = vcon_dict
 
     # Unknown
     else:
@@ -1775,6 +2048,26 @@ class Vcon():
         )
 
 
+  @tag_serialize
+  def loads(self, vcon_json : str) -> None:
+    """
+    Load the vCon from a JSON string.
+    Assumes that this vCon is an empty vCon as it is not cleared.
+
+    Decision as to what json form to be deserialized is:
+    1) unsigned vcon must have a vcon and one or more of the following elements: parties, dialog, analysis, attachments
+    2) JWS vCon must have a payload and signatures
+    3) JWE vCon must have a ciphertext and recipients
+
+    Parameters:  
+      **vcon_json** (str): string containing JSON representation of a vCon
+
+    Returns: none
+    """
+
+    self.loadd(json.loads(vcon_json), False)
+
+
   @experimental("CBOR format is non-standard for vCon")
   @tag_serialize
   def loadc(self, vcon_cbor : bytes) -> None:
@@ -1801,6 +2094,9 @@ class Vcon():
     if(self._state != VconStates.UNSIGNED):
       raise InvalidVconState("Cannot load Vcon unless current state is UNSIGNED.  Current state: {}".format(self._state))
 
+    # Loaded content is not a change relative to any prior baseline
+    self._changes = None
+
     vcon_dict = cbor2.loads(vcon_cbor)
 
     # TODO: iterate object and replace CBORTag 21 with base64url encoded string and set encoding to "base64url"
@@ -1809,9 +2105,9 @@ class Vcon():
     # not and deconstruct the loaded object.
     # load differently based upon the contents of the JSON
 
-    # Signed vCon (JWS)
-    if(("payload" in vcon_dict) and
-      ("signatures" in vcon_dict)
+    # Signed vCon (JWS), the payload may be detached
+    if(("signatures" in vcon_dict) and
+      ("payload" in vcon_dict or self.VCON_VERSION not in vcon_dict)
       ):
       self._vcon_dict = {}
 
@@ -1862,7 +2158,7 @@ class Vcon():
                     object_array_name
                   ))
 
-              reference_object["body"] = jose.utils.base64url_encode(reference_object["body"].value).decode('utf-8')
+              reference_object["body"] = vcon.base64url.encode_str(reference_object["body"].value)
               reference_object["encoding"] = "base64url"
 
       # validate version
@@ -1923,7 +2219,12 @@ class Vcon():
     self.loads(vcon_json)
 
   @tag_signing
-  def sign(self, private_key_pem_file: str, cert_chain_pem_files : typing.List[str]) -> None:
+  def sign(
+      self,
+      private_key_pem_file: str,
+      cert_chain_pem_files : typing.List[str],
+      canonical: bool = False
+    ) -> None:
     """
     Sign the vcon using the given private key from the give certificate chain.
 
@@ -1931,7 +2232,10 @@ class Vcon():
     **private_key_pem_file** (str): file name or string containing PEM format private key to use for signing the vcon.  
     **cert_chain_pem_files** (List[str]): file names or PEM strings, for the pem format certicate chain for the
         private key to use for signing.  The cert/public key corresponding to the private key should be the
-        first cert.  THe certificate authority root should be the last cert.
+        first cert.  THe certificate authority root should be the last cert.  
+    **canonical** (bool): False (default) the JWS payload is the base64url encoded vCon JSON.
+        True the JWS payload is the unencoded (RFC7797) canonical (RFC8785 JCS) vCon JSON, which is
+        hashed as it is serialized and may be stored detached (see **dumps**).
 
     Returns: none
     """
@@ -1945,13 +2249,22 @@ class Vcon():
     if(self.uuid is None or len(self.uuid) < 1):
       raise InvalidVconState("vCon has no UUID set.  Use set_uuid method before signing.")
 
-    header, signing_jwk = vcon.security.build_signing_jwk_from_pem_files(private_key_pem_file, cert_chain_pem_files)
+    # Parsed key and certs are cached, only loaded again if the files change
+    header, signing_key = vcon.security.get_signing_key(private_key_pem_file, cert_chain_pem_files)
 
-    # dot separated JWS token.  First part is the payload, second part is the signature (both base64url encoded)
-    jws_token = jose.jws.sign(self._vcon_dict, signing_jwk, headers=header, algorithm=signing_jwk["alg"])
-    #print(jws_token.split('.'))
-    protected_header, payload, signature = jws_token.split('.')
-    #print("decoded header: {}".format(jose.utils.base64url_decode(bytes(protected_header, 'utf-8'))))
+    if(canonical):
+      protected_header = vcon.security.jws_unencoded_protected_header(header)
+      # The canonical JSON chunks are hashed and then joined for the payload
+      payload_chunks = list(vcon.security.jcs_iter(self._vcon_dict))
+      signature = vcon.security.jws_sign_unencoded(protected_header, payload_chunks, signing_key)
+      payload = "".join(payload_chunks)
+
+    else:
+      # dot separated JWS token.  First part is the payload, second part is the signature (both base64url encoded)
+      jws_token = jose.jws.sign(self._vcon_dict, signing_key, headers=header, algorithm=header["alg"])
+      #print(jws_token.split('.'))
+      protected_header, payload, signature = jws_token.split('.')
+      #print("decoded header: {}".format(vcon.base64url.decode(protected_header)))
 
     # For convenience add the uuid to the header
     header[Vcon.UUID] = self.uuid
@@ -1970,13 +2283,19 @@ class Vcon():
 
 
   @tag_signing
-  def verify(self, ca_cert_pem_files : typing.List[str]) -> None:
+  def verify(
+      self,
+      ca_cert_pem_files : typing.List[str],
+      detached_payload: typing.Union[dict, str, None] = None
+    ) -> None:
     """
     Verify the signed vCon and its certificate chain which should be issued by one of the given CAs
 
     Parameters:  
       **ca_cert_pem_files** (List[str]): file name or PEM string list containing Certificate Authority certificates 
-        to verify the vCon's certificate chain.
+        to verify the vCon's certificate chain.  
+      **detached_payload** (Union[dict, str, None]): for a vCon signed with a canonical payload and
+        serialized without it (see **dumps**), the unsigned vCon as a dict or JSON string.
 
     Returns: none
 
@@ -2001,10 +2320,17 @@ class Vcon():
       ):
       raise InvalidVconState("Vcon JWS invalid")
 
+    payload = self._jws_dict.get("payload", None)
+    if(payload is None):
+      if(detached_payload is None):
+        raise InvalidVconState("Vcon JWS payload is detached and no detached_payload was provided")
+      if(isinstance(detached_payload, str)):
+        detached_payload = json.loads(detached_payload)
+      # JSON may have been reordered or reformatted in storage, the canonical form is what was signed
+      payload = vcon.security.jcs_dumps(detached_payload)
+
     # Load an array of CA certficate objects to use to verify acceptable cert chains
-    ca_cert_object_list = []
-    for ca in ca_cert_pem_files:
-      ca_cert_object_list.append(vcon.security.load_pem_cert(ca)[0])
+    ca_cert_object_list = vcon.security.get_ca_certs(ca_cert_pem_files)
 
     # TODO: what does it mean if ca_cert_pem_files is empty?  Should we verify and
     # assume that the cert chain is trusted?
@@ -2036,24 +2362,28 @@ class Vcon():
                 # IF we get here, we have a valid chain: cert_chain_objects issued from one of our accepted
                 # CAs: ca_object.
                 # The assumtion is that it is safe to trust this cert chain.  So we
-                # can use it to build a JWK and verify the signature.
-                verification_jwk = {}
-                verification_jwk["kty"] = "RSA"
-                verification_jwk["use"] = "sig"
-                verification_jwk["alg"] = signature['header']['alg']
-                verification_jwk["e"] = jose.utils.base64url_encode(jose.utils.
-                  long_to_bytes(cert_chain_objects[0].public_key().public_numbers().e)).decode('utf-8')
-                verification_jwk["n"] = jose.utils.base64url_encode(jose.utils.
-                  long_to_bytes(cert_chain_objects[0].public_key().public_numbers().n)).decode('utf-8')
-
-                jws_token = signature['protected'] + "." + self._jws_dict['payload'] + "." + signature['signature']
-                verified_payload = jose.jws.verify(jws_token, verification_jwk, verification_jwk["alg"])
+                # can use its public key to verify the signature.
+                if(vcon.security.is_jws_unencoded(signature['protected'])):
+                  # Canonical JSON payload is hashed in chunks, rather than decoded
+                  vcon.security.jws_verify_unencoded(
+                    signature['protected'],
+                    vcon.security.str_chunks(payload),
+                    signature['signature'],
+                    cert_chain_objects[0].public_key()
+                    )
+                  verified_payload = payload
+
+                else:
+                  jws_token = signature['protected'] + "." + payload + "." + signature['signature']
+                  verified_payload = jose.jws.verify(jws_token, cert_chain_objects[0].public_key(), signature['header']['alg']).decode('utf-8')
 
                 # If we get here, the payload was verified
                 #print("verified payload: {}".format(verified_payload))
                 #print("verified payload type: {}".format(type(verified_payload)))
-                vcon_dict = json.loads(verified_payload.decode('utf-8'))
+                vcon_dict = json.loads(verified_payload)
                 self._vcon_dict = self.migrate_0_0_1_vcon(vcon_dict)
+                if("payload" not in self._jws_dict):
+                  self._jws_dict = dict(self._jws_dict, payload = payload)
 
                 self._state = VconStates.VERIFIED
 
@@ -2076,14 +2406,20 @@ class Vcon():
 
 
   @tag_encrypting
-  def encrypt(self, cert_pem_file: str) -> None:
+  def encrypt(self, cert_pem_file: typing.Union[str, typing.List[str]]) -> None:
     """
     encrypt a Signed vcon using the given public key from the give certificate.
 
     vcon must be signed first.
 
+    The vCon is encrypted once with a random content key and only the content
+    key is encrypted for each certificate, producing a JWE JSON Serialization with
+    a recipient per certificate.  The recipient's key ID (kid) is the certificate
+    subject common name.
+
     Parameters:  
-    **cert_pem_file** (str): file name or PEM string for the public key/cert to use for encrypting the vcon.
+    **cert_pem_file** (typing.Union[str, typing.List[str]]): file name or PEM string,
+      or list of them, for the public key/cert(s) of the recipients for the encrypted vcon.
 
     Returns: none
     """
@@ -2094,23 +2430,22 @@ class Vcon():
     if(len(self._jws_dict) < 2):
       raise InvalidVconState("Vcon signature does not seem valid: {}".format(self._jws_dict))
 
-    # both of these work
-    #encryption = "A256GCM"
-    encryption = "A256CBC-HS512"
+    if(isinstance(cert_pem_file, str)):
+      cert_pem_file = [cert_pem_file]
 
-    encryption_key = vcon.security.build_encryption_jwk_from_pem_file(cert_pem_file)
+    # Parsed certs are cached, only loaded again if the file changes
+    recipient_keys = [vcon.security.get_encryption_key(cert) for cert in cert_pem_file]
 
-    plaintext = json.dumps(self._jws_dict, **dumps_options)
+    plaintext = json.dumps(self._jws_dict, **dumps_options).encode("utf-8")
 
-    jwe_compact_token = jose.jwe.encrypt(plaintext, encryption_key, encryption, encryption_key['alg']).decode('utf-8')
-    jwe_complete_serialization = vcon.security.jwe_compact_token_to_complete_serialization(jwe_compact_token, enc = encryption, x5c = [])
+    jwe_complete_serialization = vcon.security.jwe_encrypt_json(plaintext, recipient_keys)
 
     # Add unprotected stuff
     jwe_complete_serialization["unprotected"] = {}
     # Add UUID to unprotected for easy reference
     jwe_complete_serialization["unprotected"]["uuid"] = self.uuid
     jwe_complete_serialization["unprotected"]["cty"] = Vcon.MIMETYPE_VCON_JSON
-    jwe_complete_serialization["unprotected"]["enc"] = "A256CBC-HS512"
+    jwe_complete_serialization["unprotected"]["enc"] = vcon.security.JWE_CONTENT_ENCRYPTION
 
     self._jwe_dict = jwe_complete_serialization
     self._state = VconStates.ENCRYPTED
@@ -2122,6 +2457,7 @@ class Vcon():
     Decrypt a vCon using private and public key file.
 
     vCon must be in encrypted state and will be in signed state after decryption.
+    The recipient with the key ID (kid) of the certificate is decrypted.
 
     Parameters:  
     **private_key_pem_file** (str): file name or PEM string for the private key to use for decrypting the vcon.  
@@ -2136,12 +2472,19 @@ class Vcon():
     if(len(self._jwe_dict) < 2):
       raise InvalidVconState("Vcon JWE does not seem valid: {}".format(self._jws_dict))
 
-    jwe_compact_token_reconstructed = vcon.security.jwe_complete_serialization_to_compact_token(self._jwe_dict)
+    # Parsed key is cached, only loaded again if the files change
+    decryption_key = vcon.security.get_decryption_key(private_key_pem_file, cert_pem_file)
 
-    (header, signing_key) = vcon.security.build_signing_jwk_from_pem_files(private_key_pem_file, [cert_pem_file])
-    #signing_key['alg'] = encryption_key['alg']
+    protected_header = json.loads(vcon.base64url.decode(self._jwe_dict["protected"]))
+    if(protected_header.get("enc", None) == vcon.security.JWE_CONTENT_ENCRYPTION):
+      kid = vcon.security.get_encryption_key(cert_pem_file)[1]
+      plaintext_decrypted = vcon.security.jwe_decrypt_json(self._jwe_dict, decryption_key, kid).decode('utf-8')
+
+    else:
+      # Other content encryption, single recipient only
+      jwe_compact_token_reconstructed = vcon.security.jwe_complete_serialization_to_compact_token(self._jwe_dict)
+      plaintext_decrypted = jose.jwe.decrypt(jwe_compact_token_reconstructed, decryption_key).decode('utf-8')
 
-    plaintext_decrypted = jose.jwe.decrypt(jwe_compact_token_reconstructed, signing_key).decode('utf-8')
     # let loads figure out if this is an encrypted JWS vCon or just a vCon
     current_state = self._state
     # Fool loads into thinking this is a raw vCon and its safe to load.  Save state incase we barf.
@@ -2176,6 +2519,8 @@ class Vcon():
       create_date = time.time()
 
     self._vcon_dict[Vcon.CREATED_AT] = vcon.utils.cannonize_date(create_date)
+    if(self._changes is not None):
+      self._changes.parameter_modified(Vcon.CREATED_AT)
 
 
   @tag_meta
@@ -2192,6 +2537,8 @@ class Vcon():
     self._attempting_modify()
 
     self._vcon_dict[Vcon.SUBJECT] = subject
+    if(self._changes is not None):
+      self._changes.parameter_modified(Vcon.SUBJECT)
 
 
   @tag_operation
@@ -2259,7 +2606,49 @@ class Vcon():
     if(isinstance(options, dict)):
       options = plugin.options_type(**options)
 
-    return(await plugin.filter(self, options))
+    # CPU bound plugins are run in an executor by the registration
+    return(await plugin_reg.filter(self, options))
+
+
+  @staticmethod
+  @tag_operation
+  async def filter_many(
+    vcons: typing.List[Vcon],
+    filter_name: str,
+    options: vcon.filter_plugins.FilterPluginOptions
+    ) -> typing.List[Vcon]:
+    """
+    Run the list of Vcons through the named filter plugin in one batch.
+    Plugins which batch work across Vcons (e.g. model inference) can
+    process the list more efficiently than invoking **Vcon.filter** on each.
+
+    See vcon.filter_plugins.FilterPluginRegistry for the set of registered plugins.
+
+    Parameters:
+      **vcons** (List[Vcon]) - the Vcons to be filtered
+      **filter_name** (str) - name of a registered FilterPlugin
+      **options** - passed through to plugin and used for all of the Vcons.  The fields in options
+        are documented by the specified plugin.
+
+    Returns:
+      list of the filter modified Vcons in the same order as **vcons**
+    """
+
+    plugin_reg = vcon.filter_plugins.FilterPluginRegistry.get(filter_name, True)
+
+    plugin = plugin_reg.plugin()
+    if(plugin is None):
+      message = "plugin: {} not loaded as module: {} was not found".format(plugin_reg.name, plugin_reg._module_name)
+      raise vcon.filter_plugins.FilterPluginModuleNotFound(message)
+
+    for filter_vcon in vcons:
+      plugin.check_valid_state(filter_vcon)
+
+    # Force defaulting and typing for plugin specific options
+    if(isinstance(options, dict)):
+      options = plugin.options_type(**options)
+
+    return(await plugin_reg.filter_batch(vcons, options))
 
 
   @tag_meta
@@ -2285,6 +2674,8 @@ class Vcon():
     uuid = self.uuid8_domain_name(domain_name)
 
     self._vcon_dict[Vcon.UUID] = uuid
+    if(self._changes is not None):
+      self._changes.invalidate()
 
     return(uuid)
 
@@ -2302,14 +2693,17 @@ class Vcon():
       raise Exception("get_dict_uuid expected dict, got: {} {}".format(type(vcon_dict), vcon_dict))
 
     # signed (JWS) form of vCon
-    if({"payload", "signatures"} <= vcon_dict.keys() and
+    if("signatures" in vcon_dict.keys() and
        len(vcon_dict["signatures"]) > 0 and
         "header" in vcon_dict["signatures"][0]
       ):
       uuid = vcon_dict["signatures"][0]["header"].get("uuid", None)
-      if(uuid is None):
-        # decode the payload and parse JSON to get UUID
-        vcon_json_string = jose.utils.base64url_decode(bytes(vcon_dict["payload"], 'utf-8'))
+      if(uuid is None and "payload" in vcon_dict):
+        vcon_json_string = vcon_dict["payload"]
+        # unencoded (canonical JSON) payload starts with "{", which is not base64url
+        if(not vcon_json_string.startswith("{")):
+          # decode the payload and parse JSON to get UUID
+          vcon_json_string = vcon.base64url.decode(vcon_json_string)
         payload_vcon_dict = json.loads(vcon_json_string)
         uuid = payload_vcon_dict.get("uuid", None)
 
@@ -2346,6 +2740,8 @@ class Vcon():
     new_redacted["uuid"] = uuid
 
     self._vcon_dict[Vcon.REDACTED] = new_redacted
+    if(self._changes is not None):
+      self._changes.parameter_modified(Vcon.REDACTED)
 
 
   @tag_vcon_references
@@ -2365,6 +2761,8 @@ class Vcon():
     new_appended["uuid"] = uuid
 
     self._vcon_dict[Vcon.APPENDED] = new_appended
+    if(self._changes is not None):
+      self._changes.parameter_modified(Vcon.APPENDED)
 
 
   @tag_vcon_references
@@ -2421,7 +2819,7 @@ class Vcon():
       # The only programatic way to do this is to instantiate a Vcon, but this seemed a bit
       # heavy.  So for now just testing a manually maintained list of attributes and  blacklisted
       # token names.
-      instance_attributes = ['_jwe_dict', '_jws_dict', '_state', '_vcon_dict', 'vcon', "Vcon", "filter_plugins", "security", "utils", "cli"]
+      instance_attributes = ['_changes', '_jwe_dict', '_jws_dict', '_state', '_vcon_dict', 'vcon', "Vcon", "filter_plugins", "security", "utils", "cli"]
       if(name in instance_attributes):
         exists = True
 
@@ -2512,10 +2910,14 @@ class Vcon():
       if("alg" in dialog):
         if( dialog['alg'] == "lm-ots"):
           dialog['alg'] = "LMOTS_SHA256_N32_W8"
-        elif( dialog['alg'] in ["SHA-512", "LMOTS_SHA256_N32_W8"]):
+        elif( dialog['alg'] in ["SHA-512", "LMOTS_SHA256_N32_W8", vcon.security.MERKLE_ED25519_ALGORITHM]):
           pass
         else:
-          raise AttributeError("dialog[{}] alg: {} not supported.  Must be SHA-512 or LMOTS_SHA256_N32_W8".format(index, dialog['alg']))
+          raise AttributeError("dialog[{}] alg: {} not supported.  Must be SHA-512, {} or LMOTS_SHA256_N32_W8".format(
+            index,
+            dialog['alg'],
+            vcon.security.MERKLE_ED25519_ALGORITHM
+            ))
 
     # Translate transcriptions to body for consistency with dialog and attachments
     for index, analysis in enumerate(old_vcon.get("analysis", [])):
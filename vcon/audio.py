@@ -0,0 +1,170 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" In memory decoding of dialog recordings to audio samples for transcription """
+import io
+import wave
+import typing
+import tempfile
+import subprocess
+import numpy
+import vcon
+
+logger = vcon.build_logger(__name__)
+
+# Sample rate expected by most speech models (e.g. Whisper)
+SPEECH_SAMPLE_RATE = 16000
+
+class AudioDecodeError(Exception):
+  """ Raised when a dialog recording cannot be decoded to audio samples """
+
+
+def channel_count(body: bytes) -> int:
+  """
+  Get the number of audio channels in the recording.  Wave files are read
+  natively, other formats are probed with ffprobe.
+
+  Returns: number of channels, 1 if it cannot be determined
+  """
+  try:
+    with wave.open(io.BytesIO(body), "rb") as wave_file:
+      return(wave_file.getnchannels())
+
+  except (wave.Error, EOFError):
+    pass
+
+  command = [
+    "ffprobe",
+    "-v", "error",
+    "-select_streams", "a:0",
+    "-show_entries", "stream=channels",
+    "-of", "csv=p=0",
+    "pipe:0"
+    ]
+  try:
+    process = subprocess.run(command, input = body, capture_output = True, check = False)
+    if(process.returncode != 0 or process.stdout.strip() == b""):
+      # Some containers (e.g. MP4 with the index at the end) cannot be probed from a pipe
+      with tempfile.NamedTemporaryFile() as audio_file:
+        audio_file.write(body)
+        audio_file.flush()
+        command[-1] = audio_file.name
+        process = subprocess.run(command, capture_output = True, check = False)
+    return(int(process.stdout.split()[0]))
+
+  except (FileNotFoundError, ValueError, IndexError) as probe_error:
+    logger.debug("unable to get channel count: {}".format(probe_error))
+
+  return(1)
+
+
+def decode_wav(
+    body: bytes,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    channels: int = 1
+  ) -> typing.Union[numpy.ndarray, None]:
+  """
+  Natively decode a 16 bit PCM wave file at the given sample rate to
+  float32 samples in the range [-1.0, 1.0).
+
+  Parameters:
+    **channels** (int) - 1 to down mix to mono samples, otherwise the number
+      of channels to separate, which must match the wave file
+
+  Returns: the mono samples, an array of samples per channel or None if not a
+    16 bit PCM wave file at the given sample rate and number of channels
+  """
+  try:
+    with wave.open(io.BytesIO(body), "rb") as wave_file:
+      num_channels = wave_file.getnchannels()
+      if(wave_file.getsampwidth() != 2 or
+        wave_file.getframerate() != sample_rate or
+        wave_file.getcomptype() != "NONE" or
+        (channels > 1 and channels != num_channels)
+        ):
+        return(None)
+      frames = wave_file.readframes(wave_file.getnframes())
+
+  except (wave.Error, EOFError):
+    return(None)
+
+  samples = numpy.frombuffer(frames, numpy.int16).astype(numpy.float32)
+  if(channels > 1):
+    # de-interleave into a row per channel
+    samples = samples.reshape(-1, num_channels).T.copy()
+  elif(num_channels > 1):
+    # down mix the same as ffmpeg -ac 1
+    samples = samples.reshape(-1, num_channels).mean(axis = 1, dtype = numpy.float32)
+
+  return(samples / 32768.0)
+
+
+def decode_audio(
+    body: bytes,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    channels: int = 1
+  ) -> numpy.ndarray:
+  """
+  Decode the recording body in memory to float32 samples in the range
+  [-1.0, 1.0) at the given sample rate.
+
+  16 bit PCM wave files already at the sample rate are decoded natively.  Otherwise
+  the body is piped through ffmpeg.  Containers which ffmpeg cannot decode from a
+  pipe (e.g. MP4 with the index at the end) fall back to a temporary file.
+
+  Parameters:
+    **channels** (int) - 1 to down mix to mono samples, otherwise the number
+      of channels to separate
+
+  Returns: the mono samples or an array of samples per channel
+  """
+  samples = decode_wav(body, sample_rate, channels)
+  if(samples is not None):
+    return(samples)
+
+  command = [
+    "ffmpeg",
+    "-nostdin",
+    "-threads", "0",
+    "-i", "pipe:0",
+    "-f", "s16le",
+    "-ac", str(channels),
+    "-acodec", "pcm_s16le",
+    "-ar", str(sample_rate),
+    "pipe:1"
+    ]
+  process = subprocess.run(command, input = body, capture_output = True, check = False)
+  if(process.returncode != 0 or len(process.stdout) == 0):
+    logger.debug("ffmpeg pipe decode failed, trying file: {}".format(process.stderr.decode("utf-8", "replace")[-300:]))
+    with tempfile.NamedTemporaryFile() as audio_file:
+      audio_file.write(body)
+      audio_file.flush()
+      command[command.index("pipe:0")] = audio_file.name
+      process = subprocess.run(command, capture_output = True, check = False)
+
+    if(process.returncode != 0):
+      raise AudioDecodeError("ffmpeg failed to decode audio: {}".format(
+        process.stderr.decode("utf-8", "replace")[-300:]
+        ))
+
+  samples = numpy.frombuffer(process.stdout, numpy.int16).astype(numpy.float32) / 32768.0
+  if(channels > 1):
+    samples = samples.reshape(-1, channels).T.copy()
+
+  return(samples)
+
+
+def channel_parties(dialog: typing.Dict[str, typing.Any], num_channels: int) -> typing.Union[list, None]:
+  """
+  Get the party(s) for each channel of a multi-channel recording dialog.
+
+  The **parties** of a multi-channel recording is a list with the party index
+  (or list of party indices) for each channel.
+
+  Returns: list of party index or indices per channel or None if the dialog
+    is not a multi-channel recording with a party per channel
+  """
+  parties = dialog.get("parties", None)
+  if(num_channels > 1 and isinstance(parties, list) and len(parties) == num_channels):
+    return(parties)
+
+  return(None)
+
@@ -0,0 +1,156 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+"""
+base64url (RFC 4648 section 5, without padding) encoding and decoding of
+vCon bodies and JWS/JWE parts.
+
+The binascii codec does the work.  Unlike **jose.utils.base64url_encode**
+and **base64url_decode**, the input is not converted, padded or copied as a
+whole: bytes-like input is read through a memoryview and large inputs are
+encoded and decoded in chunks of **CHUNK_SIZE** bytes (which is also faster
+as the chunk stays in the CPU cache).  The **iter_encode** and
+**iter_decode** variants yield the chunks, so that large bodies can be
+streamed (e.g. written to a file or hashed) without the whole output in memory.
+"""
+import binascii
+import typing
+
+BytesLike = typing.Union[bytes, bytearray, memoryview]
+
+# Bytes of binary data encoded at a time.  Must be a multiple of 3 so that
+# the encoded chunks concatenate without padding.  The base64url text is
+# decoded in chunks of the corresponding 4/3 size.
+CHUNK_SIZE = 3 * 64 * 1024
+
+_ENCODE_TABLE = bytes.maketrans(b"+/", b"-_")
+_DECODE_TABLE = bytes.maketrans(b"-_", b"+/")
+# Padding to add, by the number of characters modulo 4 (as jose does)
+_PADDING = (b"", b"===", b"==", b"=")
+
+
+def _byte_view(data: BytesLike) -> memoryview:
+  view = memoryview(data)
+  if(view.format != "B" or view.ndim != 1):
+    view = view.cast("B")
+  return(view)
+
+
+def iter_encode(data: BytesLike, chunk_size: int = CHUNK_SIZE) -> typing.Iterator[bytes]:
+  """
+  base64url encode the data in chunks.
+
+  Parameters:
+    **data** (bytes, bytearray or memoryview) - the binary data to encode
+    **chunk_size** (int) - bytes of data encoded at a time, must be a multiple of 3
+
+  Returns: iterator of the base64url encoded (ASCII bytes) chunks
+  """
+  if(chunk_size % 3 != 0):
+    raise AttributeError("base64url encode chunk_size: {} must be a multiple of 3".format(chunk_size))
+
+  view = _byte_view(data)
+  for start in range(0, len(view), chunk_size):
+    yield(binascii.b2a_base64(view[start:start + chunk_size], newline = False).translate(_ENCODE_TABLE, b"="))
+
+
+def encode(data: BytesLike, chunk_size: int = CHUNK_SIZE) -> bytes:
+  """
+  base64url encode the data.
+
+  Parameters:
+    **data** (bytes, bytearray or memoryview) - the binary data to encode
+    **chunk_size** (int) - bytes of data encoded at a time, must be a multiple of 3
+
+  Returns: the base64url encoding as ASCII bytes, without padding
+  """
+  if(not isinstance(data, bytes)):
+    data = _byte_view(data)
+  if(len(data) <= chunk_size):
+    return(binascii.b2a_base64(data, newline = False).translate(_ENCODE_TABLE, b"="))
+
+  return(b"".join(iter_encode(data, chunk_size)))
+
+
+def encode_str(data: BytesLike, chunk_size: int = CHUNK_SIZE) -> str:
+  """
+  base64url encode the data to a str (e.g. for a JSON body or JWS/JWE part).
+
+  Parameters: see **encode**
+
+  Returns: the base64url encoding, without padding
+  """
+  return(encode(data, chunk_size).decode("ascii"))
+
+
+def _decode_chunk(chunk: typing.Union[str, BytesLike]) -> bytes:
+  """ translate a chunk of base64url to base64, pad it and decode it """
+  if(isinstance(chunk, str)):
+    chunk = chunk.encode("ascii")
+  elif(isinstance(chunk, memoryview)):
+    chunk = chunk.tobytes()
+
+  translated = chunk.translate(_DECODE_TABLE)
+  remainder = len(translated) % 4
+  if(remainder > 0):
+    translated += _PADDING[remainder]
+
+  return(binascii.a2b_base64(translated))
+
+
+def iter_decode(data: typing.Union[str, BytesLike], chunk_size: int = CHUNK_SIZE) -> typing.Iterator[bytes]:
+  """
+  base64url decode the data in chunks.
+
+  Padding is optional.  As with **jose.utils.base64url_decode**, characters
+  outside of the base64url alphabet (e.g. white space) are ignored.
+
+  Parameters:
+    **data** (str, bytes, bytearray or memoryview) - the base64url encoded data
+    **chunk_size** (int) - bytes of decoded data per chunk, must be a multiple of 3
+
+  Returns: iterator of the decoded binary chunks
+
+  Raises: binascii.Error if the data is not valid base64url
+  """
+  if(chunk_size % 3 != 0):
+    raise AttributeError("base64url decode chunk_size: {} must be a multiple of 3".format(chunk_size))
+
+  if(not isinstance(data, str)):
+    data = _byte_view(data)
+  encoded_chunk_size = chunk_size // 3 * 4
+  length = len(data)
+  start = 0
+  # Whole chunks, each of which decodes to exactly chunk_size bytes unless
+  # it contains padding or ignored characters.
+  while(length - start > encoded_chunk_size):
+    try:
+      decoded = _decode_chunk(data[start:start + encoded_chunk_size])
+    except binascii.Error:
+      decoded = None
+
+    if(decoded is None or len(decoded) != chunk_size):
+      # Not aligned to the chunks, decode the rest at once.  The chunks
+      # already decoded end on a 4 character boundary.
+      break
+
+    yield(decoded)
+    start += encoded_chunk_size
+
+  yield(_decode_chunk(data[start:]))
+
+
+def decode(data: typing.Union[str, BytesLike], chunk_size: int = CHUNK_SIZE) -> bytes:
+  """
+  base64url decode the data.
+
+  Parameters: see **iter_decode**
+
+  Returns: the decoded binary data
+
+  Raises: binascii.Error if the data is not valid base64url
+  """
+  if(isinstance(data, memoryview)):
+    data = _byte_view(data)
+  if(len(data) <= chunk_size // 3 * 4):
+    return(_decode_chunk(data))
+
+  return(b"".join(iter_decode(data, chunk_size)))
@@ -0,0 +1,307 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+"""
+Pluggable caches for the results of expensive **FilterPlugin** operations
+(e.g. transcription or generative AI) keyed by a digest of the input and the
+options used.
+"""
+import os
+import time
+import json
+import typing
+import asyncio
+import hashlib
+import weakref
+import threading
+import collections
+import tempfile
+import urllib.parse
+import vcon
+
+logger = vcon.build_logger(__name__)
+
+
+class CacheNotSupported(Exception):
+  """ Raised when the cache URL scheme is not supported or its package is not installed """
+
+
+def digest(data: bytes) -> str:
+  """ Get the SHA-512 hex digest of the given bytes (e.g. a recording) """
+  return(hashlib.sha512(data).hexdigest())
+
+
+def make_key(namespace: str, *parts: typing.Any) -> str:
+  """
+  Build a cache key from the given JSON serializable parts.  Dicts are normalized
+  by sorting their keys so that the same option set always produces the same key.
+
+  Parameters:
+    **namespace** (str) - prefix for the key (e.g. "transcript")
+    **parts** - values that the cached result is dependent upon (e.g. digest
+      of the recording, model name and options)
+
+  Returns: key of the form <namespace>:<SHA-512 hex digest of the parts>
+  """
+  normalized = json.dumps(parts, sort_keys = True, separators = (",", ":"), default = str)
+  return("{}:{}".format(namespace, digest(normalized.encode("utf-8"))))
+
+
+class ResultCache():
+  """
+  Abstract cache of JSON serializable results.
+
+  Use **ResultCache.from_url** to instantiate the cache for a URL:
+
+    * **memory:** - in process memory, at most **MemoryResultCache.DEFAULT_MAX_ENTRIES**
+      least recently used entries (e.g. memory:?max_entries=100)
+    * **file:///path/to/dir** - one JSON file per entry in the given directory
+    * **redis://host:port/db** - entries in Redis, requires the redis package
+
+  **lookup** gets a value counting the cache **hits** and **misses**.
+
+  The cache methods are coroutines so that the event loop is not blocked
+  by the file or network I/O of the disk and Redis caches.
+  """
+  hits: int = 0
+  misses: int = 0
+
+  async def lookup(self, key: str) -> typing.Any:
+    """ **get** the cached value for the key, counting the cache hit or miss """
+    value = await self.get(key)
+    if(value is None):
+      self.misses += 1
+    else:
+      self.hits += 1
+
+    return(value)
+
+
+  def stats(self) -> typing.Dict[str, typing.Any]:
+    """ Get the hit and miss counts of **lookup** and the hit ratio """
+    lookups = self.hits + self.misses
+    return({
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_ratio": self.hits / lookups if lookups > 0 else 0.0
+      })
+
+
+  async def get(self, key: str) -> typing.Any:
+    """ Get the cached value for the key or None if not cached or expired """
+    raise Exception("{}.get not implemented".format(type(self).__name__))
+
+
+  async def set(self, key: str, value: typing.Any, ttl: typing.Union[int, None] = None) -> None:
+    """
+    Cache the value for the key
+
+    Parameters:
+      **key** (str) - the key as built by **make_key**
+      **value** (Any) - JSON serializable value
+      **ttl** (int) - seconds until the entry expires, None for no expiry
+    """
+    raise Exception("{}.set not implemented".format(type(self).__name__))
+
+
+  async def delete(self, key: str) -> None:
+    """ Remove the key from the cache if it exists """
+    raise Exception("{}.delete not implemented".format(type(self).__name__))
+
+
+  @staticmethod
+  def from_url(url: typing.Union[str, None]) -> typing.Union['ResultCache', None]:
+    """
+    Instantiate the cache for the given URL.
+
+    Returns: the cache or None if the URL is empty (i.e. caching disabled)
+    """
+    if(url is None or url == ""):
+      return(None)
+
+    parsed_url = urllib.parse.urlparse(url)
+    scheme = parsed_url.scheme
+    if(scheme == "memory"):
+      query = urllib.parse.parse_qs(parsed_url.query)
+      max_entries = query.get("max_entries", [MemoryResultCache.DEFAULT_MAX_ENTRIES])[0]
+      try:
+        return(MemoryResultCache(int(max_entries)))
+
+      except ValueError as value_error:
+        raise CacheNotSupported("memory cache max_entries: {} should be an int".format(max_entries)) from value_error
+
+    if(scheme == "file"):
+      return(DiskResultCache(parsed_url.path))
+
+    if(scheme in ("redis", "rediss", "unix")):
+      return(RedisResultCache(url))
+
+    raise CacheNotSupported("cache URL scheme: {} not supported".format(scheme))
+
+
+class MemoryResultCache(ResultCache):
+  """
+  **ResultCache** in process memory.  The least recently used entries are
+  dropped when there are more than **max_entries**.
+
+  Values are stored as JSON and each **get** returns a new copy, so that
+  changes to a value (e.g. a transcript added to a **Vcon** and then
+  offset or redacted) do not alter the cached entry or other copies of it.
+  """
+  DEFAULT_MAX_ENTRIES = 1024
+
+  def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Parameters:
+      **max_entries** (int) - maximum number of cached entries
+    """
+    if(max_entries < 1):
+      raise CacheNotSupported("memory cache max_entries: {} should be at least 1".format(max_entries))
+
+    self.max_entries = max_entries
+    # key: (expiry time or None, JSON value)
+    self._entries: typing.OrderedDict[str, typing.Tuple[typing.Union[float, None], str]] = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+
+  async def get(self, key: str) -> typing.Any:
+    with self._lock:
+      entry = self._entries.get(key, None)
+      if(entry is None):
+        return(None)
+
+      expires, value = entry
+      if(expires is not None and expires <= time.time()):
+        del self._entries[key]
+        return(None)
+
+      self._entries.move_to_end(key)
+
+    return(json.loads(value))
+
+
+  async def set(self, key: str, value: typing.Any, ttl: typing.Union[int, None] = None) -> None:
+    # Store as JSON so that later changes to value do not alter the cached entry
+    entry = (
+      None if ttl is None else time.time() + ttl,
+      json.dumps(value)
+      )
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+      while(len(self._entries) > self.max_entries):
+        self._entries.popitem(last = False)
+
+
+  async def delete(self, key: str) -> None:
+    with self._lock:
+      self._entries.pop(key, None)
+
+
+class DiskResultCache(ResultCache):
+  """
+  **ResultCache** with one JSON file per entry in a directory.  The directory
+  may be shared by processes as entries are written atomically.  The files are
+  read and written in the event loop's default executor.
+  """
+  def __init__(self, directory: str):
+    self._directory = directory
+    os.makedirs(directory, exist_ok = True)
+
+
+  def _path(self, key: str) -> str:
+    # keys contain a ':' after the namespace which is not portable in file names
+    return(os.path.join(self._directory, key.replace(":", "_") + ".json"))
+
+
+  def _read(self, key: str) -> typing.Any:
+    try:
+      with open(self._path(key), "r", encoding = "utf-8") as entry_file:
+        entry = json.load(entry_file)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+      return(None)
+
+    expires = entry.get("expires", None)
+    if(expires is not None and expires <= time.time()):
+      self._remove(key)
+      return(None)
+
+    return(entry["value"])
+
+
+  def _write(self, key: str, value: typing.Any, ttl: typing.Union[int, None]) -> None:
+    entry = {
+      "expires": None if ttl is None else time.time() + ttl,
+      "value": value
+      }
+    # Write to a temp file and rename so that readers never see a partial entry
+    file_handle, temp_path = tempfile.mkstemp(dir = self._directory, suffix = ".tmp")
+    try:
+      with os.fdopen(file_handle, "w", encoding = "utf-8") as entry_file:
+        json.dump(entry, entry_file)
+      os.replace(temp_path, self._path(key))
+
+    except Exception:
+      os.unlink(temp_path)
+      raise
+
+
+  def _remove(self, key: str) -> None:
+    try:
+      os.unlink(self._path(key))
+    except FileNotFoundError:
+      pass
+
+
+  async def get(self, key: str) -> typing.Any:
+    return(await asyncio.get_running_loop().run_in_executor(None, self._read, key))
+
+
+  async def set(self, key: str, value: typing.Any, ttl: typing.Union[int, None] = None) -> None:
+    await asyncio.get_running_loop().run_in_executor(None, self._write, key, value, ttl)
+
+
+  async def delete(self, key: str) -> None:
+    await asyncio.get_running_loop().run_in_executor(None, self._remove, key)
+
+
+class RedisResultCache(ResultCache):
+  """ **ResultCache** with entries stored as JSON strings in Redis """
+  def __init__(self, url: str):
+    try:
+      import redis.asyncio
+    except ModuleNotFoundError as mod_error:
+      raise CacheNotSupported("Redis cache requires the redis package") from mod_error
+
+    self._url = url
+    # asyncio Redis connections are bound to the event loop
+    self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    logger.info("Redis result cache: {}".format(url))
+
+
+  def _client(self):
+    """ Get the Redis client for the running event loop """
+    import redis.asyncio
+    loop = asyncio.get_running_loop()
+    client = self._clients.get(loop, None)
+    if(client is None):
+      client = redis.asyncio.Redis.from_url(self._url)
+      self._clients[loop] = client
+
+    return(client)
+
+
+  async def get(self, key: str) -> typing.Any:
+    value = await self._client().get(key)
+    if(value is None):
+      return(None)
+
+    return(json.loads(value))
+
+
+  async def set(self, key: str, value: typing.Any, ttl: typing.Union[int, None] = None) -> None:
+    await self._client().set(key, json.dumps(value), ex = ttl)
+
+
+  async def delete(self, key: str) -> None:
+    await self._client().delete(key)
+
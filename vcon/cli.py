@@ -19,6 +19,7 @@ import sox
 import pytz
 import ffmpeg
 import vcon
+import vcon.base64url
 
 VERBOSE = False
 
@@ -837,12 +838,22 @@ Name of filter plugin (e.g. {}) or default type filter plugin name (e.g. {})
       if(dialog_index > num_dialogs):
         raise AttributeError("Dialog index: {} must be less than the number of dialog in the vCon: {}".format(dialog_index, num_dialogs))
 
-      recording_bytes = in_vcon.decode_dialog_inline_body(dialog_index)
       stdout_vcon = False
-      if(isinstance(recording_bytes, bytes)):
-        args.outfile.buffer.write(recording_bytes)
+      dialog = in_vcon.dialog[dialog_index]
+      if(dialog.get("body") is not None and
+        dialog.get("encoding", "none").lower() == "base64url" and
+        dialog["type"] in ["text", "recording"]
+        ):
+        # decode and write large bodies a chunk at a time
+        for recording_chunk in vcon.base64url.iter_decode(dialog["body"]):
+          args.outfile.buffer.write(recording_chunk)
+
       else:
-        args.outfile.write(recording_bytes)
+        recording_bytes = in_vcon.decode_dialog_inline_body(dialog_index)
+        if(isinstance(recording_bytes, bytes)):
+          args.outfile.buffer.write(recording_bytes)
+        else:
+          args.outfile.write(recording_bytes)
 
   #print("vcon._vcon_dict: {}".format(in_vcon._vcon_dict))
   if(stdout_vcon):
@@ -5,13 +5,18 @@ import importlib
 import os
 import copy
 import sys
+import time
 import typing
+import asyncio
+import threading
+import concurrent.futures
 import traceback
 import operator
 import logging
 import pydantic
 import pythonjsonlogger.jsonlogger
 import vcon.pydantic_utils
+import vcon.instrumentation
 
 
 # This package is dependent upon the vcon package only for typing purposes.
@@ -116,6 +121,47 @@ to be transcribed.
     examples = ["", "0:", "0:-2", "2:5", "0:6:2", [], [1, 4, 5, 9]]
     )
 
+  split_channels: bool = pydantic.Field(
+    title = "transcribe the channels of multi-channel recordings separately",
+    description = """
+For multi-channel recording **dialog** objects having a **parties** list
+with a party (or list of parties) per channel (e.g. stereo agent/customer
+recordings), transcribe each channel separately and concurrently so that
+the text in the transcript is attributed to the party of its channel.
+Otherwise the channels are mixed and transcribed as one.
+""",
+    default = True,
+    examples = [True, False]
+    )
+
+
+class TranscribeInitOptions(FilterPluginInitOptions):
+  """ base class for initialization options of all **FilterPlugins** that provide audio transcription """
+  transcription_cache: str = pydantic.Field(
+    title = "transcription result cache URL",
+    description = """
+URL of the cache in which transcription results are saved, keyed by the
+SHA-512 digest of the recording, the model and the transcription options.
+When the same recording is transcribed again with the same model and options,
+the cached result is added to the **Vcon** without performing the transcription.
+
+ * **""** (empty str) - transcription results are not cached
+ * **memory:** - results are cached in process memory, up to the 1024 most recently
+   used (memory:?max_entries=N sets the limit)
+ * **file:///path/to/dir** - results are cached as files in the given directory
+ * **redis://host:port/db** - results are cached in Redis
+""",
+    default = "",
+    examples = ["", "memory:", "file:///var/cache/vcon", "redis://localhost:6379/1"]
+    )
+
+  transcription_cache_ttl: int = pydantic.Field(
+    title = "transcription cache entry time to live",
+    description = "seconds after which cached transcription results expire, 0 for no expiry",
+    default = 0,
+    examples = [0, 604800]
+    )
+
 
 class FilterPlugin():
   """
@@ -132,13 +178,28 @@ class FilterPlugin():
         options (derived from **FilterPluginInitOptions**(
 
    * filtering (**filter**) which is the actual method 
-        that operates on a **Vcon**.
+        that operates on a **Vcon**.  **filter_batch** operates
+        on a list of **Vcon**s and may be overridden to batch
+        the work across **Vcon**s.
 
    * teardown (**__del__**) which performs any shutdown or
         release of resources for the plugin.
 
   Initialization and teardown are only performed once.
 
+  A derived class which does CPU heavy work in **filter** (e.g. model
+  inference or cryptography) should set the **cpu_bound** class attribute
+  to True.  If an executor is configured with **FilterPluginRegistry.set_executor**
+  (none by default), **FilterPluginRegistration.filter** then runs the plugin
+  in it rather than blocking the event loop and everything else in flight on it.
+  The plugin must then be safe to run in another thread or process (e.g. not
+  modify process wide state such as sys.stdout).
+
+  A derived class which does not modify the input **Vcon** (e.g. it only
+  reads it or returns a new **Vcon**) should set the **modifies_vcon** class
+  attribute to False.  **FilterPluginChain** then does not need to copy the
+  **Vcon** to preserve its state for later steps in the chain.
+
 
   **FilterPlugins** is an abstract class.  One must
   implement a derived class to use it.  The derived class
@@ -160,6 +221,9 @@ class FilterPlugin():
   is actually used. It stays loaded until the system
   exits.
   """
+  cpu_bound: bool = False
+  modifies_vcon: bool = True
+
   def __init__(self,
     options: FilterPluginInitOptions,
     options_type: typing.Type[FilterPluginOptions]
@@ -220,6 +284,44 @@ class FilterPlugin():
     raise FilterPluginNotImplemented("{}.filter not implemented".format(type(self)))
 
 
+  async def filter_batch(
+    self,
+    in_vcons: typing.List[Vcon],
+    options: FilterPluginOptions
+    ) -> typing.List[Vcon]:
+    """
+    Perform the operation on each of the input Vcons using the same options.
+
+    The default implementation invokes **filter** on each **Vcon** in turn.
+    Derived classes may override this to batch work (e.g. model inference)
+    across the **Vcon**s.
+
+    Parameters:
+      in_vcons (List[vcon.Vcon]) - input Vcons upon which the operation is to be performed by the plugin.
+      options (FilterPluginOptions) - derived options specific to the filter method/opearation
+
+    Returns:
+      List[vcon.Vcon] - the modified Vcons in the same order as the input Vcons
+    """
+    out_vcons = []
+    for in_vcon in in_vcons:
+      out_vcons.append(await self.filter(in_vcon, options))
+
+    return(out_vcons)
+
+
+  def cache_stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Get the hit and miss counts of the plugin's result caches (see **vcon.cache**).
+
+    The default implementation returns an empty dict.  Derived classes with
+    result caches should override this.
+
+    Returns: dict of cache name (e.g. init option name) to **vcon.cache.ResultCache.stats**
+    """
+    return({})
+
+
   def check_valid_state(
       self,
       filter_vcon: Vcon
@@ -378,6 +480,165 @@ class FilterPlugin():
     return(sliced_list)
 
 
+class ThreadPoolBatchInitOptions(FilterPluginInitOptions):
+  """
+  Initialization options for **ThreadPoolBatchFilterPlugin**s
+  """
+  batch_workers: int = pydantic.Field(
+    title = "filter_batch thread pool size",
+    description = """
+maximum number of threads used to run the operation on the **Vcon**s in a
+filter_batch call concurrently, 0 for the Python default.
+""",
+    examples = [0, 4],
+    default = 0
+    )
+
+
+class ThreadPoolBatchFilterPlugin(FilterPlugin):
+  """
+  Abstract **FilterPlugin** for CPU bound operations on a single **Vcon**
+  which release the GIL (e.g. **cryptography** RSA operations), such that
+  a batch of **Vcon**s is processed faster in parallel threads.
+
+  **filter_batch** runs the derived class's **filter** on each of the
+  **Vcon**s in the plugin's thread pool, so **filter** must be thread safe.
+  """
+  cpu_bound = True
+
+  def __init__(self,
+    options: ThreadPoolBatchInitOptions,
+    options_type: typing.Type[FilterPluginOptions]
+    ):
+    """ see **FilterPlugin.__init__** """
+    super().__init__(
+      options,
+      options_type
+      )
+    self._batch_pool: typing.Union[concurrent.futures.ThreadPoolExecutor, None] = None
+    self._batch_pool_lock = threading.Lock()
+
+
+  async def filter_batch(
+    self,
+    in_vcons: typing.List[Vcon],
+    options: FilterPluginOptions
+    ) -> typing.List[Vcon]:
+    """
+    Perform the operation on each of the input Vcons, in parallel in the
+    plugin's thread pool.
+
+    Returns:
+      List[vcon.Vcon] - the modified Vcons in the same order as the input Vcons
+    """
+    if(len(in_vcons) < 2):
+      return(await super().filter_batch(in_vcons, options))
+
+    with self._batch_pool_lock:
+      if(self._batch_pool is None):
+        self._batch_pool = concurrent.futures.ThreadPoolExecutor(
+          max_workers = self._init_options.batch_workers or None,
+          thread_name_prefix = "{}_batch".format(self.__class__.__name__)
+          )
+      batch_pool = self._batch_pool
+
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+      *[loop.run_in_executor(batch_pool, _run_filter, self.filter, in_vcon, options) for in_vcon in in_vcons]
+      )
+    return([result[0] for result in results])
+
+
+  def __del__(self):
+    """
+    Teardown/uninitialization method for the plugin, shuts down the filter_batch thread pool
+
+    Parameters: None
+    """
+    if(getattr(self, "_batch_pool", None) is not None):
+      self._batch_pool.shutdown(wait = False)
+    super().__del__()
+
+
+# Event loop for each executor thread (or process) used to run CPU bound plugins
+_executor_local = threading.local()
+
+
+def _executor_loop() -> asyncio.AbstractEventLoop:
+  """ Get the event loop for this executor thread, creating it the first time """
+  loop = getattr(_executor_local, "loop", None)
+  if(loop is None or loop.is_closed()):
+    loop = asyncio.new_event_loop()
+    _executor_local.loop = loop
+
+  return(loop)
+
+
+def _in_executor() -> bool:
+  """ Check if the running event loop is that of a plugin executor thread """
+  try:
+    return(asyncio.get_running_loop() is getattr(_executor_local, "loop", None))
+
+  except RuntimeError:
+    return(False)
+
+
+def _run_filter(
+    method: typing.Callable,
+    in_vcons: typing.Union[Vcon, typing.List[Vcon]],
+    options: FilterPluginOptions,
+    trace_memory: bool = False
+  ) -> typing.Tuple[typing.Union[Vcon, typing.List[Vcon]], float, typing.Union[int, None]]:
+  """
+  Run the plugin's filter or filter_batch coroutine on this executor thread's event loop
+
+  Returns: the filter result, the CPU seconds used by this thread to run it
+    and the peak memory allocated while running it if **trace_memory**
+    (otherwise None)
+  """
+  loop = _executor_loop()
+  cpu_start = time.thread_time()
+  peak_memory_bytes = None
+  if(trace_memory):
+    result, peak_memory_bytes = vcon.instrumentation.call_tracing_memory(
+      loop.run_until_complete,
+      method(in_vcons, options)
+      )
+
+  else:
+    result = loop.run_until_complete(method(in_vcons, options))
+
+  return((result, time.thread_time() - cpu_start, peak_memory_bytes))
+
+
+# Registrations instantiated in a plugin executor process, keyed by name
+_process_registrations: typing.Dict[str, FilterPluginRegistration] = {}
+
+
+def _process_filter(
+    name: str,
+    module_name: str,
+    class_name: str,
+    init_options: typing.Union[FilterPluginInitOptions, typing.Dict[str, typing.Any]],
+    in_vcons: typing.Union[Vcon, typing.List[Vcon]],
+    options: typing.Dict[str, typing.Any],
+    batch: bool,
+    trace_memory: bool
+  ) -> typing.Tuple[typing.Union[Vcon, typing.List[Vcon]], float, typing.Union[int, None]]:
+  """ Run the plugin's filter or filter_batch in a plugin executor process, see **_run_filter** """
+  registration = _process_registrations.get(name, None)
+  if(registration is None or
+    registration._module_name != module_name or
+    registration._class_name != class_name
+    ):
+    registration = FilterPluginRegistration(name, module_name, class_name, "", init_options)
+    _process_registrations[name] = registration
+
+  plugin = registration._loaded_plugin()
+  method = plugin.filter_batch if batch else plugin.filter
+  return(_run_filter(method, in_vcons, plugin.options_type(**options), trace_memory))
+
+
 class FilterPluginRegistration:
   """ Class containing info and helper methods on the registration for a single named plugin filter """
   def __init__(
@@ -397,6 +658,11 @@ class FilterPluginRegistration:
     self.description = description
     self._init_options = init_options
     self._plugin : typing.Union[FilterPlugin, None] = None
+    # Serializes loading so that a background preload and first use do not both load the plugin
+    self._load_lock = threading.RLock()
+    # seconds to import the implementation module and to instantiate the plugin class
+    self.import_seconds: typing.Union[float, None] = None
+    self.init_seconds: typing.Union[float, None] = None
 
   def import_plugin(
     self,
@@ -418,55 +684,65 @@ class FilterPluginRegistration:
         class was instantiated.
     """
     succeed = False
-    if(not self._module_load_attempted):
-      try:
-        logger.info("importing: {} for registered filter plugin: {}".format(self._module_name, self.name))
-        module = importlib.import_module(self._module_name)
-        self._module_load_attempted = True
-        self._module_not_found = False
-
+    with self._load_lock:
+      if(not self._module_load_attempted):
         try:
-          class_ = getattr(module, self._class_name)
-          if(isinstance(init_options, dict)):
-            # convert to proper init options type if a generic dict
-            if(not hasattr(class_, "init_options_type")):
-              raise FilterPluginNotImplemented(
-                "filter plugin class: {} in module: {} has not set init_options_type.  It should be the type/class derived form FiterPluginInitOptions".format(
-                self._class_name,
-                self._module_name
+          logger.info("importing: {} for registered filter plugin: {}".format(self._module_name, self.name))
+          start = time.perf_counter()
+          module = importlib.import_module(self._module_name)
+          self.import_seconds = time.perf_counter() - start
+          self._module_load_attempted = True
+          self._module_not_found = False
+
+          try:
+            class_ = getattr(module, self._class_name)
+            if(isinstance(init_options, dict)):
+              # convert to proper init options type if a generic dict
+              if(not hasattr(class_, "init_options_type")):
+                raise FilterPluginNotImplemented(
+                  "filter plugin class: {} in module: {} has not set init_options_type.  It should be the type/class derived form FiterPluginInitOptions".format(
+                  self._class_name,
+                  self._module_name
+                  ))
+
+              # Hide keys from logging
+              init_options_hidden = init_options.copy()
+              for name in init_options_hidden.keys():
+                # assume field names that end in _key needs to be hidden
+                if(name[-4:] == "_key" and init_options_hidden[name] != ""):
+                  # obscure keys
+                  init_options_hidden[name] = "********"
+                  # logger.debug("hiding value for: {}".format(name))
+
+              logger.debug("creating init_options type: {} using: dict: {} for plugin: {}".format(
+                class_.init_options_type,
+                init_options_hidden,
+                self.name
                 ))
-
-            # Hide keys from logging
-            init_options_hidden = init_options.copy()
-            for name in init_options_hidden.keys():
-              # assume field names that end in _key needs to be hidden
-              if(name[-4:] == "_key" and init_options_hidden[name] != ""):
-                # obscure keys
-                init_options_hidden[name] = "********"
-                # logger.debug("hiding value for: {}".format(name))
-
-            logger.debug("creating init_options type: {} using: dict: {} for plugin: {}".format(
-              class_.init_options_type,
-              init_options_hidden,
-              self.name
+              init_options = class_.init_options_type(**init_options)
+              # TODO raise "filter_plugin class: {} has not set static attribute: init_options_type.  Should be a class Deribed from FilterPluginInitOptions".format(self._class_name)
+            start = time.perf_counter()
+            self._plugin = class_(init_options)
+            self.init_seconds = time.perf_counter() - start
+            logger.info("filter plugin: {} import: {:.3f} init: {:.3f} seconds".format(
+              self.name,
+              self.import_seconds,
+              self.init_seconds
               ))
-            init_options = class_.init_options_type(**init_options)
-            # TODO raise "filter_plugin class: {} has not set static attribute: init_options_type.  Should be a class Deribed from FilterPluginInitOptions".format(self._class_name)
-          self._plugin = class_(init_options)
-          self._class_not_found = False
-          succeed = True
+            self._class_not_found = False
+            succeed = True
 
-        except AttributeError as ae:
-          logger.warning(ae)
-          self._class_not_found = True
+          except AttributeError as ae:
+            logger.warning(ae)
+            self._class_not_found = True
 
-      except ModuleNotFoundError as mod_error:
-        logger.warning(mod_error)
-        logger.warning(traceback.format_exc(limit=-1))
-        self._module_not_found = True
+        except ModuleNotFoundError as mod_error:
+          logger.warning(mod_error)
+          logger.warning(traceback.format_exc(limit=-1))
+          self._module_not_found = True
 
-    elif(self._plugin is not None):
-      succeed = True
+      elif(self._plugin is not None):
+        succeed = True
 
     return(succeed)
 
@@ -475,14 +751,58 @@ class FilterPluginRegistration:
     init_options: typing.Union[FilterPluginInitOptions, None] = None
     ) -> typing.Union[FilterPlugin, None]:
     """ Return the plugin filter class for this registration """
-    if(not self._module_load_attempted):
-      if(init_options is None):
-        init_options = self._init_options
-      self.import_plugin(init_options)
+    if(self._plugin is None):
+      # wait for any load in progress in another thread (e.g. background preload)
+      with self._load_lock:
+        if(not self._module_load_attempted):
+          if(init_options is None):
+            init_options = self._init_options
+          self.import_plugin(init_options)
 
     return(self._plugin)
 
 
+  def load_timings(self) -> typing.Dict[str, typing.Any]:
+    """
+    Get the load state and timings for this registration's plugin.
+
+    Returns: dict with keys:
+      **module** (str) - the implementation module name
+      **state** (str) - "not_loaded", "loaded", "module_not_found", "class_not_found" or "failed"
+      **import_seconds** (float) - seconds to import the module, None if not imported
+      **init_seconds** (float) - seconds to instantiate the plugin, None if not instantiated
+    """
+    if(self._plugin is not None):
+      state = "loaded"
+    elif(self._module_not_found):
+      state = "module_not_found"
+    elif(self._class_not_found):
+      state = "class_not_found"
+    elif(self._module_load_attempted):
+      state = "failed"
+    else:
+      state = "not_loaded"
+
+    return({
+      "module": self._module_name,
+      "state": state,
+      "import_seconds": self.import_seconds,
+      "init_seconds": self.init_seconds
+      })
+
+
+  def cache_stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Get the result cache stats of this registration's plugin.
+
+    Returns: the dict returned by **FilterPlugin.cache_stats**, empty if the plugin is not loaded
+    """
+    if(self._plugin is None):
+      return({})
+
+    return(self._plugin.cache_stats())
+
+
   def options_type(self, *args, **kwargs) -> FilterPluginOptions:
     plugin = self.plugin()
 
@@ -501,12 +821,9 @@ class FilterPluginRegistration:
     return(plugin.options_type(*args, **kwargs))
 
 
-  async def filter(
-    self,
-    in_vcon : vcon.Vcon,
-    options: FilterPluginOptions
-    ) -> vcon.Vcon:
-    if(not self._module_load_attempted):
+  def _loaded_plugin(self) -> FilterPlugin:
+    """ Get the plugin, loading it if needed, raise exception if it cannot be loaded """
+    if(self._plugin is None):
       self.import_plugin(self._init_options)
 
     if(self._module_not_found is True):
@@ -522,6 +839,15 @@ class FilterPluginRegistration:
       logger.debug("plugin: {} from class: {} module: {} load failed".format(self.name, self._class_name, self._module_name))
       raise Exception("plugin: {} from class: {} module: {} load failed".format(self.name, self._class_name, self._module_name))
 
+    return(plugin)
+
+
+  def _plugin_options(
+    self,
+    plugin: FilterPlugin,
+    options: typing.Union[FilterPluginOptions, typing.Dict[str, typing.Any]]
+    ) -> FilterPluginOptions:
+    """ Coerce the options to the plugin's options type """
     if(isinstance(options, dict)):
       options = plugin.options_type(**options)
 
@@ -533,13 +859,151 @@ class FilterPluginRegistration:
         type(options)
         ))
 
-    return(await plugin.filter(in_vcon, options))
+    return(options)
+
+
+  async def filter(
+    self,
+    in_vcon : vcon.Vcon,
+    options: FilterPluginOptions
+    ) -> vcon.Vcon:
+    """
+    Run the given **Vcon** through this registration's plugin.
+
+    CPU bound plugins are run in the **FilterPluginRegistry** executor.
+    Note: with a process executor, the plugin operates on a copy of the
+    **Vcon** and the returned **Vcon** is a different object than **in_vcon**.
+    """
+    plugin = self._loaded_plugin()
+    options = self._plugin_options(plugin, options)
+
+    with FILTER_PLUGIN_STATS.measure(self.name, in_vcon) as measurement:
+      executor = self._executor(plugin)
+      if(executor is None):
+        out_vcon = await plugin.filter(in_vcon, options)
+
+      else:
+        out_vcon, measurement.cpu_seconds, measurement.peak_memory_bytes = await self._run_in_executor(
+          executor,
+          plugin,
+          in_vcon,
+          options,
+          False,
+          measurement.sampled
+          )
+
+      measurement.set_output(out_vcon)
+
+    return(out_vcon)
+
+
+  async def filter_batch(
+    self,
+    in_vcons : typing.List[vcon.Vcon],
+    options: FilterPluginOptions
+    ) -> typing.List[vcon.Vcon]:
+    """
+    Run the given list of **Vcon**s through this registration's plugin using **FilterPlugin.filter_batch**
+
+    CPU bound plugins are run in the **FilterPluginRegistry** executor.  If
+    the plugin does not override **filter_batch**, the **Vcon**s are filtered
+    concurrently in the executor.
+    """
+    plugin = self._loaded_plugin()
+    options = self._plugin_options(plugin, options)
+
+    with FILTER_PLUGIN_STATS.measure(self.name + ".filter_batch", in_vcons) as measurement:
+      executor = self._executor(plugin)
+      if(executor is None):
+        out_vcons = await plugin.filter_batch(in_vcons, options)
+
+      elif(type(plugin).filter_batch is FilterPlugin.filter_batch):
+        results = await asyncio.gather(
+          *[self._run_in_executor(executor, plugin, in_vcon, options, False, measurement.sampled)
+            for in_vcon in in_vcons]
+          )
+        out_vcons = [out_vcon for out_vcon, cpu_seconds, peak_memory_bytes in results]
+        measurement.cpu_seconds = sum([cpu_seconds for out_vcon, cpu_seconds, peak_memory_bytes in results])
+        # Only one of the concurrent calls traces memory
+        peaks = [peak_memory_bytes for out_vcon, cpu_seconds, peak_memory_bytes in results
+          if peak_memory_bytes is not None]
+        measurement.peak_memory_bytes = max(peaks) if len(peaks) > 0 else None
+
+      else:
+        out_vcons, measurement.cpu_seconds, measurement.peak_memory_bytes = await self._run_in_executor(
+          executor,
+          plugin,
+          in_vcons,
+          options,
+          True,
+          measurement.sampled
+          )
+
+      measurement.set_output(out_vcons)
+
+    return(out_vcons)
+
+
+  @staticmethod
+  def _executor(plugin: FilterPlugin) -> typing.Union[concurrent.futures.Executor, None]:
+    """ Get the executor to run the plugin in, None to run it on the event loop """
+    # Plugins run from within a plugin already in the executor stay on that thread
+    # to avoid waiting on the same pool (i.e. deadlock).
+    if(not plugin.cpu_bound or _in_executor()):
+      return(None)
+
+    return(FilterPluginRegistry.get_executor())
+
+
+  async def _run_in_executor(
+      self,
+      executor: concurrent.futures.Executor,
+      plugin: FilterPlugin,
+      in_vcons: typing.Union[Vcon, typing.List[Vcon]],
+      options: FilterPluginOptions,
+      batch: bool,
+      trace_memory: bool
+    ) -> typing.Tuple[typing.Union[Vcon, typing.List[Vcon]], float, typing.Union[int, None]]:
+    """
+    Run the plugin's filter (or filter_batch if **batch**) in the executor
+
+    Returns: the filter result, the CPU seconds used by the executor thread or
+      process to run it and, if **trace_memory**, the peak memory allocated in
+      the executor thread or process while running it (otherwise None)
+    """
+    loop = asyncio.get_running_loop()
+    if(isinstance(executor, concurrent.futures.ProcessPoolExecutor)):
+      # The Vcons are pickled to and from the process.  The options are passed
+      # as a dict as the options class may be created dynamically (e.g. for
+      # VconProcessors), which cannot be pickled.
+      return(await loop.run_in_executor(
+        executor,
+        _process_filter,
+        self.name,
+        self._module_name,
+        self._class_name,
+        self._init_options,
+        in_vcons,
+        options.dict(),
+        batch,
+        trace_memory
+        ))
+
+    method = plugin.filter_batch if batch else plugin.filter
+    return(await loop.run_in_executor(executor, _run_filter, method, in_vcons, options, trace_memory))
+
 
 class FilterPluginRegistry:
   """ class/scope for Vcon filter plugin registrations and defaults for plugin types """
   _registry: typing.Dict[str, FilterPluginRegistration] = {}
   _defaults: typing.Dict[str, str] = {}
 
+  EXECUTOR_TYPES = ["thread", "process", "none"]
+  _executor_type: str = os.getenv("VCON_FILTER_PLUGIN_EXECUTOR", "none")
+  _executor_workers: int = 0
+  _executor: typing.Union[concurrent.futures.Executor, None] = None
+  _executor_lock = threading.Lock()
+
   @staticmethod
   def __add_plugin(plugin: FilterPluginRegistration, replace=False):
 
@@ -624,6 +1088,74 @@ class FilterPluginRegistry:
     """
     return(FilterPluginRegistry._registry.keys())
 
+  @staticmethod
+  def load_plugins(
+      names: typing.List[str],
+      wait: bool = True,
+      max_workers: int = 0
+    ) -> typing.Dict[str, concurrent.futures.Future]:
+    """
+    Load (import and instantiate) the named filter plugins in parallel threads,
+    rather than upon first use.  This is used to warm up plugins with slow imports
+    or model loads (e.g. TensorFlow or torch) before they are needed, either
+    waiting for them or letting them load in the background.  Using a plugin
+    while it is being loaded in the background waits for the load to complete.
+
+    Parameters:  
+      **names** (List[str]) - names of registered filter plugins or plugin types
+        to load, "*" for all registered plugins  
+      **wait** (bool) - True to wait for all of the plugins to load, False to
+        load them in background threads and return immediately  
+      **max_workers** (int) - maximum number of threads loading plugins, 0 for
+        the Python default
+
+    Returns: dict of plugin name to the **concurrent.futures.Future** for its load,
+      the result of which is True if the plugin was loaded
+    """
+    if("*" in names):
+      names = list(FilterPluginRegistry.get_names())
+
+    # raise for unregistered names before loading any
+    registrations = {name: FilterPluginRegistry.get(name, True) for name in names}
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+      max_workers or None,
+      thread_name_prefix = "filter_plugin_load"
+      )
+    futures: typing.Dict[str, concurrent.futures.Future] = {}
+    for name, registration in registrations.items():
+      futures[name] = executor.submit(registration.import_plugin, registration._init_options)
+      futures[name].add_done_callback(
+        lambda future, name = name: FilterPluginRegistry._log_load_result(name, future)
+        )
+
+    # Queued loads are still run when not waiting
+    executor.shutdown(wait = wait)
+
+    return(futures)
+
+
+  @staticmethod
+  def _log_load_result(name: str, future: concurrent.futures.Future) -> None:
+    exception = future.exception()
+    if(exception is not None):
+      logger.warning("filter plugin: {} load failed: {}".format(name, exception))
+    elif(not future.result()):
+      logger.warning("filter plugin: {} not loaded".format(name))
+
+
+  @staticmethod
+  def get_load_timings() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Get the load state and import and initialization timings of all of the
+    registered filter plugins.
+
+    Returns: dict of plugin name to the dict returned by **FilterPluginRegistration.load_timings**
+    """
+    return({name: registration.load_timings()
+      for name, registration in list(FilterPluginRegistry._registry.items())})
+
+
   @staticmethod
   def set_type_default_name(plugin_type: str, name: str) -> None:
     """ Set the default filter name for the given filter type """
@@ -655,6 +1187,65 @@ class FilterPluginRegistry:
       raise FilterPluginNotRegistered("Filter plugin default type name {} is not set".format(plugin_type))
     return(FilterPluginRegistry.get(name))
 
+  @staticmethod
+  def set_executor(executor_type: str, max_workers: int = 0) -> None:
+    """
+    Set the executor in which CPU bound plugins (**FilterPlugin.cpu_bound**)
+    are run, off of the event loop.  The default is set by the
+    VCON_FILTER_PLUGIN_EXECUTOR and VCON_FILTER_PLUGIN_EXECUTOR_WORKERS
+    environment variables.
+
+    Parameters:  
+      **executor_type** (str) - "thread" to run in a thread pool, "process" to run in a
+        process pool (the Vcon is pickled to and from the process) or "none" to run
+        CPU bound plugins on the event loop  
+      **max_workers** (int) - maximum number of threads or processes, 0 for the
+        executor's default
+
+    Returns: none
+    """
+    if(executor_type not in FilterPluginRegistry.EXECUTOR_TYPES):
+      raise AttributeError("executor_type: {} should be one of: {}".format(
+        executor_type,
+        FilterPluginRegistry.EXECUTOR_TYPES
+        ))
+
+    FilterPluginRegistry.shutdown_executor()
+    FilterPluginRegistry._executor_type = executor_type
+    FilterPluginRegistry._executor_workers = max_workers
+
+
+  @staticmethod
+  def get_executor() -> typing.Union[concurrent.futures.Executor, None]:
+    """
+    Get the executor for CPU bound plugins, creating it the first time.
+
+    Returns: the thread or process pool executor or None if CPU bound
+      plugins are to be run on the event loop
+    """
+    with FilterPluginRegistry._executor_lock:
+      if(FilterPluginRegistry._executor is None):
+        max_workers = FilterPluginRegistry._executor_workers or None
+        if(FilterPluginRegistry._executor_type == "thread"):
+          FilterPluginRegistry._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers,
+            thread_name_prefix = "filter_plugin"
+            )
+        elif(FilterPluginRegistry._executor_type == "process"):
+          FilterPluginRegistry._executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+
+      return(FilterPluginRegistry._executor)
+
+
+  @staticmethod
+  def shutdown_executor() -> None:
+    """ Shutdown the executor for CPU bound plugins, it is recreated when next needed """
+    with FilterPluginRegistry._executor_lock:
+      if(FilterPluginRegistry._executor is not None):
+        FilterPluginRegistry._executor.shutdown()
+        FilterPluginRegistry._executor = None
+
+
   @staticmethod
   def shutdown_plugins():
     """
@@ -672,7 +1263,235 @@ class FilterPluginRegistry:
       plugin._module_load_attempted = False
       plugin._module_not_found = False
       plugin._class_not_found = False
+      plugin.import_seconds = None
+      plugin.init_seconds = None
       # This should cause __del__ to be invoked on the plugin
       del plugin._plugin
       plugin._plugin = None
 
+    # Plugin instances in executor processes are shutdown with the processes
+    FilterPluginRegistry.shutdown_executor()
+
+
+def _vcon_size(vcons: typing.Union[Vcon, typing.List[Vcon], None]) -> typing.Union[int, None]:
+  """ Get the size in bytes of the JSON serialized Vcon(s), None if not serializable """
+  if(isinstance(vcons, list)):
+    sizes = [_vcon_size(a_vcon) for a_vcon in vcons]
+    if(None in sizes):
+      return(None)
+    return(sum(sizes))
+
+  if(vcons is None):
+    return(None)
+
+  return(len(vcons.dumps().encode("utf-8")))
+
+
+# Instrumentation of FilterPluginRegistration.filter and filter_batch calls by plugin name
+FILTER_PLUGIN_STATS = vcon.instrumentation.CallInstrumentation(_vcon_size)
+
+
+def stats() -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+  """
+  Get the wall time, CPU time, peak memory (CPU bound plugins run in the
+  executor only) and bytes in and out histograms of the filter plugin calls.  **filter_batch** calls are aggregated under the
+  plugin name with ".filter_batch" appended.
+  See **vcon.instrumentation** for configuration.
+
+  Returns: dict of plugin name to the stats described in **vcon.instrumentation.CallInstrumentation.stats**
+  """
+  return(FILTER_PLUGIN_STATS.stats())
+
+
+def cache_stats() -> typing.Dict[str, typing.Dict[str, typing.Dict[str, typing.Any]]]:
+  """
+  Get the hit and miss counts of the result caches (e.g. transcription and
+  response caches) of the loaded filter plugins.  Only the lookups made in
+  this process are counted (i.e. not those of plugins run in the "process"
+  plugin executor).
+
+  Returns: dict of plugin name to the dict returned by **FilterPlugin.cache_stats**,
+    for the loaded plugins which have result caches
+  """
+  plugin_cache_stats = {}
+  for name, registration in list(FilterPluginRegistry._registry.items()):
+    registration_cache_stats = registration.cache_stats()
+    if(len(registration_cache_stats) > 0):
+      plugin_cache_stats[name] = registration_cache_stats
+
+  return(plugin_cache_stats)
+
+
+class FilterPluginChainStep(pydantic.BaseModel, **vcon.pydantic_utils.SET_ALLOW):
+  """ A **FilterPlugin** and its options run as one step of a **FilterPluginChain** """
+  plugin: str = pydantic.Field(
+    title = "filter plugin name",
+    description = "name of the registered **FilterPlugin** or **FilterPlugin** type to run in this step",
+    examples = ["whisper", "transcribe", "openai_chat_completion"]
+    )
+  options: typing.Dict[str, typing.Any] = pydantic.Field(
+    title = "filter plugin options",
+    description = "options for the **FilterPlugin.filter** method of this step's plugin",
+    default = {}
+    )
+  input_vcon: int = pydantic.Field(
+    title = "step input vCon",
+    description = """
+The state of the vCon in the chain which is input to this step.
+0 is the vCon input to the chain, N is the vCon output from the Nth
+step of the chain and -1 is the vCon output from the previous step
+(the vCon input to the chain for the first step).
+""",
+    examples = [-1, 0, 2],
+    default = -1
+    )
+
+
+class FilterPluginChainInitOptions(
+  FilterPluginInitOptions,
+  title = "filter plugin chain **FilterPlugin** intialization object"
+  ):
+  """
+  A FilterPluginChainInitOptions is derived from FilterPluginInitOptions.
+  A FilterPluginChainInitOptions is passed to the FilterPluginChain plugin
+  when it is initialized.
+  """
+  steps: typing.List[FilterPluginChainStep] = pydantic.Field(
+    title = "chain steps",
+    description = "ordered list of the **FilterPlugins** and their options run by the chain",
+    default = []
+    )
+
+
+class FilterPluginChainOptions(
+  FilterPluginOptions,
+  title = "filter plugin chain filter method options"
+  ):
+  """
+  Options for running a **Vcon** through a **FilterPluginChain**
+  """
+  steps: typing.List[FilterPluginChainStep] = pydantic.Field(
+    title = "chain steps",
+    description = """
+ordered list of the **FilterPlugins** and their options to run instead of
+the steps given in the chain's initialization options.  If empty, the steps
+in the initialization options are run.
+""",
+    default = []
+    )
+
+
+class FilterPluginChain(FilterPlugin):
+  """
+  **FilterPlugin** which runs an ordered list of **FilterPlugins** on one
+  **Vcon** object in place, without copying or serializing the **Vcon**
+  between steps.
+
+  Each step takes the output **Vcon** of the previous step by default, or
+  of an earlier step (see **FilterPluginChainStep.input_vcon**).  A step's
+  input **Vcon** is copied only if its plugin modifies the **Vcon**
+  (**FilterPlugin.modifies_vcon**) and a later step takes the same **Vcon**
+  state as input.
+
+  A chain with a fixed set of steps is registered with
+  **FilterPluginRegistry.register** using module: "vcon.filter_plugins", class:
+  "FilterPluginChain" and the steps in the initialization options.  The
+  "filter_chain" plugin has no steps in its initialization options and runs
+  the steps given in its **filter** options.
+  """
+  init_options_type = FilterPluginChainInitOptions
+
+  def __init__(
+      self,
+      init_options: FilterPluginChainInitOptions
+    ):
+    """
+    Parameters:
+      init_options (FilterPluginChainInitOptions) - the initialization options for the chain
+    """
+    super().__init__(
+      init_options,
+      FilterPluginChainOptions
+      )
+
+    self.check_steps(init_options.steps)
+    self.last_stats: typing.Dict[str, int] = {}
+
+
+  @staticmethod
+  def check_steps(steps: typing.List[FilterPluginChainStep]) -> None:
+    """ Check that each step's input vCon is the chain input or output of an earlier step """
+    for step_index, step in enumerate(steps):
+      if(step.input_vcon < -1 or step.input_vcon > step_index):
+        raise AttributeError("chain step: {} plugin: {} input_vcon: {} should be -1 or 0 through {}".format(
+          step_index,
+          step.plugin,
+          step.input_vcon,
+          step_index
+          ))
+
+
+  @staticmethod
+  def _input_index(step: FilterPluginChainStep, step_index: int) -> int:
+    """ index in to the chain's vCon states of the input to the step """
+    if(step.input_vcon == -1):
+      return(step_index)
+
+    return(step.input_vcon)
+
+
+  def check_valid_state(
+      self,
+      filter_vcon: Vcon
+    ) -> None:
+    """
+    The state of the vCon is checked by the plugin of each step before the step is run
+    """
+
+
+  async def filter(
+      self,
+      in_vcon: Vcon,
+      options: FilterPluginChainOptions
+    ) -> Vcon:
+    """
+    Run the **Vcon** through each of the chain steps in order.
+
+    Parameters:
+      options (FilterPluginChainOptions)
+
+    Returns:
+      the **Vcon** output from the last step in the chain
+    """
+    steps = options.steps if len(options.steps) > 0 else self._init_options.steps
+    self.check_steps(steps)
+
+    # vcon_states[0] is the chain input, vcon_states[N] the output of step N
+    vcon_states: typing.List[Vcon] = [in_vcon]
+    num_copies = 0
+    for step_index, step in enumerate(steps):
+      registration = FilterPluginRegistry.get(step.plugin, True)
+      plugin = registration._loaded_plugin()
+      step_vcon = vcon_states[self._input_index(step, step_index)]
+      plugin.check_valid_state(step_vcon)
+
+      # Preserve the input state if a later step takes it as input
+      if(plugin.modifies_vcon and any(
+        vcon_states[self._input_index(later_step, later_index)] is step_vcon
+        for later_index, later_step in enumerate(steps[step_index + 1:], step_index + 1)
+        if(self._input_index(later_step, later_index) <= step_index)
+        )):
+        logger.debug("chain step: {} plugin: {} copying input vCon".format(step_index, step.plugin))
+        step_vcon = copy.deepcopy(step_vcon)
+        num_copies += 1
+
+      vcon_states.append(await registration.filter(step_vcon, step.options))
+
+    self.last_stats = {"num_steps": len(steps), "num_copies": num_copies}
+    return(vcon_states[-1])
+
+
+try:
+  FilterPluginRegistry._executor_workers = int(os.getenv("VCON_FILTER_PLUGIN_EXECUTOR_WORKERS", 0))
+except ValueError:
+  logger.warning("VCON_FILTER_PLUGIN_EXECUTOR_WORKERS should be an int, using: 0")
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Deepgram audio transcription filter plugin registration """
 import os
 import datetime
@@ -7,7 +7,10 @@ import vcon.accessors
 
 deepgram_key = os.getenv("DEEPGRAM_KEY", "")
 # Register the Deepgram filter plugin
-init_options = {"deepgram_key": deepgram_key}
+init_options = {
+  "deepgram_key": deepgram_key,
+  "transcription_cache": os.getenv("TRANSCRIPTION_CACHE", "")
+  }
 
 vcon.filter_plugins.FilterPluginRegistry.register(
   "deepgram",
@@ -35,6 +38,25 @@ class DeepgramTranscriptAccessor(vcon.accessors.TranscriptAccessor):
 
       text_list = []
       dialog_start = datetime.datetime.fromisoformat(vcon.utils.cannonize_date(self._dialog_dict["start"]))
+      channels = self._analysis_dict["body"]["results"]["channels"]
+      parties = self._dialog_dict.get("parties", None)
+      # Multi-channel recording transcribed per channel, the dialog parties list has the party(s) per channel
+      if(len(channels) > 1 and isinstance(parties, list) and len(parties) == len(channels)):
+        for channel_index, channel in enumerate(channels):
+          for paragraph in channel["alternatives"][0].get("paragraphs", {}).get("paragraphs", []):
+            text_dict = {}
+            text_dict["parties"] = parties[channel_index]
+            relative_start = paragraph["start"]
+            text_dict["start"] = (dialog_start + datetime.timedelta(0, relative_start)).isoformat()
+            relative_end = paragraph["end"]
+            text_dict["duration"] = relative_end - relative_start
+            sentence_list = [d["text"] for d in paragraph["sentences"]]
+            text_dict["text"] = "  ".join(sentence_list)
+            text_list.append((relative_start, text_dict))
+
+        text_list.sort(key = lambda start_text: start_text[0])
+        return([text_dict for relative_start, text_dict in text_list])
+
       # get diarization if provided
       if(self._analysis_dict["body"]["results"]["channels"][0]["alternatives"][0].get("paragraphs", None) is not None):
         for paragraph in self._analysis_dict["body"]["results"]["channels"][0]["alternatives"][0]["paragraphs"]["paragraphs"]:
@@ -0,0 +1,14 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" FilterPluginChain plugin registration """
+import typing
+import vcon.filter_plugins
+
+# Register plugin, the chain steps are given in the filter options
+registration_options: typing.Dict[str, typing.Any] = {}
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "filter_chain",
+  "vcon.filter_plugins",
+  "FilterPluginChain",
+  "runs a vCon through an ordered list of filter plugins in place",
+  registration_options
+  )
@@ -1,7 +1,8 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for JWE decripting of vCon """
 import typing
 import pydantic
+import vcon.security
 import vcon.filter_plugins
 
 logger = vcon.build_logger(__name__)
@@ -16,7 +17,7 @@ class NoPublicKey(Exception):
 
 
 class DecryptFilterPluginInitOptions(
-  vcon.filter_plugins.FilterPluginInitOptions,
+  vcon.filter_plugins.ThreadPoolBatchInitOptions,
   title = "JWE decripting of vCon **FilterPlugin** intialization object"
   ):
   """
@@ -65,9 +66,12 @@ class DecryptFilterPluginOptions(
     )
 
 
-class DecryptFilterPlugin(vcon.filter_plugins.FilterPlugin):
+class DecryptFilterPlugin(vcon.filter_plugins.ThreadPoolBatchFilterPlugin):
   """
   **FilterPlugin** for JWE decrypting of vCon
+
+  The private key is parsed once and cached (reloaded if the PEM files
+  change).  filter_batch decrypts the vCons in parallel threads.
   """
   init_options_type = DecryptFilterPluginInitOptions
 
@@ -84,6 +88,16 @@ class DecryptFilterPlugin(vcon.filter_plugins.FilterPlugin):
       DecryptFilterPluginOptions
       )
 
+    # Parse and cache the default key material now, rather than on first use
+    if(init_options.private_pem_key is not None and len(init_options.private_pem_key) > 0 and
+      init_options.public_pem_key is not None and len(init_options.public_pem_key) > 0
+      ):
+      try:
+        vcon.security.get_decryption_key(init_options.private_pem_key, init_options.public_pem_key)
+
+      except vcon.security.KEY_MATERIAL_ERRORS as load_error:
+        logger.warning("Decrypt filter plugin failed to load default key: {}".format(load_error))
+
 
   async def filter(
     self,
@@ -1,20 +1,78 @@
 # Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for Deepgram transcription """
 import typing
-import json
+import asyncio
+import datetime
+import email.utils
 import logging
+import weakref
+import aiohttp
 import pydantic
-import requests
 import tenacity
+import vcon.audio
+import vcon.cache
+import vcon.rate_limit
 import vcon.filter_plugins
-import deepgram
 
 logger = vcon.build_logger(__name__)
 
-DEEPGRAM_RETRY_EXCEPTIONS = (requests.exceptions.ReadTimeout)
+DEEPGRAM_REQUEST_TIMEOUT = 20
+
+class DeepgramRateLimited(Exception):
+  """ Raised when Deepgram responds that the request rate is exceeded (429) """
+  def __init__(self, message: str, retry_after: typing.Union[float, None] = None):
+    super().__init__(message)
+    # seconds to wait from the Retry-After header, None if not given
+    self.retry_after = retry_after
+
+
+DEEPGRAM_RETRY_EXCEPTIONS = (
+  asyncio.TimeoutError,
+  aiohttp.ServerDisconnectedError,
+  DeepgramRateLimited
+  )
+
+DEEPGRAM_RETRY_BACKOFF = tenacity.wait_random_exponential(multiplier = 1, max = 90)
+
+
+def retry_after_seconds(value: typing.Union[str, None]) -> typing.Union[float, None]:
+  """
+  Get the seconds to wait from a Retry-After header value in either seconds
+  or HTTP date form.  None if not set or not valid.
+  """
+  if(value is None):
+    return(None)
+
+  try:
+    return(max(0.0, float(value)))
+
+  except ValueError:
+    pass
+
+  try:
+    retry_time = email.utils.parsedate_to_datetime(value)
+
+  except (TypeError, ValueError):
+    return(None)
+
+  if(retry_time.tzinfo is None):
+    retry_time = retry_time.replace(tzinfo = datetime.timezone.utc)
+  return(max(0.0, (retry_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds()))
+
+
+def deepgram_retry_wait(retry_state: tenacity.RetryCallState) -> float:
+  """
+  Rate limited requests wait for the time given in the Retry-After header,
+  if provided.  Other retried requests back off exponentially.
+  """
+  error = retry_state.outcome.exception()
+  if(isinstance(error, DeepgramRateLimited) and error.retry_after is not None):
+    return(min(error.retry_after, 90.0))
+
+  return(DEEPGRAM_RETRY_BACKOFF(retry_state))
 
 class DeepgramInitOptions(
-  vcon.filter_plugins.FilterPluginInitOptions,
+  vcon.filter_plugins.TranscribeInitOptions,
   title = "Deepgram transcription **FilterPlugin** intialization object"
   ):
   """
@@ -34,6 +92,47 @@ You can get one at: https://console.deepgram.com/signup?jump=keys
     default = ""
     )
 
+  deepgram_url: str = pydantic.Field(
+    title = "URL of the **Deepgram** pre-recorded transcription API",
+    description = """
+The URL to which recordings are posted for transcription.  One keep-alive
+HTTP session is used for all of the requests.
+""",
+    examples = ["https://api.deepgram.com/v1/listen"],
+    default = "https://api.deepgram.com/v1/listen"
+    )
+
+  max_concurrent_requests: int = pydantic.Field(
+    title = "maximum concurrent **Deepgram** requests",
+    description = """
+The maximum number of recording dialogs transcribed concurrently, across
+all of the vCons being filtered by this plugin.
+""",
+    examples = [1, 4, 16],
+    default = 4
+    )
+
+  requests_per_second: float = pydantic.Field(
+    title = "**Deepgram** request rate limit",
+    description = """
+Token bucket rate limit of requests per second to **Deepgram**, shared by all
+of the vCons being filtered by this plugin.  0 for no rate limit.
+""",
+    examples = [0, 0.5, 10],
+    default = 0
+    )
+
+  request_burst: int = pydantic.Field(
+    title = "**Deepgram** request burst size",
+    description = """
+The number of requests which may be sent at once before the
+**requests_per_second** rate limit applies (i.e. the token bucket size).
+0 for the larger of 1 and **requests_per_second**.
+""",
+    examples = [0, 1, 10],
+    default = 0
+    )
+
 
 class DeepgramOptions(
   vcon.filter_plugins.TranscribeOptions,
@@ -71,60 +170,143 @@ class Deepgram(vcon.filter_plugins.FilterPlugin):
     if(init_options.deepgram_key is None or
       init_options.deepgram_key == ""):
       logger.warning("Deepgram plugin: key not set.  Plugin will be a no-op")
-      self.deepgram_client = None
 
-    else:
-      self.deepgram_client = deepgram.Deepgram(init_options.deepgram_key)
+    self._rate_limit = vcon.rate_limit.TokenBucket(
+      init_options.requests_per_second,
+      init_options.request_burst
+      )
+    # HTTP session and concurrency limit are bound to the event loop
+    self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    self._transcription_cache = vcon.cache.ResultCache.from_url(init_options.transcription_cache)
+
 
+  def _client(self) -> typing.Tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+    """ Get the keep-alive HTTP session and concurrency limit for the running event loop """
+    loop = asyncio.get_running_loop()
+    client = self._clients.get(loop, None)
+    if(client is None or client[0].closed):
+      client = (
+        aiohttp.ClientSession(
+          timeout = aiohttp.ClientTimeout(sock_read = DEEPGRAM_REQUEST_TIMEOUT)
+          ),
+        asyncio.Semaphore(max(1, self._init_options.max_concurrent_requests))
+        )
+      self._clients[loop] = client
 
+    return(client)
 
 
   @tenacity.retry(
-      #retry=retry_if_exception_type((openai.error.APIError, openai.error.APIConnectionError, openai.error.RateLimitError, openai.error.ServiceUnavailableError, openai.error.Timeout)), 
       retry = tenacity.retry_if_exception_type(DEEPGRAM_RETRY_EXCEPTIONS),
-      wait = tenacity.wait_random_exponential(multiplier = 1, max = 90),
+      wait = deepgram_retry_wait,
       stop = tenacity.stop_after_attempt(16),
       before = tenacity.before_log(logger, logging.DEBUG),
       after = tenacity.after_log(logger, logging.DEBUG)
     )
-  def request_transcribe(
+  async def request_transcribe(
     self,
     recording_data: typing.Dict[str, typing.Any],
     transcribe_options: typing.Dict[str, typing.Any]
     ) -> typing.Dict[str, typing.Any]:
-    """ synchronous post of deepgram transcrtion request """
-    url = "https://api.deepgram.com/v1/listen"
+    """ post of deepgram transcrtion request, limited to max_concurrent_requests and requests_per_second """
+    url = self._init_options.deepgram_url
     headers = {
       "accept": "application/json",
       "content-type": recording_data["mimetype"],
       "Authorization": "Token " + self._init_options.deepgram_key
       }
-    requests_options = {
-      "timeout": 20
-      }
-
-    response = requests.post(
-      url,
-      params = transcribe_options,
-      #json = recording_data,
-      data = recording_data["buffer"],
-      headers = headers,
-      **requests_options
-      )
 
-    if(response.status_code >= 300):
-      logger.warning("request to: {} with {} failed: {}: {}".format(
+    session, concurrency = self._client()
+    async with concurrency:
+      await self._rate_limit.acquire()
+      async with session.post(
         url,
+        params = transcribe_options,
+        data = recording_data["buffer"],
+        headers = headers
+        ) as response:
+        content = await response.read()
+
+        if(response.status == 429):
+          logger.info("request to: {} rate limited: {}".format(url, content))
+          raise DeepgramRateLimited(
+            "request to Deepgram rate limited",
+            retry_after_seconds(response.headers.get("Retry-After", None))
+            )
+
+        if(response.status >= 300):
+          logger.warning("request to: {} with {} failed: {}: {}".format(
+            url,
+            transcribe_options,
+            response.status,
+            content
+            ))
+          raise Exception("request to Deepgram options: {} failed: {}".format(
+            transcribe_options,
+            response.status
+            ))
+
+        return(await response.json(content_type = None))
+
+
+  async def transcribe_dialog(
+    self,
+    in_vcon: vcon.Vcon,
+    dialog_index: int,
+    transcribe_options: typing.Dict[str, typing.Any],
+    options: DeepgramOptions
+    ) -> typing.Dict[str, typing.Any]:
+    """ Get the Deepgram transcript for the recording dialog, from the cache if available """
+    dialog = in_vcon.dialog[dialog_index]
+    recording_bytes = await in_vcon.get_dialog_body(dialog_index)
+
+    recording_data = {
+      "buffer": recording_bytes,
+      "mimetype": dialog["mimetype"]
+      }
+
+    if(options.split_channels and
+      vcon.audio.channel_parties(
+        dialog,
+        # channel_count runs ffprobe, keep it off of the event loop
+        await asyncio.get_running_loop().run_in_executor(None, vcon.audio.channel_count, recording_bytes)
+        ) is not None
+      ):
+      # Deepgram transcribes the channels separately and concurrently, with a
+      # result per channel, which the accessor attributes to the channel's party.
+      transcribe_options = dict(transcribe_options, multichannel = "true")
+
+    cache_key = None
+    transcript_dict = None
+    if(self._transcription_cache is not None):
+      cache_key = vcon.cache.make_key(
+        "transcript",
+        "deepgram",
+        "transcription",
         transcribe_options,
-        response.status_code,
-        response.content
-        ))
-      raise Exception("request to Deepgram options: {} failed: {}".format(
-        transcribe_options,
-        response.status_code
+        vcon.cache.digest(recording_bytes)
+        )
+      transcript_dict = await self._transcription_cache.lookup(cache_key)
+      logger.debug("deepgram transcription cache {}: {}".format(
+        "miss" if transcript_dict is None else "hit",
+        cache_key
         ))
 
-    return(json.loads(response.content))
+    if(transcript_dict is None):
+      transcript_dict = await self.request_transcribe(
+        recording_data,
+        transcribe_options
+        )
+
+      if(cache_key is not None):
+        await self._transcription_cache.set(
+          cache_key,
+          transcript_dict,
+          self._init_options.transcription_cache_ttl or None
+          )
+
+    return(transcript_dict)
 
 
   async def filter(
@@ -140,6 +322,9 @@ class Deepgram(vcon.filter_plugins.FilterPlugin):
 
     Returns:
       the modified Vcon with added transcript analysis objects for the recording dialogs.
+      If some of the dialogs fail to be transcribed, the transcripts of the others
+      are still added.  The exception for the first failure is raised only if
+      none of the dialogs could be transcribed.
     """
     out_vcon = in_vcon
 
@@ -156,7 +341,8 @@ class Deepgram(vcon.filter_plugins.FilterPlugin):
     if(len(dialog_indices) == 0):
       return(out_vcon)
 
-    if(self.deepgram_client is None):
+    if(self._init_options.deepgram_key is None or
+      self._init_options.deepgram_key == ""):
       logger.warning("Deepgram.filter: deepgram_key is not set, no transcription performed")
       return(out_vcon)
 
@@ -173,6 +359,7 @@ class Deepgram(vcon.filter_plugins.FilterPlugin):
       'diarize': 'true'
       }
 
+    transcribe_indices = []
     for dialog_index in dialog_indices:
       dialog = in_vcon.dialog[dialog_index]
       if(dialog["type"] == "recording"):
@@ -186,31 +373,79 @@ class Deepgram(vcon.filter_plugins.FilterPlugin):
 
         # We have not already transcribed this dialog
         if(transcript_index is None):
-          recording_bytes = await in_vcon.get_dialog_body(dialog_index)
+          transcribe_indices.append(dialog_index)
+
+    # Transcribe the dialogs concurrently, limited by max_concurrent_requests
+    # Failure of one dialog does not lose the transcripts of the others
+    transcripts = await asyncio.gather(*[
+      self.transcribe_dialog(in_vcon, dialog_index, transcribe_options, options)
+        for dialog_index in transcribe_indices
+      ],
+      return_exceptions = True
+      )
 
-          recording_data = {
-            "buffer": recording_bytes,
-            "mimetype": dialog["mimetype"]
-            }
+    errors = [transcript for transcript in transcripts if isinstance(transcript, BaseException)]
+    if(len(errors) > 0 and len(errors) == len(transcripts)):
+      raise errors[0]
 
-          transcript_dict = self.request_transcribe(
-            recording_data,
-            transcribe_options
-            )
-
-          # For now make synch.
-          # transcript_dict = await self.deepgram_client.transcription.prerecorded(
-          #   recording_data,
-          #   transcribe_options
-          #   )
-          # logger.debug("deepgram return type: {} value: {}".format(type(transcript_dict), transcript_dict))
-          out_vcon.add_analysis_transcript(
-            dialog_index,
-            transcript_dict,
-            "deepgram",
-            "deepgram_prerecorded",
-            **analysis_extras
-            )
+    # Add the analysis in dialog order
+    for dialog_index, transcript_dict in zip(transcribe_indices, transcripts):
+      if(isinstance(transcript_dict, BaseException)):
+        logger.warning("Deepgram transcription of vCon: {} dialog: {} failed: {}".format(
+          in_vcon.uuid,
+          dialog_index,
+          transcript_dict
+          ))
+        continue
+
+      out_vcon.add_analysis_transcript(
+        dialog_index,
+        transcript_dict,
+        "deepgram",
+        "deepgram_prerecorded",
+        **analysis_extras
+        )
 
     return(out_vcon)
 
+
+  @staticmethod
+  def _loop_running_in_thread() -> bool:
+    """ Check if an event loop is running in this thread """
+    try:
+      asyncio.get_running_loop()
+      return(True)
+
+    except RuntimeError:
+      return(False)
+
+
+  def cache_stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """ Get the hit and miss counts of the transcription cache, see **FilterPlugin.cache_stats** """
+    if(self._transcription_cache is None):
+      return({})
+
+    return({"transcription_cache": self._transcription_cache.stats()})
+
+
+  def __del__(self):
+    """ Close the keep-alive HTTP sessions """
+    for loop, client in list(getattr(self, "_clients", {}).items()):
+      session = client[0]
+      if(session.closed):
+        continue
+
+      if(loop.is_closed()):
+        # connections went with the event loop
+        session.detach()
+      elif(loop.is_running()):
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+      elif(self._loop_running_in_thread()):
+        # Cannot run the session's loop while another loop is running in this
+        # thread (e.g. garbage collected in a coroutine).  The connections go
+        # with the session's event loop.
+        session.detach()
+      else:
+        loop.run_until_complete(session.close())
+
+    super().__del__()
@@ -1,7 +1,8 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for JWE encryption of vCon """
 import typing
 import pydantic
+import vcon.security
 import vcon.filter_plugins
 
 logger = vcon.build_logger(__name__)
@@ -12,7 +13,7 @@ class NoPublicKey(Exception):
 
 
 class EncryptFilterPluginInitOptions(
-  vcon.filter_plugins.FilterPluginInitOptions,
+  vcon.filter_plugins.ThreadPoolBatchInitOptions,
   title = "JWE encryption of vCon **FilterPlugin** intialization object"
   ):
   """
@@ -20,9 +21,11 @@ class EncryptFilterPluginInitOptions(
   **EncryptFilterPlugin.__init__** method when it is first loaded.  Its
   attributes effect how the registered **FilterPlugin** functions.
   """
-  public_pem_key: typing.Union[str, None] = pydantic.Field(
+  public_pem_key: typing.Union[str, typing.List[str], None] = pydantic.Field(
     title = "default PEM format public key/cert to use for encrypting a vCon",
     description = """
+    A list of PEM format public keys/certs encrypts the vCon once for
+    all of them (a JWE recipient per cert).
 """,
     default = None
     )
@@ -36,18 +39,25 @@ class EncryptFilterPluginOptions(
   Options for encrypting the vCon in filter_plugin.
   """
 
-  public_pem_key: typing.Union[str, None] = pydantic.Field(
+  public_pem_key: typing.Union[str, typing.List[str], None] = pydantic.Field(
     title = "PEM format public key/cert to use for encrypting the vCon",
     description = """
     Override the default PEM format public key/cert for encrypting.
+    A list of PEM format public keys/certs encrypts the vCon once for
+    all of them (a JWE recipient per cert).
 """,
     default = None
     )
 
 
-class EncryptFilterPlugin(vcon.filter_plugins.FilterPlugin):
+class EncryptFilterPlugin(vcon.filter_plugins.ThreadPoolBatchFilterPlugin):
   """
   **FilterPlugin** for JWE encrypting of vCon
+
+  The public key/cert is parsed once and cached (reloaded if the PEM file
+  changes).  filter_batch encrypts the vCons in parallel threads.
+  With a list of public keys/certs, the vCon content is encrypted once and
+  only the content key is encrypted per recipient.
   """
   init_options_type = EncryptFilterPluginInitOptions
 
@@ -64,6 +74,18 @@ class EncryptFilterPlugin(vcon.filter_plugins.FilterPlugin):
       EncryptFilterPluginOptions
       )
 
+    # Parse and cache the default key material now, rather than on first use
+    if(init_options.public_pem_key is not None and len(init_options.public_pem_key) > 0):
+      public_keys = init_options.public_pem_key
+      if(isinstance(public_keys, str)):
+        public_keys = [public_keys]
+      try:
+        for public_key in public_keys:
+          vcon.security.get_encryption_key(public_key)
+
+      except vcon.security.KEY_MATERIAL_ERRORS as load_error:
+        logger.warning("Encrypt filter plugin failed to load default key: {}".format(load_error))
+
 
   async def filter(
     self,
@@ -1,10 +1,147 @@
 # Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for jq query based redaction of vCon """
+import re
 import typing
+import functools
 import pyjq
 import pydantic
 import vcon.filter_plugins
 
+# .name, [], [index] or [field=value] path segments
+REDACTION_PATH_SEGMENT = re.compile(r"\.([A-Za-z_][\w-]*)|\[\]|\[(-?\d+)\]|\[([A-Za-z_][\w-]*)=([^\]]*)\]")
+
+# compiled path segments: ("key", name), ("all", None), ("index", int) or ("match", (field, value))
+RedactionPath = typing.Tuple[typing.Tuple[str, typing.Any], ...]
+
+
+@functools.lru_cache(maxsize = 256)
+def compile_redaction_path(path: str) -> RedactionPath:
+  """
+  Compile the redaction path in to its segments.
+
+  Parameters:
+    **path** (str) - path to the object(s) to remove from the vCon, made up of:
+      **.name** - the named field of an object,
+      **[]** - all of the elements of an array,
+      **[N]** - the Nth (negative from the end) element of an array,
+      **[field=value]** - the elements of an array with the field set to the string value.
+      For example: ".dialog[].body", ".analysis[type=transcript]" or ".attachments"
+
+  Returns: tuple of the path segments
+  """
+  segments = []
+  position = 0
+  while(position < len(path)):
+    match = REDACTION_PATH_SEGMENT.match(path, position)
+    if(match is None):
+      raise AttributeError("invalid redaction path: \"{}\" at character: {}".format(path, position))
+    if(match.group(1) is not None):
+      segments.append(("key", match.group(1)))
+    elif(match.group(2) is not None):
+      segments.append(("index", int(match.group(2))))
+    elif(match.group(3) is not None):
+      segments.append(("match", (match.group(3), match.group(4))))
+    else:
+      segments.append(("all", None))
+    position = match.end()
+
+  if(len(segments) == 0 or segments[0][0] != "key"):
+    raise AttributeError("redaction path: \"{}\" must start with a field name (e.g. .dialog)".format(path))
+
+  return(tuple(segments))
+
+
+def _remove_path(node: typing.Any, path: RedactionPath) -> typing.Any:
+  """
+  Remove the object(s) at the path from the node, copying only the objects
+  and arrays on the path which change.  Returns the node if nothing is removed.
+  """
+  kind, selector = path[0]
+  last = len(path) == 1
+  if(kind == "key"):
+    if(not isinstance(node, dict) or selector not in node):
+      return(node)
+    if(last):
+      new_node = dict(node)
+      del new_node[selector]
+      return(new_node)
+    child = _remove_path(node[selector], path[1:])
+    if(child is node[selector]):
+      return(node)
+    new_node = dict(node)
+    new_node[selector] = child
+    return(new_node)
+
+  if(not isinstance(node, list)):
+    return(node)
+
+  if(kind == "all"):
+    selected = range(len(node))
+  elif(kind == "index"):
+    if(not -len(node) <= selector < len(node)):
+      return(node)
+    selected = [selector % len(node)]
+  else:
+    field, value = selector
+    selected = [index for index, element in enumerate(node)
+      if isinstance(element, dict) and field in element and str(element[field]) == value]
+
+  if(last):
+    if(len(selected) == 0):
+      return(node)
+    selected = set(selected)
+    return([element for index, element in enumerate(node) if index not in selected])
+
+  new_node = None
+  for index in selected:
+    child = _remove_path(node[index], path[1:])
+    if(child is not node[index]):
+      if(new_node is None):
+        new_node = list(node)
+      new_node[index] = child
+
+  return(node if new_node is None else new_node)
+
+
+def _copy_containers(node: typing.Any) -> typing.Any:
+  """ Copy the objects and arrays of the JSON node, sharing the (immutable) strings and other values """
+  if(isinstance(node, dict)):
+    return({key: _copy_containers(value) for key, value in node.items()})
+
+  if(isinstance(node, list)):
+    return([_copy_containers(element) for element in node])
+
+  return(node)
+
+
+def redact_paths(
+    vcon_dict: typing.Dict[str, typing.Any],
+    paths: typing.List[str]
+  ) -> typing.Dict[str, typing.Any]:
+  """
+  Removal of the objects at the given paths from a copy of the vCon dict.
+
+  The input dict is not modified.  All of the objects and arrays retained
+  in the returned dict are copies, so that either vCon may be modified in
+  place (e.g. appended to, transcript offsets changed) without effecting
+  the other.  The strings (e.g. bodies, which are most of the size of a
+  vCon) are immutable, so are shared by reference rather than copied.
+  The cost is proportional to the number of retained objects, not the
+  size of their content.
+
+  Parameters:
+    **vcon_dict** (dict) - unsigned vCon dict
+    **paths** (List[str]) - paths (see **compile_redaction_path**) of the objects to remove, applied in order
+
+  Returns: the redacted vCon dict
+  """
+  redacted = vcon_dict
+  for path in paths:
+    redacted = _remove_path(redacted, compile_redaction_path(path))
+
+  # Objects not on a removed path are still those of the input
+  return(_copy_containers(redacted))
+
 
 class JqRedactionInitOptions(
   vcon.filter_plugins.FilterPluginInitOptions,
@@ -31,7 +168,21 @@ class JqRedactionOptions(
       description = """string containing the JQ query to apply to the input vCon
         to construct the output vCon.  The query can add, delete, modifiy the
         contents of the input vcon to define the contents of the output vCon.  The
-        input vCon remains unchanged."""
+        input vCon remains unchanged.  Not used if **redaction_paths** is set.""",
+      default = ""
+    )
+
+  redaction_paths: typing.List[str] = pydantic.Field(
+      title = "paths of the objects to remove to construct the redacted vCon",
+      description = """list of paths of the objects to remove from the input vCon
+        to construct the output vCon, in place of the JQ query.  A path is made up of
+        **.name** (field of an object), **[]** (all array elements), **[N]** (Nth
+        array element) and **[field=value]** (array elements with the field value) segments.
+        The strings (e.g. bodies) of the input vCon which are not removed are shared with
+        the output vCon rather than copied, so the time to redact does not depend on the
+        size of the bodies.  The input vCon remains unchanged.""",
+      examples = [[], [".dialog[].body", ".dialog[].url", ".analysis[type=transcript]"]],
+      default = []
     )
 
   redaction_type_label: str = pydantic.Field(
@@ -51,6 +202,8 @@ class JqRedaction(vcon.filter_plugins.FilterPlugin):
   """
 
   init_options_type = JqRedactionInitOptions
+  # the redacted vCon is a new Vcon, the input is not modified
+  modifies_vcon = False
 
   def __init__(
     self,
@@ -88,16 +241,26 @@ class JqRedaction(vcon.filter_plugins.FilterPlugin):
 
     out_vcon = vcon.Vcon()
 
+    redaction_paths = getattr(options, "redaction_paths", [])
     redaction_query = options.jq_redaction_query
-    if(redaction_query is None or len(redaction_query) == 0):
-      raise Exception("invalid JQ query for redaction: {}".format(redaction_query))
+    if(len(redaction_paths) > 0):
+      # query_result is already a copy in the current form, sharing only the
+      # immutable strings with in_vcon, so it is neither copied nor migrated
+      # again.  In place modification of either vCon does not effect the other.
+      query_result = redact_paths(vcon_dict, redaction_paths)
+      out_vcon.loadd(query_result, False, False)
 
-    query_result = pyjq.all(redaction_query,
-         vcon_dict)[0]
+    else:
+      if(redaction_query is None or len(redaction_query) == 0):
+        raise Exception("invalid JQ query for redaction: {}".format(redaction_query))
 
-    redacted_uuid = query_result.get("uuid", None)
+      query_result = pyjq.all(redaction_query,
+           vcon_dict)[0]
 
-    out_vcon.loadd(query_result)
+      # the query result is a new object, no need to copy it
+      out_vcon.loadd(query_result, False)
+
+    redacted_uuid = query_result.get("uuid", None)
     # cannot use same UUID
     if(redacted_uuid in (None, in_vcon.uuid)):
       if(options.uuid_domain in (None, "")):
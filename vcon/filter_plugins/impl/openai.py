@@ -1,13 +1,19 @@
 # Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ OpenAI FilterPlugin implentation """
+import copy
 import typing
+import asyncio
 import datetime
+import functools
 import logging
+import weakref
 import pydantic
 import openai
 import pyjq
 import tenacity
 import vcon
+import vcon.cache
+import vcon.rate_limit
 import vcon.filter_plugins
 
 VERBOSE = False
@@ -17,8 +23,149 @@ logger = vcon.build_logger(__name__)
 OPENAI_MAJOR_VERSION = int(openai.__version__.split('.')[0])
 if(OPENAI_MAJOR_VERSION < 1):
   OPENAI_RETRY_EXCEPTIONS = (openai.error.ServiceUnavailableError, openai.error.Timeout)
+  OPENAI_RATE_LIMIT_EXCEPTIONS = (openai.error.RateLimitError, )
 else:
-  OPENAI_RETRY_EXCEPTIONS = (openai.APITimeoutError)
+  # The errors retried by the openai package (which is configured not to retry,
+  # see OpenAIClient), APIConnectionError includes APITimeoutError
+  OPENAI_RETRY_EXCEPTIONS = (openai.APIConnectionError, openai.InternalServerError, openai.ConflictError)
+  OPENAI_RATE_LIMIT_EXCEPTIONS = (openai.RateLimitError, )
+
+OPENAI_RETRY_BACKOFF = tenacity.wait_random_exponential(multiplier = 1, max = 90)
+
+
+def openai_retry_wait(retry_state: tenacity.RetryCallState) -> float:
+  """
+  Rate limited requests wait for the pause in the **OpenAIClient** rate limiter,
+  other retried requests back off exponentially.
+  """
+  if(isinstance(retry_state.outcome.exception(), OPENAI_RATE_LIMIT_EXCEPTIONS)):
+    return(0.0)
+
+  return(OPENAI_RETRY_BACKOFF(retry_state))
+
+
+def retry_after(error: Exception) -> typing.Union[float, None]:
+  """ Get the seconds to wait from the retry-after headers of a rate limited response """
+  response = getattr(error, "response", None)
+  headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+  for header, scale in [("retry-after-ms", 0.001), ("retry-after", 1.0)]:
+    value = headers.get(header, None)
+    if(value is not None):
+      try:
+        return(float(value) * scale)
+
+      except ValueError:
+        # HTTP date form is not used by OpenAI
+        pass
+
+  return(None)
+
+
+def estimate_tokens(text: str) -> int:
+  """ Rough estimate of the number of tokens in the text, about 4 characters per token """
+  return(len(text) // 4 + 1)
+
+
+# about 4 tokens of overhead per chat message
+MESSAGE_TOKEN_OVERHEAD = 4
+
+@functools.lru_cache(maxsize = None)
+def get_tokenizer(model: str) -> typing.Union[typing.Callable[[str], int], None]:
+  """
+  Get a function counting the tokens in text for the given model, using the
+  local **tiktoken** tokenizer.  None if tiktoken is not installed or the
+  tokenizer cannot be loaded, in which case token counts are estimated.
+
+  tiktoken downloads the tokenizer BPE file on first use.  For hosts without
+  access to the internet, pre-seed the directory set in the **TIKTOKEN_CACHE_DIR**
+  env variable (e.g. by loading the tokenizer once on a connected host).
+  Loading may block, so it should be done via **run_in_executor** when
+  invoked from the event loop.
+  """
+  try:
+    import tiktoken
+  except ModuleNotFoundError:
+    logger.info("tiktoken not installed, estimating token counts")
+    return(None)
+
+  try:
+    try:
+      encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+      # newer models mostly use o200k_base
+      logger.warning("model: {} unknown to tiktoken, counting tokens with o200k_base".format(model))
+      encoding = tiktoken.get_encoding("o200k_base")
+
+  # e.g. BPE file download failed when offline
+  except Exception as load_error:
+    logger.warning("tiktoken tokenizer for model: {} failed to load ({}), estimating token counts".format(
+      model,
+      load_error
+      ))
+    return(None)
+
+  return(lambda text: len(encoding.encode(text, disallowed_special = ())))
+
+
+def count_tokens(text: str, model: str) -> int:
+  """ Count the tokens in the text with the model's tokenizer, estimate if no tokenizer """
+  tokenizer = get_tokenizer(model)
+  if(tokenizer is None):
+    return(estimate_tokens(text))
+
+  return(tokenizer(text))
+
+
+def chunk_messages(
+    messages: typing.List[typing.Dict[str, str]],
+    max_chunk_tokens: int,
+    model: str
+  ) -> typing.List[typing.List[typing.Dict[str, str]]]:
+  """
+  Pack the chat messages, in order, in to chunks of at most **max_chunk_tokens**
+  tokens.  A message which alone is longer than **max_chunk_tokens** is split
+  at white space in to multiple messages.
+
+  Parameters:
+    **messages** (List[dict]) - chat messages with role and content
+    **max_chunk_tokens** (int) - token budget for each chunk
+    **model** (str) - model name used to choose the tokenizer
+
+  Returns: list of message lists
+  """
+  chunks: typing.List[typing.List[typing.Dict[str, str]]] = []
+  chunk: typing.List[typing.Dict[str, str]] = []
+  chunk_tokens = 0
+  pending = list(reversed(messages))
+  while(len(pending) > 0):
+    message = pending.pop()
+    message_tokens = count_tokens(message["content"], model) + MESSAGE_TOKEN_OVERHEAD
+    if(message_tokens > max_chunk_tokens):
+      words = message["content"].split(" ")
+      if(len(words) > 1):
+        # split in half and pack each half
+        half = len(words) // 2
+        pending.append({"role": message["role"], "content": " ".join(words[half:])})
+        pending.append({"role": message["role"], "content": " ".join(words[:half])})
+        continue
+      logger.warning("chat message of {} tokens cannot be split to fit in {} tokens".format(
+        message_tokens,
+        max_chunk_tokens
+        ))
+
+    if(len(chunk) > 0 and chunk_tokens + message_tokens > max_chunk_tokens):
+      chunks.append(chunk)
+      chunk = []
+      chunk_tokens = 0
+
+    chunk.append(message)
+    chunk_tokens += message_tokens
+
+  if(len(chunk) > 0):
+    chunks.append(chunk)
+
+  return(chunks)
+
 
 class OpenAICompletionInitOptions(
   vcon.filter_plugins.FilterPluginInitOptions,
@@ -40,6 +187,80 @@ You can get one at: https://platform.openai.com/account/api-keys
     examples = ["sk-cABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstu"]
     )
 
+  openai_base_url: str = pydantic.Field(
+    title = "**OpenAI** API base URL",
+    description = """
+The base URL of the **OpenAI** API or a compatible service.  An empty
+string uses the **OpenAI** package default.
+""",
+    examples = ["", "https://api.openai.com/v1", "http://localhost:8080/v1"],
+    default = ""
+    )
+
+  max_concurrent_requests: int = pydantic.Field(
+    title = "maximum concurrent **OpenAI** requests",
+    description = """
+The maximum number of completion requests sent concurrently, across all of
+the dialogs and vCons being filtered by this plugin.
+""",
+    examples = [1, 8, 32],
+    default = 8
+    )
+
+  requests_per_minute: int = pydantic.Field(
+    title = "**OpenAI** requests per minute limit",
+    description = """
+The rate limit of completion requests, shared by all of the dialogs and vCons
+being filtered by this plugin.  This should be set to the request rate limit
+of your **OpenAI** account and model.  0 for no limit.
+
+Regardless of this setting, rate limited (429) responses pause requests for the
+retry-after time and reduce the request and token rates, which recover with
+successful requests.
+""",
+    examples = [0, 500, 10000],
+    default = 0
+    )
+
+  tokens_per_minute: int = pydantic.Field(
+    title = "**OpenAI** tokens per minute limit",
+    description = """
+The rate limit of tokens (estimated prompt plus **max_tokens** of output) of
+completion requests, shared by all of the dialogs and vCons being filtered by
+this plugin.  This should be set to the token rate limit of your **OpenAI**
+account and model.  0 for no limit.
+""",
+    examples = [0, 30000, 2000000],
+    default = 0
+    )
+
+  response_cache: str = pydantic.Field(
+    title = "URL of the generative AI response cache",
+    description = """
+Responses to deterministic requests (**temperature** 0 or the **cache** filter
+option set) are cached, keyed by the model, prompt/messages and sampling
+options, so that the same request (e.g. on an unchanged vCon or on the
+redacted copy of a vCon with the same text) is not sent again.
+
+ * **""** (empty str) - no caching
+ * **memory:** - cache in process memory, up to the 1024 most recently used
+   (memory:?max_entries=N sets the limit)
+ * **file:///path/to/dir** - cache in files in the given directory
+ * **redis://host:port/db** - cache in Redis
+""",
+    examples = ["", "memory:", "file:///var/cache/vcon", "redis://localhost:6379/1"],
+    default = ""
+    )
+
+  response_cache_ttl: int = pydantic.Field(
+    title = "generative AI response cache entry time to live",
+    description = """
+Seconds after which cached responses expire.  0 for no expiry.
+""",
+    examples = [0, 86400],
+    default = 0
+    )
+
 
 class OpenAICompletionOptions(
   vcon.filter_plugins.FilterPluginOptions,
@@ -221,9 +442,27 @@ on the new **analysis** object in the **Vcon**.
     default = "summary"
     )
 
+  cache: bool = pydantic.Field(
+    title = "cache the response",
+    description = """
+Responses are cached in the **response_cache** if the **temperature** is 0.
+If **cache** is True, responses with a non-zero **temperature** are also cached
+and reused, rather than generating a new sampled response.
+""",
+    default = False
+    )
+
 
 class OpenAIClient():
-  """ Abstration to hide OpenAI API difference between 0.X and 1.X """
+  """
+  Abstration to hide OpenAI API difference between 0.X and 1.X
+
+  Requests are limited to **max_concurrent_requests** at a time and to the
+  request and token rates of the init options.  Rate limited responses
+  adapt the rates and are retried after the retry-after time.
+
+  Responses to deterministic requests are cached in the **response_cache**.
+  """
   def __init__(
       self,
       init_options,
@@ -236,39 +475,171 @@ class OpenAIClient():
     else:
       self.key_set = True
 
+    self.rate_limiter = vcon.rate_limit.AdaptiveRateLimiter(
+      init_options.requests_per_minute,
+      init_options.tokens_per_minute
+      )
+    self._max_concurrent_requests = max(1, init_options.max_concurrent_requests)
+    # concurrency limit is bound to the event loop
+    self._concurrency: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
+    self.response_cache = vcon.cache.ResultCache.from_url(init_options.response_cache)
+    self._response_cache_ttl = init_options.response_cache_ttl or None
+    self._base_url = init_options.openai_base_url
+
+    base_url = init_options.openai_base_url or None
     if(OPENAI_MAJOR_VERSION < 1):
       openai.api_key = init_options.openai_api_key
+      if(base_url):
+        openai.api_base = base_url
     else:
+      # Retries are done here so that the rate limiter adapts to rate limited responses
       self.client = openai.AsyncOpenAI(
-          api_key = init_options.openai_api_key
+          api_key = init_options.openai_api_key,
+          base_url = base_url,
+          max_retries = 0
         )
 
 
+  def _concurrency_limit(self) -> asyncio.Semaphore:
+    """ Get the concurrent request limit for the running event loop """
+    loop = asyncio.get_running_loop()
+    semaphore = self._concurrency.get(loop, None)
+    if(semaphore is None):
+      semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+      self._concurrency[loop] = semaphore
+
+    return(semaphore)
+
+
+  @tenacity.retry(
+      retry = tenacity.retry_if_exception_type(OPENAI_RETRY_EXCEPTIONS + OPENAI_RATE_LIMIT_EXCEPTIONS),
+      wait = openai_retry_wait,
+      stop = tenacity.stop_after_attempt(16),
+      before = tenacity.before_log(logger, logging.DEBUG),
+      after = tenacity.after_log(logger, logging.DEBUG)
+    )
+  async def request(
+      self,
+      create: typing.Callable,
+      tokens: int,
+      **create_args
+    ):
+    """
+    Send the request when the concurrency and rate limits allow.
+
+    Parameters:
+      **create** - the OpenAI create method for the request
+      **tokens** (int) - estimated number of tokens (input and output) used by the request
+      **create_args** - arguments to the **create** method
+
+    Returns: the OpenAI response object
+    """
+    async with self._concurrency_limit():
+      await self.rate_limiter.acquire(tokens)
+      try:
+        if(OPENAI_MAJOR_VERSION < 1):
+          result = await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(create, **create_args)
+            )
+        else:
+          result = await create(**create_args)
+
+      except OPENAI_RATE_LIMIT_EXCEPTIONS as rate_error:
+        self.rate_limiter.rate_limited(retry_after(rate_error))
+        raise
+
+    self.rate_limiter.succeeded()
+    return(result)
+
+
+  def _cache_key(
+      self,
+      options,
+      request_type: str,
+      create_args: typing.Dict[str, typing.Any]
+    ) -> typing.Union[str, None]:
+    """ Get the response cache key for the request, None if the response is not to be cached """
+    if(self.response_cache is None or
+      (options.temperature != 0 and not getattr(options, "cache", False))
+      ):
+      return(None)
+
+    return(vcon.cache.make_key("openai", request_type, self._base_url, create_args))
+
+
+  async def cached_request(
+      self,
+      options,
+      request_type: str,
+      create_args: typing.Dict[str, typing.Any],
+      tokens: int
+    ) -> typing.Dict[str, typing.Any]:
+    """
+    Get the response to the completion request from the response cache or send the request.
+
+    Parameters:
+      **options** - OpenAICompletionOptions
+      **request_type** (str) - "completions" or "chat_completions"
+      **create_args** (dict) - arguments of the OpenAI create method
+      **tokens** (int) - estimated number of tokens (input and output) used by the request
+
+    Returns: the response as a dict
+    """
+    cache_key = self._cache_key(options, request_type, create_args)
+    if(cache_key is not None):
+      result = await self.response_cache.lookup(cache_key)
+      logger.debug("openai response cache {}: {}".format(
+        "miss" if result is None else "hit",
+        cache_key
+        ))
+      if(result is not None):
+        # The response is added to the vCon, do not share it with the cache
+        return(copy.deepcopy(result))
+
+    if(OPENAI_MAJOR_VERSION < 1):
+      if(request_type == "chat_completions"):
+        create = openai.ChatCompletion.create
+      else:
+        create = openai.Completion.create
+      result = await self.request(create, tokens, **create_args)
+
+    else:
+      if(request_type == "chat_completions"):
+        create = self.client.chat.completions.create
+      else:
+        create = self.client.completions.create
+      # result object is openai.types.completion.Completion or
+      # openai.types.chat.chat_completion.ChatCompletion
+      result = (await self.request(create, tokens, **create_args)).dict()
+
+    if(cache_key is not None):
+      await self.response_cache.set(cache_key, result, self._response_cache_ttl)
+
+    return(result)
+
+
   async def completions(
       self,
       options,
       text_body
     ):
     """ Generative AI completion on single text chunk """
-    if(OPENAI_MAJOR_VERSION < 1):
-      completion_result = openai.Completion.create(
-          model = options.model,
-          prompt = options.prompt + text_body,
-          max_tokens = options.max_tokens,
-          temperature = options.temperature
-        )
-
-    else:
-      completion_object = await self.client.completions.create(
-          model = options.model,
-          prompt = options.prompt + text_body,
-          max_tokens = options.max_tokens,
-          temperature = options.temperature
-        )
+    prompt = options.prompt + text_body
+    create_args = {
+      "model": options.model,
+      "prompt": prompt,
+      "max_tokens": options.max_tokens,
+      "temperature": options.temperature
+      }
 
-      # completion_object is a openai.types.completion.Completion
-      completion_result = completion_object.dict()
+    completion_result = await self.cached_request(
+        options,
+        "completions",
+        create_args,
+        estimate_tokens(prompt) + options.max_tokens
+      )
 
     return(completion_result)
 
@@ -279,28 +650,22 @@ class OpenAIClient():
       messages
     ):
     """ Generative AI completion on set of messages, from potentially mutliple people """
-    if(OPENAI_MAJOR_VERSION < 1):
-      chat_completion_result = openai.ChatCompletion.create(
-          model = options.model,
-          messages = messages,
-          max_tokens = options.max_tokens,
-          temperature = options.temperature
-        )
+    create_args = {
+      "model": options.model,
+      "messages": messages,
+      "max_tokens": options.max_tokens,
+      "temperature": options.temperature
+      }
+    if(OPENAI_MAJOR_VERSION >= 1 and options.json_response):
+      create_args["response_format"] = {"type": "json_object"}
 
-    else:
-      additional_args = {}
-      if(options.json_response):
-        additional_args["response_format"] = {"type": "json_object"}
-
-      # chat_completion_result is openai.types.chat.chat_completion.ChatCompletion
-      chat_completion_object = await self.client.chat.completions.create(
-          model = options.model,
-          messages = messages,
-          max_tokens = options.max_tokens,
-          temperature = options.temperature,
-          **additional_args
-        )
-      chat_completion_result  = chat_completion_object.dict()
+    tokens = sum([estimate_tokens(message["content"]) + MESSAGE_TOKEN_OVERHEAD for message in messages]) + options.max_tokens
+    chat_completion_result = await self.cached_request(
+        options,
+        "chat_completions",
+        create_args,
+        tokens
+      )
 
     return(chat_completion_result)
 
@@ -364,6 +729,17 @@ class OpenAICompletion(vcon.filter_plugins.FilterPlugin):
         text_body
       )
 
+    return(self.add_completion_analysis(out_vcon, options, completion_result, dialog_index))
+
+
+  def add_completion_analysis(
+    self,
+    out_vcon: vcon.Vcon,
+    options: OpenAICompletionOptions,
+    completion_result: typing.Dict[str, typing.Any],
+    dialog_index: int
+    ) -> vcon.Vcon:
+    """ Create a new analysis object from the **OpenAI completion** result """
     query_result = pyjq.all(options.jq_result, completion_result)
     if(len(query_result) == 0):
       logger.warning("{} jq query resulted in no elements.  No analysis object added".format(
@@ -444,13 +820,13 @@ class OpenAICompletion(vcon.filter_plugins.FilterPlugin):
       logger.warning("OpenAICompletion.filter: OpenAI API key is not set, no filtering performed")
       return(out_vcon)
 
+    dialog_texts = []
     for dialog_index in dialog_indices:
       this_dialog_texts = await in_vcon.get_dialog_text(
         dialog_index,
         True, # find text from transcript analysis if dialog is a recording and transcript exists
         True  # transcribe this recording dialog if transcript does not exist
         )
-      dialog = in_vcon.dialog[dialog_index]
 
       text_segments = [d["text"] for d in this_dialog_texts]
 
@@ -459,17 +835,49 @@ class OpenAICompletion(vcon.filter_plugins.FilterPlugin):
         continue
 
       self.last_stats["num_text_segments"] = len(text_segments)
-      all_dialog_text = "  ".join(text_segments)
-      out_vcon = await self.completions(
+      dialog_texts.append((dialog_index, "  ".join(text_segments)))
+
+    # Request the completions concurrently, limited by the client's concurrency and rate limits
+    completion_results = await asyncio.gather(*[
+      self.client.completions(options, all_dialog_text)
+        for dialog_index, all_dialog_text in dialog_texts
+      ])
+
+    # Add the analysis in dialog order
+    for (dialog_index, all_dialog_text), completion_result in zip(dialog_texts, completion_results):
+      out_vcon = self.add_completion_analysis(
           out_vcon,
           options,
-          all_dialog_text,
+          completion_result,
           dialog_index
         )
 
     return(out_vcon)
 
 
+  async def filter_batch(
+    self,
+    in_vcons: typing.List[vcon.Vcon],
+    options: OpenAICompletionOptions
+    ) -> typing.List[vcon.Vcon]:
+    """
+    Perform the completions on the given **Vcon**s concurrently, limited by
+    the client's concurrency and rate limits.
+
+    Returns:
+      the modified Vcons in the same order as the input Vcons
+    """
+    return(list(await asyncio.gather(*[self.filter(in_vcon, options) for in_vcon in in_vcons])))
+
+
+  def cache_stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """ Get the hit and miss counts of the response cache, see **FilterPlugin.cache_stats** """
+    if(self.client is None or self.client.response_cache is None):
+      return({})
+
+    return({"response_cache": self.client.response_cache.stats()})
+
+
   def __del__(self):
     """ Close down OpenAI client if created. """
     if(self.client):
@@ -509,10 +917,49 @@ class OpenAIChatCompletionOptions(
   title = "OpenAI Chat Completion filter method options"
   ):
   """
-  Options for OpenAIChatCompletion.  Does not add any fields to the
-  OpenAICompletionOptions from which OpenAIChatCompletionOptions is
-  derived.
+  Options for OpenAIChatCompletion.  Adds the chunking (map-reduce) options
+  for long conversations to the OpenAICompletionOptions from which
+  OpenAIChatCompletionOptions is derived.
   """
+  max_input_tokens: int = pydantic.Field(
+    title = "token budget for the messages of one chat completion request",
+    description = """
+If the messages for the text **dialogs** and transcripts plus the prompt exceed
+**max_input_tokens** (counted with the local **tiktoken** tokenizer for the
+**model**), the messages are split in to chunks which fit in the budget.
+tiktoken downloads the tokenizer on first use.  On hosts without internet
+access, pre-seed the **TIKTOKEN_CACHE_DIR** directory, otherwise token counts
+are estimated.
+Each chunk is completed with the **map_prompt** (in parallel) and the
+partial results are then completed with the **prompt** to get the
+final result (map-reduce).  This allows for conversations longer than the
+model's context and reduces the latency of long conversations.
+
+0 for no chunking, all of the messages are sent in one request.
+""",
+    examples = [0, 8000, 100000],
+    default = 0
+    )
+
+  map_prompt: str = pydantic.Field(
+    title = "prompt for the completion of each chunk of messages",
+    description = """
+Prompt used to complete each chunk of messages when the messages exceed
+**max_input_tokens**.  The completions of the chunks are the input
+to the final completion with **prompt**.
+""",
+    default = "Extract the facts, topics, decisions and action items in this part of the conversation, " +
+      "noting who said what.  These notes will be combined with those from the other parts of the conversation."
+    )
+
+  map_max_tokens: int = pydantic.Field(
+    title = "maximum tokens of the completion of each chunk",
+    description = """
+Maximum number of tokens generated by the completion of each chunk of
+messages (see **max_input_tokens**).
+""",
+    default = 500
+    )
 
 
 class OpenAIChatCompletion(OpenAICompletion):
@@ -526,6 +973,9 @@ class OpenAIChatCompletion(OpenAICompletion):
   or transcribe analysis text when asking for a completion to the prompt, generating
   a prompt response and a new analysis object for each text dialog and transcribe
   analysis object analysed.
+
+  Conversations longer than **max_input_tokens** are completed in chunks
+  in parallel and the chunk results are completed with the prompt (map-reduce).
   """
 
   def __init__(
@@ -546,16 +996,11 @@ class OpenAIChatCompletion(OpenAICompletion):
     self.last_stats: typing.Dict[str, int] = {}
 
 
-  @tenacity.retry(
-      #retry=retry_if_exception_type((openai.error.APIError, openai.error.APIConnectionError, openai.error.RateLimitError, openai.error.ServiceUnavailableError, openai.error.Timeout)), 
-      retry = tenacity.retry_if_exception_type(OPENAI_RETRY_EXCEPTIONS),
-      wait = tenacity.wait_random_exponential(multiplier = 1, max = 90),
-      stop = tenacity.stop_after_attempt(16),
-      before = tenacity.before_log(logger, logging.DEBUG),
-      after = tenacity.after_log(logger, logging.DEBUG)
-    )
   async def chat_completions_with_retry(self, messages, options):
-    """ Retry chat_completions if connectivity or service availability problems """
+    """
+    chat_completions, retried by the client if connectivity or service availability
+    problems or rate limited
+    """
     logger.debug("attempting chat_completions")
     chat_completion_result = await self.client.chat_completions(
         options,
@@ -564,6 +1009,81 @@ class OpenAIChatCompletion(OpenAICompletion):
     return(chat_completion_result)
 
 
+  async def map_chunks(
+    self,
+    messages: typing.List[typing.Dict[str, str]],
+    options: OpenAIChatCompletionOptions
+    ) -> typing.List[typing.Dict[str, str]]:
+    """
+    Reduce the messages to fit in **options.max_input_tokens** by completing
+    chunks of the messages with the **options.map_prompt** concurrently.
+    Repeated if the chunk completions still do not fit.
+
+    Parameters:
+      **messages** (List[dict]) - the chat messages (role and content) of the conversation
+      **options** (OpenAIChatCompletionOptions)
+
+    Returns: the messages if they fit in the token budget, otherwise the messages
+      containing the completions of each chunk
+    """
+    # Load the tokenizer (which may download it) off of the event loop
+    await asyncio.get_running_loop().run_in_executor(None, get_tokenizer, options.model)
+
+    # Reserve tokens for the system and prompt messages
+    prompt_tokens = count_tokens(options.prompt, options.model) + \
+      count_tokens(options.map_prompt, options.model) + 4 * MESSAGE_TOKEN_OVERHEAD + 10
+    max_chunk_tokens = options.max_input_tokens - prompt_tokens
+    # Each chunk must fit at least 2 map completions for the completions to reduce
+    if(max_chunk_tokens < 2 * (options.map_max_tokens + MESSAGE_TOKEN_OVERHEAD + 20)):
+      raise AttributeError("OpenAIChatCompletionOptions.max_input_tokens: {} too small for prompts and map_max_tokens: {}".format(
+        options.max_input_tokens,
+        options.map_max_tokens
+        ))
+
+    # map completions are text regardless of the final result
+    map_options = options.copy(update = {
+      "max_tokens": options.map_max_tokens,
+      "json_response": False
+      })
+
+    chunks = chunk_messages(messages, max_chunk_tokens, options.model)
+    while(len(chunks) > 1):
+      logger.debug("chat completion of {} messages in {} chunks".format(
+        len(messages),
+        len(chunks)
+        ))
+      self.last_stats["num_map_completions"] += len(chunks)
+      chunk_results = await asyncio.gather(*[
+        self.chat_completions_with_retry(
+          chunk + [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "system", "content": options.map_prompt}
+            ],
+          map_options
+          )
+        for chunk in chunks
+        ])
+
+      messages = []
+      for chunk_index, chunk_result in enumerate(chunk_results):
+        messages.append({
+          "role": "user",
+          "content": "notes on part {} of {} of the conversation: {}".format(
+            chunk_index + 1,
+            len(chunk_results),
+            chunk_result["choices"][0]["message"]["content"]
+            )
+          })
+
+      num_chunks = len(chunks)
+      chunks = chunk_messages(messages, max_chunk_tokens, options.model)
+      if(len(chunks) >= num_chunks):
+        logger.warning("chunk completions longer than map_max_tokens, not reducing further")
+        break
+
+    return(messages)
+
+
   async def filter(
     self,
     in_vcon: vcon.Vcon,
@@ -676,6 +1196,11 @@ class OpenAIChatCompletion(OpenAICompletion):
       for param in remove_keys:
         del msg[param]
 
+    # Map: complete chunks of the messages which exceed the token budget in parallel
+    self.last_stats["num_map_completions"] = 0
+    if(options.max_input_tokens > 0):
+      sorted_messages = await self.map_chunks(sorted_messages, options)
+
     # add the system role at the end so that dialog does not over ride it
     sorted_messages.append({"role": "system", "content": "You are a helpful assistant."})
 
@@ -690,6 +1215,7 @@ class OpenAIChatCompletion(OpenAICompletion):
     #  openai.error.ServiceUnavailableError: The server is overloaded or not ready yet.
     # /usr/local/lib/python3.8/dist-packages/openai/api_requestor.py:743: ServiceUnavailableError
 
+    # Reduce: (or only) completion with the prompt
     chat_completion_result = await self.chat_completions_with_retry(sorted_messages, options)
     # chat_completion_result = openai.ChatCompletion.create(
     #   model = options.model,
@@ -1,15 +1,9 @@
 # Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 import typing
-import tempfile
-import csv
-from datetime import datetime
+import threading
 import pydantic
-import pandas as pd
-import tensorflow as tf
+import numpy
 import vcon.filter_plugins
-#import dataprofiler
-from dataprofiler import Data, DataLabeler
-from dataprofiler.data_readers.csv_data import CSVData
 
 logger = vcon.build_logger(__name__)
 
@@ -21,18 +15,82 @@ ANALYSIS_VENDOR    = 'CapitalOne'
 ANALYSIS_PRODUCT    = 'dataprofiler'
 ANALYSIS_SCHEMA     = 'data_labeler_schema'
 
+# The dataprofiler (and TensorFlow) import and model load are slow, so
+# they are done on first use and the labeler is shared in the process.
+_labeler = None
+_labeler_lock = threading.Lock()
+
+
+def get_labeler():
+  """ Get the dataprofiler unstructured DataLabeler, loaded once per process """
+  global _labeler
+  with _labeler_lock:
+    if(_labeler is None):
+      logger.info("loading dataprofiler unstructured DataLabeler")
+      # imports TensorFlow
+      import dataprofiler
+
+      labeler = dataprofiler.DataLabeler(labeler_type = 'unstructured')
+      labeler.set_params(
+        { 'postprocessor' : {'output_format':'ner', 'use_word_level_argmax': True}}
+      )
+      _labeler = labeler
+
+  return(_labeler)
+
+
+def redact_text(
+    text: str,
+    labels: typing.List[typing.Tuple[int, int, str]]
+  ) -> str:
+  """
+  Replace the labeled spans in the text with the label name in double braces.
+  For example, text "my email is test@mail.com and number is 617 555 1234"
+  becomes "my email is {{EMAIL}} and number is {{PHONE}}".
+
+  Parameters:
+    **text** (str) - the text to redact
+    **labels** (List[Tuple[int, int, str]]) - start, end (exclusive) and label
+      name of each span in the text to redact
+
+  Returns: the redacted text
+  """
+  redacted: typing.List[str] = []
+  position = 0
+  for start, end, label in sorted(labels, key = lambda label_info: label_info[0]):
+    # skip any span overlapping the previous one
+    if(start < position):
+      continue
+    end = min(end, len(text))
+    redacted.append(text[position:start])
+    redacted.append("{{" + label + "}}")
+    position = end
+
+  redacted.append(text[position:])
+  return("".join(redacted))
+
+
 class RedactPiiInitOptions(vcon.filter_plugins.FilterPluginInitOptions):
   """
-  A RedactPiiInitOptions is derived from FilterPluginInitOptions
-  with no added fields.  A RedactPiiInitOptions is passed to the
-  RedactPii plugin when it is initialized.
+  A RedactPiiInitOptions is derived from FilterPluginInitOptions.
+  A RedactPiiInitOptions is passed to the RedactPii plugin when it is
+  initialized.
   """
-  # nothing to initialize here
+  batch_size: int = pydantic.Field(
+    title = "labeling model batch size",
+    description = """
+Number of texts labeled by the dataprofiler model at a time.  The texts
+of all of the selected dialogs of all of the vCons in a filter or
+filter_batch call are labeled in one call in batches of this size.
+""",
+    examples = [32, 128],
+    default = 32
+    )
 
 
 class RedactPiiOptions(vcon.filter_plugins.FilterPluginOptions):
   """
-  Options for redacting PII data in the text or transcriptions for **dialog** objects.  
+  Options for redacting PII data in the text or transcriptions for **dialog** objects.
   The resulting dialogs(s) are added to **analysis** objects in this **Vcon**
   """
   input_dialogs: typing.Union[str,typing.List[int]] = pydantic.Field(
@@ -50,7 +108,15 @@ using the default FilterPlugin transcribe type.
 
 
 class RedactPii(vcon.filter_plugins.FilterPlugin):
+  """
+  **FilterPlugin** to label PII in the dialog texts and transcripts using the
+  CapitalOne dataprofiler and add redacted transcript **analysis** objects.
+
+  The texts of all of the **Vcon**s given to **filter_batch** are labeled in
+  one batched model call.
+  """
   init_options_type = RedactPiiInitOptions
+  cpu_bound = True
 
   def __init__(
       self,
@@ -64,28 +130,34 @@ class RedactPii(vcon.filter_plugins.FilterPlugin):
       init_options,
       RedactPiiOptions)
 
-  # Function to redact dialog text based on PII labels
-  def redact_text_helper(self, dialog, labels):
-    redacted_dialog = dialog.text
-    index_adjuster = 0
-    for label_info in labels:
-      # start of sensitive data
-      s = label_info[0] + index_adjuster
-      # end of sensitive data
-      e = label_info[1] + index_adjuster
-      if e >= len(redacted_dialog):
-        e = len(redacted_dialog) - 1
-      # redact sensitive data. For example, 
-      # text "my email is test@mail.com and number is 617 555 1234" 
-      # becomes "my email is {{EMAIL}} and number is {{PHONE}}"
-      redacted_dialog = redacted_dialog[:s] + "{{" + label_info[2] + "}}" + redacted_dialog[e:]
-      # adjust the index for the next iteration as the original text has changed
-      diff =e - s - len(label_info[2]) - 4
-      if diff < 0:
-        diff = diff * -1
-      index_adjuster = index_adjuster + diff
-
-    return(redacted_dialog)
+    self._batch_size = init_options.batch_size
+
+
+  def redact_text_helper(self, text: str, labels) -> str:
+    """ Redact the dialog text based on the PII labels, see **redact_text** """
+    return(redact_text(text, labels))
+
+
+  def label_texts(
+      self,
+      texts: typing.List[str]
+    ) -> typing.List[typing.List[typing.Tuple[int, int, str]]]:
+    """
+    Label the PII in the texts in one batched model call.
+
+    Returns: list of (start, end, label) lists, one for each of the texts
+    """
+    if(len(texts) == 0):
+      return([])
+
+    logger.debug('predicting labels for {} texts'.format(len(texts)))
+    predictions = get_labeler().predict(
+      numpy.array(texts, dtype = object),
+      batch_size = self._batch_size
+      )
+
+    return(predictions['pred'])
+
 
   async def filter(
       self,
@@ -94,7 +166,7 @@ class RedactPii(vcon.filter_plugins.FilterPlugin):
     ) -> vcon.Vcon:
     """
     Redact PII in the transcripts for the indicated dialogs using the
-    CaptialOne dataprofiler. 
+    CaptialOne dataprofiler.
 
     Note: this does not guarentee that all PII is redacted.  Other data
     is sometimes mistaken as PII data.  PII data could be missed and
@@ -107,84 +179,82 @@ class RedactPii(vcon.filter_plugins.FilterPlugin):
       The input vCon with the generated, redacted transcript(s) in the
       added.  DOES NOT remove the original, non-redacted transcripts.
     """
-    logger.debug('Redact filter is invoked')
-    out_vcon = in_vcon
-    if(in_vcon.dialog is None):
-      logger.info('Return as there are no dialogs..')
-      return(out_vcon)
-
-    dialog_indices = self.slice_indices(
-      options.input_dialogs,
-      len(in_vcon.dialog),
-      "RedactOptions.input_dialogs"
-      )
+    return((await self.filter_batch([in_vcon], options))[0])
 
-    # no dialogs
-    if(len(dialog_indices) == 0):
-      logger.warning('Return as there are no dialog indices..')
-      return(out_vcon)
 
-    logger.debug('Get dialog text')
-    # iterate through the vcon
-    for dialog_index in dialog_indices:
+  async def filter_batch(
+      self,
+      in_vcons: typing.List[vcon.Vcon],
+      options: RedactPiiOptions
+    ) -> typing.List[vcon.Vcon]:
+    """
+    Redact PII in the transcripts for the indicated dialogs of each of the
+    **Vcon**s, labeling all of the texts in one batched model call.
 
-      dialog_texts = await in_vcon.get_dialog_text(
-        dialog_index,
-        True, # find text from transcript analysis if dialog is a recording and transcript exists
-        False # do not transcribe this recording dialog if transcript does not exist
-      )
+    Parameters:
+      options (RedactPiiOptions)
+
+    Returns:
+      The input vCons with the generated, redacted transcript(s)
+      added, in the same order as the input Vcons.
+    """
+    logger.debug('Redact filter is invoked')
+    # (vCon, dialog index, dialog texts) for each dialog with text
+    dialogs_texts: typing.List[typing.Tuple[vcon.Vcon, int, typing.List[typing.Dict[str, typing.Any]]]] = []
+    for in_vcon in in_vcons:
+      if(in_vcon.dialog is None):
+        logger.info('Return as there are no dialogs..')
+        continue
+
+      dialog_indices = self.slice_indices(
+        options.input_dialogs,
+        len(in_vcon.dialog),
+        "RedactOptions.input_dialogs"
+        )
 
-      # no text, no analysis
-      if(len(dialog_texts) == 0):
-        logger.info('There are no dialog text at index ', dialog_index)
+      # no dialogs
+      if(len(dialog_indices) == 0):
+        logger.warning('Return as there are no dialog indices..')
         continue
 
-      logger.info('creating csv')
-      csv_has_header = False
-      with tempfile.NamedTemporaryFile(suffix = ".csv", mode = "w") as dialog_csv:
-        writer = csv.DictWriter(dialog_csv, fieldnames=DIALOG_DATA_FIELDS)
-        # write header (just once)
-        if(not csv_has_header):
-          writer.writeheader()
-          csv_has_header = True
-        # write data rows
-        # logger.debug("writing dialog text: {}".format(dialog_texts))
-        writer.writerows(dialog_texts)
-
-        # Label the data using CapitalOne libraries
-        # structured labeler doesnt work as it considers entire dialog as a string
-        # and hence is unable to come up with a label for the entire column
-        logger.debug('creating data object')
-        options = {'selected_columns': ['text']}
-        data = CSVData(dialog_csv.name, options=options)
-        dialog_csv.flush()
-
-        # with open(dialog_csv.name, "r") as csv_reader:
-        #   csv_text = csv_reader.read()
-        #   logger.debug("csv: {}".format(csv_text))
-
-        labeler = DataLabeler(labeler_type='unstructured')
-        labeler.set_params(
-          { 'postprocessor' : {'output_format':'ner', 'use_word_level_argmax': True}}
+      logger.debug('Get dialog text')
+      for dialog_index in dialog_indices:
+        dialog_texts = await in_vcon.get_dialog_text(
+          dialog_index,
+          True, # find text from transcript analysis if dialog is a recording and transcript exists
+          False # do not transcribe this recording dialog if transcript does not exist
         )
 
-        logger.debug('predicting labels')
-        predictions = labeler.predict(data)
+        # no text, no analysis
+        if(len(dialog_texts) == 0):
+          logger.info('There are no dialog text at index {}'.format(dialog_index))
+          continue
+
+        dialogs_texts.append((in_vcon, dialog_index, dialog_texts))
+
+    # Label the data using CapitalOne libraries, all texts at once
+    # structured labeler doesnt work as it considers entire dialog as a string
+    # and hence is unable to come up with a label for the entire column
+    predictions = self.label_texts([
+      text_dict['text'] for out_vcon, dialog_index, dialog_texts in dialogs_texts for text_dict in dialog_texts
+      ])
 
-      analysis_extras = {
-        "product": ANALYSIS_PRODUCT
-      }
+    analysis_extras = {
+      "product": ANALYSIS_PRODUCT
+    }
 
-      logger.debug('redacting dialog text')
+    logger.debug('redacting dialog text')
+    prediction_index = 0
+    for out_vcon, dialog_index, dialog_texts in dialogs_texts:
       redacted_texts = []
-      for i, dialog in data.data.iterrows():
-        redacted_dialog = self.redact_text_helper(dialog, predictions['pred'][i])
-        dialog_texts[i]['text'] = redacted_dialog
-        #if redacted_dialog != dialog.text:
+      for text_dict in dialog_texts:
+        redacted_text = dict(text_dict)
+        redacted_text['text'] = redact_text(text_dict['text'], predictions[prediction_index])
+        prediction_index += 1
         # Copy chunks containing no redacted as well
-        redacted_texts.append(dialog_texts[i])
+        redacted_texts.append(redacted_text)
 
-      logger.debug('adding to aaaaanalysis')
+      logger.debug('adding to analysis')
       out_vcon.add_analysis(
         dialog_index,
         ANALYSIS_TYPE,
@@ -194,5 +264,5 @@ class RedactPii(vcon.filter_plugins.FilterPlugin):
         **analysis_extras
         )
 
-    return(out_vcon)
+    return(in_vcons)
 
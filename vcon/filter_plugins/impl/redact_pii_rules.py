@@ -0,0 +1,401 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Rule based (dictionary and pattern) PII redaction FilterPlugin implementation """
+import re
+import typing
+import collections
+import pydantic
+import vcon.filter_plugins
+import vcon.filter_plugins.impl.redact_pii
+
+logger = vcon.build_logger(__name__)
+
+# Same analysis type and body format as the redact_pii (dataprofiler) plugin
+ANALYSIS_TYPE       = vcon.filter_plugins.impl.redact_pii.ANALYSIS_TYPE
+ANALYSIS_VENDOR     = 'py-vcon'
+ANALYSIS_PRODUCT    = 'redact_pii_rules'
+ANALYSIS_SCHEMA     = vcon.filter_plugins.impl.redact_pii.ANALYSIS_SCHEMA
+
+# label: regex, in order of precedence for matches starting at the same position
+# Labels are the same as those of the dataprofiler labeler.
+DEFAULT_PATTERNS: typing.Dict[str, str] = {
+  "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
+  "CREDIT_CARD": r"\b\d(?:[ -]?\d){12,18}\b",
+  "EMAIL_ADDRESS": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b",
+  "PHONE_NUMBER": r"(?:\+?\b1[ .-]?)?(?:\(\d{3}\)\s?|\b\d{3}[ .-]?)\d{3}[ .-]?\d{4}\b"
+  }
+
+
+def luhn_valid(number: str) -> bool:
+  """ Check the Luhn checksum of the digits in the number (e.g. credit card number) """
+  total = 0
+  digits = [int(char) for char in number if char.isdigit()]
+  for index, digit in enumerate(reversed(digits)):
+    if(index % 2 == 1):
+      digit *= 2
+      if(digit > 9):
+        digit -= 9
+    total += digit
+
+  return(len(digits) > 0 and total % 10 == 0)
+
+
+# label: validation of the matched text
+PATTERN_VALIDATORS: typing.Dict[str, typing.Callable[[str], bool]] = {
+  "CREDIT_CARD": luhn_valid
+  }
+
+
+def _lower_same_length(text: str) -> str:
+  """ Lower case the text without changing the character offsets """
+  lowered = text.lower()
+  if(len(lowered) == len(text)):
+    return(lowered)
+
+  # A few characters (e.g. dotted capital I) lower case to more than one character
+  return("".join(char if len(char.lower()) != 1 else char.lower() for char in text))
+
+
+class KeywordAutomaton():
+  """
+  Aho-Corasick automaton to find all of the dictionary terms in a text in one
+  pass.  Uses the pyahocorasick package if it is installed, otherwise a
+  python implementation.
+  """
+  def __init__(
+      self,
+      terms: typing.Dict[str, str],
+      case_sensitive: bool = False
+    ):
+    """
+    Parameters:
+      **terms** (Dict[str, str]) - term: label for each term to find
+      **case_sensitive** (bool) - match the case of the terms
+    """
+    self._case_sensitive = case_sensitive
+    if(not case_sensitive):
+      terms = {_lower_same_length(term): label for term, label in terms.items()}
+
+    try:
+      import ahocorasick
+      self._automaton = ahocorasick.Automaton()
+      for term, label in terms.items():
+        self._automaton.add_word(term, (len(term), label))
+      self._automaton.make_automaton()
+
+    except ModuleNotFoundError:
+      self._automaton = None
+      self._build(terms)
+
+
+  def _build(self, terms: typing.Dict[str, str]) -> None:
+    # node 0 is the root, per node: next node for each character, failure node
+    # and the (length, label) of terms ending at the node
+    self._goto: typing.List[typing.Dict[str, int]] = [{}]
+    self._fail: typing.List[int] = [0]
+    self._output: typing.List[typing.List[typing.Tuple[int, str]]] = [[]]
+    for term, label in terms.items():
+      node = 0
+      for char in term:
+        next_node = self._goto[node].get(char, None)
+        if(next_node is None):
+          next_node = len(self._goto)
+          self._goto.append({})
+          self._fail.append(0)
+          self._output.append([])
+          self._goto[node][char] = next_node
+        node = next_node
+      self._output[node].append((len(term), label))
+
+    # breadth first to set the failure links
+    queue = collections.deque(self._goto[0].values())
+    while(len(queue) > 0):
+      node = queue.popleft()
+      for char, next_node in self._goto[node].items():
+        queue.append(next_node)
+        fail = self._fail[node]
+        while(fail and char not in self._goto[fail]):
+          fail = self._fail[fail]
+        self._fail[next_node] = self._goto[fail].get(char, 0)
+        self._output[next_node] = self._output[next_node] + self._output[self._fail[next_node]]
+
+
+  def iter_matches(self, text: str) -> typing.Iterator[typing.Tuple[int, int, str]]:
+    """
+    Find all of the terms in the text.
+
+    Returns: iterator of (start, end (exclusive), label) of each term found
+    """
+    if(not self._case_sensitive):
+      text = _lower_same_length(text)
+
+    if(self._automaton is not None):
+      if(len(self._automaton) > 0):
+        for last_index, (length, label) in self._automaton.iter(text):
+          yield(last_index + 1 - length, last_index + 1, label)
+      return
+
+    goto = self._goto
+    fail = self._fail
+    output = self._output
+    node = 0
+    for index, char in enumerate(text):
+      while(node and char not in goto[node]):
+        node = fail[node]
+      node = goto[node].get(char, 0)
+      for length, label in output[node]:
+        yield(index + 1 - length, index + 1, label)
+
+
+class PiiRules():
+  """
+  Dictionary terms and patterns compiled in to one **KeywordAutomaton** and
+  one merged regular expression to label PII in a text in a single pass over
+  the text by each.  Patterns with a validator (e.g. Luhn checked CREDIT_CARD)
+  are searched separately so that a candidate which fails validation does not
+  hide other patterns matching the same text (e.g. PHONE_NUMBER).
+  """
+  def __init__(
+      self,
+      dictionary: typing.Dict[str, typing.List[str]],
+      patterns: typing.Dict[str, str],
+      case_sensitive: bool = False
+    ):
+    """
+    Parameters:
+      **dictionary** (Dict[str, List[str]]) - label: terms to label
+      **patterns** (Dict[str, str]) - label: regular expression to label, in order of precedence
+      **case_sensitive** (bool) - match the case of the dictionary terms
+    """
+    terms = {}
+    for label, label_terms in dictionary.items():
+      for term in label_terms:
+        if(len(term) > 0):
+          terms[term] = label
+    self._keywords = KeywordAutomaton(terms, case_sensitive) if len(terms) > 0 else None
+
+    # label: regex for patterns which must be validated
+    self._validated_regexes: typing.Dict[str, typing.Pattern] = {}
+    # regex group names must be identifiers, labels may not be
+    self._group_labels: typing.Dict[str, str] = {}
+    alternatives = []
+    for index, (label, pattern) in enumerate(patterns.items()):
+      if(label in PATTERN_VALIDATORS):
+        self._validated_regexes[label] = re.compile(pattern)
+        continue
+      group = "pii{}".format(index)
+      self._group_labels[group] = label
+      alternatives.append("(?P<{}>{})".format(group, pattern))
+    self._regex = re.compile("|".join(alternatives)) if len(alternatives) > 0 else None
+
+
+  def label(
+      self,
+      text: str,
+      only_labels: typing.Union[typing.Collection[str], None] = None
+    ) -> typing.List[typing.Tuple[int, int, str]]:
+    """
+    Label the PII in the text.
+
+    Parameters:
+      **text** (str) - text to be labeled
+      **only_labels** (Collection[str]) - if given and not empty, only these
+        labels are considered.  Other labels are dropped before overlaps are
+        resolved so that they do not hide the requested labels.
+
+    Returns: list of (start, end (exclusive), label) of the non-overlapping PII
+      in the text in order.  The longest of overlapping labels is kept.
+    """
+    labels: typing.List[typing.Tuple[int, int, str]] = []
+    if(self._regex is not None):
+      for match in self._regex.finditer(text):
+        labels.append((match.start(), match.end(), self._group_labels[match.lastgroup]))
+
+    for label, regex in self._validated_regexes.items():
+      validator = PATTERN_VALIDATORS[label]
+      match = regex.search(text)
+      while(match is not None):
+        if(validator(match.group())):
+          labels.append((match.start(), match.end(), label))
+          position = match.end()
+        else:
+          # retry from the next character, a shorter candidate may be valid
+          position = match.start() + 1
+        match = regex.search(text, position)
+
+    if(self._keywords is not None):
+      for start, end, label in self._keywords.iter_matches(text):
+        # whole words only
+        if((start > 0 and text[start - 1].isalnum() and text[start].isalnum()) or
+          (end < len(text) and text[end].isalnum() and text[end - 1].isalnum())
+          ):
+          continue
+        labels.append((start, end, label))
+
+    if(only_labels):
+      labels = [label_info for label_info in labels if label_info[2] in only_labels]
+
+    # leftmost, then longest wins
+    labels.sort(key = lambda label_info: (label_info[0], label_info[0] - label_info[1]))
+    non_overlapping = []
+    position = 0
+    for label_info in labels:
+      if(label_info[0] >= position):
+        non_overlapping.append(label_info)
+        position = label_info[1]
+
+    return(non_overlapping)
+
+
+class RedactPiiRulesInitOptions(
+  vcon.filter_plugins.FilterPluginInitOptions,
+  title = "rule based PII redaction **FilterPlugin** intialization object"
+  ):
+  """
+  A **RedactPiiRulesInitOptions** object is provided to the
+  **RedactPiiRules FilterPlugin.__init__** method when it is first loaded.  Its
+  attributes define the dictionary terms and patterns labeled as PII.
+  """
+  dictionary: typing.Dict[str, typing.List[str]] = pydantic.Field(
+    title = "dictionary of terms to redact",
+    description = """
+Dictionary, keyed by label, of lists of terms (e.g. account IDs or names)
+to be redacted as whole words.  All of the terms are compiled in to one
+Aho-Corasick automaton, so the number of terms does not effect the time to
+search a text.
+""",
+    examples = [{}, {"ACCOUNT_ID": ["AC-10023", "AC-10024"]}],
+    default = {}
+    )
+
+  patterns: typing.Dict[str, str] = pydantic.Field(
+    title = "regular expressions to redact",
+    description = """
+Regular expressions, keyed by label, of PII to be redacted in addition to
+the built in SSN, CREDIT_CARD (Luhn checked), EMAIL_ADDRESS and PHONE_NUMBER
+patterns.  All of the patterns are merged in to one regular expression.
+""",
+    examples = [{}, {"ACCOUNT_ID": "\\bAC-\\d{5}\\b"}],
+    default = {}
+    )
+
+  case_sensitive: bool = pydantic.Field(
+    title = "match the case of the dictionary terms",
+    default = False
+    )
+
+
+class RedactPiiRulesOptions(
+  vcon.filter_plugins.impl.redact_pii.RedactPiiOptions,
+  title = "rule based PII redaction filter method options"
+  ):
+  """
+  Options for redacting PII data in the text or transcriptions for **dialog** objects
+  using dictionary terms and patterns.
+  The resulting dialogs(s) are added to **analysis** objects in this **Vcon**
+  """
+  labels: typing.List[str] = pydantic.Field(
+    title = "labels to redact",
+    description = """
+Only redact the PII with these labels.  Empty list to redact all labels.
+""",
+    examples = [[], ["CREDIT_CARD", "SSN"]],
+    default = []
+    )
+
+
+class RedactPiiRules(vcon.filter_plugins.FilterPlugin):
+  """
+  **FilterPlugin** to redact structured PII (phone numbers, email addresses,
+  Luhn checked credit card numbers, SSNs and terms from a configured
+  dictionary such as account IDs) from the dialog texts and transcripts.
+
+  Much faster than the **redact_pii** plugin and does not require the ML
+  packages.  The redacted transcript **analysis** objects are in the same
+  {{LABEL}} format as those of **redact_pii**, so may also be used with the
+  **jq_redaction** plugin.
+  """
+  init_options_type = RedactPiiRulesInitOptions
+
+  def __init__(
+      self,
+      init_options: RedactPiiRulesInitOptions
+    ):
+    """
+    Parameters:
+      init_options (RedactPiiRulesInitOptions) - the dictionary terms and patterns to redact
+    """
+    super().__init__(
+      init_options,
+      RedactPiiRulesOptions)
+
+    patterns = dict(DEFAULT_PATTERNS)
+    patterns.update(init_options.patterns)
+    self.rules = PiiRules(
+      init_options.dictionary,
+      patterns,
+      init_options.case_sensitive
+      )
+
+
+  async def filter(
+      self,
+      in_vcon: vcon.Vcon,
+      options: RedactPiiRulesOptions
+    ) -> vcon.Vcon:
+    """
+    Redact PII in the text and transcripts for the indicated dialogs.
+
+    Note: this only redacts the PII matching the dictionary and patterns.
+    Unstructured PII (e.g. names and addresses) is not redacted.
+
+    Parameters:
+      options (RedactPiiRulesOptions)
+
+    Returns:
+      The input vCon with the generated, redacted transcript(s)
+      added.  DOES NOT remove the original, non-redacted transcripts.
+    """
+    out_vcon = in_vcon
+    if(in_vcon.dialog is None):
+      return(out_vcon)
+
+    dialog_indices = self.slice_indices(
+      options.input_dialogs,
+      len(in_vcon.dialog),
+      "RedactPiiRulesOptions.input_dialogs"
+      )
+
+    redact_labels = set(options.labels)
+    analysis_extras = {
+      "product": ANALYSIS_PRODUCT
+    }
+
+    for dialog_index in dialog_indices:
+      dialog_texts = await in_vcon.get_dialog_text(
+        dialog_index,
+        True, # find text from transcript analysis if dialog is a recording and transcript exists
+        False # do not transcribe this recording dialog if transcript does not exist
+      )
+
+      # no text, no analysis
+      if(len(dialog_texts) == 0):
+        continue
+
+      redacted_texts = []
+      for text_dict in dialog_texts:
+        labels = self.rules.label(text_dict["text"], redact_labels)
+        redacted_text = dict(text_dict)
+        redacted_text["text"] = vcon.filter_plugins.impl.redact_pii.redact_text(text_dict["text"], labels)
+        redacted_texts.append(redacted_text)
+
+      out_vcon.add_analysis(
+        dialog_index,
+        ANALYSIS_TYPE,
+        redacted_texts,
+        ANALYSIS_VENDOR,
+        ANALYSIS_SCHEMA,
+        **analysis_extras
+        )
+
+    return(out_vcon)
+
@@ -1,7 +1,8 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for JWS signing of vCon """
 import typing
 import pydantic
+import vcon.security
 import vcon.filter_plugins
 
 logger = vcon.build_logger(__name__)
@@ -11,7 +12,7 @@ class NoPrivateKey(Exception):
 
 
 class SignFilterPluginInitOptions(
-  vcon.filter_plugins.FilterPluginInitOptions,
+  vcon.filter_plugins.ThreadPoolBatchInitOptions,
   title = "JWS signing of vCon **FilterPlugin** intialization object"
   ):
   """
@@ -62,9 +63,12 @@ and used for verification of the signed vCon.
     )
 
 
-class SignFilterPlugin(vcon.filter_plugins.FilterPlugin):
+class SignFilterPlugin(vcon.filter_plugins.ThreadPoolBatchFilterPlugin):
   """
   **FilterPlugin** for JWS signing of vCon
+
+  The private key and certificate chain are parsed once and cached (reloaded
+  if the PEM files change).  filter_batch signs the vCons in parallel threads.
   """
   init_options_type = SignFilterPluginInitOptions
 
@@ -81,6 +85,14 @@ class SignFilterPlugin(vcon.filter_plugins.FilterPlugin):
       SignFilterPluginOptions
       )
 
+    # Parse and cache the default key material now, rather than on first use
+    if(init_options.private_pem_key is not None and len(init_options.private_pem_key) > 0):
+      try:
+        vcon.security.get_signing_key(init_options.private_pem_key, init_options.cert_chain_pems)
+
+      except vcon.security.KEY_MATERIAL_ERRORS as load_error:
+        logger.warning("Sign filter plugin failed to load default key: {}".format(load_error))
+
 
   async def filter(
     self,
@@ -1,12 +1,14 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ FilterPlugin for JWS verification of vCon """
 import typing
 import pydantic
+import vcon.security
 import vcon.filter_plugins
 
+logger = vcon.build_logger(__name__)
 
 class VerifyFilterPluginInitOptions(
-  vcon.filter_plugins.FilterPluginInitOptions,
+  vcon.filter_plugins.ThreadPoolBatchInitOptions,
   title = "JWS verification of vCon **FilterPlugin** intialization object"
   ):
   """
@@ -48,9 +50,12 @@ this is not the case.
     )
 
 
-class VerifyFilterPlugin(vcon.filter_plugins.FilterPlugin):
+class VerifyFilterPlugin(vcon.filter_plugins.ThreadPoolBatchFilterPlugin):
   """
   **FilterPlugin** for JWS verification of vCon
+
+  The trusted CA certificates are parsed once and cached (reloaded if the
+  PEM files change).  filter_batch verifies the vCons in parallel threads.
   """
   init_options_type = VerifyFilterPluginInitOptions
 
@@ -67,6 +72,14 @@ class VerifyFilterPlugin(vcon.filter_plugins.FilterPlugin):
       VerifyFilterPluginOptions
       )
 
+    # Parse and cache the default CA certs now, rather than on first use
+    if(len(init_options.allowed_ca_cert_pems) > 0):
+      try:
+        vcon.security.get_ca_certs(init_options.allowed_ca_cert_pems)
+
+      except vcon.security.KEY_MATERIAL_ERRORS as load_error:
+        logger.warning("Verify filter plugin failed to load default CA certs: {}".format(load_error))
+
 
   async def filter(
     self,
@@ -1,12 +1,19 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Whisper transcriptiont FilterPlugin implentation """
 import os
-import sys
 import typing
-import tempfile
-import contextlib
+import asyncio
+import signal
+import threading
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.synchronize
+import concurrent.futures
+import numpy
 import pydantic
 import vcon
+import vcon.audio
+import vcon.cache
 import vcon.filter_plugins
 
 logger = vcon.build_logger(__name__)
@@ -20,7 +27,572 @@ except Exception as e:
   raise e
 
 
-class WhisperInitOptions(vcon.filter_plugins.FilterPluginInitOptions, title = "Whisper **FilterPlugin** intialization object"):
+# Whisper models operate on 16kHz mono audio
+WHISPER_SAMPLE_RATE = vcon.audio.SPEECH_SAMPLE_RATE
+
+def find_chunk_boundaries(
+    audio: numpy.ndarray,
+    chunk_duration: float,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    frame_duration: float = 0.02,
+    silence_duration: float = 0.3
+  ) -> typing.List[typing.Tuple[int, int]]:
+  """
+  Split the audio into chunks of at most **chunk_duration** seconds at
+  silence boundaries using an energy based voice activity detector.
+
+  Each cut is placed in the quietest **silence_duration** window in the last
+  quarter of the chunk so that words are not split across chunks.
+
+  Returns: list of (start, end) sample indices of the chunks
+  """
+  chunk_samples = int(chunk_duration * sample_rate)
+  if(chunk_samples <= 0 or len(audio) <= chunk_samples):
+    return([(0, len(audio))])
+
+  frame_samples = max(1, int(frame_duration * sample_rate))
+  num_frames = len(audio) // frame_samples
+  frame_energy = numpy.square(
+    audio[0:num_frames * frame_samples].reshape(num_frames, frame_samples)
+    ).mean(axis = 1)
+  # Average energy over the silence window starting at each frame
+  window_frames = max(1, int(silence_duration / frame_duration))
+  window_sums = numpy.convolve(frame_energy, numpy.ones(window_frames), mode = "valid")
+
+  boundaries = []
+  start = 0
+  while(len(audio) - start > chunk_samples):
+    search_end = (start + chunk_samples) // frame_samples - window_frames + 1
+    # first whole frame at or after start (start is not frame aligned after a cut without silence)
+    first_frame = -(-start // frame_samples)
+    search_start = max(first_frame, search_end - chunk_samples // (4 * frame_samples))
+    cut = start + chunk_samples
+    if(search_end > search_start):
+      quietest = search_start + int(numpy.argmin(window_sums[search_start:search_end]))
+      # cut in the middle of the quiet window, the chunk must not be empty
+      # (e.g. window of one frame at start)
+      quiet_cut = (quietest + window_frames // 2) * frame_samples
+      if(quiet_cut > start):
+        cut = quiet_cut
+    boundaries.append((start, cut))
+    start = cut
+
+  boundaries.append((start, len(audio)))
+  return(boundaries)
+
+
+def offset_transcript(transcript: dict, offset: float) -> dict:
+  """ Shift the segment, word and non-speech timestamps in the Whisper transcript dict by **offset** seconds """
+  for segment in transcript.get("segments", []):
+    for key in ("start", "end", "seek"):
+      if(segment.get(key, None) is not None):
+        segment[key] += offset
+    for word in segment.get("words", None) or []:
+      word["start"] += offset
+      word["end"] += offset
+
+  for section in transcript.get("nonspeech_sections", None) or []:
+    section["start"] += offset
+    section["end"] += offset
+
+  return(transcript)
+
+
+def stitch_transcripts(
+    chunk_transcripts: typing.List[dict],
+    offsets: typing.List[float]
+  ) -> dict:
+  """
+  Combine the Whisper transcript dicts of consecutive audio chunks into one transcript.
+
+  Parameters:
+    **chunk_transcripts** (List[dict]) - transcript of each chunk in order
+    **offsets** (List[float]) - start time in seconds of each chunk in the recording
+
+  Returns: the transcript dict for the whole recording
+  """
+  transcript = {
+    "text": "",
+    "segments": [],
+    "language": None,
+    "nonspeech_sections": []
+    }
+  for chunk_transcript, offset in zip(chunk_transcripts, offsets):
+    offset_transcript(chunk_transcript, offset)
+    transcript["text"] += chunk_transcript.get("text", "")
+    transcript["segments"].extend(chunk_transcript.get("segments", []))
+    transcript["nonspeech_sections"].extend(chunk_transcript.get("nonspeech_sections", None) or [])
+    if(transcript["language"] is None):
+      transcript["language"] = chunk_transcript.get("language", None)
+    if("regroup_history" in chunk_transcript and "regroup_history" not in transcript):
+      transcript["regroup_history"] = chunk_transcript["regroup_history"]
+
+  for segment_id, segment in enumerate(transcript["segments"]):
+    if("id" in segment):
+      segment["id"] = segment_id
+
+  return(transcript)
+
+
+def merge_channel_transcripts(
+    channel_transcripts: typing.List[dict],
+    parties: typing.List[typing.Union[int, typing.List[int]]]
+  ) -> dict:
+  """
+  Merge the Whisper transcript dicts of each channel of a multi-channel
+  recording into one transcript with the segments in time order.  Each
+  segment is labeled with the **party** index (or indices) of its channel.
+
+  Parameters:
+    **channel_transcripts** (List[dict]) - transcript of each channel
+    **parties** (List[Union[int, List[int]]]) - party(s) for each channel
+
+  Returns: the merged transcript dict
+  """
+  segments = []
+  language = None
+  for channel, (channel_transcript, party) in enumerate(zip(channel_transcripts, parties)):
+    for segment in channel_transcript.get("segments", []):
+      segment["channel"] = channel
+      segment["party"] = party
+      segments.append(segment)
+    if(language is None):
+      language = channel_transcript.get("language", None)
+
+  # stable so that channel order is kept for segments starting at the same time
+  segments.sort(key = lambda segment: segment["start"])
+  for segment_id, segment in enumerate(segments):
+    if("id" in segment):
+      segment["id"] = segment_id
+
+  return({
+    "text": "".join(segment.get("text", "") for segment in segments),
+    "segments": segments,
+    "language": language
+    })
+
+
+# Model used to transcribe chunks in the worker processes.  Workers are forked
+# after the model is loaded so they share the weights copy-on-write.
+_worker_model = None
+
+def _init_chunk_worker(model) -> None:
+  """ Initialize a chunk transcription worker process """
+  global _worker_model
+  _worker_model = model
+  try:
+    import torch
+    # Parallelism is across the worker processes
+    torch.set_num_threads(1)
+  except ModuleNotFoundError:
+    pass
+
+
+def transcribe_samples(
+    model,
+    audio: numpy.ndarray,
+    whisper_options: typing.Dict[str, typing.Any]
+  ) -> dict:
+  """ Transcribe the audio samples using the given Whisper model """
+  # verbose None stops whisper printing the decoded text and detected
+  # language to stdout.  stdout is not redirected as it is process wide and
+  # this may run on a thread while others are printing.
+  transcript = model.transcribe(audio, verbose = None, **whisper_options)
+  logger.debug("whisper transcript type: {}".format(type(transcript)))
+  # Newer version of whisper returns object instead of dict
+  if(not isinstance(transcript, dict)):
+    transcript = transcript.to_dict()
+  # dict_keys(['text', 'segments', 'language'])
+
+  return(transcript)
+
+
+def _transcribe_chunk(
+    audio: numpy.ndarray,
+    whisper_options: typing.Dict[str, typing.Any]
+  ) -> dict:
+  """ Transcribe one chunk of audio in a worker process """
+  return(transcribe_samples(_worker_model, audio, whisper_options))
+
+
+class WhisperTranscriber():
+  """
+  Whisper model and the pool of worker processes, which share the model
+  weights, used to transcribe chunks and channels in parallel.
+
+  The model is not thread safe (whisper installs hooks on the model while
+  transcribing), so transcriptions in this process are run one at a time in
+  a single inference thread.  This also keeps the event loop responsive and
+  serializes concurrent **filter** calls (e.g. when the plugin is run in the
+  "thread" plugin executor or the model host is serving several clients).
+  """
+  def __init__(
+      self,
+      model_size: str,
+      chunk_workers: int = 0
+    ):
+    """
+    Parameters:
+      **model_size** (str) - Whisper model size to load
+      **chunk_workers** (int) - number of worker processes, 0 for one per CPU core
+    """
+    self.model_size = model_size
+    logger.info("Initializing whisper model size: {}".format(self.model_size))
+    self.model = stable_whisper.load_model(self.model_size)
+    #stable_whisper.modify_model(self.model)
+    self._chunk_workers = chunk_workers or os.cpu_count() or 1
+    self._chunk_pool = None
+    self._chunk_pool_warned = False
+    self._inference_executor = concurrent.futures.ThreadPoolExecutor(
+      max_workers = 1,
+      thread_name_prefix = "whisper_inference"
+      )
+
+
+  def close(self) -> None:
+    """ Shutdown the worker processes and inference thread """
+    if(self._chunk_pool is not None):
+      self._chunk_pool.shutdown(wait = False, cancel_futures = True)
+      self._chunk_pool = None
+
+    if(self._inference_executor is not None):
+      self._inference_executor.shutdown(wait = False, cancel_futures = True)
+      self._inference_executor = None
+
+
+  def warm_up(self) -> None:
+    """
+    Run a short transcription of silence so that lazy initialization
+    (e.g. kernels, caches) is done before the first real request.
+    """
+    silence = numpy.zeros(WHISPER_SAMPLE_RATE, numpy.float32)
+    self._inference_executor.submit(transcribe_samples, self.model, silence, {}).result()
+    if(self._chunk_workers > 1):
+      # fork the workers now rather than on the first request
+      self._get_chunk_pool().submit(_transcribe_chunk, silence, {}).result()
+
+
+  def _get_chunk_pool(self) -> typing.Union[concurrent.futures.ProcessPoolExecutor, None]:
+    """
+    Get the pool of worker processes for transcribing chunks, creating it if needed.
+
+    The workers are only forked from the main thread, as forking from another
+    thread of a multi-threaded process (e.g. a plugin executor thread) can
+    deadlock the child on a lock held by another thread.
+
+    Returns: the pool or None if it is not started and this is not the main thread
+    """
+    if(self._chunk_pool is None):
+      if(threading.current_thread() is not threading.main_thread()):
+        if(not self._chunk_pool_warned):
+          logger.warning("whisper chunk workers can only be started from the main thread, transcribing chunks in this process")
+          self._chunk_pool_warned = True
+        return(None)
+
+      logger.info("starting {} whisper chunk workers".format(self._chunk_workers))
+      # fork so that the loaded model is shared with the workers rather than pickled
+      self._chunk_pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers = self._chunk_workers,
+        mp_context = multiprocessing.get_context("fork"),
+        initializer = _init_chunk_worker,
+        initargs = (self.model,)
+        )
+      # The fork context starts all of the workers on the first submit, do it now on this thread
+      self._chunk_pool.submit(int)
+
+    return(self._chunk_pool)
+
+
+  async def transcribe_channels(
+      self,
+      channels: typing.List[numpy.ndarray],
+      whisper_options: typing.Dict[str, typing.Any],
+      chunk_duration: float = 0
+    ) -> typing.List[dict]:
+    """
+    Transcribe the audio samples of each channel concurrently.  Channels longer
+    than **chunk_duration** seconds are split into chunks at silence boundaries.
+    All of the chunks of all of the channels are transcribed in parallel.
+
+    Returns: the Whisper transcript dict for each channel
+    """
+    # (channel, start, end) for each chunk
+    chunks = []
+    for channel_index, audio in enumerate(channels):
+      chunks.extend([(channel_index, start, end) for start, end in find_chunk_boundaries(audio, chunk_duration)])
+
+    if(len(chunks) > len(channels)):
+      logger.debug("transcribing {} chunks of {} seconds".format(
+        len(chunks),
+        [round((end - start) / WHISPER_SAMPLE_RATE, 2) for channel_index, start, end in chunks]
+        ))
+
+    pool = None
+    if(self._chunk_workers > 1 and len(chunks) > 1):
+      pool = self._get_chunk_pool()
+
+    if(pool is None):
+      loop = asyncio.get_running_loop()
+      chunk_transcripts = [await loop.run_in_executor(
+          self._inference_executor,
+          transcribe_samples,
+          self.model,
+          channels[channel_index][start:end],
+          whisper_options
+          )
+        for channel_index, start, end in chunks]
+
+    else:
+      chunk_transcripts = await asyncio.gather(*[
+        asyncio.wrap_future(pool.submit(_transcribe_chunk, channels[channel_index][start:end], whisper_options))
+          for channel_index, start, end in chunks])
+
+    channel_transcripts = []
+    for channel_index in range(len(channels)):
+      channel_chunks = [(transcript, start / WHISPER_SAMPLE_RATE)
+        for transcript, (chunk_channel, start, end) in zip(chunk_transcripts, chunks)
+          if chunk_channel == channel_index]
+      if(len(channel_chunks) == 1):
+        channel_transcripts.append(channel_chunks[0][0])
+      else:
+        channel_transcripts.append(stitch_transcripts(
+          [transcript for transcript, offset in channel_chunks],
+          [offset for transcript, offset in channel_chunks]
+          ))
+
+    return(channel_transcripts)
+
+
+def _model_host_authkey() -> bytes:
+  """
+  Get the key used to authenticate connections to the model host.  Processes
+  forked or spawned from the same parent (e.g. the server and its workers)
+  share the multiprocessing authkey unless WHISPER_MODEL_HOST_AUTHKEY is set.
+  """
+  authkey = os.getenv("WHISPER_MODEL_HOST_AUTHKEY", "")
+  if(authkey):
+    return(authkey.encode("utf-8"))
+
+  return(bytes(multiprocessing.current_process().authkey))
+
+
+def _serve_model_host_connection(
+    connection: multiprocessing.connection.Connection,
+    transcriber: WhisperTranscriber,
+    loop: asyncio.AbstractEventLoop
+  ) -> None:
+  """ Serve the transcription requests from one client connection to the model host """
+  try:
+    connection.send({"model_size": transcriber.model_size})
+    while(True):
+      channels, whisper_options, chunk_duration = connection.recv()
+      try:
+        # Requests from all connections are run concurrently in the host's event
+        # loop, sharing the host's pool of chunk workers
+        transcripts = asyncio.run_coroutine_threadsafe(
+          transcriber.transcribe_channels(channels, whisper_options, chunk_duration),
+          loop
+          ).result()
+        connection.send((transcripts, None))
+
+      except Exception as transcribe_error:
+        logger.exception(transcribe_error)
+        connection.send((None, "{}: {}".format(type(transcribe_error).__name__, transcribe_error)))
+
+  except (EOFError, OSError):
+    # client disconnected
+    pass
+
+  finally:
+    connection.close()
+
+
+def _run_model_host(
+    address: str,
+    model_size: str,
+    chunk_workers: int,
+    authkey: bytes,
+    ready: multiprocessing.synchronize.Event
+  ) -> None:
+  """ Model host process main """
+  # Inference is not run on the event loop so that one long transcription
+  # does not block the requests from the other clients
+  transcriber = WhisperTranscriber(model_size, chunk_workers)
+  transcriber.warm_up()
+
+  if(os.path.exists(address)):
+    # stale socket from a previous host
+    os.unlink(address)
+  listener = multiprocessing.connection.Listener(address, authkey = authkey)
+  loop = asyncio.new_event_loop()
+  signal.signal(signal.SIGTERM, lambda signal_number, frame: loop.call_soon_threadsafe(loop.stop))
+
+  def accept_connections():
+    while(True):
+      try:
+        connection = listener.accept()
+      except multiprocessing.AuthenticationError as auth_error:
+        logger.warning("whisper model host connection failed: {}".format(auth_error))
+        continue
+      except OSError:
+        # listener closed
+        return
+      threading.Thread(
+        target = _serve_model_host_connection,
+        args = (connection, transcriber, loop),
+        daemon = True
+        ).start()
+
+  threading.Thread(target = accept_connections, daemon = True).start()
+  logger.info("whisper model host: {} model size: {} ready".format(address, model_size))
+  ready.set()
+  try:
+    loop.run_forever()
+
+  finally:
+    listener.close()
+    transcriber.close()
+    loop.close()
+    logger.info("whisper model host: {} stopped".format(address))
+
+
+class WhisperModelHostError(Exception):
+  """ Raised when the model host fails to start or to transcribe a request """
+
+
+class WhisperModelHost():
+  """
+  Long lived process which loads and warms up one Whisper model and its pool
+  of chunk workers, which share the model weights.  **Whisper** plugins in other
+  processes on the host (e.g. pipeline workers) configured with the host's
+  address in **WhisperInitOptions.model_host** submit their audio to it over a
+  local socket rather than each loading a copy of the model.  Requests from
+  all of the clients are transcribed concurrently in the shared worker pool.
+  """
+  def __init__(
+      self,
+      address: str,
+      model_size: str = "base",
+      chunk_workers: int = 0
+    ):
+    """
+    Parameters:
+      **address** (str) - path of the Unix socket the host listens on
+      **model_size** (str) - Whisper model size name
+      **chunk_workers** (int) - number of worker processes, 0 for one per CPU core
+    """
+    self.address = address
+    self.model_size = model_size
+    self.chunk_workers = chunk_workers
+    self._process = None
+
+
+  def start(self, timeout: float = 600.0) -> None:
+    """ Start the model host process and wait until the model is loaded and warmed up """
+    context = multiprocessing.get_context()
+    ready = context.Event()
+    # Not a daemon as the host has its own worker processes
+    self._process = context.Process(
+      target = _run_model_host,
+      args = (self.address, self.model_size, self.chunk_workers, _model_host_authkey(), ready),
+      name = "whisper_model_host"
+      )
+    self._process.start()
+    if(not ready.wait(timeout)):
+      self.stop()
+      raise WhisperModelHostError("whisper model host: {} did not start in {} seconds".format(
+        self.address,
+        timeout
+        ))
+    logger.info("started whisper model host pid: {}".format(self._process.pid))
+
+
+  def stop(self, timeout: float = 10.0) -> None:
+    """ Stop the model host process """
+    if(self._process is not None):
+      self._process.terminate()
+      self._process.join(timeout)
+      if(self._process.is_alive()):
+        self._process.kill()
+      self._process = None
+
+
+class WhisperModelHostClient():
+  """
+  Submits transcription requests to a **WhisperModelHost**.  Provides the
+  same transcription interface as **WhisperTranscriber**.
+  """
+  def __init__(self, address: str):
+    self._address = address
+    self._lock = threading.Lock()
+    self._connection = None
+    self._pid = None
+    # The model is in the host process
+    self.model = None
+    self.model_size = None
+    self._connect()
+
+
+  def _connect(self) -> None:
+    self._connection = multiprocessing.connection.Client(self._address, authkey = _model_host_authkey())
+    self._pid = os.getpid()
+    self.model_size = self._connection.recv()["model_size"]
+
+
+  def close(self) -> None:
+    """ Close the connection to the host """
+    with self._lock:
+      # A connection inherited by a forked process belongs to the parent
+      if(self._connection is not None and self._pid == os.getpid()):
+        self._connection.close()
+      self._connection = None
+
+
+  def _request(
+      self,
+      channels: typing.List[numpy.ndarray],
+      whisper_options: typing.Dict[str, typing.Any],
+      chunk_duration: float
+    ) -> typing.List[dict]:
+    with self._lock:
+      if(self._connection is None or self._pid != os.getpid()):
+        self._connect()
+      try:
+        self._connection.send((list(channels), whisper_options, chunk_duration))
+        transcripts, error = self._connection.recv()
+
+      except (EOFError, OSError):
+        # reconnect on the next request in case the host was restarted
+        self._connection = None
+        raise
+
+    if(error is not None):
+      raise WhisperModelHostError("whisper model host: {} failed: {}".format(self._address, error))
+
+    return(transcripts)
+
+
+  async def transcribe_channels(
+      self,
+      channels: typing.List[numpy.ndarray],
+      whisper_options: typing.Dict[str, typing.Any],
+      chunk_duration: float = 0
+    ) -> typing.List[dict]:
+    """
+    Transcribe the audio samples of each channel in the model host.
+
+    Returns: the Whisper transcript dict for each channel
+    """
+    return(await asyncio.get_running_loop().run_in_executor(
+      None,
+      self._request,
+      channels,
+      whisper_options,
+      chunk_duration
+      ))
+
+
+class WhisperInitOptions(vcon.filter_plugins.TranscribeInitOptions, title = "Whisper **FilterPlugin** intialization object"):
   """
   A **WhisperInitOptions** object is provided to the
   **Whisper FilterPlugin.__init__** method when it is first loaded.  Its
@@ -36,6 +608,36 @@ https://github.com/openai/whisper#available-models-and-languages
     examples = [ "tiny", "base" ]
     )
 
+  model_host: str = pydantic.Field(
+    title = "address of the shared Whisper model host",
+    description = """
+Path of the Unix socket of a **WhisperModelHost** process which has the model
+loaded and warmed up.  When set, the audio is submitted to the model host
+rather than loading a copy of the model in this process.  The model host
+should have the same **model_size**.  If the model host is not available
+when the plugin is loaded (e.g. not started yet), the connection is retried
+upon first use, and if still not available, the model is loaded in this
+process.  The py_vcon_server starts the model host when the WHISPER_MODEL_HOST
+environment variable is set.
+""",
+    default = "",
+    examples = ["", "/tmp/vcon_whisper_model_host"]
+    )
+
+  chunk_workers: int = pydantic.Field(
+    title = "number of chunk transcription worker processes",
+    description = """
+Number of worker processes used to transcribe the chunks of recordings split
+using **WhisperOptions.chunk_duration**.  The workers are forked after the
+model is loaded so that they share the model weights.  0 uses one worker per CPU core.
+The workers are only forked from the main thread (on the first chunked transcription
+there or when the model host starts).  Until then, chunks transcribed on other threads
+(e.g. with the "thread" plugin executor) are transcribed in this process, one at a time.
+""",
+    default = 0,
+    examples = [0, 4]
+    )
+
 
 class WhisperOptions(vcon.filter_plugins.TranscribeOptions):
   """
@@ -54,12 +656,26 @@ List of output types to generate.  Current set of value supported are:
     default = ["vendor", "word_srt", "word_ass"]
     )
 
+  chunk_duration: float = pydantic.Field(
+    title = "maximum duration in seconds of chunks transcribed in parallel",
+    description = """
+Recordings longer than **chunk_duration** seconds are split into chunks at
+silence boundaries which are transcribed in parallel by the worker processes
+(see **WhisperInitOptions.chunk_workers**).  The segment and word timestamps of the
+chunks are offset and stitched back into one transcript.
+0 transcribes the whole recording in one pass.
+""",
+    default = 0,
+    examples = [0, 120]
+    )
+
 
 class Whisper(vcon.filter_plugins.FilterPlugin):
   """
   **FilterPlugin** to generate transcriptions for a **Vcon**
   """
   init_options_type = WhisperInitOptions
+  cpu_bound = True
   supported_options = [ "language" ]
   _supported_media = [
     vcon.Vcon.MIMETYPE_AUDIO_WAV,
@@ -80,11 +696,120 @@ class Whisper(vcon.filter_plugins.FilterPlugin):
       init_options,
       WhisperOptions
       )
-    # make model size configurable
-    self.whisper_model_size = init_options.model_size
-    logger.info("Initializing whisper model size: {}".format(self.whisper_model_size))
-    self.whisper_model = stable_whisper.load_model(self.whisper_model_size)
-    #stable_whisper.modify_model(self.whisper_model)
+    self._transcriber = None
+    self._transcriber_lock = threading.Lock()
+    if(init_options.model_host):
+      # The model host may not be started yet (e.g. plugins warmed up before the
+      # server starts the host), in which case the connection is retried and the
+      # model is only loaded in this process upon first use.
+      self._transcriber = self._connect_model_host()
+
+    else:
+      self._transcriber = WhisperTranscriber(init_options.model_size, init_options.chunk_workers)
+
+    self._transcription_cache = vcon.cache.ResultCache.from_url(init_options.transcription_cache)
+
+
+  def _connect_model_host(self) -> typing.Union[WhisperModelHostClient, None]:
+    """ Connect to the shared model host, None if it is not available """
+    try:
+      # Use the model loaded and warmed up in the shared model host process
+      client = WhisperModelHostClient(self._init_options.model_host)
+
+    except (OSError, EOFError) as connect_error:
+      logger.info("whisper model host: {} not available ({})".format(
+        self._init_options.model_host,
+        connect_error
+        ))
+      return(None)
+
+    if(client.model_size != self._init_options.model_size):
+      logger.warning("whisper model host: {} has model size: {} not: {}".format(
+        self._init_options.model_host,
+        client.model_size,
+        self._init_options.model_size
+        ))
+
+    return(client)
+
+
+  def _get_transcriber(self) -> typing.Union[WhisperTranscriber, WhisperModelHostClient]:
+    """
+    Get the model host client or local model, connecting to the model host
+    or, if it is not available, loading the model in this process if not
+    already done.
+    """
+    if(self._transcriber is None):
+      with self._transcriber_lock:
+        if(self._transcriber is None):
+          transcriber = self._connect_model_host()
+          if(transcriber is None):
+            logger.warning("whisper model host: {} not available, loading model in this process".format(
+              self._init_options.model_host
+              ))
+            transcriber = WhisperTranscriber(self._init_options.model_size, self._init_options.chunk_workers)
+          self._transcriber = transcriber
+
+    return(self._transcriber)
+
+
+  @property
+  def whisper_model_size(self) -> str:
+    """ Size of the Whisper model used by this plugin """
+    return(self._get_transcriber().model_size)
+
+
+  @property
+  def whisper_model(self):
+    """ The Whisper model, None if using the model host """
+    return(self._get_transcriber().model)
+
+
+  def cache_stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """ Get the hit and miss counts of the transcription cache, see **FilterPlugin.cache_stats** """
+    if(self._transcription_cache is None):
+      return({})
+
+    return({"transcription_cache": self._transcription_cache.stats()})
+
+
+  def __del__(self):
+    """ Close the model or model host connection and chunk worker processes """
+    if(getattr(self, "_transcriber", None) is not None):
+      self._transcriber.close()
+      self._transcriber = None
+    super().__del__()
+
+
+  async def transcribe_audio(
+      self,
+      audio: numpy.ndarray,
+      whisper_options: typing.Dict[str, typing.Any],
+      chunk_duration: float = 0
+    ) -> dict:
+    """
+    Transcribe the audio samples, splitting them into chunks at silence
+    boundaries which are transcribed in parallel if longer than **chunk_duration** seconds.
+
+    Returns: the Whisper transcript dict
+    """
+    return((await self.transcribe_channels([audio], whisper_options, chunk_duration))[0])
+
+
+  async def transcribe_channels(
+      self,
+      channels: typing.List[numpy.ndarray],
+      whisper_options: typing.Dict[str, typing.Any],
+      chunk_duration: float = 0
+    ) -> typing.List[dict]:
+    """
+    Transcribe the audio samples of each channel concurrently using the local
+    model or the shared model host.
+
+    Returns: the Whisper transcript dict for each channel
+    """
+    return(await self._get_transcriber().transcribe_channels(channels, whisper_options, chunk_duration))
+
 
   async def filter(
     self,
@@ -164,110 +889,112 @@ class Whisper(vcon.filter_plugins.FilterPlugin):
 
           body_bytes = await in_vcon.get_dialog_body(dialog_index)
           if(body_bytes is not None and len(body_bytes)):
-            with tempfile.TemporaryDirectory() as temp_dir:
-              transcript = None
-              suffix = vcon.Vcon.get_mime_extension(mime_type)
-              with tempfile.NamedTemporaryFile(prefix= temp_dir + os.sep, suffix = suffix) as temp_audio_file:
-                temp_audio_file.write(body_bytes)
-                #rate, samples = scipy.io.wavfile.read(body_io)
-                # ts_num=7 is num of timestamps to get, so 7 is more than the default of 5
-                # stab=True  is disable stabilization so you can do it later with different settings
-                #transcript = self.whisper_model.transcribe(samples, ts_num=7, stab=False)
-
-                # whisper has some print statements that we want to go to stderr
-
-                model = self.whisper_model
-
-                with contextlib.redirect_stdout(sys.stderr):
-
-                  # loading a different model is expensive.  Its better to register
-                  # multiple instance of whisper plugin with different names and models.
-                  if(hasattr(options, "model_size")):
-                    logger.warning(
-                      "Ignoring whisper options attribute: model_size: {}, model size must be set in whipser initialization.  Using model size: {}".format(
-
-                      options.model_size,
-                      self.whisper_model_size
-                      ))
-
-                  whisper_options = {}
-                  for field_value in options:
-                    key = field_value[0]
-                    if(key in self.supported_options):
-                      whisper_options[key] = field_value[1]
-                  logger.debug("providing whisper options: {}".format(whisper_options))
-
-                  transcript = model.transcribe(temp_audio_file.name, **whisper_options)
-                  logger.debug("whisper transcript type: {}".format(type(transcript)))
-                  # Newer version of whisper returns object instead of dict
-                  if(not isinstance(transcript, dict)):
-                    transcript = transcript.to_dict()
-                  # dict_keys(['text', 'segments', 'language'])
-              # aggressive allows more variation
-              #stabilized_segments = stable_whisper.stabilize_timestamps(transcript["segments"], aggressive=True)
-              #transcript["segments"] = stabilized_segments
-              # stable_segments = stable_whisper.stabilize_timestamps(transcript, top_focus=True)
-              # transcript["stable_segments"] = stable_segments
-
-              # need to add transcription to dialog.analysis
-              # if time stamp transcript does not already exist and requested
-              analysis_extras = {
-                "product": "whisper"
-              }
-              if(wwt_index is None and "vendor" in output_types):
-                out_vcon.add_analysis_transcript(
-                  dialog_index,
+            transcript = None
+
+            # loading a different model is expensive.  Its better to register
+            # multiple instance of whisper plugin with different names and models.
+            if(hasattr(options, "model_size")):
+              logger.warning(
+                "Ignoring whisper options attribute: model_size: {}, model size must be set in whipser initialization.  Using model size: {}".format(
+
+                options.model_size,
+                self.whisper_model_size
+                ))
+
+            whisper_options = {}
+            for field_value in options:
+              key = field_value[0]
+              if(key in self.supported_options):
+                whisper_options[key] = field_value[1]
+            logger.debug("providing whisper options: {}".format(whisper_options))
+            # options may be a TranscribeOptions without the Whisper specific fields
+            chunk_duration = getattr(options, "chunk_duration", 0)
+            parties = None
+            if(options.split_channels):
+              parties = vcon.audio.channel_parties(dialog, vcon.audio.channel_count(body_bytes))
+
+            cache_key = None
+            if(self._transcription_cache is not None):
+              cache_key = vcon.cache.make_key(
+                "transcript",
+                "openai",
+                "whisper",
+                self.whisper_model_size,
+                whisper_options,
+                chunk_duration,
+                parties,
+                vcon.cache.digest(body_bytes)
+                )
+              transcript = await self._transcription_cache.lookup(cache_key)
+              logger.debug("whisper transcription cache {}: {}".format(
+                "miss" if transcript is None else "hit",
+                cache_key
+                ))
+
+            if(transcript is None):
+              # Decode in memory rather than having whisper read a temp file
+              if(parties is None):
+                audio = vcon.audio.decode_audio(body_bytes, WHISPER_SAMPLE_RATE)
+                transcript = await self.transcribe_audio(audio, whisper_options, chunk_duration)
+
+              else:
+                # Transcribe each channel separately to attribute the text to the channel's party
+                channels = vcon.audio.decode_audio(body_bytes, WHISPER_SAMPLE_RATE, len(parties))
+                transcript = merge_channel_transcripts(
+                  await self.transcribe_channels(list(channels), whisper_options, chunk_duration),
+                  parties
+                  )
+
+              if(cache_key is not None):
+                await self._transcription_cache.set(
+                  cache_key,
                   transcript,
-                  "openai",
-                  "whisper_word_timestamps",
-                  **analysis_extras
+                  self._init_options.transcription_cache_ttl or None
                   )
 
-              # if srt does not already exist and requested
-              if(wws_index is None and "word_srt" in output_types):
-                with tempfile.NamedTemporaryFile(prefix= temp_dir + os.sep, suffix=".srt") as temp_srt_file:
-                  # stable_whisper has some print statements that we want to go to stderr
-                  with contextlib.redirect_stdout(sys.stderr):
-                    # Function name changed in version 2.X
-                    if(int(stable_whisper.__version__.split('.')[0]) >= 2):
-                      func = stable_whisper.result_to_srt_vtt
-                    else:
-                      func = stable_whisper.results_to_word_srt
-                    logger.debug("starting srt")
-                    func(transcript, temp_srt_file.name)
-                  srt_bytes = temp_srt_file.read()
-                  # TODO: should body be json.loads'd
-                  out_vcon.add_analysis_transcript(
-                    dialog_index,
-                    srt_bytes.decode("utf-8"),
-                    "openai",
-                    "whisper_word_srt",
-                    encoding = "none",
-                    **analysis_extras
-                    )
-
-              # if ass does not already exist and requested
-              if(wwa_index is None and "word_ass" in output_types):
-                # Getting junk on stdout from stable_whisper.  Redirect it.
-                with contextlib.redirect_stdout(sys.stderr):
-                  with tempfile.NamedTemporaryFile(prefix= temp_dir + os.sep, suffix=".ass") as temp_ass_file:
-                    if(int(stable_whisper.__version__.split('.')[0]) >= 2):
-                      func = stable_whisper.result_to_ass
-                    else:
-                      func = stable_whisper.results_to_sentence_word_ass
-                    logger.debug("starting ass")
-                    func(transcript, temp_ass_file.name)
-                    ass_bytes = temp_ass_file.read()
-                    # TODO: should body be json.loads'd
-                    out_vcon.add_analysis_transcript(
-                      dialog_index,
-                      ass_bytes.decode("utf-8"),
-                      "openai",
-                      "whisper_word_ass",
-                      encoding = "none",
-                      **analysis_extras
-                      )
-              logger.debug("done with whisper transcription")
+            # need to add transcription to dialog.analysis
+            # if time stamp transcript does not already exist and requested
+            analysis_extras = {
+              "product": "whisper"
+            }
+            if(wwt_index is None and "vendor" in output_types):
+              out_vcon.add_analysis_transcript(
+                dialog_index,
+                transcript,
+                "openai",
+                "whisper_word_timestamps",
+                **analysis_extras
+                )
+
+            # if srt does not already exist and requested
+            if(wws_index is None and "word_srt" in output_types):
+              logger.debug("starting srt")
+              # No file path renders to a str in memory, without printing the saved file path
+              srt_text = stable_whisper.result_to_srt_vtt(transcript, None)
+              # TODO: should body be json.loads'd
+              out_vcon.add_analysis_transcript(
+                dialog_index,
+                srt_text,
+                "openai",
+                "whisper_word_srt",
+                encoding = "none",
+                **analysis_extras
+                )
+
+            # if ass does not already exist and requested
+            if(wwa_index is None and "word_ass" in output_types):
+              logger.debug("starting ass")
+              ass_text = stable_whisper.result_to_ass(transcript, None)
+              # TODO: should body be json.loads'd
+              out_vcon.add_analysis_transcript(
+                dialog_index,
+                ass_text,
+                "openai",
+                "whisper_word_ass",
+                encoding = "none",
+                **analysis_extras
+                )
+            logger.debug("done with whisper transcription")
 
           else:
             pass # ignore??
@@ -1,4 +1,4 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ OpenAi filter plugin registrations """
 import os
 import vcon.filter_plugins
@@ -7,7 +7,10 @@ logger = vcon.build_logger(__name__)
 
 openai_api_key = os.getenv("OPENAI_API_KEY", "")
 logger.warning("OPENAI_API_KEY env variable not set.  OpenAI pluggins will be no-op.")
-init_options = {"openai_api_key": openai_api_key}
+init_options = {
+  "openai_api_key": openai_api_key,
+  "response_cache": os.getenv("OPENAI_RESPONSE_CACHE", "")
+  }
 
 vcon.filter_plugins.FilterPluginRegistry.register(
   "openai_completion",
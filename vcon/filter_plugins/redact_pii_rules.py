@@ -0,0 +1,14 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Rule based PII redaction plugin registration """
+import typing
+import vcon.filter_plugins
+
+# Register plugin
+registration_options: typing.Dict[str, typing.Any] = {}
+vcon.filter_plugins.FilterPluginRegistry.register(
+  "redact_pii_rules",
+  "vcon.filter_plugins.impl.redact_pii_rules",
+  "RedactPiiRules",
+  "Adds analysis object to vcon with dictionary and pattern matched PII redacted from the dialog text",
+  registration_options
+  )
@@ -1,17 +1,22 @@
-# Copyright (C) 2023-2024 SIPez LLC.  All rights reserved.
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
 """ Whisper audio transcription filter plugin registration """
+import os
 import datetime
 import vcon.filter_plugins
 import vcon.accessors
 
 # Register the whisper filter plugin
-init_options = {"model_size": "base"}
+init_options = {
+  "model_size": os.getenv("WHISPER_MODEL_SIZE", "base"),
+  "model_host": os.getenv("WHISPER_MODEL_HOST", ""),
+  "transcription_cache": os.getenv("TRANSCRIPTION_CACHE", "")
+  }
 
 vcon.filter_plugins.FilterPluginRegistry.register(
   "whisper",
   "vcon.filter_plugins.impl.whisper",
   "Whisper",
-  "OpenAI Whisper implemented transcription of audio dialog recordings using model size: \"base\"",
+  "OpenAI Whisper implemented transcription of audio dialog recordings using model size: \"{}\"".format(init_options["model_size"]),
   init_options
   )
 
@@ -26,7 +31,8 @@ class WhisperTranscriptAccessor(vcon.accessors.TranscriptAccessor):
 
     Currently diarization is not supported for Whisper so there
     is only one text chunk, not a chunk per speaker and spoken
-    segment.
+    segment.  The exception is multi-channel recordings transcribed
+    per channel, which have a text chunk per party turn.
     """
     if(self._analysis_dict["type"].lower() == "transcript" and
       ((self._analysis_dict["vendor"].lower() == "openai" and
@@ -36,11 +42,36 @@ class WhisperTranscriptAccessor(vcon.accessors.TranscriptAccessor):
         self._analysis_dict["schema"].lower() == "whisper_word_timestamps")
       )):
 
+      dialog_start = datetime.datetime.fromisoformat(vcon.utils.cannonize_date(self._dialog_dict["start"]))
+      segments = self._analysis_dict["body"]["segments"]
+
+      # Multi-channel recordings transcribed per channel have the party for each segment
+      if(len(segments) > 0 and "party" in segments[0]):
+        text_list = []
+        for segment in segments:
+          if(len(text_list) > 0 and text_list[-1]["parties"] == segment["party"]):
+            text_dict = text_list[-1]
+            text_dict["text"] += segment["text"]
+            text_dict["duration"] = max(text_dict["duration"], segment["end"] - text_dict["relative_start"])
+          else:
+            text_dict = {}
+            text_dict["parties"] = segment["party"]
+            text_dict["text"] = segment["text"]
+            text_dict["relative_start"] = segment["start"]
+            text_dict["start"] = (dialog_start + datetime.timedelta(0, segment["start"])).isoformat()
+            text_dict["duration"] = segment["end"] - segment["start"]
+            text_list.append(text_dict)
+
+        for text_dict in text_list:
+          del text_dict["relative_start"]
+          text_dict["text"] = text_dict["text"].strip()
+
+        return(text_list)
+
       # TODO: need to get diarization working on Whisper
       text_dict = {}
       text_dict["parties"] = self._dialog_dict["parties"]
       text_dict["text"] = self._analysis_dict["body"]["text"]
-      dialog_start = datetime.datetime.fromisoformat(vcon.utils.cannonize_date(self._dialog_dict["start"]))
       relative_start = self._analysis_dict["body"]["segments"][0]["start"]
       text_dict["start"] = (dialog_start + datetime.timedelta(0, relative_start)).isoformat()
       relative_end = self._analysis_dict["body"]["segments"][-1]["end"]
@@ -0,0 +1,343 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+"""
+Low overhead instrumentation of calls (e.g. **FilterPlugin** filter and
+**VconProcessor** process) aggregated in to histograms per name.
+
+Wall and CPU time are measured for every call.  Bytes in and out are only
+measured for a sampled fraction of the calls, as they are relatively
+expensive.  Peak allocated memory (using tracemalloc) is only measured for
+sampled calls run synchronously in an executor thread or process (see
+**call_tracing_memory**), as tracing memory slows down everything running
+in the process while it is on.  Calls awaited on the event loop (e.g. non
+CPU bound **FilterPlugin**s) would trace memory for the whole time they
+await, counting the allocations of unrelated coroutines.
+
+Instrumentation is configured with the following environmental variables:
+
+  * **VCON_INSTRUMENTATION** - "0" or "false" to disable instrumentation (defaults to: enabled)
+  * **VCON_INSTRUMENTATION_SAMPLE_RATE** - fraction (0.0-1.0) of calls for which
+    memory and bytes in and out are measured (defaults to: 0.01)
+"""
+import os
+import sys
+import time
+import bisect
+import random
+import typing
+import threading
+import tracemalloc
+
+# Only one sampled call traces memory at a time, as tracemalloc is process wide
+_tracemalloc_lock = threading.Lock()
+
+
+def call_tracing_memory(
+    function: typing.Callable,
+    *args
+  ) -> typing.Tuple[typing.Any, typing.Union[int, None]]:
+  """
+  Invoke the synchronous function, tracing the peak memory allocated while it runs.
+  Should only be used for calls run in an executor thread or process, so that
+  memory is only traced while the call is actually running.
+
+  Returns: the function result and the peak bytes allocated above those
+    allocated when the call started, None if another call is already tracing
+    memory
+  """
+  if(not _tracemalloc_lock.acquire(blocking = False)):
+    return((function(*args), None))
+
+  try:
+    stop_tracing = False
+    if(not tracemalloc.is_tracing()):
+      tracemalloc.start()
+      stop_tracing = True
+    try:
+      tracemalloc.reset_peak()
+      memory_base = tracemalloc.get_traced_memory()[0]
+      result = function(*args)
+      return((result, max(0, tracemalloc.get_traced_memory()[1] - memory_base)))
+
+    finally:
+      if(stop_tracing):
+        tracemalloc.stop()
+
+  finally:
+    _tracemalloc_lock.release()
+
+
+class Histogram():
+  """
+  Histogram of observed values with exponentially sized buckets.
+  Quantiles are estimated as the upper bound of the bucket containing them.
+  """
+  def __init__(self, first_bound: float, num_buckets: int, factor: float = 2.0):
+    """
+    Parameters:
+      **first_bound** (float) - upper bound of the first bucket
+      **num_buckets** (int) - number of buckets, values above the last bound go in an overflow bucket
+      **factor** (float) - ratio of each bucket's upper bound to the previous one's
+    """
+    self.bounds = [first_bound * factor ** index for index in range(num_buckets)]
+    self.counts = [0] * (num_buckets + 1)
+    self.count = 0
+    self.total = 0.0
+    self.min: typing.Union[float, None] = None
+    self.max: typing.Union[float, None] = None
+
+
+  def observe(self, value: float) -> None:
+    """ Add the value to the histogram """
+    self.counts[bisect.bisect_left(self.bounds, value)] += 1
+    self.count += 1
+    self.total += value
+    if(self.min is None or value < self.min):
+      self.min = value
+    if(self.max is None or value > self.max):
+      self.max = value
+
+
+  def quantile(self, fraction: float) -> typing.Union[float, None]:
+    """
+    Estimate the value below which the given fraction of the observed values fall.
+
+    Returns: the upper bound of the bucket containing the quantile (the max
+      value for the overflow bucket), None if there are no values
+    """
+    if(self.count == 0):
+      return(None)
+
+    rank = fraction * self.count
+    cumulative = 0
+    for index, count in enumerate(self.counts):
+      cumulative += count
+      if(cumulative >= rank and count > 0):
+        if(index < len(self.bounds)):
+          return(min(self.bounds[index], self.max))
+        break
+
+    return(self.max)
+
+
+  def to_dict(self) -> typing.Dict[str, typing.Any]:
+    """
+    Returns: dict with the count, sum, min, max, mean, p50, p90 and p99
+      estimates and the count in each non-empty bucket, keyed by the bucket's
+      upper bound ("inf" for the overflow bucket)
+    """
+    return({
+      "count": self.count,
+      "sum": self.total,
+      "min": self.min,
+      "max": self.max,
+      "mean": self.total / self.count if self.count > 0 else None,
+      "p50": self.quantile(0.5),
+      "p90": self.quantile(0.9),
+      "p99": self.quantile(0.99),
+      "buckets": {("{:g}".format(self.bounds[index]) if index < len(self.bounds) else "inf"): count
+        for index, count in enumerate(self.counts) if count > 0}
+      })
+
+
+class CallStats():
+  """ Histograms of the measurements of the calls for one name (e.g. plugin name) """
+  def __init__(self):
+    self.calls = 0
+    self.errors = 0
+    # 100 microseconds to ~15 hours
+    self.wall_seconds = Histogram(0.0001, 30)
+    self.cpu_seconds = Histogram(0.0001, 30)
+    # 1 KB to 1 TB
+    self.peak_memory_bytes = Histogram(1024, 31)
+    self.bytes_in = Histogram(1024, 31)
+    self.bytes_out = Histogram(1024, 31)
+    self._lock = threading.Lock()
+
+
+  def record(self, measurement: "Measurement") -> None:
+    """ Add the measurements of a call """
+    with self._lock:
+      self.calls += 1
+      if(measurement.error):
+        self.errors += 1
+      self.wall_seconds.observe(measurement.wall_seconds)
+      if(measurement.cpu_seconds is not None):
+        self.cpu_seconds.observe(measurement.cpu_seconds)
+      if(measurement.peak_memory_bytes is not None):
+        self.peak_memory_bytes.observe(measurement.peak_memory_bytes)
+      if(measurement.bytes_in is not None):
+        self.bytes_in.observe(measurement.bytes_in)
+      if(measurement.bytes_out is not None):
+        self.bytes_out.observe(measurement.bytes_out)
+
+
+  def to_dict(self) -> typing.Dict[str, typing.Any]:
+    with self._lock:
+      return({
+        "calls": self.calls,
+        "errors": self.errors,
+        "wall_seconds": self.wall_seconds.to_dict(),
+        "cpu_seconds": self.cpu_seconds.to_dict(),
+        "peak_memory_bytes": self.peak_memory_bytes.to_dict(),
+        "bytes_in": self.bytes_in.to_dict(),
+        "bytes_out": self.bytes_out.to_dict()
+        })
+
+
+class Measurement():
+  """
+  Context manager measuring one call, recorded in the **CallInstrumentation**
+  when the context exits.  Exceptions raised in the context are counted as
+  errors.
+
+  CPU time is that of the thread entering the context.  If the work is done
+  in another thread (e.g. an executor), that thread's CPU time should be set
+  in **cpu_seconds** before the context exits.  For coroutines, the CPU time
+  includes that of other coroutines run on the event loop while awaiting.
+
+  Peak memory is not traced by the context.  For sampled calls run in an
+  executor, the peak memory measured by **call_tracing_memory** in the
+  executor thread or process should be set in **peak_memory_bytes** before
+  the context exits.
+  """
+  def __init__(
+      self,
+      instrumentation: "CallInstrumentation",
+      name: str,
+      call_input: typing.Any,
+      sampled: bool
+    ):
+    self._instrumentation = instrumentation
+    self.name = name
+    self.sampled = sampled
+    self.error = False
+    self.wall_seconds = 0.0
+    self.cpu_seconds: typing.Union[float, None] = None
+    self.peak_memory_bytes: typing.Union[int, None] = None
+    self.bytes_in: typing.Union[int, None] = None
+    self.bytes_out: typing.Union[int, None] = None
+    self._call_input = call_input
+
+
+  def __enter__(self) -> "Measurement":
+    if(self.sampled):
+      self.bytes_in = self._instrumentation.size(self._call_input)
+    self._call_input = None
+
+    self._wall_start = time.perf_counter()
+    self._cpu_start = time.thread_time()
+    return(self)
+
+
+  def set_output(self, call_output: typing.Any) -> None:
+    """ Measure the bytes out from the call output, if this call is sampled """
+    if(self.sampled):
+      self.bytes_out = self._instrumentation.size(call_output)
+
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    self.wall_seconds = time.perf_counter() - self._wall_start
+    if(self.cpu_seconds is None):
+      self.cpu_seconds = time.thread_time() - self._cpu_start
+
+    self.error = exc_type is not None
+    self._instrumentation.record(self)
+
+
+class CallInstrumentation():
+  """
+  Instrumentation of a class of calls (e.g. **FilterPlugin** filter calls)
+  aggregated in to **CallStats** per name.
+  """
+  enabled: bool = os.getenv("VCON_INSTRUMENTATION", "1").lower() not in ("0", "false", "no", "off")
+  sample_rate: float = 0.01
+
+  def __init__(
+      self,
+      size_function: typing.Callable[[typing.Any], typing.Union[int, None]]
+    ):
+    """
+    Parameters:
+      **size_function** - function returning the size in bytes of the input or
+        output of a call, or None if it cannot be determined.  Only invoked for
+        sampled calls.
+    """
+    self._size_function = size_function
+    self._stats: typing.Dict[str, CallStats] = {}
+    self._lock = threading.Lock()
+
+
+  def size(self, call_io: typing.Any) -> typing.Union[int, None]:
+    """ Get the size in bytes of the call input or output, None if it cannot be determined """
+    try:
+      return(self._size_function(call_io))
+
+    except Exception:
+      return(None)
+
+
+  def measure(self, name: str, call_input: typing.Any = None) -> typing.Union[Measurement, "_NoMeasurement"]:
+    """
+    Measure a call.
+
+    Parameters:
+      **name** (str) - the name (e.g. plugin name) which the call is aggregated under
+      **call_input** - the input to the call, only sized if the call is sampled
+
+    Returns: context manager for the call, the **set_output** method of which
+      should be invoked with the call output
+    """
+    if(not CallInstrumentation.enabled):
+      return(_NO_MEASUREMENT)
+
+    return(Measurement(self, name, call_input, random.random() < CallInstrumentation.sample_rate))
+
+
+  def record(self, measurement: Measurement) -> None:
+    """ Add the measurement to the stats for its name """
+    stats = self._stats.get(measurement.name, None)
+    if(stats is None):
+      with self._lock:
+        stats = self._stats.setdefault(measurement.name, CallStats())
+
+    stats.record(measurement)
+
+
+  def stats(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+    Get the aggregated measurements.
+
+    Returns: dict of name to dict with keys: "calls", "errors" and the
+      histograms (see **Histogram.to_dict**) for: "wall_seconds", "cpu_seconds",
+      "peak_memory_bytes", "bytes_in" and "bytes_out"
+    """
+    return({name: call_stats.to_dict() for name, call_stats in list(self._stats.items())})
+
+
+  def reset(self) -> None:
+    """ Clear all of the aggregated measurements """
+    with self._lock:
+      self._stats = {}
+
+
+class _NoMeasurement():
+  """ Measurement used when instrumentation is disabled """
+  sampled = False
+  cpu_seconds = None
+  peak_memory_bytes = None
+
+  def __enter__(self) -> "_NoMeasurement":
+    return(self)
+
+  def set_output(self, call_output: typing.Any) -> None:
+    pass
+
+  def __exit__(self, exc_type, exc_value, traceback) -> None:
+    pass
+
+_NO_MEASUREMENT = _NoMeasurement()
+
+try:
+  CallInstrumentation.sample_rate = float(os.getenv("VCON_INSTRUMENTATION_SAMPLE_RATE", 0.01))
+except ValueError:
+  print("Warning: VCON_INSTRUMENTATION_SAMPLE_RATE should be a float, using: 0.01", file = sys.stderr)
@@ -0,0 +1,192 @@
+# Copyright (C) 2023-2025 SIPez LLC.  All rights reserved.
+""" Rate limiting of requests to third party services (e.g. transcription) """
+import time
+import typing
+import asyncio
+import threading
+import vcon
+
+logger = vcon.build_logger(__name__)
+
+
+class TokenBucket():
+  """
+  Token bucket rate limiter shared by all of the requests to a service.
+
+  Tokens are added to the bucket at **rate** tokens per second, up to
+  **capacity** tokens (the burst size).  Each request takes tokens from the
+  bucket before it is sent, waiting if there are not enough.  Waiting
+  requests reserve their tokens, so they are granted in the order in which
+  they asked.
+
+  The bucket is not bound to an event loop and may be shared across threads.
+  """
+  def __init__(self, rate: float, capacity: float = 0):
+    """
+    Parameters:
+      **rate** (float) - tokens added per second, 0 or less for no limit
+      **capacity** (float) - maximum tokens in the bucket, 0 for max(1, **rate**)
+    """
+    self.rate = rate
+    self.capacity = capacity if capacity > 0 else max(1.0, rate)
+    self._tokens = self.capacity
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+
+  def reserve(self, tokens: float = 1) -> float:
+    """
+    Take the tokens from the bucket, going in to debt if there are not enough.
+
+    Parameters:
+      **tokens** (float) - number of tokens to take
+
+    Returns: seconds to wait before the tokens are available
+    """
+    if(self.rate <= 0):
+      return(0.0)
+
+    with self._lock:
+      now = time.monotonic()
+      self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+      self._updated = now
+      self._tokens -= tokens
+      if(self._tokens >= 0):
+        return(0.0)
+
+      return(-self._tokens / self.rate)
+
+
+  def set_rate(self, rate: float) -> None:
+    """
+    Change the rate at which tokens are added to the bucket.  Tokens added at
+    the old rate, up to now, are kept.
+    """
+    with self._lock:
+      now = time.monotonic()
+      if(self.rate > 0):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+      self._updated = now
+      self.rate = rate
+
+
+  async def acquire(self, tokens: float = 1) -> float:
+    """
+    Wait until the tokens are available.
+
+    Parameters:
+      **tokens** (float) - number of tokens to take
+
+    Returns: seconds waited
+    """
+    wait = self.reserve(tokens)
+    if(wait > 0):
+      logger.debug("rate limited, waiting: {:.3f} seconds".format(wait))
+      await asyncio.sleep(wait)
+
+    return(wait)
+
+
+class AdaptiveRateLimiter():
+  """
+  Requests per minute and tokens per minute rate limiter which adapts to
+  the rate limited (e.g. HTTP 429) responses of the service.
+
+  A rate limited response pauses all requests for the retry after time given
+  by the service (or an exponential backoff if not given) and halves the
+  request and token rates.  Each successful request recovers some of the
+  rate, back up to the configured rates.
+
+  The limiter is not bound to an event loop and may be shared across threads.
+  """
+  MIN_RATE_SCALE = 1.0 / 16
+  RATE_RECOVERY = 0.05
+  MIN_BACKOFF = 1.0
+  MAX_BACKOFF = 60.0
+
+  def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+    """
+    Parameters:
+      **requests_per_minute** (float) - request rate limit, 0 for no limit other
+        than pausing when rate limited
+      **tokens_per_minute** (float) - token (e.g. LLM input plus output tokens)
+        rate limit, 0 for no limit other than pausing when rate limited
+    """
+    self.requests_per_minute = requests_per_minute
+    self.tokens_per_minute = tokens_per_minute
+    # Allow a second's worth of burst so that the limit is spread over the minute
+    self._requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 60.0))
+    self._tokens = TokenBucket(tokens_per_minute / 60.0, max(1.0, tokens_per_minute / 60.0))
+    self._rate_scale = 1.0
+    self._backoff = self.MIN_BACKOFF
+    self._paused_until = 0.0
+    self._lock = threading.Lock()
+    self.num_rate_limited = 0
+
+
+  @property
+  def rate_scale(self) -> float:
+    """ fraction of the configured rates currently allowed """
+    return(self._rate_scale)
+
+
+  def _set_rates(self) -> None:
+    self._requests.set_rate(self.requests_per_minute / 60.0 * self._rate_scale)
+    self._tokens.set_rate(self.tokens_per_minute / 60.0 * self._rate_scale)
+
+
+  async def acquire(self, tokens: float = 1) -> float:
+    """
+    Wait until a request using the given number of tokens may be sent.
+
+    Parameters:
+      **tokens** (float) - estimated number of tokens used by the request
+
+    Returns: seconds waited
+    """
+    waited = 0.0
+    pause = self._paused_until - time.monotonic()
+    while(pause > 0):
+      await asyncio.sleep(pause)
+      waited += pause
+      pause = self._paused_until - time.monotonic()
+
+    waited += await self._requests.acquire(1)
+    waited += await self._tokens.acquire(tokens)
+    return(waited)
+
+
+  def rate_limited(self, retry_after: typing.Union[float, None] = None) -> None:
+    """
+    Pause requests and reduce the rates after a rate limited response.
+
+    Parameters:
+      **retry_after** (float) - seconds to wait given by the service
+        (e.g. retry-after header), None to use an exponential backoff
+    """
+    with self._lock:
+      self.num_rate_limited += 1
+      now = time.monotonic()
+      if(retry_after is None):
+        retry_after = self._backoff
+        self._backoff = min(self.MAX_BACKOFF, self._backoff * 2)
+
+      # Concurrent requests rate limited in the same pause only reduce the rate once
+      if(now >= self._paused_until):
+        self._rate_scale = max(self.MIN_RATE_SCALE, self._rate_scale / 2)
+        self._set_rates()
+        logger.info("rate limited, pausing: {:.3f} seconds, rate scale now: {}".format(
+          retry_after,
+          self._rate_scale
+          ))
+
+      self._paused_until = max(self._paused_until, now + retry_after)
+
+
+  def succeeded(self) -> None:
+    """ Recover some of the rate after a successful request """
+    with self._lock:
+      self._backoff = self.MIN_BACKOFF
+      if(self._rate_scale < 1.0):
+        self._rate_scale = min(1.0, self._rate_scale + self.RATE_RECOVERY)
+        self._set_rates()
@@ -1,7 +1,20 @@
 
 import os
+import copy
+import json
+import hmac
+import struct
 import typing
+import threading
+import collections
 import cryptography.hazmat.backends.openssl.backend
+import cryptography.hazmat.primitives.ciphers
+import cryptography.hazmat.primitives.padding
+import cryptography.hazmat.primitives.asymmetric.padding
+import cryptography.hazmat.primitives.asymmetric.utils
+import cryptography.hazmat.primitives.asymmetric.ed25519
+import cryptography.hazmat.primitives.serialization
+import cryptography.exceptions
 import cryptography.x509
 #import re
 import base64
@@ -9,6 +22,7 @@ import jose
 import datetime
 import hsslms
 import hashlib
+import vcon.base64url
 
 CERT_PARTIAL_PREFIX = "--BEGIN CERTIFICATE--"
 CERT_PARTIAL_SUFFIX = "--END CERTIFICATE--"
@@ -168,26 +182,26 @@ def build_signing_jwk_from_pem_files(private_key_pem_file: str, cert_chain_pem_f
   signing_key["kty"] = "RSA"
   signing_key["use"] = "sig"
   signing_key["alg"] = algorithm
-  signing_key["n"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(cert_object.public_key().public_numbers().n)).decode('utf-8')
-  signing_key["e"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(cert_object.public_key().public_numbers().e)).decode('utf-8')
-  signing_key["d"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().d)).decode('utf-8')
+  signing_key["n"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(cert_object.public_key().public_numbers().n))
+  signing_key["e"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(cert_object.public_key().public_numbers().e))
+  signing_key["d"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().d))
 
   # if missing, can be computed using:
   # (p,p) = cryptography.hazmat.primitives.asymmetric.rsa.rsa_recover_prime_factors(n, e, d)
-  signing_key["p"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().p)).decode('utf-8')
-  signing_key["q"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().q)).decode('utf-8')
+  signing_key["p"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().p))
+  signing_key["q"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().q))
 
   # if missing, can be computed using:
   # cryptography.hazmat.primitives.asymmetric.rsa.rsa_crt_dmp1(d, p)
-  signing_key["dp"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().dmp1)).decode('utf-8')
+  signing_key["dp"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().dmp1))
 
   # if missing, can be computed using:
   # cryptography.hazmat.primitives.asymmetric.rsa.rsa_crt_dmq1(d, q)
-  signing_key["dq"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().dmq1)).decode('utf-8')
+  signing_key["dq"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().dmq1))
 
   # if missing, can be computed using:
   # cryptography.hazmat.primitives.asymmetric.rsa.rsa_crt_iqmp(p,q)
-  signing_key["qi"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(private_key_object.private_numbers().iqmp)).decode('utf-8')
+  signing_key["qi"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(private_key_object.private_numbers().iqmp))
 
   return(header, signing_key)
 
@@ -267,6 +281,150 @@ def verify_cert(cert_to_verify : cryptography.x509.Certificate, issuer_cert : cr
 
   # TODO need to check revokations as well
 
+# =============================== Key Material Cache ===========================
+
+class KeyMaterialCache():
+  """
+  Thread safe, least recently used cache of key material (e.g. key and
+  certificate objects) parsed from PEM files or PEM strings, so that the PEMs
+  are not parsed again for every sign, verify, encrypt or decrypt.
+
+  Key material parsed from files is reloaded when the modification time or
+  size of any of the files changes.
+  """
+  def __init__(self, max_entries: int = 32):
+    """
+    Parameters:
+      **max_entries** (int) - maximum number of cached key materials, the least recently used are dropped
+    """
+    self.max_entries = max_entries
+    self.num_hits = 0
+    self.num_loads = 0
+    self._entries: typing.OrderedDict[tuple, tuple] = collections.OrderedDict()
+    self._lock = threading.Lock()
+    self._build_lock = threading.Lock()
+
+
+  @staticmethod
+  def _file_stamps(pem_sources: typing.Tuple[str, ...]) -> tuple:
+    """ Get the modification time and size of each of the sources which are file names """
+    stamps = []
+    for source in pem_sources:
+      if(source.find("--BEGIN ") >= 0 and source.find("--END ") >= 0):
+        stamps.append(None)
+
+      else:
+        file_stat = os.stat(source)
+        stamps.append((file_stat.st_mtime_ns, file_stat.st_size))
+
+    return(tuple(stamps))
+
+
+  def get(
+      self,
+      kind: str,
+      pem_sources: typing.Tuple[str, ...],
+      build: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+    """
+    Get the cached key material, building it if not cached or if any of its
+    files have changed.
+
+    Parameters:
+      **kind** (str) - label for the type of key material built
+      **pem_sources** (Tuple[str]) - the file names or PEM strings from which the key material is built
+      **build** (Callable) - function to parse and build the key material
+
+    Returns: the key material returned by **build**
+    """
+    cache_key = (kind, pem_sources)
+    stamps = self._file_stamps(pem_sources)
+    material = self._get_entry(cache_key, stamps)
+    if(material is not None):
+      return(material)
+
+    # Concurrent misses (e.g. a batch of vCons) wait for one build rather than each parsing the PEMs
+    with self._build_lock:
+      material = self._get_entry(cache_key, stamps)
+      if(material is not None):
+        return(material)
+
+      material = build()
+      with self._lock:
+        self.num_loads += 1
+        self._entries[cache_key] = (stamps, material)
+        self._entries.move_to_end(cache_key)
+        while(len(self._entries) > self.max_entries):
+          self._entries.popitem(last = False)
+
+    return(material)
+
+
+  def _get_entry(self, cache_key: tuple, stamps: tuple) -> typing.Any:
+    """ Get the cached key material if its files have not changed, otherwise None """
+    with self._lock:
+      entry = self._entries.get(cache_key, None)
+      if(entry is not None and entry[0] == stamps):
+        self._entries.move_to_end(cache_key)
+        self.num_hits += 1
+        return(entry[1])
+
+    return(None)
+
+
+  def clear(self) -> None:
+    """ Drop all of the cached key material """
+    with self._lock:
+      self._entries.clear()
+
+
+KEY_MATERIAL_CACHE = KeyMaterialCache()
+
+# Errors raised when key material cannot be read or parsed (e.g. missing
+# file or invalid PEM), as opposed to errors in the calling code
+KEY_MATERIAL_ERRORS = (OSError, ValueError, TypeError)
+
+
+def get_signing_key(
+    private_key_pem_file: str,
+    cert_chain_pem_files: typing.List[str]
+  ) -> typing.Tuple[dict, cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey]:
+  """
+  Get the JWS header and private key object for signing from **KEY_MATERIAL_CACHE**,
+  see **build_signing_jwk_from_pem_files** for the parameters.
+
+  Returns:
+    Tuple[dict, RSAPrivateKey]: header, private key
+        - copy of the header appropriate for including in JWS including x5c and alg
+        - private key object for signing a JWS
+  """
+  def build():
+    header = {}
+    header["x5c"] = load_x5c_from_pem_certs(cert_chain_pem_files)
+    header["alg"] = "RS256"
+    return((header, load_pem_key(private_key_pem_file)))
+
+  header, private_key_object = KEY_MATERIAL_CACHE.get(
+    "signing",
+    (private_key_pem_file, *cert_chain_pem_files),
+    build
+    )
+
+  return(copy.deepcopy(header), private_key_object)
+
+
+def get_ca_certs(ca_cert_pem_files: typing.List[str]) -> typing.List[cryptography.x509.Certificate]:
+  """
+  Get the certificate objects for the list of CA certificate PEM file names or
+  PEM strings from **KEY_MATERIAL_CACHE**.
+  """
+  return(KEY_MATERIAL_CACHE.get(
+    "ca_certs",
+    tuple(ca_cert_pem_files),
+    lambda: [load_pem_cert(ca)[0] for ca in ca_cert_pem_files]
+    ))
+
+
 # =============================== JOSE JWE Helper Functions ===========================
 
 def build_encryption_jwk_from_pem_file(cert_pem_file: str) -> dict:
@@ -295,12 +453,300 @@ def build_encryption_jwk_from_pem_file(cert_pem_file: str) -> dict:
   encryption_key = {}
   encryption_key["kty"] = "RSA"
   encryption_key["alg"] = algorithm
-  encryption_key["n"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(public_key_object.public_key().public_numbers().n)).decode('utf-8')
-  encryption_key["e"] = jose.utils.base64url_encode(jose.utils.long_to_bytes(public_key_object.public_key().public_numbers().e)).decode('utf-8')
+  encryption_key["n"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(public_key_object.public_key().public_numbers().n))
+  encryption_key["e"] = vcon.base64url.encode_str(jose.utils.long_to_bytes(public_key_object.public_key().public_numbers().e))
   encryption_key["kid"] = public_key_object.subject.get_attributes_for_oid(cryptography.x509.NameOID.COMMON_NAME)[0].value
 
   return(encryption_key)
 
+def get_encryption_key(cert_pem_file: str) -> typing.Tuple[str, str, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey]:
+  """
+  Get the JWE key algorithm, key ID and public key object for encryption from
+  **KEY_MATERIAL_CACHE**.
+
+  Parameters:
+    cert_pem_file (str) - file name or PEM string containing the PEM cert
+
+  Returns:
+    Tuple[str, str, RSAPublicKey]: JWE key management algorithm, key ID (kid) and public key object
+  """
+  def build():
+    encryption_key = build_encryption_jwk_from_pem_file(cert_pem_file)
+    public_key_object = load_pem_cert(cert_pem_file)[0].public_key()
+    return((encryption_key["alg"], encryption_key["kid"], public_key_object))
+
+  return(KEY_MATERIAL_CACHE.get("encryption", (cert_pem_file,), build))
+
+
+def get_decryption_key(
+    private_key_pem_file: str,
+    cert_pem_file: str
+  ) -> cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey:
+  """
+  Get the private key object for decryption from **KEY_MATERIAL_CACHE**.
+
+  Parameters:
+    private_key_pem_file (str) - file name or PEM string containing the private key
+    cert_pem_file (str) - file name or PEM string containing the cert for the private key
+
+  Returns:
+    private key object for decrypting a JWE
+  """
+  def build():
+    private_key_object = load_pem_key(private_key_pem_file)
+    if(load_pem_cert(cert_pem_file)[0].public_key().public_numbers() != private_key_object.public_key().public_numbers()):
+      raise AttributeError("private key does not match the public key in the cert")
+    return(private_key_object)
+
+  return(KEY_MATERIAL_CACHE.get("decryption", (private_key_pem_file, cert_pem_file), build))
+
+
+class InvalidJwe(Exception):
+  """ JWE cannot be decrypted: unsupported algorithm, no matching recipient or authentication tag mismatch """
+
+
+# JWE content encryption supported by jwe_encrypt_json and jwe_decrypt_json
+JWE_CONTENT_ENCRYPTION = "A256CBC-HS512"
+
+# Size of the plaintext and ciphertext chunks encrypted, decrypted and
+# authenticated at a time.  A multiple of the AES block size.
+JWE_CHUNK_SIZE = 1024 * 1024
+
+_RSA_OAEP_PADDING = cryptography.hazmat.primitives.asymmetric.padding.OAEP(
+  mgf = cryptography.hazmat.primitives.asymmetric.padding.MGF1(algorithm = cryptography.hazmat.primitives.hashes.SHA1()),
+  algorithm = cryptography.hazmat.primitives.hashes.SHA1(),
+  label = None
+  )
+
+
+def _jwe_content_cipher(content_key: bytes, iv: bytes) -> cryptography.hazmat.primitives.ciphers.Cipher:
+  """ AES-256-CBC cipher using the encryption half of the A256CBC-HS512 content key (RFC 7518 section 5.2) """
+  return(cryptography.hazmat.primitives.ciphers.Cipher(
+    cryptography.hazmat.primitives.ciphers.algorithms.AES(content_key[32:]),
+    cryptography.hazmat.primitives.ciphers.modes.CBC(iv)
+    ))
+
+
+def _jwe_content_mac(content_key: bytes, aad: bytes, iv: bytes) -> "hmac.HMAC":
+  """ HMAC-SHA-512 over AAD || IV, to be updated with the ciphertext, using the MAC half of the content key """
+  mac = hmac.new(content_key[:32], aad, "sha512")
+  mac.update(iv)
+  return(mac)
+
+
+def _jwe_content_tag(mac: "hmac.HMAC", aad: bytes) -> bytes:
+  """ Complete the MAC with the AAD bit length and truncate it to the A256CBC-HS512 authentication tag """
+  mac.update(struct.pack(">Q", len(aad) * 8))
+  return(mac.digest()[:32])
+
+
+def jwe_encrypt_content(
+    plaintext: bytes,
+    content_key: bytes,
+    aad: bytes,
+    chunk_size: int = JWE_CHUNK_SIZE
+  ) -> typing.Tuple[bytes, bytes, bytes]:
+  """
+  Encrypt and authenticate the plaintext with A256CBC-HS512 (RFC 7518 section 5.2),
+  in chunks of **chunk_size** bytes.
+
+  Parameters:
+    plaintext (bytes) - the content to encrypt
+    content_key (bytes) - 64 byte content encryption key (CEK)
+    aad (bytes) - additional authenticated data (the ASCII encoded, base64url encoded JWE protected header)
+    chunk_size (int) - bytes of plaintext encrypted at a time
+
+  Returns:
+    Tuple[bytes, bytes, bytes]: IV, ciphertext and authentication tag
+  """
+  iv = os.urandom(16)
+  encryptor = _jwe_content_cipher(content_key, iv).encryptor()
+  padder = cryptography.hazmat.primitives.padding.PKCS7(128).padder()
+  mac = _jwe_content_mac(content_key, aad, iv)
+  ciphertext = bytearray()
+  plaintext_view = memoryview(plaintext)
+  for start in range(0, len(plaintext_view), chunk_size):
+    ciphertext_chunk = encryptor.update(padder.update(plaintext_view[start:start + chunk_size]))
+    mac.update(ciphertext_chunk)
+    ciphertext += ciphertext_chunk
+
+  ciphertext_chunk = encryptor.update(padder.finalize()) + encryptor.finalize()
+  mac.update(ciphertext_chunk)
+  ciphertext += ciphertext_chunk
+
+  return(iv, bytes(ciphertext), _jwe_content_tag(mac, aad))
+
+
+def jwe_decrypt_content(
+    iv: bytes,
+    ciphertext: bytes,
+    tag: bytes,
+    content_key: bytes,
+    aad: bytes,
+    chunk_size: int = JWE_CHUNK_SIZE
+  ) -> bytes:
+  """
+  Authenticate and decrypt A256CBC-HS512 (RFC 7518 section 5.2) ciphertext,
+  in chunks of **chunk_size** bytes.
+
+  Parameters:
+    see **jwe_encrypt_content**
+
+  Returns:
+    the decrypted plaintext
+
+  Raises: InvalidJwe if the authentication tag does not match
+  """
+  ciphertext_view = memoryview(ciphertext)
+  mac = _jwe_content_mac(content_key, aad, iv)
+  for start in range(0, len(ciphertext_view), chunk_size):
+    mac.update(ciphertext_view[start:start + chunk_size])
+
+  if(not hmac.compare_digest(_jwe_content_tag(mac, aad), tag)):
+    raise InvalidJwe("JWE authentication tag mismatch")
+
+  decryptor = _jwe_content_cipher(content_key, iv).decryptor()
+  unpadder = cryptography.hazmat.primitives.padding.PKCS7(128).unpadder()
+  plaintext = bytearray()
+  for start in range(0, len(ciphertext_view), chunk_size):
+    plaintext += unpadder.update(decryptor.update(ciphertext_view[start:start + chunk_size]))
+
+  plaintext += unpadder.update(decryptor.finalize()) + unpadder.finalize()
+  return(bytes(plaintext))
+
+
+def jwe_encrypt_json(
+    plaintext: bytes,
+    recipient_keys: typing.List[typing.Tuple[str, str, cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey]],
+    chunk_size: int = JWE_CHUNK_SIZE
+  ) -> dict:
+  """
+  Encrypt the plaintext once for all of the recipients in a JWE General JSON
+  Serialization (RFC 7516 section 7.2.1).  The content is encrypted with a
+  random content key (A256CBC-HS512) which is wrapped for each recipient with
+  the recipient's public key.
+
+  The key algorithm and content encryption are in the protected header, so a
+  single recipient JWE may be converted to a compact token using
+  **jwe_complete_serialization_to_compact_token**.
+
+  Parameters:
+    plaintext (bytes) - the content to encrypt
+    recipient_keys (List[Tuple[str, str, RSAPublicKey]]) - JWE key algorithm, key ID
+      (kid) and public key object for each recipient, as returned by **get_encryption_key**
+    chunk_size (int) - bytes of plaintext encrypted at a time
+
+  Returns:
+    dict containing Complete JWE JSON Serialization Representation
+  """
+  if(len(recipient_keys) == 0):
+    raise AttributeError("no recipient keys to encrypt to")
+
+  algorithm = recipient_keys[0][0]
+  if(algorithm != "RSA-OAEP" or any(key_algorithm != algorithm for key_algorithm, kid, public_key in recipient_keys)):
+    raise AttributeError("unsupported JWE key algorithms: {}".format([key[0] for key in recipient_keys]))
+
+  protected = vcon.base64url.encode_str(json.dumps(
+    {"alg": algorithm, "enc": JWE_CONTENT_ENCRYPTION},
+    separators = (",", ":")
+    ).encode("utf-8"))
+
+  content_key = os.urandom(64)
+  iv, ciphertext, tag = jwe_encrypt_content(plaintext, content_key, protected.encode("ascii"), chunk_size)
+
+  jwe_complete_serialization = {}
+  jwe_complete_serialization["protected"] = protected
+  jwe_complete_serialization["iv"] = vcon.base64url.encode_str(iv)
+  jwe_complete_serialization["ciphertext"] = vcon.base64url.encode_str(ciphertext)
+  jwe_complete_serialization["tag"] = vcon.base64url.encode_str(tag)
+  jwe_complete_serialization["recipients"] = []
+  for key_algorithm, kid, public_key in recipient_keys:
+    recipient = {}
+    recipient["header"] = {"kid": kid}
+    recipient["encrypted_key"] = vcon.base64url.encode_str(public_key.encrypt(content_key, _RSA_OAEP_PADDING))
+    jwe_complete_serialization["recipients"].append(recipient)
+
+  return(jwe_complete_serialization)
+
+
+def jwe_decrypt_json(
+    jwe_complete_serialization: dict,
+    private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey,
+    kid: typing.Union[str, None] = None,
+    chunk_size: int = JWE_CHUNK_SIZE
+  ) -> bytes:
+  """
+  Decrypt a JWE JSON Serialization (general or flattened, RFC 7516 section
+  7.2) for the recipient with the given private key.
+
+  Recipients with the given key ID (kid) are tried first, followed by those
+  without a kid.  Recipients with a different kid are skipped.
+
+  Parameters:
+    jwe_complete_serialization (dict) - the JWE
+    private_key (RSAPrivateKey) - the recipient's private key, see **get_decryption_key**
+    kid (str) - the recipient's key ID, None to try all recipients
+    chunk_size (int) - bytes of ciphertext decrypted at a time
+
+  Returns:
+    the decrypted plaintext
+
+  Raises: InvalidJwe
+  """
+  protected = jwe_complete_serialization["protected"]
+  header = json.loads(vcon.base64url.decode(protected))
+  if(header.get("enc", None) != JWE_CONTENT_ENCRYPTION):
+    raise InvalidJwe("unsupported JWE content encryption: {}".format(header.get("enc", None)))
+
+  recipients = jwe_complete_serialization.get("recipients", None)
+  if(recipients is None):
+    # Flattened serialization
+    recipients = [jwe_complete_serialization]
+
+  matching = [recipient for recipient in recipients if kid is not None and recipient.get("header", {}).get("kid", None) == kid]
+  without_kid = [recipient for recipient in recipients if recipient.get("header", {}).get("kid", None) is None]
+  if(kid is None):
+    without_kid = recipients
+
+  content_key = None
+  for recipient in matching + without_kid:
+    algorithm = recipient.get("header", {}).get("alg", header.get("alg", None))
+    if(algorithm != "RSA-OAEP"):
+      continue
+
+    try:
+      content_key = private_key.decrypt(
+        vcon.base64url.decode(recipient["encrypted_key"]),
+        _RSA_OAEP_PADDING
+        )
+    except ValueError:
+      # not wrapped with this key
+      continue
+
+    if(len(content_key) == 64):
+      break
+    content_key = None
+
+  if(content_key is None):
+    raise InvalidJwe("no JWE recipient (of {}) could be decrypted with the private key for kid: {}".format(
+      len(recipients),
+      kid
+      ))
+
+  aad = protected.encode("ascii")
+  if("aad" in jwe_complete_serialization):
+    aad += b"." + jwe_complete_serialization["aad"].encode("ascii")
+
+  return(jwe_decrypt_content(
+    vcon.base64url.decode(jwe_complete_serialization["iv"]),
+    vcon.base64url.decode(jwe_complete_serialization["ciphertext"]),
+    vcon.base64url.decode(jwe_complete_serialization["tag"]),
+    content_key,
+    aad,
+    chunk_size
+    ))
+
+
 def jwe_compact_token_to_complete_serialization(jwe_token : str, enc : str = "", x5c : typing.List[str] = []) -> dict:
   """
   Convert a JWE dot separated token to a JWE complete serialization
@@ -347,6 +793,263 @@ def jwe_complete_serialization_to_compact_token(jwe_complete_serialization : dic
 
   return(jwe_compact_token)
 
+# =============================== JSON Canonicalization Helper Functions ===========================
+#                            JSON Canonicalization Scheme (RFC8785)
+
+# Tokens at least this long are yielded on their own rather than joined with
+# the small tokens around them, so that large strings (e.g. bodies) are not copied.
+JCS_CHUNK_SIZE = 64 * 1024
+
+
+def _jcs_number(value: typing.Union[int, float]) -> str:
+  """ Serialize a number as ECMAScript Number.prototype.toString does (RFC8785 section 3.2.2.3) """
+  if(isinstance(value, int)):
+    if(abs(value) < 2 ** 53):
+      return(str(value))
+    # Integers beyond IEEE 754 double precision are serialized as the double
+    value = float(value)
+
+  if(value != value or value in (float("inf"), float("-inf"))):
+    raise ValueError("JCS does not support NaN or Infinity")
+
+  if(value == 0):
+    return("0")
+
+  sign = "-" if value < 0 else ""
+  # repr gives the shortest digits which round trip
+  mantissa, _, exponent = repr(abs(value)).partition("e")
+  integer_digits, _, fraction_digits = mantissa.partition(".")
+  digits = integer_digits + fraction_digits
+  # decimal point position relative to the start of the significant digits
+  point = len(integer_digits) + (int(exponent) if exponent else 0)
+  significant = digits.lstrip("0")
+  point -= len(digits) - len(significant)
+  significant = significant.rstrip("0")
+  num_digits = len(significant)
+
+  if(num_digits <= point <= 21):
+    return(sign + significant + "0" * (point - num_digits))
+  if(0 < point <= 21):
+    return(sign + significant[:point] + "." + significant[point:])
+  if(-6 < point <= 0):
+    return(sign + "0." + "0" * -point + significant)
+
+  point -= 1
+  if(num_digits > 1):
+    significant = significant[0] + "." + significant[1:]
+  return("{}{}e{}{}".format(sign, significant, "+" if point >= 0 else "-", abs(point)))
+
+
+def _jcs_tokens(value: typing.Any) -> typing.Iterator[str]:
+  if(isinstance(value, str)):
+    yield(json.encoder.encode_basestring(value))
+  elif(value is None):
+    yield("null")
+  elif(value is True):
+    yield("true")
+  elif(value is False):
+    yield("false")
+  elif(isinstance(value, (int, float))):
+    yield(_jcs_number(value))
+  elif(isinstance(value, dict)):
+    yield("{")
+    # Members sorted by the UTF-16 code units of their names
+    for index, name in enumerate(sorted(value.keys(), key = lambda name: name.encode("utf-16-be"))):
+      if(not isinstance(name, str)):
+        raise TypeError("JCS object member names must be str, not: {}".format(type(name)))
+      if(index > 0):
+        yield(",")
+      yield(json.encoder.encode_basestring(name))
+      yield(":")
+      yield from _jcs_tokens(value[name])
+    yield("}")
+  elif(isinstance(value, (list, tuple))):
+    yield("[")
+    for index, element in enumerate(value):
+      if(index > 0):
+        yield(",")
+      yield from _jcs_tokens(element)
+    yield("]")
+  else:
+    raise TypeError("type: {} not supported by JCS".format(type(value)))
+
+
+def jcs_iter(value: typing.Any) -> typing.Iterator[str]:
+  """
+  Canonicalize the JSON value (RFC8785 JSON Canonicalization Scheme) in chunks.
+
+  Object members are sorted, there is no white space and strings and numbers
+  have a single serialization.  So the same JSON value always serializes to
+  the same bytes, however it was stored or parsed.
+
+  Parameters:
+    value - JSON compatible value (dict, list, str, int, float, bool or None)
+
+  Returns:
+    iterator of str chunks of the canonical JSON, which concatenated (and
+    UTF-8 encoded) is the canonical form
+  """
+  parts: typing.List[str] = []
+  size = 0
+  for token in _jcs_tokens(value):
+    if(len(token) >= JCS_CHUNK_SIZE):
+      if(len(parts) > 0):
+        yield("".join(parts))
+        parts = []
+        size = 0
+      yield(token)
+      continue
+
+    parts.append(token)
+    size += len(token)
+    if(size >= JCS_CHUNK_SIZE):
+      yield("".join(parts))
+      parts = []
+      size = 0
+
+  if(len(parts) > 0):
+    yield("".join(parts))
+
+
+def jcs_dumps(value: typing.Any) -> str:
+  """
+  Canonicalize the JSON value (RFC8785 JSON Canonicalization Scheme).
+
+  Returns:
+    the canonical JSON str
+  """
+  return("".join(jcs_iter(value)))
+
+
+# =============================== Unencoded Payload JWS Helper Functions ===========================
+#                            JWS Unencoded Payload Option (RFC7797)
+
+class InvalidJwsSignature(Exception):
+  """ JWS signature does not verify with the public key or the algorithm is not supported """
+
+
+# JWS algorithms supported for unencoded payloads: hashlib and cryptography hash names
+_JWS_HASH_ALGORITHMS = {
+  "RS256": "SHA256",
+  "RS384": "SHA384",
+  "RS512": "SHA512"
+  }
+
+# Size of the str chunks of an unencoded payload hashed at a time
+JWS_PAYLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def str_chunks(text: str, chunk_size: int = JWS_PAYLOAD_CHUNK_SIZE) -> typing.Iterator[str]:
+  """ Iterate over the str in chunks of **chunk_size** characters """
+  for start in range(0, len(text), chunk_size):
+    yield(text[start:start + chunk_size])
+
+
+def jws_unencoded_protected_header(header: dict) -> str:
+  """
+  Build the protected header for a JWS with an unencoded (b64 false) payload.
+
+  Parameters:
+    header (dict) - header parameters (e.g. alg and x5c) to protect
+
+  Returns:
+    the base64url encoded protected header
+  """
+  protected = dict(header)
+  protected["b64"] = False
+  protected["crit"] = ["b64"]
+  return(vcon.base64url.encode_str(json.dumps(protected, separators = (",", ":")).encode("utf-8")))
+
+
+def is_jws_unencoded(protected: str) -> bool:
+  """ Returns: True if the base64url encoded JWS protected header is for an unencoded (b64 false) payload """
+  return(json.loads(vcon.base64url.decode(protected)).get("b64", True) is False)
+
+
+def _jws_unencoded_digest(
+    protected: str,
+    payload_chunks: typing.Iterable[str]
+  ) -> typing.Tuple[str, bytes]:
+  """ Stream hash the JWS signing input: protected header "." unencoded payload """
+  header = json.loads(vcon.base64url.decode(protected))
+  if(header.get("b64", True) is not False or "b64" not in header.get("crit", [])):
+    raise InvalidJwsSignature("JWS protected header is not for an unencoded payload: {}".format(header))
+
+  hash_name = _JWS_HASH_ALGORITHMS.get(header.get("alg", None), None)
+  if(hash_name is None):
+    raise InvalidJwsSignature("JWS algorithm: {} not supported for unencoded payloads".format(header.get("alg", None)))
+
+  hasher = hashlib.new(hash_name.lower())
+  hasher.update(protected.encode("ascii"))
+  hasher.update(b".")
+  for chunk in payload_chunks:
+    hasher.update(chunk.encode("utf-8"))
+
+  return(hash_name, hasher.digest())
+
+
+def _prehashed(hash_name: str) -> cryptography.hazmat.primitives.asymmetric.utils.Prehashed:
+  return(cryptography.hazmat.primitives.asymmetric.utils.Prehashed(getattr(cryptography.hazmat.primitives.hashes, hash_name)()))
+
+
+def jws_sign_unencoded(
+    protected: str,
+    payload_chunks: typing.Iterable[str],
+    private_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey
+  ) -> str:
+  """
+  Sign a JWS unencoded (b64 false) payload (RFC7797).  The payload is hashed
+  as it is iterated and only the digest is signed, so the payload is not
+  base64url encoded or joined in to one string.
+
+  Parameters:
+    protected (str) - base64url encoded protected header, see **jws_unencoded_protected_header**
+    payload_chunks (Iterable[str]) - the payload, e.g. from **jcs_iter**
+    private_key (RSAPrivateKey) - the signing key, see **get_signing_key**
+
+  Returns:
+    the base64url encoded signature
+  """
+  hash_name, digest = _jws_unencoded_digest(protected, payload_chunks)
+  signature = private_key.sign(
+    digest,
+    cryptography.hazmat.primitives.asymmetric.padding.PKCS1v15(),
+    _prehashed(hash_name)
+    )
+  return(vcon.base64url.encode_str(signature))
+
+
+def jws_verify_unencoded(
+    protected: str,
+    payload_chunks: typing.Iterable[str],
+    signature: str,
+    public_key: cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey
+  ) -> None:
+  """
+  Verify the signature of a JWS unencoded (b64 false) payload (RFC7797),
+  hashing the payload as it is iterated.
+
+  Parameters:
+    protected (str) - base64url encoded protected header
+    payload_chunks (Iterable[str]) - the payload, e.g. from **str_chunks** or **jcs_iter**
+    signature (str) - base64url encoded signature
+    public_key (RSAPublicKey) - the signer's public key
+
+  Raises: InvalidJwsSignature
+  """
+  hash_name, digest = _jws_unencoded_digest(protected, payload_chunks)
+  try:
+    public_key.verify(
+      vcon.base64url.decode(signature),
+      digest,
+      cryptography.hazmat.primitives.asymmetric.padding.PKCS1v15(),
+      _prehashed(hash_name)
+      )
+
+  except cryptography.exceptions.InvalidSignature as invalid_error:
+    raise InvalidJwsSignature("JWS signature verification failed") from invalid_error
+
+
 # =============================== SHA-512 Hash Helper Functions ===========================
 #                            SHA-512 Hash (RFC6234)
 
@@ -366,7 +1069,7 @@ def sha_512_hash(data : bytes) -> str:
 
   hasher.update(data)
 
-  sig_hash = jose.utils.base64url_encode(hasher.digest()).decode('utf-8')
+  sig_hash = vcon.base64url.encode_str(hasher.digest())
 
   #print("sha_512_hash: {}".format(sig_hash))
   return(sig_hash)
@@ -384,9 +1087,9 @@ def lm_one_time_signature(data : bytes) -> typing.Tuple[str, str]:
   one_time_private_key = hsslms.LM_OTS_Priv(
     hsslms.LMOTS_ALGORITHM_TYPE.LMOTS_SHA256_N32_W8, os.urandom(16), 0, os.urandom(32))
 
-  signature = jose.utils.base64url_encode(one_time_private_key.sign(data)).decode('utf-8')
+  signature = vcon.base64url.encode_str(one_time_private_key.sign(data))
 
-  public_key = jose.utils.base64url_encode(one_time_private_key.gen_pub().pubkey).decode('utf-8')
+  public_key = vcon.base64url.encode_str(one_time_private_key.gen_pub().pubkey)
 
   #print("public_key: {}".format(public_key))
   #print("sig: {}".format(signature))
@@ -399,11 +1102,159 @@ def verify_lm_one_time_signature(data : bytes, signature : str, public_key : str
 
   Raises: exceptions if the signature fails to verify
   """
-  public_key_bytes = jose.utils.base64url_decode(bytes(public_key, 'utf-8'))
+  public_key_bytes = vcon.base64url.decode(public_key)
 
   public_key_object = hsslms.LM_OTS_Pub(public_key_bytes)
 
-  signature_bytes = jose.utils.base64url_decode(bytes(signature, 'utf-8'))
+  signature_bytes = vcon.base64url.decode(signature)
 
   public_key_object.verify(data, signature_bytes)
 
+
+# =============================== Merkle Tree Batch Signature Helper Functions ===========================
+#             SHA-512 Merkle tree (RFC9162 section 2.1) with Ed25519 (RFC8032) signed root
+
+class InvalidMerkleSignature(Exception):
+  """ Inclusion proof or Ed25519 signature of the Merkle tree root does not verify """
+
+
+MERKLE_ED25519_ALGORITHM = "MERKLE_SHA512_Ed25519"
+
+
+def _merkle_leaf_hash(digest: bytes) -> bytes:
+  return(hashlib.sha512(b"\x00" + digest).digest())
+
+
+def _merkle_node_hash(left: bytes, right: bytes) -> bytes:
+  return(hashlib.sha512(b"\x01" + left + right).digest())
+
+
+def _merkle_tree_head(size: int, root: bytes) -> bytes:
+  """ The signed data: tree size and root, so that an inclusion path cannot be verified with another size """
+  return(struct.pack(">Q", size) + root)
+
+
+def _merkle_tree(leaf_hashes: typing.List[bytes], paths: typing.List[typing.List[bytes]]) -> bytes:
+  """
+  Get the root of the tree of the leaf hashes, appending the sibling hash at
+  each level to the inclusion path of each leaf (paths are in leaf order).
+  """
+  if(len(leaf_hashes) == 1):
+    return(leaf_hashes[0])
+
+  # left sub-tree is the largest power of 2 smaller than the number of leaves
+  split = 1 << ((len(leaf_hashes) - 1).bit_length() - 1)
+  left = _merkle_tree(leaf_hashes[:split], paths[:split])
+  right = _merkle_tree(leaf_hashes[split:], paths[split:])
+  for path in paths[:split]:
+    path.append(right)
+  for path in paths[split:]:
+    path.append(left)
+
+  return(_merkle_node_hash(left, right))
+
+
+def _merkle_root_from_path(leaf_hash: bytes, index: int, size: int, path: typing.List[bytes]) -> bytes:
+  """ Compute the tree root from the leaf hash and its inclusion path (RFC9162 section 2.1.3.2) """
+  if(index < 0 or index >= size):
+    raise InvalidMerkleSignature("leaf index: {} not in tree of size: {}".format(index, size))
+
+  node_index = index
+  last_index = size - 1
+  root = leaf_hash
+  for sibling in path:
+    if(last_index == 0):
+      raise InvalidMerkleSignature("inclusion path is too long")
+
+    if(node_index % 2 == 1 or node_index == last_index):
+      root = _merkle_node_hash(sibling, root)
+      while(node_index % 2 == 0 and node_index != 0):
+        node_index >>= 1
+        last_index >>= 1
+
+    else:
+      root = _merkle_node_hash(root, sibling)
+
+    node_index >>= 1
+    last_index >>= 1
+
+  if(last_index != 0):
+    raise InvalidMerkleSignature("inclusion path is too short")
+
+  return(root)
+
+
+def merkle_batch_signature(
+    digests: typing.List[str],
+    private_key: typing.Union[cryptography.hazmat.primitives.asymmetric.ed25519.Ed25519PrivateKey, None] = None
+  ) -> typing.Tuple[str, str, typing.List[typing.List[str]]]:
+  """
+  Sign a batch of SHA-512 digests (e.g. from **sha_512_hash**) with one Ed25519
+  signature of the size and root of a Merkle tree of the digests.  Each digest is then
+  verified with its inclusion path, index and the tree size (number of digests),
+  see **verify_merkle_batch_signature**.
+
+  Parameters:
+    digests (List[str]) - base64url encoded SHA-512 digests of the data to sign
+    private_key (Ed25519PrivateKey) - signing key, if None a key is generated for this batch
+
+  Returns:
+    Tuple(str, str, List[List[str]]): base64url encoded public key, root signature
+      and the inclusion path for each digest
+  """
+  if(len(digests) == 0):
+    raise AttributeError("no digests to sign")
+
+  if(private_key is None):
+    private_key = cryptography.hazmat.primitives.asymmetric.ed25519.Ed25519PrivateKey.generate()
+  elif(not isinstance(private_key, cryptography.hazmat.primitives.asymmetric.ed25519.Ed25519PrivateKey)):
+    raise AttributeError("private key: {} is not an Ed25519 key".format(type(private_key)))
+
+  paths: typing.List[typing.List[bytes]] = [[] for digest in digests]
+  root = _merkle_tree([_merkle_leaf_hash(vcon.base64url.decode(digest)) for digest in digests], paths)
+
+  signature = vcon.base64url.encode_str(private_key.sign(_merkle_tree_head(len(digests), root)))
+  public_key = vcon.base64url.encode_str(private_key.public_key().public_bytes(
+    cryptography.hazmat.primitives.serialization.Encoding.Raw,
+    cryptography.hazmat.primitives.serialization.PublicFormat.Raw
+    ))
+
+  return(public_key, signature,
+    [[vcon.base64url.encode_str(sibling) for sibling in path] for path in paths])
+
+
+def verify_merkle_batch_signature(
+    digest: str,
+    index: int,
+    size: int,
+    path: typing.List[str],
+    signature: str,
+    public_key: str
+  ) -> None:
+  """
+  Verify a SHA-512 digest signed in a batch by **merkle_batch_signature**.
+
+  Parameters:
+    digest (str) - base64url encoded SHA-512 digest of the data
+    index (int) - index of the digest in the signed batch
+    size (int) - number of digests in the signed batch
+    path (List[str]) - base64url encoded inclusion path of the digest
+    signature (str) - base64url encoded Ed25519 signature of the tree size and root
+    public_key (str) - base64url encoded Ed25519 public key
+
+  Raises: InvalidMerkleSignature
+  """
+  root = _merkle_root_from_path(
+    _merkle_leaf_hash(vcon.base64url.decode(digest)),
+    index,
+    size,
+    [vcon.base64url.decode(sibling) for sibling in path]
+    )
+
+  try:
+    public_key_object = cryptography.hazmat.primitives.asymmetric.ed25519.Ed25519PublicKey.from_public_bytes(
+      vcon.base64url.decode(public_key))
+    public_key_object.verify(vcon.base64url.decode(signature), _merkle_tree_head(size, root))
+
+  except (ValueError, cryptography.exceptions.InvalidSignature) as invalid_error:
+    raise InvalidMerkleSignature("Merkle tree root signature verification failed") from invalid_error